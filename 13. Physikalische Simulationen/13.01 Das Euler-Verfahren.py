@@ -70,6 +70,32 @@
 
 
 
+# _______________________
+#                       /
+# Das Paket `physik`   (
+# ______________________\
+
+# Die Lektionen 13.1 bis 13.3 sind eigenständige Dateien. Ab Lektion 13.4
+# verwenden die Lektionen gemeinsame Bausteine aus dem Paket `physik`, das im
+# selben Ordner wie dieses Kapitel liegt, z.B.
+#
+#        from physik import ParticleSystem
+#
+# Die Hauptlektionen 13.4 bis 13.9 erklären die Physik weiterhin mit ihren
+# eigenen Klassen (`Body`, `Collision`, `Spring`, ...) und nehmen aus dem Paket
+# nur Hilfsmittel wie die Zeitmessung. Einige Zusatzlektionen (z.B. 13.6.2 und
+# 13.8.1 bis 13.8.4) enthalten ihre Klassen nicht mehr selbst, sondern
+# importieren sie aus dem Paket. Alle diese Dateien funktionieren deshalb nur,
+# wenn sie im Ordner "13. Physikalische Simulationen" neben dem Ordner
+# `physik` liegen. Die Vergleichsmessungen des Pakets, z.B.
+#
+#        python -m physik.integratoren
+#
+# müssen in diesem Ordner gestartet werden.
+
+
+
+
 # _______________________
 #                       /
 # Das Euler-Verfahren  (
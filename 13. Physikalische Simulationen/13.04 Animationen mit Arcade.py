@@ -39,6 +39,9 @@ import arcade
 import arcade.gui 
 import numpy as np
 
+from physik.darstellung import TextPanel
+from physik.zeitmessung import PhaseTimer
+
 # _________________________________
 #                                 /
 # Klassenstruktur für Animation  (
@@ -82,7 +85,7 @@ class Body:
 # der Partikelbewegungen.
 class AnimationWindow(arcade.Window):
 
-    def __init__(self, width, height, title):
+    def __init__(self, width, height, title, profile=False):
         super().__init__(width, height, title, resizable=False)
         
         # Hintergrundfarbe des Fensters auf Weiß setzen
@@ -103,8 +106,10 @@ class AnimationWindow(arcade.Window):
         # Simulationsstatus (0 = Pause, 1 = Ausführen)
         self.state = 0
         
-        # FPS-Berechnung mit gleitendem Durchschnitt
-        self.fps_history = [0] * 30
+        # Zeitmessung für die FPS-Anzeige. Mit profile=True wird auch gemessen,
+        # wie lange die Teile von on_update dauern (siehe physik/zeitmessung.py).
+        self.profiler = PhaseTimer(enabled=profile)
+        self.profile_panel = TextPanel()
         
         # UI-Manager zur Steuerung der Benutzeroberfläche (Buttons)
         self.uimanager = arcade.gui.UIManager() 
@@ -173,7 +178,7 @@ class AnimationWindow(arcade.Window):
         arcade.draw_text(f"t = {time} s", x, y, arcade.color.BLACK)
         
         # Zeigt die FPS an
-        fps = round(sum(self.fps_history) / len(self.fps_history), 1)
+        fps = round(self.profiler.fps(), 1)
         x, y = self.meter_to_pixel(-9, 2.5)
         arcade.draw_text(f"FPS = {fps}", x, y, arcade.color.BLACK)
         
@@ -185,21 +190,23 @@ class AnimationWindow(arcade.Window):
             
             # zeichne die Geschwindigkeit
             arcade.draw_line(x, y, x + 2*body.velocity[0], y + 2*body.velocity[1] , arcade.color.GREEN, 2)
-            
-            
+
+        # Zeigt die Zeitmessung oben rechts über allem an (nur mit profile=True)
+        self.profile_panel.draw(self.profiler.lines(), self.width - 10, self.height - 10)
+
     # Aktualisiert die Simulation um einen Zeitschritt
     def on_update(self, dt):
         # Führe die Funktion nur aus, wenn der Status auf 1 ist.
         if self.state != 1:
             return
         
-        # FPS berechnen und als gleitenden Durchschnitt speichern
-        self.fps_history.append(1.0/dt)               
-        self.fps_history.pop(0)
+        # Startet die Zeitmessung für dieses Bild
+        self.profiler.start()
         
         # Setzt die Kräfte aller Körper auf null
         for body in self.bodies:
             body.clear_force()
+        self.profiler.lap("Kräfte null")
 
         # Berechnet die Kräfte und aktualisiert die Bewegungen der Objekte
         for body in self.bodies:
@@ -207,6 +214,7 @@ class AnimationWindow(arcade.Window):
             body.add_force(F_G)
 
             body.update_ec(dt)  # Aktualisiert Position und Geschwindigkeit
+        self.profiler.lap("Bewegung")
         
         # Überprüft und verarbeitet Kollisionen mit dem Boden
         for body in self.bodies:
@@ -221,9 +229,14 @@ class AnimationWindow(arcade.Window):
             elif body.position[0] < -4.5 + body.radius:
                 body.position[0] = -4.5 + body.radius
                 body.velocity[0] *= -1
+        self.profiler.lap("Wände")
             
         # Erhöht die Simulationszeit
         self.t += dt  
+        
+        # Beendet die Zeitmessung für dieses Bild
+        self.profiler.count("Teilchen", len(self.bodies))
+        self.profiler.stop(dt)
 
 
 
@@ -234,6 +247,12 @@ if __name__ == "__main__":
     # starte die Simulation
     arcade.run()
 
+    # Mit `profile=True` zeigt das Fenster, wie lange die Teile von
+    # `on_update` dauern. Nach dem Schliessen werden die Messwerte der
+    # letzten Bilder in eine CSV-Datei geschrieben.
+    if window.profiler.enabled:
+        window.profiler.save_csv("profil.csv")
+
 
 
 # _____________________
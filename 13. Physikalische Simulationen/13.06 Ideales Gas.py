@@ -20,12 +20,22 @@
 # Animation der Teilchenbewegungen. Arcade bietet eine benutzerfreundliche Oberfläche 
 # für 2D-Grafiken und Animationen und eignet sich gut für physikalische Simulationen.
 
+# Jedes Teilchen ist hier ein eigenes `Body`-Objekt, und jedes Teilchenpaar hat
+# ein eigenes `Collision`-Objekt. Bei 64 Teilchen sind das schon 2016 Paare, die
+# in jedem Bild einzeln geprüft werden. Für tausende Teilchen reicht das nicht
+# mehr. Lektion 13.6.2 zeigt dasselbe Gas mit den Bausteinen aus dem Paket
+# `physik`: Arrays für alle Teilchen, ein Zellengitter für die Stösse und ein
+# fester Zeitschritt.
+
 
 import arcade
 import arcade.gui 
 import numpy as np
 import random
 
+from physik.darstellung import TextPanel
+from physik.zeitmessung import PhaseTimer
+
 
 # Die Klasse `Body` modelliert ein physikalisches Objekt in der Simulation, 
 # das durch seine Position, Geschwindigkeit und Masse beschrieben wird.
@@ -121,7 +131,7 @@ class Collision(Interaction):
 # der Partikelbewegungen.
 class AnimationWindow(arcade.Window):
 
-    def __init__(self, width, height, title):
+    def __init__(self, width, height, title, profile=False):
         super().__init__(width, height, title, resizable=True)
         
         # Hintergrundfarbe des Fensters auf Weiß setzen
@@ -145,8 +155,10 @@ class AnimationWindow(arcade.Window):
         # Simulationsstatus (0 = Pause, 1 = Ausführen)
         self.state = 0
         
-        # FPS-Berechnung mit gleitendem Durchschnitt
-        self.fps_history = [0] * 30
+        # Zeitmessung für die FPS-Anzeige. Mit profile=True wird auch gemessen,
+        # wie lange die Teile von on_update dauern (siehe physik/zeitmessung.py).
+        self.profiler = PhaseTimer(enabled=profile)
+        self.profile_panel = TextPanel()
         
         # UI-Manager zur Steuerung der Benutzeroberfläche (Buttons)
         self.uimanager = arcade.gui.UIManager() 
@@ -266,7 +278,7 @@ class AnimationWindow(arcade.Window):
         arcade.draw_text(f"t = {time} s", x, y, arcade.color.BLACK)
         
         # Zeigt die FPS an
-        fps = round(sum(self.fps_history) / len(self.fps_history), 1)
+        fps = round(self.profiler.fps(), 1)
         x, y = self.meter_to_pixel(-9, 3.5)
         arcade.draw_text(f"FPS = {fps}", x, y, arcade.color.BLACK)
         
@@ -289,6 +301,9 @@ class AnimationWindow(arcade.Window):
             r = body.radius * self.scale_factor
             arcade.draw_circle_filled(x, y, r, body.color)
 
+        # Zeigt die Zeitmessung oben rechts über allem an (nur mit profile=True)
+        self.profile_panel.draw(self.profiler.lines(), self.width - 10, self.height - 10)
+
     # Die Geschwindigkeit von allen Körper wird erhöht.
     def heat(self, e):
         for body in self.bodies:
@@ -306,22 +321,24 @@ class AnimationWindow(arcade.Window):
         if self.state != 1:
             return
         
-        # FPS berechnen und als gleitenden Durchschnitt speichern
-        self.fps_history.append(1.0/dt)               
-        self.fps_history.pop(0)
+        # Startet die Zeitmessung für dieses Bild
+        self.profiler.start()
         
         # Setzt die Kräfte aller Körper auf null
         for body in self.bodies:
             body.clear_force()
+        self.profiler.lap("Kräfte null")
         
         
         # Aktualisiert die Kollisionen
         for interacion in self.interactions:
             interacion.update()
+        self.profiler.lap("Interaktionen")
             
         # Berechnet die Kräfte und aktualisiert die Bewegungen der Objekte
         for body in self.bodies:
             body.update_ec(dt)  # Aktualisiert Position und Geschwindigkeit
+        self.profiler.lap("Bewegung")
         
         for body in self.bodies:
             # Überprüft und verarbeitet Kollisionen mit dem Boden
@@ -339,14 +356,21 @@ class AnimationWindow(arcade.Window):
             elif body.position[0] > 4 - body.radius:
                 body.position[0] = 4 - body.radius
                 body.velocity[0] *= -1
+        self.profiler.lap("Wände")
         
         # Berechne die Gesamtenergie aller Körper und speichere sie
         self.energy = 0.0
         for body in self.bodies:
             self.energy += body.kinetic_energy()
+        self.profiler.lap("Energie")
             
         # Erhöht die Simulationszeit
         self.t += dt  
+        
+        # Beendet die Zeitmessung für dieses Bild
+        self.profiler.count("Teilchen", len(self.bodies))
+        self.profiler.count("Paare", len(self.interactions))
+        self.profiler.stop(dt)
 
 
 
@@ -357,6 +381,12 @@ if __name__ == "__main__":
     # starte die Simulation
     arcade.run()
 
+    # Mit `profile=True` zeigt das Fenster, wie lange die Teile von
+    # `on_update` dauern. Nach dem Schliessen werden die Messwerte der
+    # letzten Bilder in eine CSV-Datei geschrieben.
+    if window.profiler.enabled:
+        window.profiler.save_csv("profil.csv")
+
 
 
 
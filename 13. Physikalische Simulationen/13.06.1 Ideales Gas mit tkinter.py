@@ -19,6 +19,30 @@
 # Es ermöglicht die Berechnungen parallel zur grafischen Oberfläche durchzuführen 
 # und so die Performance zu verbessern. 
 
+# Damit die Oberfläche nie einen halb berechneten Zustand zeichnet, tauschen die
+# beiden Threads die Daten über einen `FrameBuffer` aus (siehe `physik/austausch.py`):
+# Die Physik veröffentlicht nach jedem Schritt eine Kopie des Zustands, und die
+# Oberfläche zeichnet jeweils die neuste Kopie. Ein `Lock` schützt dabei nur die
+# Angabe, welcher Platz des Puffers wem gehört. Kopiert und gezeichnet wird
+# ausserhalb des Locks, so dass kein Thread warten muss, bis der andere mit
+# Rechnen oder Zeichnen fertig ist. Wie oft die Physik rechnet
+# (`steps_per_second`) und wie oft neu gezeichnet wird (`redraw_interval`),
+# lässt sich deshalb getrennt einstellen.
+
+# Threads in Python teilen sich allerdings einen Prozessorkern: Es rechnet immer
+# nur ein Thread gleichzeitig (das "Global Interpreter Lock", GIL). Physik, Tk
+# und matplotlib bremsen sich deshalb gegenseitig. Mit `backend="process"`
+# läuft die Physik stattdessen in einem eigenen Prozess mit einem eigenen Kern.
+# Der Zustand liegt dann in einem `SharedFrameBuffer`, einem Speicherblock, den
+# beide Prozesse gemeinsam benutzen. Die Oberfläche liest die Arrays direkt aus
+# diesem Block, ohne sie zu kopieren.
+
+# Auch die Diagramme brauchen viel Zeit, wenn sie bei jedem Bild ganz neu
+# gezeichnet werden. `EnergyPlot` und `SpeedHistogram` aus `physik/diagramme.py`
+# zeichnen deshalb nur die Linie neu und den Rest nur, wenn sich die Achsen
+# ändern ("Blitting"). Sie werden seltener aktualisiert als die Teilchen
+# (`plot_interval`).
+
 # Die Simulation illustriert Konzepte der kinetischen Gastheorie, indem die Teilchen als 
 # elastische Kugeln behandelt werden. Durch Interaktionen zwischen den Partikeln und 
 # Kollisionen mit den Wänden entstehen dynamische Geschwindigkeits- und Energieverteilungen, 
@@ -32,101 +56,147 @@
 
 
 import tkinter as tk
-import numpy as np
+import multiprocessing
+import queue
 import random
 import threading
 import time
+from collections import deque
 import matplotlib.pyplot as plt
 
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 
-
-
-class Body:
-    def __init__(self, mass, position, velocity, radius=5):
-        self.mass = mass
-        self.position = np.array(position, dtype=float)  # Aktuelle Position
-        self.velocity = np.array(velocity, dtype=float)  # Aktuelle Geschwindigkeit
-        self.radius = radius  # Radius des Körpers
-
-    def clear_force(self):
-        # Setzt die Kräfte zurück (aktuell keine äußeren Kräfte)
-        self.force = np.array([0.0, 0.0])
-
-    def apply_force(self, force):
-        # Wendet eine gegebene Kraft auf den Körper an
-        self.force += np.array(force, dtype=float)
-
-    def update_ec(self, dt):
-        # Aktualisiert die Geschwindigkeit und Position des Körpers für den nächsten Zeitschritt
-        acceleration = self.force / self.mass
-        self.velocity += acceleration * dt
-        self.position += self.velocity * dt
-
-    def kinetic_energy(self):
-        # Berechnet die kinetische Energie des Körpers
-        return 0.5 * self.mass * np.linalg.norm(self.velocity)**2
-
-
-
-
-# Die Klasse `Interaction` ist die Basisklasse für alle Wechselwirkungen. 
-class Interaction:
-    def __init__(self, bodyA, bodyB):
-        self.bodyA = bodyA
-        self.bodyB = bodyB
-
-    def update(self):
-        pass
+from physik import FrameBuffer, ParticleSystem, SharedFrameBuffer, resolve_collisions
+from physik.diagramme import EnergyPlot, SpeedHistogram
+from physik.nachbarn import NeighbourList
 
 
 
-# Die Klasse `Collision` verwaltet die Kollisionserkennung und -berechnung 
-# zwischen zwei Körpern.
-class Collision(Interaction):
-
-    def __init__(self, bodyA, bodyB, restitution=1.0):
-        super().__init__(bodyA, bodyB)
-        self.restitution = restitution
-
-
-    def check_collision(self):
-        # Prüft, ob zwei Körper kollidieren.
-        distance = np.linalg.norm(self.bodyA.position - self.bodyB.position)
-        return distance <= (self.bodyA.radius + self.bodyB.radius)
-
-
-    def resolve_collision(self):
-        # Berechnet die neuen Geschwindigkeiten der beiden Körper nach einer Kollision.
-        normal = (self.bodyB.position - self.bodyA.position) / np.linalg.norm(self.bodyB.position - self.bodyA.position)
-        relative_velocity = self.bodyA.velocity - self.bodyB.velocity
-        velocity_along_normal = np.dot(relative_velocity, normal)
-
-        # Berechnet nur, wenn die Körper aufeinander zu bewegen
-        if velocity_along_normal < 0:
-            return
-
-        # Impulsberechnung
-        impulse = ((1 + self.restitution) * velocity_along_normal) / (1 / self.bodyA.mass + 1 / self.bodyB.mass)
-        impulse_vector = impulse * normal
-
-        # Aktualisiert die Geschwindigkeit der beiden Körper
-        self.bodyA.velocity -= (impulse_vector / self.bodyA.mass)
-        self.bodyB.velocity += (impulse_vector / self.bodyB.mass)
-
-
-    # Überprüft und berechnet die Kollision, falls nötig
-    def update(self):
-        if self.check_collision():
-            self.resolve_collision()
+# Die Teilchen werden in einem `ParticleSystem` aus dem Paket `physik` gespeichert
+# (siehe Lektion 13.6.2). Positionen, Geschwindigkeiten und Massen aller Teilchen
+# liegen dort in numpy-Arrays, und jeder Simulationsschritt rechnet mit den
+# ganzen Arrays.
+#
+# Die Kollisionspartner sucht eine `CellList`: Sie teilt die Box in Zellen von der
+# Grösse eines Teilchendurchmessers, sodass nur Paare aus benachbarten Zellen
+# geprüft werden müssen. `resolve_collisions` berechnet für diese Paare die
+# elastischen Stösse mit der Impulsformel aus Kapitel 13.5.
+#
+# Weil sich die Teilchen pro Schritt nur wenig bewegen, wird die Zellenliste
+# nicht in jedem Schritt neu aufgebaut. Eine `NeighbourList` merkt sich alle
+# Paare mit etwas Reserve (`skin`) und sucht sie erst neu, wenn sich ein
+# Teilchen weiter als die halbe Reserve bewegt hat (siehe `physik.nachbarn`).
+
+
+
+# Die Physik des Gases. `run` rechnet die Schritte und veröffentlicht jeden
+# neuen Zustand im `FrameBuffer`. Die Methode läuft entweder in einem Thread
+# oder in einem eigenen Prozess. In beiden Fällen schickt die Oberfläche ihre
+# Befehle über die Warteschlange `commands`, z.B. ("state", 1) zum Starten oder
+# ("scale", 1.2) zum Heizen.
+class GasPhysics:
+    def __init__(self, particles, frames, commands, dt=1, steps_per_second=100):
+        self.particles = particles
+        self.frames = frames
+        self.commands = commands
+        
+        # Status (0 = Pause, 1 = Ausführen, -1 = Beenden)
+        self.state = 0
+        
+        # Zeit
+        self.time = 0
+        self.dt = dt
+        self.step = 0
+        
+        # Physikschritte pro Sekunde (None = so schnell wie möglich)
+        self.steps_per_second = steps_per_second
+        
+        # Nachbarliste für die Suche nach Kollisionspartnern (2 Pixel Reserve)
+        self.neighbours = NeighbourList.from_radii(self.particles.radii, skin=2.0)
+    
+    
+    # Führt die Befehle der Oberfläche aus. Gibt True zurück, wenn sich der
+    # Zustand der Teilchen geändert hat.
+    def apply_commands(self):
+        changed = False
+        while True:
+            try:
+                command, value = self.commands.get_nowait()
+            except queue.Empty:
+                return changed
+            
+            if command == "state":
+                self.state = value
+            elif command == "scale":
+                self.particles.velocities *= value
+                changed = True
+            elif command == "steps_per_second":
+                self.steps_per_second = value
+    
+    
+    # Veröffentlicht den aktuellen Zustand für die Oberfläche
+    def publish(self):
+        self.frames.publish(self.time, self.step, self.particles.positions, self.particles.velocities)
+    
+    
+    # Ein Zeitschritt der Simulation
+    def advance(self):
+        # Aktualisiere Simulationszeit
+        self.time += self.dt
+        self.step += 1
+
+        # Setze alle Kräfte auf null
+        self.particles.clear_forces()
+
+        # Kandidatenpaare aus der Nachbarliste und Kollisionen berechnen
+        i, j = self.neighbours.candidate_pairs(self.particles.positions)
+        resolve_collisions(self.particles, i, j)
+            
+        # Euler-Cromer-Schritt
+        self.particles.update_ec(self.dt)
+        
+        # Überprüfe die Kollisionen mit den Wänden
+        self.particles.reflect_walls(0, 300, 0, 300)
+    
+    
+    def run(self):
+        next_step = time.perf_counter()
+        
+        while self.state >= 0:
+            # Befehle auch in der Pause ausführen und anzeigen
+            if self.apply_commands():
+                self.publish()
+            
+            # Pausiere die Simulation
+            if self.state != 1:
+                time.sleep(0.01)
+                next_step = time.perf_counter()
+                continue
+            
+            self.advance()
+            
+            # Gib den neuen Zustand an die Oberfläche weiter
+            self.publish()
 
+            # Warte bis zum nächsten Schritt. Ist die Physik im Rückstand, wird
+            # nicht nachgeholt, sondern einfach weitergerechnet.
+            if self.steps_per_second:
+                next_step += 1 / self.steps_per_second
+                delay = next_step - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_step = time.perf_counter()
 
 
 
+# Die Oberfläche. Mit `backend="thread"` läuft die Physik in einem Thread,
+# mit `backend="process"` in einem eigenen Prozess.
 class SimulationApp:
-    def __init__(self, root):
+    def __init__(self, root, backend="thread"):
         self.root = root
         self.root.title("Ideales Gas")
+        self.backend = backend
         
         # Canvas für die Darstellung der Teilchen
         self.canvas = tk.Canvas(root, width=300, height=300, bg="white")
@@ -153,27 +223,25 @@ class SimulationApp:
         self.label_1.grid(row = 1, columnspan = 3, sticky=tk.NW)
         
         # Variablen für die Simulation
-        self.bodies = []  # Liste der Teilchen
-        self.interactions = []  # Liste der Wechselwirkungen
+        self.particles = ParticleSystem()  # Arrays mit den Daten aller Teilchen
+        self.bodies = self.particles.bodies  # Liste der Teilchen
         
-        # Liste für die Berechnung des gleitenden Durchschnitts der FPS
-        self.fps_history = [0] * 60
-        self.fps_time = 0
+        # Zeit und Schrittzahl der letzten 60 Bilder für die gleitenden
+        # Durchschnitte der FPS und der Physikschritte pro Sekunde
+        self.rate_history = deque(maxlen=60)
             
         # Energie-Zeit-Diagramm
-        self.energies = 60*[0] 
-        self.times = 60*[0] 
-
         self.fig1, self.ax1 = plt.subplots(figsize=(4, 3),constrained_layout=True)
         self.ax1.set_xlabel("Zeit [s]")
         self.ax1.set_ylabel("Gesamtenergie [J]")
-        self.ax1.set_ylim(bottom=0, top=20)
-        self.line1, = self.ax1.plot([], [], color="blue")
         
         # bette matplotlib in tkinter ein
         self.plot1 = FigureCanvasTkAgg(self.fig1, master=self.root)
         self.plot1.get_tk_widget().grid(row = 1, column = 0, sticky = tk.W, pady = 2)
         
+        # Die letzten 1000 Energiewerte, die x-Achse zeigt 1000 s
+        self.energy_plot = EnergyPlot(self.ax1, history=1000, span=1000.0, min_top=20.0)
+        
         # matplotlib-Toolbar
         self.toolbar1 = NavigationToolbar2Tk(self.plot1, self.root, pack_toolbar=False)
         self.toolbar1.update()
@@ -184,13 +252,14 @@ class SimulationApp:
         self.fig2, self.ax2 = plt.subplots(figsize=(4, 3),constrained_layout=True)
         self.ax2.set_ylabel("Häufigkeit")
         self.ax2.set_xlabel("Geschwindigkeit [m/s]")
-        self.ax2.set_ylim(bottom=0, top=50)
-        self.line2, = self.ax2.plot([], [], color="blue")
         
         # Bette matplotlib in tkinter ein
         self.plot2 = FigureCanvasTkAgg(self.fig2, master=root)
         self.plot2.get_tk_widget().grid(row = 1, column = 1, sticky = tk.W, pady = 2)
         
+        # 20 Klassen von 0 bis 1 m/s
+        self.histogram = SpeedHistogram(self.ax2, bins=20, v_max=1.0, top=50)
+        
         # matplotlib-Toolbar
         self.toolbar2 = NavigationToolbar2Tk(self.plot2, self.root, pack_toolbar=False)
         self.toolbar2.update()
@@ -199,22 +268,32 @@ class SimulationApp:
         # Status
         self.state = 0
         
-        # Zeit
-        self.time = 0
-        self.dt = 1 
+        # Zeit zwischen zwei Bildern und zwischen zwei Aktualisierungen der
+        # Diagramme in ms
+        self.redraw_interval = 10
+        self.plot_interval = 100
         
         # Erstelle die Teilchen in einem Raster
         for i in range(10):
             for j in range(10):
                 vx = 0.5 - random.random()  # Zufällige x-Geschwindigekeit
                 vy = 0.5 - random.random()  # Zufällige y-Geschwindigekeit
-                body = Body(1.0, [15.0 + i*30.0, 15.0 + j*30.0], [vx, vy], radius=5.0)
-                self.bodies.append(body)
+                self.particles.add_body([15.0 + i*30.0, 15.0 + j*30.0], [vx, vy], mass=1.0, radius=5.0)
 
-        # Erstelle alle Wechselwirkungen zwischen den Teilchen.
-        for i in range(len(self.bodies)):
-            for j in range(i + 1, len(self.bodies)):
-                self.interactions.append(Collision(self.bodies[i], self.bodies[j]))
+        # Puffer für den Austausch mit der Physik und Warteschlange für die
+        # Befehle. Für einen eigenen Prozess liegen beide im gemeinsamen Speicher.
+        if self.backend == "process":
+            self.frames = SharedFrameBuffer(len(self.particles))
+            self.commands = multiprocessing.Queue()
+        else:
+            self.frames = FrameBuffer(len(self.particles))
+            self.commands = queue.Queue()
+        
+        # Physik mit dem Anfangszustand. Nach dem Start gehören die Teilchen
+        # der Physik, die Oberfläche liest nur noch die Frames.
+        self.physics = GasPhysics(self.particles, self.frames, self.commands, dt=1, steps_per_second=100)
+        self.physics.publish()
+        self.worker = None
         
         
         # Erstelle alle canvas Objekte für die Darstellung der Teilchen
@@ -224,146 +303,102 @@ class SimulationApp:
                                     x + body.radius, y + body.radius, fill="red")
         # zeichne alles            
         self.draw()
+        self.update_plots()
         
 
+    # Startet die Physik in einem Thread oder in einem eigenen Prozess
+    def start_physics(self):
+        if self.backend == "process":
+            self.worker = multiprocessing.Process(target=self.physics.run, daemon=True)
+        else:
+            self.worker = threading.Thread(target=self.physics.run, daemon=True)
+        self.worker.start()
+    
+    
+    # Beendet die Physik, gibt den gemeinsamen Speicher frei und schliesst das Fenster
+    def close(self):
+        self.commands.put(("state", -1))
+        if self.worker is not None:
+            self.worker.join(timeout=1)
+        self.root.destroy()
+        
+        if self.backend == "process":
+            self.frames.close()
+            self.frames.unlink()
+    
+
     # starte oder stoppe die Simulation
     def start_stop(self):
         if self.state == 0:
             self.state = 1
             self.button_1.configure(text="Stop") 
         else:
-            self.fps_time = time.time()
             self.state = 0
             self.button_1.configure(text="Start")
+        self.commands.put(("state", self.state))
             
     
     # Die Geschwindigkeit von allen Körper wird erhöht.
     def heat(self):
-        for body in self.bodies:
-            body.velocity *= 1.2
+        self.commands.put(("scale", 1.2))
             
     
     # Die Geschwindigkeit von allen Körper wird reduziert.
     def cool(self):
-        for body in self.bodies:
-            body.velocity *= 0.8
-            
-            
-    def update(self):
-        while True:
-            # Pausiere die Simulation
-            if self.state != 1:
-                time.sleep(0.01)
-                continue
-            
-            # Aktualisiert die FPS-Berechnung (gleitender Durchschnitt)
-            time_passed = time.time() - self.fps_time
-            self.fps_time = time.time()
-            
-            self.fps_history.append(1.0 / time_passed)               
-            self.fps_history.pop(0)
-            
-            # Aktualisiere Simulationszeit
-            self.time += self.dt
+        self.commands.put(("scale", 0.8))
     
-            # Setze alle Kräfte auf null
-            for body in self.bodies:
-                body.clear_force()
-
-            # Berechne die Wechselwirkungen
-            for interaction in self.interactions:
-                interaction.update()
-                
-            # Euler-Cromer-Schritt
-            for body in self.bodies:
-                body.update_ec(self.dt)
-            
-            # Überprüfe die Kollisionen mit den Wänden
-            for body in self.bodies:
-                if body.position[0] <= body.radius:
-                    body.position[0] = body.radius
-                    body.velocity[0] *= -1
-                elif body.position[0] >= 300 - body.radius:
-                    body.position[0] = 300 - body.radius
-                    body.velocity[0] *= -1
-                    
-                if body.position[1] <= body.radius:
-                    body.velocity[1] *= -1
-                    body.position[1] = body.radius
-                elif body.position[1] >= 300 - body.radius:
-                    body.velocity[1] *= -1
-                    body.position[1] = 300 - body.radius
-
-            time.sleep(0.01)
     
-    
-    # Aktualisiere die Kreise auf der canvas
+    # Aktualisiere die Kreise auf der canvas mit dem neusten Zustand
     def draw(self):
-        for body in self.bodies:
-            x, y = body.position
+        frame = self.frames.latest()
+        
+        for body, (x, y) in zip(self.bodies, frame.positions):
             self.canvas.coords(body.oval, x-body.radius , y-body.radius, x+body.radius , y+body.radius)
         
-        # Aktualisiere die Diagramme und die Information
-        self.update_energy_plot()
-        self.update_histogram_plot()
-        self.update_label()
+        # Speichere die Energie und aktualisiere die Information
+        self.energy_plot.append(frame.t, frame.kinetic_energy(self.particles.masses))
+        self.update_label(frame)
     
-        # Rufe diese Funktion nach 10 ms erneut auf.        
-        self.root.after(10, self.draw)
+        # Rufe diese Funktion nach `redraw_interval` ms erneut auf.        
+        self.root.after(self.redraw_interval, self.draw)
         
     
-     # Aktualisiere das Geschwindigkeits-Histogramm
-    def update_histogram_plot(self): 
-        bins = [0,0.1,0.2,0.3,0.4,0.5,0.6,0.7,0.8,0.9,1.0]
-        velocities = []
-
-        for body in self.bodies:
-            velocities.append(np.linalg.norm(body.velocity))
+    # Aktualisiere das Energie-Zeit-Diagramm und das Geschwindigkeits-Histogramm
+    def update_plots(self):
+        frame = self.frames.latest()
         
-        v_list = np.histogram(velocities)
+        self.energy_plot.redraw()
+        self.histogram.redraw(frame.speeds())
         
-        self.line2.set_data(bins[:-1], v_list[0] )
-        self.ax2.relim()
-        self.ax2.autoscale_view()
-        self.plot2.draw()
-        
-    
-    # Berechne und speichere die Energie
-    def update_energy_plot(self):
-        total_energy = sum(body.kinetic_energy() for body in self.bodies)
-        self.energies.append(total_energy)
-        self.energies.pop(0)
-        
-        self.times.append(self.time)
-        self.times.pop(0)
-        
-        # berechne y-Skala
-        max_energy = max(self.energies)
-        self.ax1.set_ylim(bottom=0, top=max(20, 1.1*max_energy))
-        
-        # Aktualisiere das Energie-Zeit-Diagramm
-        self.line1.set_data(self.times, self.energies)
-        self.ax1.relim()
-        self.ax1.autoscale_view()
-        self.plot1.draw()
+        # Rufe diese Funktion nach `plot_interval` ms erneut auf.
+        self.root.after(self.plot_interval, self.update_plots)
         
     
     # Aktualisiere die Informationen
-    def update_label(self):
-        fps = round(sum(self.fps_history) / len(self.fps_history), 1)
+    def update_label(self, frame):
+        # Gleitende Durchschnitte über die letzten 60 Bilder
+        self.rate_history.append((time.perf_counter(), frame.step))
+        (time_0, step_0), (time_1, step_1) = self.rate_history[0], self.rate_history[-1]
+        duration = max(time_1 - time_0, 1e-9)
+        
+        fps = round((len(self.rate_history) - 1) / duration, 1)
+        steps = round((step_1 - step_0) / duration, 1)
         
         text = f"N = {len(self.bodies)}\n"
-        text += f"FPS = {fps}"
+        text += f"FPS = {fps}\n"
+        text += f"Schritte/s = {steps}"
         self.label_1.configure(text=text) 
 
 
 if __name__ == "__main__":
     root = tk.Tk()
-    app = SimulationApp(root)
     
-    # Starte die Simulation in einem eigenen Thread
-    thread = threading.Thread(target=app.update, daemon=True)
-    thread.start()
+    # "thread": Physik in einem Thread, "process": Physik in einem eigenen Prozess
+    app = SimulationApp(root, backend="thread")
+    
+    # Starte die Simulation
+    app.start_physics()
+    root.protocol("WM_DELETE_WINDOW", app.close)
 
     root.mainloop()
 
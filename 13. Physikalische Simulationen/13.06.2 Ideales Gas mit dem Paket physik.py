@@ -0,0 +1,514 @@
+#              ___________________________________________________
+#       ______|                                                   |_____
+#       \     |    13.6.2 IDEALES GAS MIT DEM PAKET PHYSIK        |    /
+#        )    |___________________________________________________|   (
+#       /________)                                            (________\      13.11.24 von T. Jenni, CC BY-NC-SA 4.0 (https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+
+# In dieser Lektion simulieren wir dasselbe ideale Gas wie in Lektion 13.6:
+# Teilchen, die sich frei in einer Box bewegen und elastisch miteinander und mit
+# den Wänden zusammenstossen. Das Fenster, die Buttons und das Histogramm sind
+# gleich geblieben.
+#
+# In Lektion 13.6 ist jedes Teilchen ein `Body` und jedes Teilchenpaar eine
+# `Collision`. Das ist leicht zu verstehen, wird aber bei vielen Teilchen sehr
+# langsam. Hier kommen die Teilchen, die Stösse und der Zeitschritt deshalb aus
+# dem Paket `physik`, das neben dieser Datei liegt. Die Datei funktioniert nur
+# in diesem Ordner.
+
+
+import arcade
+import arcade.gui 
+import numpy as np
+
+from physik.darstellung import CircleBatch, TextPanel
+from physik.ereignisse import EventDrivenGas
+from physik.szenen import ideal_gas
+from physik.zeitmessung import PhaseTimer
+from physik.zeitschritt import FixedTimestep
+
+
+# Die Körper werden nicht mehr einzeln als `Body`-Objekte gespeichert, sondern
+# gemeinsam in einem `ParticleSystem` aus dem Paket `physik`. Dieses legt
+# Positionen, Geschwindigkeiten, Kräfte, Massen und Radien aller Teilchen in
+# grossen numpy-Arrays ab und berechnet den Euler-Cromer-Schritt für alle
+# Teilchen mit einer einzigen Rechnung.
+#
+# Für jedes Teilchen liefert `add_body` ein `BodyView`-Objekt, das sich wie ein
+# `Body` verhält: `body.position`, `body.velocity`, `body.mass` und `body.radius`
+# greifen direkt auf die Arrays des Systems zu. Deshalb funktioniert Code wie
+# `body.velocity *= 1.2` ohne Änderungen weiter.
+
+
+
+# Kollisionen zwischen den Teilchen werden nicht mehr mit einem `Collision`-Objekt
+# pro Teilchenpaar geprüft. Die `CellList` aus `physik.gitter` teilt die Box in
+# ein Gitter aus Zellen, die so gross sind wie ein Teilchendurchmesser. Nur Paare
+# aus derselben oder aus benachbarten Zellen kommen für einen Stoss in Frage.
+# Die Funktion `resolve_collisions` berechnet für diese Kandidatenpaare die Stösse
+# mit der bekannten Impulsformel aus Kapitel 13.5:
+#
+#        J = (1 + e) * v_n / (1/m_A + 1/m_B)
+#
+# So wächst der Rechenaufwand nur noch linear mit der Anzahl der Teilchen, und
+# die Simulation kann auch tausende Teilchen darstellen.
+#
+# Das Gitter muss nicht in jedem Schritt neu aufgebaut werden, denn die Teilchen
+# bewegen sich pro Schritt nur um etwa 0.005 m. Mit `skin=0.1` merkt sich eine
+# `NeighbourList` aus `physik.nachbarn` alle Paare, die näher als ein
+# Durchmesser plus 0.1 m sind. Neu gesucht wird erst, wenn sich ein Teilchen
+# mehr als 0.05 m bewegt hat.
+
+
+
+# Die Physik eines Zeitschritts steckt in der Klasse `Simulation` aus dem Paket
+# `physik`. Die Funktion `ideal_gas` aus `physik.szenen` erzeugt die Teilchen,
+# die Box und die Kollisionen. Das Fenster zeigt die Simulation nur noch an und
+# ruft in `on_update` die Methode `simulation.step(dt)` auf.
+#
+# Dieselbe Simulation lässt sich deshalb auch ohne Fenster berechnen, z.B. für
+# 100'000 Zeitschritte mit festem dt, und die Messwerte in eine Datei schreiben:
+#
+#        python -m physik.batch gas --steps 100000 --every 100 --hist 10 --out gas.csv
+#
+# Die Physik rechnet mit einem festen Zeitschritt von 0.01 s. Die Klasse
+# `FixedTimestep` teilt die Zeit eines Bildes in solche Schritte auf. Ein Bild,
+# das zu lange dauert, führt so nicht zu einem grossen Zeitschritt, bei dem die
+# Teilchen durch die Wände fliegen. Beim Zeichnen wird zwischen den letzten
+# beiden Schritten interpoliert, damit die Bewegung gleichmässig aussieht.
+
+
+
+# Auch das Zeichnen wird bei vielen Teilchen zum Flaschenhals, wenn jedes
+# Teilchen einzeln mit `arcade.draw_circle_filled` gezeichnet wird. Die Klasse
+# `CircleBatch` aus `physik.darstellung` speichert Radien und Farben aller
+# Teilchen einmal auf der Grafikkarte. In jedem Bild wird nur noch das Array der
+# Positionen kopiert, und alle Kreise werden mit einem einzigen Auftrag
+# gezeichnet:
+#
+#        self.circles.draw(positions, self.center_point, self.scale_factor)
+
+
+
+# Zwischen zwei Stössen fliegen die Teilchen geradeaus. Statt in jedem festen
+# Zeitschritt nach Überlappungen zu suchen, kann `EventDrivenGas` aus
+# `physik.ereignisse` den genauen Zeitpunkt jedes Stosses (mit einem anderen
+# Teilchen oder einer Wand) vorausberechnen und direkt von Stoss zu Stoss
+# springen. Kein Stoss wird verpasst, die Teilchen überlappen nie, und die
+# Energie bleibt bis auf Rundungsfehler erhalten. Bei einem dünnen Gas ist das
+# viel schneller als feste Zeitschritte. Die Positionen für ein Bild ergeben
+# sich exakt aus der geradlinigen Bewegung seit dem letzten Stoss.
+#
+# Mit `AnimationWindow(..., event_driven=True)` wird das Gas so berechnet.
+# Den Vergleich mit festen Zeitschritten zeigt `python -m physik.ereignisse`.
+
+
+            
+# Die Klasse `AnimationWindow` steuert die grafische Darstellung und die Simulation 
+# der Partikelbewegungen.
+class AnimationWindow(arcade.Window):
+
+    def __init__(self, width, height, title, event_driven=False, profile=False):
+        super().__init__(width, height, title, resizable=True)
+        
+        # Hintergrundfarbe des Fensters auf Weiß setzen
+        self.background_color = arcade.color.WHITE
+        
+        # Skalierungsfaktor in Pixel/Meter für die Darstellung
+        self.scale_factor = 50                       
+        
+        # Ursprung des Koordinatensystems in die Mitte des Fensters setzen
+        self.center_point = [width // 2 + 100, height // 2]  
+        
+        # Simulation des idealen Gases mit 8x8 Teilchen in einer Box. Die
+        # Kollisionspartner kommen aus einer Nachbarliste mit 0.1 m Reserve.
+        self.simulation = ideal_gas(n_side=8, skin=0.1)
+
+        # Partikelsystem mit den Daten aller Körper
+        self.particles = self.simulation.particles
+
+        # Liste der Körper (BodyView-Objekte) für die Darstellung
+        self.bodies = self.particles.bodies
+
+        # Ereignisgesteuerte Berechnung von Stoss zu Stoss (None = feste Zeitschritte)
+        self.events = EventDrivenGas(self.particles, self.simulation.box) if event_driven else None
+
+        # Alle Teilchen werden mit einem einzigen Auftrag gezeichnet
+        self.circles = CircleBatch()
+
+        # Fester Zeitschritt der Physik, höchstens 10 Schritte pro Bild
+        self.timestep = FixedTimestep(0.01, max_substeps=10, snapshot=lambda: self.particles.positions)
+
+        # Simulationszeit in Sekunden
+        self.t = 0
+        
+        # Simulationsstatus (0 = Pause, 1 = Ausführen)
+        self.state = 0
+        
+        # Zeitmessung für die FPS-Anzeige. Mit profile=True wird auch gemessen,
+        # wie lange die Teile von on_update dauern (siehe physik/zeitmessung.py).
+        self.profiler = PhaseTimer(enabled=profile)
+        self.profile_panel = TextPanel()
+        self.simulation.profiler = self.profiler
+        
+        # UI-Manager zur Steuerung der Benutzeroberfläche (Buttons)
+        self.uimanager = arcade.gui.UIManager() 
+        self.uimanager.enable() 
+  
+        
+        # Erstellen einer vertikalen Box für die Buttons
+        anchor = arcade.gui.UIAnchorLayout(x=30)
+        box = arcade.gui.UIBoxLayout(vertical=True,space_between=10)
+        
+        anchor.add(box,anchor_x="left")
+        
+        # Start/Stop-Button erstellen
+        self.start_button = arcade.gui.UIFlatButton(text="Start", height=30)
+        self.start_button.on_click = self.on_click_start
+        
+        box.add(self.start_button)
+        
+        # heizen Button erstellen
+        self.heat_button = arcade.gui.UIFlatButton(text="heizen", height=30)
+        self.heat_button.on_click = self.heat
+        
+        box.add(self.heat_button)
+        
+        # kühlen Button erstellen
+        self.cool_button = arcade.gui.UIFlatButton(text="kühlen", height=30)
+        self.cool_button.on_click = self.cool
+        
+        box.add(self.cool_button)
+        
+        
+        # UI-Komponenten zur Benutzeroberfläche hinzufügen
+        self.uimanager.add(anchor)
+
+        # Gesamtenergie aller Teilchen
+        self.energy = self.simulation.total_energy()
+
+    
+    # Passt die Ursprungsposition bei Fenstergrößenänderung an
+    def on_resize(self, width, height):
+        super().on_resize(width, height)
+        self.center_point = [width // 2 + 100, height // 2] 
+    
+
+    # Startet und stoppt die Simulation, wenn der Button geklickt wird
+    def on_click_start(self, e):
+        if self.state == 0:
+            self.state = 1
+            self.start_button.text = "Stop"
+        else:
+            self.state = 0
+            self.start_button.text = "Start"
+    
+
+    # Konvertiert Meterkoordinaten in Pixelkoordinaten für die Darstellung
+    def meter_to_pixel(self, x, y):
+        pixel_x = self.center_point[0] + x * self.scale_factor
+        pixel_y = self.center_point[1] + y * self.scale_factor
+        return pixel_x, pixel_y
+    
+    
+    # Zeichne Histogramm der Geschwindigkeiten
+    def draw_v_histogram(self):
+        velocities = self.particles.speeds()
+        
+        counts , bins  = np.histogram(velocities,bins=[0,0.1,0.2,0.3,0.4,0.5,0.6,0.7,0.8,0.9,1.0])
+        
+        w = 10 # Breite der Säulen
+        
+        x0, y0 = self.meter_to_pixel(-8.8,-3.5)
+        for i, count in enumerate(counts):
+            arcade.draw_line(x0+w*i, y0, x0+w*i, y0 + 2*count, arcade.color.RED, w-1)
+        
+        x, y = self.meter_to_pixel(-9,-2)
+        arcade.draw_text("Histogramm v", x, y, arcade.color.BLACK)
+        
+        x, y = self.meter_to_pixel(-9,-3.9)
+        arcade.draw_text(str(round(bins[0],2)), x, y, arcade.color.BLACK)
+        arcade.draw_text(str(round(bins[-1],2)), x + w*len(counts), y, arcade.color.BLACK)
+        
+
+
+    # Zeichnet die Szene im Fenster
+    def on_draw(self):
+        self.clear()
+        
+        # Zeichnet die Benutzeroberfläche
+        self.uimanager.draw() 
+        
+        # Wände und Bodenlinien der Box
+        x1, y1 = self.meter_to_pixel(-4,-4)
+        x2, y2 = self.meter_to_pixel(4,4)
+        w = (x2-x1)
+        h = (y2-y1)
+        arcade.draw_rect_outline(arcade.rect.XYWH(x2-w//2, y2-h//2, w, h), arcade.color.BLACK, 2)
+
+        
+        # Zeigt die Simulationszeit an
+        time = round(self.t, 1)
+        x, y = self.meter_to_pixel(-9, 4)
+        arcade.draw_text(f"t = {time} s", x, y, arcade.color.BLACK)
+        
+        # Zeigt die FPS an
+        fps = round(self.profiler.fps(), 1)
+        x, y = self.meter_to_pixel(-9, 3.5)
+        arcade.draw_text(f"FPS = {fps}", x, y, arcade.color.BLACK)
+        
+        # Zeigt die Energie an
+        energy = round(self.energy,1)
+        x, y = self.meter_to_pixel(-9, 3)
+        arcade.draw_text(f"E = {energy} J", x, y, arcade.color.BLACK)
+        
+        # Zeigt die Anzahl der Körper an
+        n = len(self.bodies)
+        x, y = self.meter_to_pixel(-9, 2.5)
+        arcade.draw_text(f"N = {n}", x, y, arcade.color.BLACK)
+        
+        # Zeigt das Histogram der Geschwindigkeiten an
+        self.draw_v_histogram()
+        
+        # Radien und Farben neu übertragen, wenn sich die Anzahl Körper ändert
+        if self.circles.count != len(self.particles):
+            self.circles.set_bodies(self.particles.radii, self.particles.colors)
+        
+        # Zeichnet alle Körper in der Szene an den interpolierten Positionen.
+        # Ereignisgesteuert liegen die Positionen bereits genau zur Zeit des Bildes vor.
+        if self.events is None:
+            positions = self.timestep.interpolated()
+        else:
+            positions = self.particles.positions
+        self.circles.draw(positions, self.center_point, self.scale_factor)
+
+        # Zeigt die Zeitmessung oben rechts über allem an (nur mit profile=True)
+        self.profile_panel.draw(self.profiler.lines(), self.width - 10, self.height - 10)
+
+    # Die Geschwindigkeit von allen Körper wird erhöht.
+    def heat(self, e):
+        self.particles.velocities *= 1.2
+        
+        # Mit den neuen Geschwindigkeiten ändern sich alle Stosszeiten
+        if self.events is not None:
+            self.events.reset()
+            
+            
+    # Die Geschwindigkeit von allen Körper wird reduziert.
+    def cool(self, e):
+        self.particles.velocities *= 0.8
+        
+        if self.events is not None:
+            self.events.reset()
+            
+    # Aktualisiert die Simulation um einen Zeitschritt
+    def on_update(self, dt):
+        # Führe die Funktion nur aus, wenn der Status auf 1 ist.
+        if self.state != 1:
+            return
+        
+        # Startet die Zeitmessung für dieses Bild
+        self.profiler.start()
+        
+        if self.events is None:
+            # Berechnet Zeitschritte mit festem dt: Kollisionen, Euler-Cromer-Schritt und Wände
+            self.timestep.advance(dt, self.simulation.step)
+            self.t = self.simulation.t
+        else:
+            # Bearbeitet alle Stösse bis zur Zeit des Bildes
+            self.events.advance(dt)
+            self.t = self.events.t
+            self.profiler.lap("Ereignisse")
+        
+        # Berechne die Gesamtenergie aller Körper und speichere sie
+        self.energy = self.simulation.total_energy()
+        self.profiler.lap("Energie")
+        
+        # Beendet die Zeitmessung für dieses Bild
+        self.profiler.count("Teilchen", len(self.particles))
+        self.profiler.stop(dt)
+
+
+
+if __name__ == "__main__":
+    # Initialisiert das Fenster für die Simulation
+    # Mit `event_driven=True` springt die Simulation von Stoss zu Stoss.
+    window = AnimationWindow(800, 600, "Ideales Gas")
+
+    # starte die Simulation
+    arcade.run()
+
+    # Mit `profile=True` zeigt das Fenster, wie lange die Teile von
+    # `on_update` dauern. Nach dem Schliessen werden die Messwerte der
+    # letzten Bilder in eine CSV-Datei geschrieben.
+    if window.profiler.enabled:
+        window.profiler.save_csv("profil.csv")
+
+
+
+
+# ___________________
+#                   /
+# Zusammenfassung  (
+# __________________\
+
+# Dieses Kapitel behandelt die Simulation eines idealen Gases mit der Arcade-
+# Bibliothek in Python. Die Partikel bewegen sich frei in einem geschlossenen 
+# Raum und erfahren elastische Kollisionen untereinander und mit den Begrenzungen 
+# des Raumes. Die Simulation veranschaulicht thermodynamische Eigenschaften eines 
+# idealen Gases wie die kinetische Energie und Temperatur, und zeigt die Verteilung 
+# der Teilchengeschwindigkeiten.
+
+
+# HAUPTBESTANDTEILE
+# -----------------
+
+# 1.  Körper und Interaktionen
+#     - Das `ParticleSystem` speichert die Teilchen des Gases in numpy-Arrays 
+#       für Masse, Geschwindigkeit und Position. Jedes Teilchen ist über einen 
+#       `BodyView` wie ein einzelner Körper ansprechbar.
+#
+#     - Ein Zellengitter (`CellList`) findet die Teilchenpaare, die sich berühren 
+#       können. Für diese Paare berechnet `resolve_collisions` die neuen 
+#       Geschwindigkeiten bei elastischen Stößen, wodurch Energie und Impuls 
+#       erhalten bleiben.
+#
+#     - Die Klasse `Simulation` enthält die Physik eines Zeitschritts. Das Fenster
+#       ruft nur `simulation.step(dt)` auf. Mit `python -m physik.batch gas` läuft
+#       dieselbe Simulation ohne Fenster und schreibt Energie, Impuls und
+#       Histogramme in eine Datei.
+  
+# 2.  Animation und Steuerung
+#     - Die Arcade-Bibliothek wird zur Visualisierung der Partikelbewegungen verwendet.
+#
+#     - Buttons `Heizen` und `Kühlen` ermöglichen es, die Gesamtenergie der Teilchen 
+#       zu erhöhen oder zu verringern, was der thermischen Energieänderung entspricht.
+  
+# 3.  Energie und Temperatur
+#     - Die Simulation berechnet die Gesamtenergie basierend auf den kinetischen 
+#       Energien der Teilchen.
+#
+#     - Ein Histogramm zeigt die Verteilung der Teilchengeschwindigkeiten und 
+#       ermöglicht es, die Veränderungen der Partikelgeschwindigkeit zu beobachten.
+
+
+# THERMISCHE EIGENSCHAFTEN
+# ------------------------
+
+# - Die Simulation demonstriert die kinetische Gastheorie, indem die Beziehung 
+#   zwischen Teilchengeschwindigkeiten, ihrer kinetischen Energie und der Temperatur 
+#   illustriert wird.
+#
+# - Die Partikelverteilung nähert sich der Maxwell-Boltzmann-Verteilung, die die 
+#   Geschwindigkeitsverteilung in einem idealen Gas beschreibt.
+
+
+
+
+# ____________________________
+#                            /
+# Übungsaufgaben            (
+# ___________________________\
+
+
+# ___________
+#            \
+# Aufgabe 1  /
+# __________/
+#
+# Ändere in `__init__` die Anzahl Teilchen von `n_side=8` auf `n_side=30`
+# (900 Teilchen). Starte das Fenster mit `profile=True` und vergleiche die FPS
+# mit Lektion 13.6. Welcher Teil von `on_update` braucht jetzt am meisten Zeit?
+
+
+# Füge hier deine Lösung ein.
+
+
+
+
+# ___________
+#            \
+# Aufgabe 2  /
+# __________/
+#
+# Starte das Fenster einmal mit festen Zeitschritten und einmal mit
+# `event_driven=True`. Beobachte die Energie E während einer Minute. Bleibt sie
+# in beiden Fällen gleich? Drücke auch mehrmals auf "heizen".
+
+
+# Füge hier deine Lösung ein.
+
+
+
+#            .-""""-.
+#            |==  ==|-.
+#            |~~ ~~~|`\\
+#            |LILILI| ||         Das ideale Gas aus der 
+#            |      |//          Tankstelle.
+#            |      |/
+#            |      |
+#   jgs    __|______|__
+#         [____________]
+#  ___ _  _ ___  ___ 
+# | __| \| |   \| __|
+# | _|| .` | |) | _| 
+# |___|_|\_|___/|___|
+#                
+# -=x=-=x=-=x=-=x=-=x=-=x=-=x=-=x=-=x=-=x=-=x=-=x=-=x=-=x=-=x=-=-=x=-=x=-=x=-=-=
+
+
+
+
+# >< >< >< >< >< >< >< >< >< >< >< >< >< >< >< >< >< >< >< >< < >< >< >< >< >< ><
+#  _    _   _                                  
+# | |  (_)_(_)___ _   _ _ __   __ _  ___ _ __  
+# | |   / _ \/ __| | | | '_ \ / _` |/ _ \ '_ \ 
+# | |__| (_) \__ \ |_| | | | | (_| |  __/ | | |
+# |_____\___/|___/\__,_|_| |_|\__, |\___|_| |_|
+#                             |___/            
+
+
+# ___________
+#            \
+# Aufgabe 1  /
+# __________/
+#
+# Ändere in `__init__` die Anzahl Teilchen von `n_side=8` auf `n_side=30`
+# (900 Teilchen). Starte das Fenster mit `profile=True` und vergleiche die FPS
+# mit Lektion 13.6. Welcher Teil von `on_update` braucht jetzt am meisten Zeit?
+
+
+'''
+# Lösung:
+# In Lektion 13.6 werden bei 900 Teilchen rund 400'000 `Collision`-Objekte in
+# jedem Bild einzeln geprüft, das Fenster ist kaum mehr bedienbar. Hier prüft
+# die Nachbarliste nur Paare, die sich fast berühren, und der Euler-Cromer-
+# Schritt rechnet alle Teilchen mit einer einzigen Arrayrechnung. Die Anzeige
+# von `profile=True` zeigt, dass die Zeit nun vor allem in den Stössen und im
+# Zeichnen steckt und nicht mehr in Python-Schleifen über die Teilchen.
+'''
+
+
+
+
+# ___________
+#            \
+# Aufgabe 2  /
+# __________/
+#
+# Starte das Fenster einmal mit festen Zeitschritten und einmal mit
+# `event_driven=True`. Beobachte die Energie E während einer Minute. Bleibt sie
+# in beiden Fällen gleich? Drücke auch mehrmals auf "heizen".
+
+'''
+# Lösung:
+# Mit festen Zeitschritten überlappen sich zwei Teilchen oft schon ein wenig,
+# bevor der Stoss bemerkt wird, und ein Teilchen kann leicht in eine Wand
+# hineinfliegen. Die Energie schwankt deshalb ein wenig. Ereignisgesteuert wird
+# jeder Stoss genau im richtigen Moment berechnet, und E bleibt bis auf
+# Rundungsfehler konstant. Beim Heizen wächst E in beiden Fällen um den Faktor
+# 1.2² = 1.44, weil alle Geschwindigkeiten mit 1.2 multipliziert werden.
+'''
+
+
+# >< >< >< >< >< >< >< >< >< >< >< >< >< >< >< >< >< >< >< >< < >< >< >< >< >< ><
@@ -26,12 +26,23 @@
 # - Geladene Teilchen:
 #   Teilchen in der Simulation erhalten eine Ladung, die entweder positiv oder negativ sein kann.
 #   Je nach Vorzeichen der Ladungen werden sie sich anziehen oder abstoßen.
+#
+# - Viele Ladungen:
+#   Hier gibt es für jedes Paar ein eigenes `Coulomb`-Objekt. Für einen
+#   Ionenkristall mit tausenden Ladungen ist das viel zu langsam. Das Modul
+#   `physik.elektrostatik` rechnet nur Paare bis zu einem Abstand `cutoff` und
+#   den Rest auf Wunsch mit einer FFT auf einem Gitter. Ein Beispiel ist die
+#   Szene `ionic_crystal` aus `physik.szenen`, der Vergleich mit allen Paaren
+#   steht in `python -m physik.elektrostatik`.
 
 
 import arcade
 import arcade.gui 
 import numpy as np
 
+from physik.darstellung import TextPanel
+from physik.zeitmessung import PhaseTimer
+
 
 class Body:
     def __init__(self, position, velocity, mass=1.0, charge=1.0, radius=1.0, color=arcade.color.BLUE):
@@ -154,7 +165,7 @@ class Coulomb(Interaction):
 # der Partikelbewegungen.
 class AnimationWindow(arcade.Window):
 
-    def __init__(self, width, height, title):
+    def __init__(self, width, height, title, profile=False):
         super().__init__(width, height, title, resizable=True)
         
         # Hintergrundfarbe des Fensters auf Weiß setzen
@@ -169,7 +180,9 @@ class AnimationWindow(arcade.Window):
         # Liste für alle zu simulierenden Körper
         self.bodies = []
         
-        # Liste für alle Interaktionen zwischen den Körpern
+        # Liste für alle Interaktionen zwischen den Körpern. Für sehr viele Körper
+        # gibt es in physik/wechselwirkungen.py die `InteractionList`, die
+        # gleichartige Interaktionen gemeinsam rechnet.
         self.interactions = []  
     
         # Simulationszeit in Sekunden
@@ -178,8 +191,10 @@ class AnimationWindow(arcade.Window):
         # Simulationsstatus (0 = Pause, 1 = Ausführen)
         self.state = 0
         
-        # FPS-Berechnung mit gleitendem Durchschnitt
-        self.fps_history = [0] * 30
+        # Zeitmessung für die FPS-Anzeige. Mit profile=True wird auch gemessen,
+        # wie lange die Teile von on_update dauern (siehe physik/zeitmessung.py).
+        self.profiler = PhaseTimer(enabled=profile)
+        self.profile_panel = TextPanel()
         
         # UI-Manager zur Steuerung der Benutzeroberfläche (Buttons)
         self.uimanager = arcade.gui.UIManager() 
@@ -201,6 +216,7 @@ class AnimationWindow(arcade.Window):
         self.uimanager.add(anchor)
 
         # Initialisiere zwei Körper
+        # (dieselben Werte stehen in der Szene `coulomb` in `physik/szenen.py`)
         ball1 = Body([-2, 1.1], [0, 2], mass=1.0, charge=1e-4, radius=0.5, color=arcade.color.RED)
         ball2 = Body([2.1, 1], [0, -1], mass=1.0, charge=-1e-4, radius=0.5, color=arcade.color.BLUE)
         self.bodies.extend([ball1, ball2])
@@ -252,7 +268,7 @@ class AnimationWindow(arcade.Window):
         arcade.draw_text(f"t = {time} s", x, y, arcade.color.BLACK)
         
         # Zeigt die FPS an
-        fps = round(sum(self.fps_history) / len(self.fps_history), 1)
+        fps = round(self.profiler.fps(), 1)
         x, y = self.meter_to_pixel(-9, 2.5)
         arcade.draw_text(f"FPS = {fps}", x, y, arcade.color.BLACK)
         
@@ -267,8 +283,9 @@ class AnimationWindow(arcade.Window):
             
             # zeichne die resultierende Kraft
             arcade.draw_line(x, y, x + 2*body.force[0], y + 2*body.force[1] , arcade.color.BARN_RED, 2)
-        
 
+        # Zeigt die Zeitmessung oben rechts über allem an (nur mit profile=True)
+        self.profile_panel.draw(self.profiler.lines(), self.width - 10, self.height - 10)
 
     # Aktualisiert die Simulation um einen Zeitschritt
     def on_update(self, dt):
@@ -276,22 +293,24 @@ class AnimationWindow(arcade.Window):
         if self.state != 1:
             return
         
-        # FPS berechnen und als gleitenden Durchschnitt speichern
-        self.fps_history.append(1.0/dt)               
-        self.fps_history.pop(0)
+        # Startet die Zeitmessung für dieses Bild
+        self.profiler.start()
         
         # Setzt die Kräfte aller Körper auf null
         for body in self.bodies:
             body.clear_force()
+        self.profiler.lap("Kräfte null")
         
         
-        # Aktualisiert die Kollisionen
-        for interacion in self.interactions:
-            interacion.update()
+        # Aktualisiert alle Interaktionen einzeln
+        for interaction in self.interactions:
+            interaction.update()
+        self.profiler.lap("Interaktionen")
             
         # Berechnet die Kräfte und aktualisiert die Bewegungen der Objekte
         for body in self.bodies:
             body.update_ec(dt)  # Aktualisiert Position und Geschwindigkeit
+        self.profiler.lap("Bewegung")
         
         
         for body in self.bodies:
@@ -310,9 +329,15 @@ class AnimationWindow(arcade.Window):
             elif body.position[0] > 4 - body.radius:
                 body.position[0] = 4 - body.radius
                 body.velocity[0] *= -1
+        self.profiler.lap("Wände")
             
         # Erhöht die Simulationszeit
         self.t += dt  
+        
+        # Beendet die Zeitmessung für dieses Bild
+        self.profiler.count("Teilchen", len(self.bodies))
+        self.profiler.count("Paare", len(self.interactions))
+        self.profiler.stop(dt)
 
 
 
@@ -323,6 +348,12 @@ if __name__ == "__main__":
     # starte die Simulation
     arcade.run()
 
+    # Mit `profile=True` zeigt das Fenster, wie lange die Teile von
+    # `on_update` dauern. Nach dem Schliessen werden die Messwerte der
+    # letzten Bilder in eine CSV-Datei geschrieben.
+    if window.profiler.enabled:
+        window.profiler.save_csv("profil.csv")
+
 
 
 # ____________________________
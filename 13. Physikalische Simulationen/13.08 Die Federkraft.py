@@ -32,6 +32,9 @@ import arcade
 import arcade.gui 
 import numpy as np
 
+from physik.darstellung import TextPanel
+from physik.zeitmessung import PhaseTimer
+
 
 # Die Klasse `Body` modelliert ein physikalisches Objekt in der Simulation, 
 # das durch seine Position, Geschwindigkeit und Masse beschrieben wird.
@@ -166,7 +169,7 @@ class Collision(Interaction):
 # der Partikelbewegungen.
 class AnimationWindow(arcade.Window):
 
-    def __init__(self, width, height, title):
+    def __init__(self, width, height, title, profile=False):
         super().__init__(width, height, title, resizable=True)
         
         # Hintergrundfarbe des Fensters auf Weiß setzen
@@ -181,7 +184,9 @@ class AnimationWindow(arcade.Window):
         # Liste für alle zu simulierenden Körper
         self.bodies = []
         
-        # Liste für alle Interaktionen zwischen den Körpern
+        # Liste für alle Interaktionen zwischen den Körpern. Für sehr viele Körper
+        # gibt es in physik/wechselwirkungen.py die `InteractionList`, die
+        # gleichartige Interaktionen gemeinsam rechnet.
         self.interactions = []  
 
         # Simulationszeit in Sekunden
@@ -190,8 +195,10 @@ class AnimationWindow(arcade.Window):
         # Simulationsstatus (0 = Pause, 1 = Ausführen)
         self.state = 0
         
-        # FPS-Berechnung mit gleitendem Durchschnitt
-        self.fps_history = [0] * 30
+        # Zeitmessung für die FPS-Anzeige. Mit profile=True wird auch gemessen,
+        # wie lange die Teile von on_update dauern (siehe physik/zeitmessung.py).
+        self.profiler = PhaseTimer(enabled=profile)
+        self.profile_panel = TextPanel()
         
         # UI-Manager zur Steuerung der Benutzeroberfläche (Buttons)
         self.uimanager = arcade.gui.UIManager() 
@@ -265,7 +272,7 @@ class AnimationWindow(arcade.Window):
         arcade.draw_text(f"t = {time} s", x, y, arcade.color.BLACK)
         
         # Zeigt die FPS an
-        fps = round(sum(self.fps_history) / len(self.fps_history), 1)
+        fps = round(self.profiler.fps(), 1)
         x, y = self.meter_to_pixel(-9, 2.5)
         arcade.draw_text(f"FPS = {fps}", x, y, arcade.color.BLACK)
         
@@ -288,7 +295,9 @@ class AnimationWindow(arcade.Window):
             xB, yB = self.meter_to_pixel(interaction.bodyB.position[0], interaction.bodyB.position[1])
             
             arcade.draw_line(xA, yA, xB, yB , interaction.color, 2)
-     
+
+        # Zeigt die Zeitmessung oben rechts über allem an (nur mit profile=True)
+        self.profile_panel.draw(self.profiler.lines(), self.width - 10, self.height - 10)
 
     # Aktualisiert die Simulation um einen Zeitschritt
     def on_update(self, dt):
@@ -296,18 +305,19 @@ class AnimationWindow(arcade.Window):
         if self.state != 1:
             return
         
-        # FPS berechnen und als gleitenden Durchschnitt speichern
-        self.fps_history.append(1.0/dt)               
-        self.fps_history.pop(0)
+        # Startet die Zeitmessung für dieses Bild
+        self.profiler.start()
         
         # Setzt die Kräfte aller Körper auf null
         for body in self.bodies:
             body.clear_force()
+        self.profiler.lap("Kräfte null")
         
         
-        # Aktualisiert die Kollisionen
-        for interacion in self.interactions:
-            interacion.update()
+        # Aktualisiert alle Interaktionen einzeln
+        for interaction in self.interactions:
+            interaction.update()
+        self.profiler.lap("Interaktionen")
             
         # Berechnet die Kräfte und aktualisiert die Bewegungen der Objekte
         for body in self.bodies:
@@ -315,6 +325,7 @@ class AnimationWindow(arcade.Window):
             body.add_force(F_G)
 
             body.update_ec(dt)  # Aktualisiert Position und Geschwindigkeit
+        self.profiler.lap("Bewegung")
         
         # Überprüft und verarbeitet Kollisionen mit dem Boden
         for body in self.bodies:
@@ -329,9 +340,15 @@ class AnimationWindow(arcade.Window):
             elif body.position[0] < -4.5 + body.radius:
                 body.position[0] = -4.5 + body.radius
                 body.velocity[0] *= -1
+        self.profiler.lap("Wände")
             
         # Erhöht die Simulationszeit
         self.t += dt  
+        
+        # Beendet die Zeitmessung für dieses Bild
+        self.profiler.count("Teilchen", len(self.bodies))
+        self.profiler.count("Paare", len(self.interactions))
+        self.profiler.stop(dt)
 
 
 
@@ -342,6 +359,12 @@ if __name__ == "__main__":
     # starte die Simulation
     arcade.run()
 
+    # Mit `profile=True` zeigt das Fenster, wie lange die Teile von
+    # `on_update` dauern. Nach dem Schliessen werden die Messwerte der
+    # letzten Bilder in eine CSV-Datei geschrieben.
+    if window.profiler.enabled:
+        window.profiler.save_csv("profil.csv")
+
 
 
 
@@ -27,13 +27,31 @@
 #   wobei g die Erdbeschleunigung ist und θ der Winkel zwischen dem 
 #   Faden und der Senkrechten ist. 
 
-# - Die Klasse `Body` wird um die Eigenschaft `fixed` erweitert. Ein `fixed`-Körper
-#   bleibt an einer festen Position. Die Aufhängung des Fadenpendels ist ein 
-#   `fixed`-Körper.
+# - Die Körper werden wie in Lektion 13.6.2 in einem `ParticleSystem` gespeichert.
+#   Ein `fixed`-Körper bleibt an einer festen Position. Die Aufhängung des
+#   Fadenpendels ist ein `fixed`-Körper.
 # 
-# - Die Seilkraft wird durch eine hohe Federkonstante simuliert, sodass der 
-#   Faden nahezu starr bleibt. Eine Dämpfungskraft reduziert das Schwingen des Pendels,
-#   um Stabilität in der Simulation zu gewährleisten.
+# - Starrer Faden statt steifer Feder:
+#   Früher wurde der Faden durch eine Feder mit hoher Federkonstante simuliert.
+#   Eine steife Feder braucht aber sehr kleine Zeitschritte und dehnt sich
+#   trotzdem. Hier erzwingen wir die Länge des Fadens direkt: Nach jedem
+#   Euler-Cromer-Schritt werden die Körper entlang des Fadens zurück auf die
+#   richtige Länge geschoben, und die Geschwindigkeit wird aus der tatsächlichen
+#   Bewegung berechnet. Die Klasse `DistanceConstraints` aus dem Paket `physik`
+#   macht das für beliebig viele Fäden (siehe `physik/stangen.py`):
+#
+#        rods = DistanceConstraints(iterations=10)
+#        rods.add(anchor, ball)
+#        simulation.add_constraints(rods)
+#
+#   Die Fadenkraft wird nicht mehr berechnet, sondern ergibt sich aus der
+#   Verschiebung. Die Methode `rods.forces` liefert sie zum Zeichnen.
+#
+# - Fester Zeitschritt:
+#   Stockt das Fenster kurz und arcade übergibt ein grosses dt, wird die Zeit
+#   eines Bildes trotzdem in Schritte mit festem dt aufgeteilt. Die Klasse
+#   `FixedTimestep` aus dem Paket `physik` übernimmt das (siehe
+#   `physik/zeitschritt.py`). Weil der Faden starr ist, genügt ein Schritt pro Bild.
 
 
 
@@ -41,147 +59,20 @@ import arcade
 import arcade.gui 
 import numpy as np
 
+from physik.darstellung import CircleBatch, LineBatch, TextPanel, arrows
+from physik.partikel import ParticleSystem
+from physik.simulation import Simulation
+from physik.stangen import DistanceConstraints
+from physik.zeitmessung import PhaseTimer
+from physik.zeitschritt import FixedTimestep
 
-# Die Klasse `Body` modelliert ein physikalisches Objekt in der Simulation, 
-# das durch seine Position, Geschwindigkeit und Masse beschrieben wird.
-class Body:
-    def __init__(self, position, velocity, mass=1.0, radius=1.0, fixed=False, color=arcade.color.BLUE):
-        self.mass = mass                                 # Masse in kg
-        self.position = np.array(position, dtype=float)  # Position in m
-        self.velocity = np.array(velocity, dtype=float)  # Geschwindigkeit in m/s
-        self.acceleration = np.array([0.0, 0.0])         # Beschleunigung in m/s^2
-        self.force = np.array([0.0, 0.0])                # Resultierende Kraft in N
-        self.radius = radius                             # Radius des Körpers in m
-        self.fixed = fixed                               # Körper wird festgehalten
-        self.color = color                               # Farbe für die Darstellung
-
-
-    # Setzt die resultierende Kraft auf null
-    def clear_force(self):
-        self.force = np.array([0.0, 0.0])
-
-
-    # Fügt eine Kraft zum Objekt hinzu, z.B. die Schwerkraft
-    def add_force(self, force):
-        self.force += np.array(force, dtype=float)
-
-
-    # Berechnet die neue Geschwindigkeit und Position mithilfe des 
-    # Euler-Cromer-Verfahrens, wobei die Beschleunigung auf Basis der Kraft 
-    # und Masse aktualisiert wird.
-    def update_ec(self, dt):
-        if self.fixed:
-            self.force = np.array([0.0, 0.0]) 
-            self.velocity = np.array([0.0, 0.0]) 
-            return
-        
-        self.acceleration = self.force / self.mass
-        self.velocity += self.acceleration * dt
-        self.position += self.velocity * dt
-        
-
-
-# Die Klasse `Interaction` ist die Basisklasse für alle Wechselwirkungen. 
-class Interaction:
-    def __init__(self, bodyA, bodyB):
-        self.bodyA = bodyA
-        self.bodyB = bodyB
-
-    def update(self):
-        pass
-
-
-
-# Die Klasse `Spring` simuliert eine Feder zwischen zwei Körpern. 
-class Spring(Interaction):
-
-    def __init__(self, bodyA, bodyB, k=1.0, length=None, damping=0.9, color=arcade.color.YELLOW):
-        super().__init__(bodyA, bodyB)
-
-        self.k = k # Federkonstante
-        
-        # Ursprungslänge der Feder
-        if length is None:
-            self.length = np.linalg.norm(bodyA.position - bodyB.position)
-        else:
-            self.length = length
-        
-        self.damping = damping # Dämpfungskonstante
-        
-        self.color = color 
-
-
-    def calculate_spring_force(self):
-        # Berechnet die Federkraft nach dem Hookeschen Gesetz.
-        r_vector = self.bodyB.position - self.bodyA.position
-        distance = np.linalg.norm(r_vector)
-        extension = distance - self.length  # Auslenkung der Feder
-
-        # Berechnet die Federkraft basierend auf der Auslenkung
-        force_magnitude = -self.k * extension
-        force_direction = r_vector / distance  # Einheitsvektor in Richtung des Abstandsvektors
-
-        # Dämpfungskraft parallel zur Federkraft
-        v_rel = self.bodyB.velocity - self.bodyA.velocity
-        force_magnitude += -self.damping * np.dot(v_rel, force_direction)
-        
-        # Berechne die Federkraft
-        return force_magnitude * force_direction
-
-
-    def update(self):
-        force = self.calculate_spring_force()
-        self.bodyA.add_force(-force)
-        self.bodyB.add_force(force)
-    
-
-
-# Die Klasse `Collision` verwaltet die Kollisionserkennung und -berechnung 
-# zwischen zwei Körpern.
-class Collision(Interaction):
-
-    def __init__(self, bodyA, bodyB, restitution=1.0):
-        super().__init__(bodyA, bodyB)
-        self.restitution = restitution
-
-
-    def check_collision(self):
-        # Prüft, ob zwei Körper kollidieren.
-        distance = np.linalg.norm(self.bodyA.position - self.bodyB.position)
-        return distance <= (self.bodyA.radius + self.bodyB.radius)
-
-
-    def resolve_collision(self):
-        # Berechnet die neuen Geschwindigkeiten der beiden Körper nach einer Kollision.
-        normal = (self.bodyB.position - self.bodyA.position) / np.linalg.norm(self.bodyB.position - self.bodyA.position)
-        relative_velocity = self.bodyA.velocity - self.bodyB.velocity
-        velocity_along_normal = np.dot(relative_velocity, normal)
 
-        # Berechnet nur, wenn die Körper aufeinander zu bewegen
-        if velocity_along_normal < 0:
-            return
-
-        # Impulsberechnung
-        impulse = ((1 + self.restitution) * velocity_along_normal) / (1 / self.bodyA.mass + 1 / self.bodyB.mass)
-        impulse_vector = impulse * normal
-
-        # Aktualisiert die Geschwindigkeit der beiden Körper
-        self.bodyA.velocity -= (impulse_vector / self.bodyA.mass)
-        self.bodyB.velocity += (impulse_vector / self.bodyB.mass)
-
-
-    # Überprüft und berechnet die Kollision, falls nötig
-    def update(self):
-        if self.check_collision():
-            self.resolve_collision()
-
-                        
             
 # Die Klasse `AnimationWindow` steuert die grafische Darstellung und die Simulation 
 # der Partikelbewegungen.
 class AnimationWindow(arcade.Window):
 
-    def __init__(self, width, height, title):
+    def __init__(self, width, height, title, profile=False):
         super().__init__(width, height, title, resizable=True)
         
         # Hintergrundfarbe des Fensters auf Weiß setzen
@@ -193,20 +84,36 @@ class AnimationWindow(arcade.Window):
         # Ursprung des Koordinatensystems in die Mitte des Fensters setzen
         self.center_point = [width // 2 + 100, height // 2]  
         
-        # Liste für alle zu simulierenden Körper
-        self.bodies = []
-        
-        # Liste für alle Interaktionen zwischen den Körpern
-        self.interactions = []  
+        # Alle Körper werden gemeinsam im Partikelsystem gespeichert
+        self.particles = ParticleSystem()
+        self.bodies = self.particles.bodies
+
+        # Simulation mit Schwerkraft in einer Box ohne Decke
+        self.simulation = Simulation(self.particles, box=(-4.5, 4.5, -4.5, np.inf), gravity=9.81)
+
+        # Starre Fäden zwischen den Körpern
+        self.rods = self.simulation.add_constraints(DistanceConstraints(iterations=10))
+
+        # Körper, Fäden und Pfeile werden je mit einem einzigen Auftrag gezeichnet
+        self.circles = CircleBatch()
+        self.rod_lines = LineBatch(arcade.color.YELLOW)
+        self.velocity_lines = LineBatch(arcade.color.GREEN)
+        self.force_lines = LineBatch(arcade.color.BARN_RED)
 
         # Simulationszeit in Sekunden
         self.t = 0
         
+        # Fester Zeitschritt der Physik in Sekunden, höchstens 5 Schritte pro Bild
+        self.timestep = FixedTimestep(1 / 60, max_substeps=5, snapshot=lambda: self.particles.positions)
+        
         # Simulationsstatus (0 = Pause, 1 = Ausführen)
         self.state = 0
         
-        # FPS-Berechnung mit gleitendem Durchschnitt
-        self.fps_history = [0] * 30
+        # Zeitmessung für die FPS-Anzeige. Mit profile=True wird auch gemessen,
+        # wie lange die Teile von on_update dauern (siehe physik/zeitmessung.py).
+        self.profiler = PhaseTimer(enabled=profile)
+        self.profile_panel = TextPanel()
+        self.simulation.profiler = self.profiler
         
         # UI-Manager zur Steuerung der Benutzeroberfläche (Buttons)
         self.uimanager = arcade.gui.UIManager() 
@@ -229,13 +136,11 @@ class AnimationWindow(arcade.Window):
         self.uimanager.add(anchor)
 
         # Initialisiere zwei Körper
-        ball1 = Body([0, 2], [2, 3], mass=1.0, radius=0.1, fixed=True, color=arcade.color.BLACK)
-        ball2 = Body([2, 1], [-2, -1], mass=1.0, radius=0.3, color=arcade.color.BLUE)
-        
-        self.bodies.extend([ball1, ball2])
+        ball1 = self.particles.add_body([0, 2], [0, 0], mass=1.0, radius=0.1, fixed=True, color=arcade.color.BLACK)
+        ball2 = self.particles.add_body([2, 1], [-2, -1], mass=1.0, radius=0.3, color=arcade.color.BLUE)
 
-        int12 = Spring(ball1, ball2, k=100.0, damping=0.9)
-        self.interactions.extend([int12])
+        # Der Faden behält den Abstand, den die Körper zu Beginn haben
+        self.rods.add(ball1, ball2)
 
     
     # Passt die Ursprungsposition bei Fenstergrößenänderung an
@@ -265,6 +170,12 @@ class AnimationWindow(arcade.Window):
     def on_draw(self):
         self.clear()
         
+        # Positionen zwischen den letzten beiden Physikschritten interpolieren
+        positions = self.timestep.interpolated()
+        
+        # Resultierende Kraft: Schwerkraft und Fadenkraft
+        forces = self.particles.forces + self.rods.forces(self.particles.positions)
+        
         # Zeichnet die Benutzeroberfläche
         self.uimanager.draw() 
         
@@ -283,30 +194,26 @@ class AnimationWindow(arcade.Window):
         arcade.draw_text(f"t = {time} s", x, y, arcade.color.BLACK)
         
         # Zeigt die FPS an
-        fps = round(sum(self.fps_history) / len(self.fps_history), 1)
+        fps = round(self.profiler.fps(), 1)
         x, y = self.meter_to_pixel(-9, 2.5)
         arcade.draw_text(f"FPS = {fps}", x, y, arcade.color.BLACK)
         
         # Zeichnet alle Körper in der Szene
-        for body in self.bodies:
-            x, y = self.meter_to_pixel(body.position[0], body.position[1])
-            r = body.radius * self.scale_factor
-            arcade.draw_circle_filled(x, y, r, body.color)
+        if self.circles.count != len(self.particles):
+            self.circles.set_bodies(self.particles.radii, self.particles.colors)
+        self.circles.draw(positions, self.center_point, self.scale_factor)
 
-            # zeichne die Geschwindigkeit
-            arcade.draw_line(x, y, x + 2*body.velocity[0], y + 2*body.velocity[1] , arcade.color.GREEN, 2)
-            
-            # zeichne die resultierende Kraft
-            arcade.draw_line(x, y, x + 2*body.force[0], y + 2*body.force[1] , arcade.color.BARN_RED, 2)
-        
+        # Geschwindigkeit und resultierende Kraft als Pfeile (2 Pixel pro m/s bzw. N)
+        velocities = self.particles.velocities
+        self.velocity_lines.draw(arrows(positions, 2 * velocities / self.scale_factor), self.center_point, self.scale_factor)
+        self.force_lines.draw(arrows(positions, 2 * forces / self.scale_factor), self.center_point, self.scale_factor)
 
-        # Zeichnet die Federn
-        for interaction in self.interactions:
-            xA, yA = self.meter_to_pixel(interaction.bodyA.position[0], interaction.bodyA.position[1])
-            xB, yB = self.meter_to_pixel(interaction.bodyB.position[0], interaction.bodyB.position[1])
-            
-            arcade.draw_line(xA, yA, xB, yB , interaction.color, 2)
-     
+        # Zeichnet die Fäden. `segments` liefert Anfangs- und Endpunkt jedes
+        # Fadens abwechselnd hintereinander.
+        self.rod_lines.draw(self.rods.segments(positions), self.center_point, self.scale_factor)
+
+        # Zeigt die Zeitmessung oben rechts über allem an (nur mit profile=True)
+        self.profile_panel.draw(self.profiler.lines(), self.width - 10, self.height - 10)
 
     # Aktualisiert die Simulation um einen Zeitschritt
     def on_update(self, dt):
@@ -314,42 +221,20 @@ class AnimationWindow(arcade.Window):
         if self.state != 1:
             return
         
-        # FPS berechnen und als gleitenden Durchschnitt speichern
-        self.fps_history.append(1.0/dt)               
-        self.fps_history.pop(0)
-        
-        # Setzt die Kräfte aller Körper auf null
-        for body in self.bodies:
-            body.clear_force()
-        
+        # Startet die Zeitmessung für dieses Bild
+        self.profiler.start()
         
-        # Aktualisiert die Kollisionen
-        for interacion in self.interactions:
-            interacion.update()
-            
-        # Berechnet die Kräfte und aktualisiert die Bewegungen der Objekte
-        for body in self.bodies:
-            F_G = np.array([0.0, -body.mass * 9.81])  # Schwerkraft
-            body.add_force(F_G)
+        # Berechnet so viele Schritte mit festem Zeitschritt, wie in dt passen.
+        # Ein Schritt berechnet die Schwerkraft, den Euler-Cromer-Schritt, die
+        # Korrektur der Fäden und die Stösse mit den Wänden der Box.
+        self.timestep.advance(dt, self.simulation.step)
 
-            body.update_ec(dt)  # Aktualisiert Position und Geschwindigkeit
+        # Simulationszeit
+        self.t = self.simulation.t
         
-        # Überprüft und verarbeitet Kollisionen mit dem Boden
-        for body in self.bodies:
-            if body.position[1] < -4.5 + body.radius:
-                body.position[1] = -4.5 + body.radius
-                body.velocity[1] *= -1
-                
-            # Überprüft die Kollisionen mit den Seitenwänden
-            if body.position[0] > 4.5 - body.radius:
-                body.position[0] = 4.5 - body.radius
-                body.velocity[0] *= -1
-            elif body.position[0] < -4.5 + body.radius:
-                body.position[0] = -4.5 + body.radius
-                body.velocity[0] *= -1
-            
-        # Erhöht die Simulationszeit
-        self.t += dt  
+        # Beendet die Zeitmessung für dieses Bild
+        self.profiler.count("Teilchen", len(self.particles))
+        self.profiler.stop(dt)
 
 
 if __name__ == "__main__":
@@ -359,6 +244,12 @@ if __name__ == "__main__":
     # starte die Simulation
     arcade.run()
 
+    # Mit `profile=True` zeigt das Fenster, wie lange die Teile von
+    # `on_update` dauern. Nach dem Schliessen werden die Messwerte der
+    # letzten Bilder in eine CSV-Datei geschrieben.
+    if window.profiler.enabled:
+        window.profiler.save_csv("profil.csv")
+
 
 
 
@@ -368,10 +259,10 @@ if __name__ == "__main__":
 # ____________________\
 
 # In diesem Kapitel haben wir das Verhalten eines Fadenpendels simuliert, das unter
-# dem Einfluss der Schwerkraft und der Seilkraft schwingt. Durch die Dämpfungskraft
-# werden die Schwingungen allmählich abgebremst, was für Stabilität sorgt. Die 
-# Verwendung einer hohen Federkonstanten für das Seil stellt sicher, dass das Pendel 
-# auf einer festen Länge bleibt.
+# dem Einfluss der Schwerkraft und der Seilkraft schwingt. Statt den Faden als
+# steife Feder zu simulieren, wird seine Länge nach jedem Schritt direkt
+# erzwungen. So bleibt das Pendel auch mit einem Zeitschritt pro Bild auf einer
+# festen Länge.
 
 
 
@@ -387,9 +278,9 @@ if __name__ == "__main__":
 # Aufgabe 1  /
 # __________/
 #
-# Experimentiere mit verschiedenen Längen und Dämpfungswerten, um zu sehen, 
-# wie sich das Schwingungsverhalten ändert. Versuche auch die Federkonstante 
-# des Seils zu variieren und beobachte die Stabilität der Simulation.
+# Experimentiere mit verschiedenen Längen, um zu sehen, wie sich das 
+# Schwingungsverhalten ändert. Versuche auch den Faden mit `compliance` 
+# nachgiebig zu machen und beobachte die Stabilität der Simulation.
 
 # Füge hier deine Lösung ein.
 
@@ -470,22 +361,23 @@ if __name__ == "__main__":
 # Lösung:
 # 
 # Um das Schwingungsverhalten zu untersuchen, experimentiere ich mit verschiedenen 
-# Längen, Dämpfungswerten und Federkonstanten. Der Einfachheit halber setze ich die 
-# neuen Werte direkt in der Initialisierung der Klasse `Interaction` ein. 
+# Längen und Nachgiebigkeiten. Der Einfachheit halber setze ich die neuen Werte
+# direkt beim Hinzufügen des Fadens ein. 
 
 # Beispielhafte Änderungen:
-# - Erhöhe die Länge des Pendels (rest_length) auf 3.0
-# - Setze die Dämpfung auf 0.5 (restitution)
-# - Reduziere die Federkonstante k auf 50 für ein weicheres Pendel
+# - Erhöhe die Länge des Pendels (length) auf 3.0
+# - Setze die Nachgiebigkeit (compliance) auf 0.01 m/N. Das entspricht einer
+#   Feder mit k = 1 / 0.01 = 100 N/m, wie sie früher verwendet wurde.
 
 # Code zum Einfügen in die Initialisierung:
-int12 = Interaction(ball1, ball2, k=50.0, rest_length=3.0, restitution=0.5)
-self.interactions.append(int12)
+self.rods.add(ball1, ball2, length=3.0, compliance=0.01)
 
 # Durch diese Modifikation lässt sich das Schwingungsverhalten in Bezug auf
-# die Länge, Dämpfung und Festigkeit des Seils variieren. Eine hohe Federkonstante
-# und geringe Dämpfung erhöhen die Frequenz, während eine größere Länge und
-# höhere Dämpfung zu langsameren und gedämpfteren Schwingungen führen.
+# die Länge und Festigkeit des Seils variieren. Eine grössere Länge führt zu
+# langsameren Schwingungen. Ein nachgiebiger Faden dehnt sich und das Pendel
+# hüpft zusätzlich auf und ab. Die Simulation bleibt aber auch mit einem
+# Zeitschritt pro Bild stabil, weil die Nachgiebigkeit wie beim starren Faden
+# als Korrektur der Positionen berechnet wird.
 '''
 
 
@@ -503,12 +395,10 @@ self.interactions.append(int12)
 # chaotische Schwingungen.
 
 # Code zum Einfügen in die Initialisierung:
-ball3 = Body([4, 1], [1, -1], mass=1.0, radius=0.3, color=arcade.color.RED)
-self.bodies.append(ball3)
+ball3 = self.particles.add_body([4, 1], [1, -1], mass=1.0, radius=0.3, color=arcade.color.RED)
 
-# Füge eine neue Interaktion hinzu, um ball2 und ball3 zu verbinden:
-int23 = Interaction(ball2, ball3, k=100.0, rest_length=2.0, restitution=0.9)
-self.interactions.append(int23)
+# Füge einen neuen Faden hinzu, um ball2 und ball3 zu verbinden:
+self.rods.add(ball2, ball3, length=2.0)
 
 # Dies erzeugt ein doppelt aufgehängtes Pendel. Das Zusammenspiel beider 
 # Pendelabschnitte führt zu komplexeren Bewegungsmustern, die aufgrund der
@@ -11,153 +11,51 @@
 # Auswirkungen von Parametern wie Länge, Masse und Dämpfung.
 
 
+# Wie beim Fadenpendel (Lektion 13.8.1) sind die Fäden keine steifen Federn,
+# sondern starre Fäden aus `physik.stangen`. Ihre Länge wird nach jedem Schritt
+# erzwungen, so dass die Pendel auch mit einem Zeitschritt pro Bild ihre Länge
+# behalten.
+#
+# Auf dieselbe Weise lassen sich auch lange Ketten simulieren. Die Funktion
+# `rope` aus `physik.federn` liefert die Positionen und die Kantenliste einer
+# Kette aus n Körpern, z.B. mit 200 Gliedern:
+#
+#        positions, edges = rope(201, start=(0, 4), end=(4, 4))
+#        bodies = self.particles.add_bodies(positions, np.zeros_like(positions), mass=0.01, radius=0.02)
+#        bodies[0].fixed = True
+#        self.rods.add_edges(edges, positions)
+#
+# Mit `iterations` wird festgelegt, wie oft die Längen pro Schritt korrigiert
+# werden. Mehr Iterationen geben eine weniger dehnbare Kette, kosten aber mehr
+# Rechenzeit. Bei langen Ketten hilft ein kleinerer Zeitschritt noch mehr
+# (siehe `python -m physik.stangen`).
+#
+# Wie chaotisch das Doppelpendel ist, zeigt eine Karte: Für jeden Startwinkel
+# der beiden Arme wird gemessen, wann sich ein Arm zum ersten Mal überschlägt.
+# Das Modul `physik.doppelpendel` rechnet dafür eine Million Pendel mit
+# denselben Längen und Massen gleichzeitig und speichert die Karte als Bild:
+#
+#        python -m physik.doppelpendel --n 1000 --out karte.png
+
+
 
 import arcade
 import arcade.gui 
 import numpy as np
 
+from physik.darstellung import CircleBatch, LineBatch, TextPanel, arrows
+from physik.partikel import ParticleSystem
+from physik.simulation import Simulation
+from physik.stangen import DistanceConstraints
+from physik.zeitmessung import PhaseTimer
+from physik.zeitschritt import FixedTimestep
 
-# Die Klasse `Body` modelliert ein physikalisches Objekt in der Simulation, 
-# das durch seine Position, Geschwindigkeit und Masse beschrieben wird.
-
-class Body:
-    def __init__(self, position, velocity, mass=1.0, radius=1.0, fixed=False, color=arcade.color.BLUE):
-        self.mass = mass                                 # Masse in kg
-        self.position = np.array(position, dtype=float)  # Position in m
-        self.velocity = np.array(velocity, dtype=float)  # Geschwindigkeit in m/s
-        self.acceleration = np.array([0.0, 0.0])         # Beschleunigung in m/s^2
-        self.force = np.array([0.0, 0.0])                # Resultierende Kraft in N
-        self.radius = radius    # Radius des Körpers in m
-        self.fixed = fixed      # Körper wird festgehalten
-        self.color = color      # Farbe für die Darstellung
-        self.trace = []         # Liste für die Spur
-        
-
-    # Setzt die resultierende Kraft auf null
-    def clear_force(self):
-        self.force = np.array([0.0, 0.0])
-
-
-    # Fügt eine Kraft zum Objekt hinzu, z.B. die Schwerkraft
-    def add_force(self, force):
-        self.force += np.array(force, dtype=float)
-
-
-    # Berechnet die neue Geschwindigkeit und Position mithilfe des 
-    # Euler-Cromer-Verfahrens, wobei die Beschleunigung auf Basis der Kraft 
-    # und Masse aktualisiert wird.
-    def update_ec(self, dt):
-        if self.fixed:
-            self.force = np.array([0.0, 0.0]) 
-            self.velocity = np.array([0.0, 0.0]) 
-            return
-        
-        self.acceleration = self.force / self.mass
-        self.velocity += self.acceleration * dt
-        self.position += self.velocity * dt
-        
-
-# Die Klasse `Interaction` ist die Basisklasse für alle Wechselwirkungen. 
-class Interaction:
-    def __init__(self, bodyA, bodyB):
-        self.bodyA = bodyA
-        self.bodyB = bodyB
-
-    def update(self):
-        pass
-
-
-
-# Die Klasse `Spring` simuliert eine Feder zwischen zwei Körpern. 
-class Spring(Interaction):
-
-    def __init__(self, bodyA, bodyB, k=1.0, length=None, damping=0.9, color=arcade.color.YELLOW):
-        super().__init__(bodyA, bodyB)
 
-        self.k = k # Federkonstante
-        
-        # Ursprungslänge der Feder
-        if length is None:
-            self.length = np.linalg.norm(bodyA.position - bodyB.position)
-        else:
-            self.length = length
-        
-        self.damping = damping # Dämpfungskonstante
-        
-        self.color = color 
-
-
-    def calculate_spring_force(self):
-        # Berechnet die Federkraft nach dem Hookeschen Gesetz.
-        r_vector = self.bodyB.position - self.bodyA.position
-        distance = np.linalg.norm(r_vector)
-        extension = distance - self.length  # Auslenkung der Feder
-
-        # Berechnet die Federkraft basierend auf der Auslenkung
-        force_magnitude = -self.k * extension
-        force_direction = r_vector / distance  # Einheitsvektor in Richtung des Abstandsvektors
-
-        # Dämpfungskraft parallel zur Federkraft
-        v_rel = self.bodyB.velocity - self.bodyA.velocity
-        force_magnitude += -self.damping * np.dot(v_rel, force_direction)
-        
-        # Berechne die Federkraft
-        return force_magnitude * force_direction
-
-
-    def update(self):
-        force = self.calculate_spring_force()
-        self.bodyA.add_force(-force)
-        self.bodyB.add_force(force)
-    
-
-
-# Die Klasse `Collision` verwaltet die Kollisionserkennung und -berechnung 
-# zwischen zwei Körpern.
-class Collision(Interaction):
-
-    def __init__(self, bodyA, bodyB, restitution=1.0):
-        super().__init__(bodyA, bodyB)
-        self.restitution = restitution
-
-
-    def check_collision(self):
-        # Prüft, ob zwei Körper kollidieren.
-        distance = np.linalg.norm(self.bodyA.position - self.bodyB.position)
-        return distance <= (self.bodyA.radius + self.bodyB.radius)
-
-
-    def resolve_collision(self):
-        # Berechnet die neuen Geschwindigkeiten der beiden Körper nach einer Kollision.
-        normal = (self.bodyB.position - self.bodyA.position) / np.linalg.norm(self.bodyB.position - self.bodyA.position)
-        relative_velocity = self.bodyA.velocity - self.bodyB.velocity
-        velocity_along_normal = np.dot(relative_velocity, normal)
-
-        # Berechnet nur, wenn die Körper aufeinander zu bewegen
-        if velocity_along_normal < 0:
-            return
-
-        # Impulsberechnung
-        impulse = ((1 + self.restitution) * velocity_along_normal) / (1 / self.bodyA.mass + 1 / self.bodyB.mass)
-        impulse_vector = impulse * normal
-
-        # Aktualisiert die Geschwindigkeit der beiden Körper
-        self.bodyA.velocity -= (impulse_vector / self.bodyA.mass)
-        self.bodyB.velocity += (impulse_vector / self.bodyB.mass)
-
-
-    # Überprüft und berechnet die Kollision, falls nötig
-    def update(self):
-        if self.check_collision():
-            self.resolve_collision()
-
-
-    
 # Die Klasse `AnimationWindow` steuert die grafische Darstellung und die Simulation 
 # der Partikelbewegungen.
 class AnimationWindow(arcade.Window):
 
-    def __init__(self, width, height, title):
+    def __init__(self, width, height, title, profile=False):
         super().__init__(width, height, title, resizable=True)
         
         # Hintergrundfarbe des Fensters auf Weiß setzen
@@ -169,23 +67,36 @@ class AnimationWindow(arcade.Window):
         # Ursprung des Koordinatensystems in die Mitte des Fensters setzen
         self.center_point = [width // 2 + 100, height // 2]  
         
-        # Liste für alle zu simulierenden Körper
-        self.bodies = []
-        
-        # Liste für alle Interaktionen zwischen den Körpern
-        self.interactions = []  
+        # Alle Körper werden gemeinsam im Partikelsystem gespeichert
+        self.particles = ParticleSystem()
+        self.bodies = self.particles.bodies
+
+        # Simulation mit Schwerkraft in einer Box ohne Decke
+        self.simulation = Simulation(self.particles, box=(-4.5, 4.5, -4.5, np.inf), gravity=9.81)
+
+        # Starre Fäden zwischen den Körpern
+        self.rods = self.simulation.add_constraints(DistanceConstraints(iterations=10))
+
+        # Körper, Fäden und Pfeile werden je mit einem einzigen Auftrag gezeichnet
+        self.circles = CircleBatch()
+        self.rod_lines = LineBatch(arcade.color.YELLOW)
+        self.velocity_lines = LineBatch(arcade.color.GREEN)
+        self.force_lines = LineBatch(arcade.color.BARN_RED)
 
         # Simulationszeit in Sekunden
         self.t = 0
         
-        # Zeitschritt in Sekunden
-        self.dt = 0.01
+        # Fester Zeitschritt der Physik in Sekunden, höchstens 5 Schritte pro Bild
+        self.timestep = FixedTimestep(1 / 60, max_substeps=5, snapshot=lambda: self.particles.positions)
         
         # Simulationsstatus (0 = Pause, 1 = Ausführen)
         self.state = 0
         
-        # FPS-Berechnung mit gleitendem Durchschnitt
-        self.fps_history = [0] * 30
+        # Zeitmessung für die FPS-Anzeige. Mit profile=True wird auch gemessen,
+        # wie lange die Teile von on_update dauern (siehe physik/zeitmessung.py).
+        self.profiler = PhaseTimer(enabled=profile)
+        self.profile_panel = TextPanel()
+        self.simulation.profiler = self.profiler
         
         self.frame = 0
         
@@ -199,6 +110,7 @@ class AnimationWindow(arcade.Window):
         
         anchor.add(box,anchor_x="left")
         
+        
         # Start/Stop-Button erstellen
         self.start_button = arcade.gui.UIFlatButton(text="Start", height=30)
         self.start_button.on_click = self.on_click_start
@@ -208,17 +120,17 @@ class AnimationWindow(arcade.Window):
         # UI-Komponenten zur Benutzeroberfläche hinzufügen
         self.uimanager.add(anchor)
 
-        # Initialisiere die Körper und Wechselwirkungen
-        ball1 = Body([0, 1], [0, 0], mass=0.1, radius=0.1, fixed=True, color=arcade.color.BLACK)
-        ball2 = Body([0, 2.5], [0, 0], mass=0.2, radius=0.2, color=arcade.color.BLUE)
-        ball3 = Body([0, 4], [-2, 0], mass=0.1, radius=0.2, color=arcade.color.RED)
-        
-        self.bodies.extend([ball1, ball2, ball3])
-        
-        int12 = Spring(ball1, ball2, k=300.0, damping=0.98)
-        int23 = Spring(ball2, ball3, k=300.0, damping=0.98)
+        # Initialisiere die Körper und Fäden
+        ball1 = self.particles.add_body([0, 1], [0, 0], mass=0.1, radius=0.1, fixed=True, color=arcade.color.BLACK)
+        ball2 = self.particles.add_body([0, 2.5], [0, 0], mass=0.2, radius=0.2, color=arcade.color.BLUE)
+        ball3 = self.particles.add_body([0, 4], [-2, 0], mass=0.1, radius=0.2, color=arcade.color.RED)
         
-        self.interactions.extend([int12,int23])
+        self.rods.add(ball1, ball2)
+        self.rods.add(ball2, ball3)
+
+        # Liste für die Spur jedes Körpers
+        for body in self.bodies:
+            body.trace = []
 
     
     # Passt die Ursprungsposition bei Fenstergrößenänderung an
@@ -248,6 +160,12 @@ class AnimationWindow(arcade.Window):
     def on_draw(self):
         self.clear()
         
+        # Positionen zwischen den letzten beiden Physikschritten interpolieren
+        positions = self.timestep.interpolated()
+        
+        # Resultierende Kraft: Schwerkraft und Fadenkraft
+        forces = self.particles.forces + self.rods.forces(self.particles.positions)
+        
         # Zeichnet die Benutzeroberfläche
         self.uimanager.draw() 
         
@@ -266,44 +184,39 @@ class AnimationWindow(arcade.Window):
         arcade.draw_text(f"t = {time} s", x, y, arcade.color.BLACK)
         
         # Zeigt die FPS an
-        fps = round(sum(self.fps_history) / len(self.fps_history), 1)
+        fps = round(self.profiler.fps(), 1)
         x, y = self.meter_to_pixel(-9, 2.5)
         arcade.draw_text(f"FPS = {fps}", x, y, arcade.color.BLACK)
-
-        # Zeichnet die Federn
-        for interaction in self.interactions:
-            xA, yA = self.meter_to_pixel(interaction.bodyA.position[0], interaction.bodyA.position[1])
-            xB, yB = self.meter_to_pixel(interaction.bodyB.position[0], interaction.bodyB.position[1])
-            
-            arcade.draw_line(xA, yA, xB, yB , interaction.color, 2)
         
         # Zeichnet alle Körper in der Szene
-        for body in self.bodies:
-            x, y = self.meter_to_pixel(body.position[0], body.position[1])
-            r = body.radius * self.scale_factor
-            arcade.draw_circle_filled(x, y, r, body.color)
+        if self.circles.count != len(self.particles):
+            self.circles.set_bodies(self.particles.radii, self.particles.colors)
+        self.circles.draw(positions, self.center_point, self.scale_factor)
 
-            # zeichne die Geschwindigkeit
-            arcade.draw_line(x, y, x + 2*body.velocity[0], y + 2*body.velocity[1] , arcade.color.GREEN, 2)
-            
-            # zeichne die resultierende Kraft
-            arcade.draw_line(x, y, x + 2*body.force[0], y + 2*body.force[1] , arcade.color.BARN_RED, 2)
-        
-            # speichere die Spur ab
+        # Geschwindigkeit und resultierende Kraft als Pfeile (2 Pixel pro m/s bzw. N)
+        velocities = self.particles.velocities
+        self.velocity_lines.draw(arrows(positions, 2 * velocities / self.scale_factor), self.center_point, self.scale_factor)
+        self.force_lines.draw(arrows(positions, 2 * forces / self.scale_factor), self.center_point, self.scale_factor)
+
+        # Speichert die Spuren ab und zeichnet sie
+        for body, position in zip(self.bodies, positions):
             if body.fixed:
                 continue
             
             if self.frame % 1 == 0:
-                body.trace.append(body.position.copy())
+                body.trace.append(position.copy())
                 if len(body.trace) > 50:
                     body.trace.pop(0)
             
-            # zeichne die Spur
-            for pos in body.trace:
-                x1, y1 = self.meter_to_pixel(pos[0], pos[1])
-                arcade.draw_point(x1, y1, color=body.color, size=2)
-                
+            trace = [self.meter_to_pixel(pos[0], pos[1]) for pos in body.trace]
+            arcade.draw_points(trace, body.color, 2)
 
+        # Zeichnet die Fäden. `segments` liefert Anfangs- und Endpunkt jedes
+        # Fadens abwechselnd hintereinander.
+        self.rod_lines.draw(self.rods.segments(positions), self.center_point, self.scale_factor)
+
+        # Zeigt die Zeitmessung oben rechts über allem an (nur mit profile=True)
+        self.profile_panel.draw(self.profiler.lines(), self.width - 10, self.height - 10)
 
     # Aktualisiert die Simulation um einen Zeitschritt
     def on_update(self, dt):
@@ -311,48 +224,23 @@ class AnimationWindow(arcade.Window):
         if self.state != 1:
             return
         
-        dt = self.dt
-        
-        # FPS berechnen und als gleitenden Durchschnitt speichern
-        self.fps_history.append(1.0/dt)               
-        self.fps_history.pop(0)
+        # Startet die Zeitmessung für dieses Bild
+        self.profiler.start()
         
-        # Setzt die Kräfte aller Körper auf null
-        for body in self.bodies:
-            body.clear_force()
-        
-        
-        # Aktualisiert die Kollisionen
-        for interacion in self.interactions:
-            interacion.update()
-            
-        # Berechnet die Kräfte und aktualisiert die Bewegungen der Objekte
-        for body in self.bodies:
-            F_G = np.array([0.0, -body.mass * 9.81])  # Schwerkraft
-            body.add_force(F_G)
+        # Berechnet so viele Schritte mit festem Zeitschritt, wie in dt passen.
+        # Ein Schritt berechnet die Schwerkraft, den Euler-Cromer-Schritt, die
+        # Korrektur der Fäden und die Stösse mit den Wänden der Box.
+        self.timestep.advance(dt, self.simulation.step)
 
-            body.update_ec(dt)  # Aktualisiert Position und Geschwindigkeit
-        
-        # Überprüft und verarbeitet Kollisionen mit dem Boden
-        for body in self.bodies:
-            if body.position[1] < -4.5 + body.radius:
-                body.position[1] = -4.5 + body.radius
-                body.velocity[1] *= -1
-                
-            # Überprüft die Kollisionen mit den Seitenwänden
-            if body.position[0] > 4.5 - body.radius:
-                body.position[0] = 4.5 - body.radius
-                body.velocity[0] *= -1
-            elif body.position[0] < -4.5 + body.radius:
-                body.position[0] = -4.5 + body.radius
-                body.velocity[0] *= -1
-            
-        # Erhöht die Simulationszeit
-        self.t += dt
+        # Simulationszeit
+        self.t = self.simulation.t
         
         # erhöhre die Framenummer
         self.frame += 1
-
+        
+        # Beendet die Zeitmessung für dieses Bild
+        self.profiler.count("Teilchen", len(self.particles))
+        self.profiler.stop(dt)
 
 
 if __name__ == "__main__":
@@ -362,6 +250,12 @@ if __name__ == "__main__":
     # starte die Simulation
     arcade.run()
 
+    # Mit `profile=True` zeigt das Fenster, wie lange die Teile von
+    # `on_update` dauern. Nach dem Schliessen werden die Messwerte der
+    # letzten Bilder in eine CSV-Datei geschrieben.
+    if window.profiler.enabled:
+        window.profiler.save_csv("profil.csv")
+
 
 
 
@@ -372,7 +266,7 @@ if __name__ == "__main__":
 # __________________________\
 #
 # Das Doppelpendel zeigt chaotisches Verhalten durch die Interaktion von zwei Massen,
-# die über Federn verbunden sind. Die Bewegung hängt stark von der Anfangsposition und
+# die über Fäden verbunden sind. Die Bewegung hängt stark von der Anfangsposition und
 # den Systemparametern ab, was zu komplexen, oft unvorhersehbaren Bewegungen führt.
 
 
@@ -388,7 +282,7 @@ if __name__ == "__main__":
 # Aufgabe 1  /
 # __________/
 #
-# Experimentiere mit verschiedenen Anfangspositionen, Federkonstanten und Längen, 
+# Experimentiere mit verschiedenen Anfangspositionen, Massen und Längen, 
 # um die Bewegung des Doppelpendels zu beeinflussen. Beobachte, wie sich die 
 # Stabilität und das Verhalten der Bewegung verändern.
 
@@ -403,7 +297,7 @@ if __name__ == "__main__":
 # __________/
 #
 # Füge in der Simulation eine Kette aus mehreren Massen hinzu, die an zwei Enden 
-# fixiert ist. Diese Kette soll aus fünf Massen bestehen, die durch Federkräfte 
+# fixiert ist. Diese Kette soll aus fünf Massen bestehen, die durch Fäden 
 # verbunden sind. Die beiden äußeren Massen (an den Enden der Kette) sind fest 
 # fixiert und dienen als Verankerungspunkte, während die inneren Massen frei 
 # schwingen können. 
@@ -463,20 +357,17 @@ if __name__ == "__main__":
 # Mit diesen Einstellungen können Sie die Auswirkungen verschiedener Parameter auf 
 # die Stabilität und die chaotische Natur des Systems untersuchen. Je nach Werten 
 # können Sie eine stärkere oder schwächere Schwingung und unterschiedliche chaotische 
-# Bewegungen beobachten. Ersetze dazu zum Beispiel die Zeilen 176 bis 186 mit:
+# Bewegungen beobachten. Ersetze dazu zum Beispiel in `__init__` die Körper
+# und Fäden mit:
 #
 '''
-        # Initialisiere die Körper und Wechselwirkungen
-        ball1 = Body([0, 1], [0, 0], mass=0.1, radius=0.1, fixed=True, color=arcade.color.BLACK)
-        ball2 = Body([0, 2.5], [0, 0], mass=0.2, radius=0.2, color=arcade.color.BLUE)
-        ball3 = Body([0, 5], [-2, 0], mass=0.1, radius=0.2, color=arcade.color.RED)
+        # Initialisiere die Körper und Fäden
+        ball1 = self.particles.add_body([0, 1], [0, 0], mass=0.1, radius=0.1, fixed=True, color=arcade.color.BLACK)
+        ball2 = self.particles.add_body([0, 2.5], [0, 0], mass=0.2, radius=0.2, color=arcade.color.BLUE)
+        ball3 = self.particles.add_body([0, 5], [-2, 0], mass=0.1, radius=0.2, color=arcade.color.RED)
         
-        self.bodies.extend([ball1, ball2, ball3])
-        
-        int12 = Spring(ball1, ball2, k=300.0, damping=0.98)
-        int23 = Spring(ball2, ball3, k=300.0, damping=0.98)
-        
-        self.interactions.extend([int12,int23])
+        self.rods.add(ball1, ball2)
+        self.rods.add(ball2, ball3)
 '''
 
 
@@ -487,30 +378,31 @@ if __name__ == "__main__":
 # __________/
 #
 # Füge in der Simulation eine Kette aus mehreren Massen hinzu, die an zwei Enden 
-# fixiert ist. Diese Kette soll aus fünf Massen bestehen, die durch Federkräfte 
+# fixiert ist. Diese Kette soll aus fünf Massen bestehen, die durch Fäden 
 # verbunden sind. Die beiden äußeren Massen (an den Enden der Kette) sind fest 
 # fixiert und dienen als Verankerungspunkte, während die inneren Massen frei 
 # schwingen können. 
 
 '''
 # Lösung:
-# Füge dazu weitere Body- und Interaction-Objekte hinzu, sodass eine Kette von 
-# Körpern entsteht. Ersetze die Zeilen 176 bis 186 mit:
+# Füge dazu weitere Körper und Fäden hinzu, sodass eine Kette von Körpern
+# entsteht. Die Fäden sind länger als der Abstand der Körper, damit die Kette
+# durchhängt. Ersetze in `__init__` die Körper und Fäden mit:
 
         # Initialisiere die Körper
-        ball1 = Body([-2, 1], [0, 0], mass=0.1, radius=0.1, fixed=True, color=arcade.color.BLACK)
-        ball2 = Body([-1, 1], [0, 0], mass=0.2, radius=0.2, color=arcade.color.BLUE)
-        ball3 = Body([0, 1], [0, 0], mass=0.2, radius=0.2, color=arcade.color.BLUE)
-        ball4 = Body([1, 1], [0, 0], mass=0.2, radius=0.2, color=arcade.color.BLUE)
-        ball5 = Body([2, 1], [0, 0], mass=0.1, radius=0.1, fixed=True, color=arcade.color.BLACK)
-
-        self.bodies.extend([ball1, ball2, ball3, ball4, ball5])
-
-        int12 = Spring(ball1, ball2, k=20.0, length=1.5)
-        int23 = Spring(ball2, ball3, k=20.0, length=1.5)
-        int34 = Spring(ball3, ball4, k=20.0, length=1.5)
-        int45 = Spring(ball4, ball5, k=20.0, length=1.5)
-        self.interactions.extend([int12, int23, int34, int45])
+        ball1 = self.particles.add_body([-2, 1], [0, 0], mass=0.1, radius=0.1, fixed=True, color=arcade.color.BLACK)
+        ball2 = self.particles.add_body([-1, 1], [0, 0], mass=0.2, radius=0.2, color=arcade.color.BLUE)
+        ball3 = self.particles.add_body([0, 1], [0, 0], mass=0.2, radius=0.2, color=arcade.color.BLUE)
+        ball4 = self.particles.add_body([1, 1], [0, 0], mass=0.2, radius=0.2, color=arcade.color.BLUE)
+        ball5 = self.particles.add_body([2, 1], [0, 0], mass=0.1, radius=0.1, fixed=True, color=arcade.color.BLACK)
+
+        self.rods.add(ball1, ball2, length=1.5)
+        self.rods.add(ball2, ball3, length=1.5)
+        self.rods.add(ball3, ball4, length=1.5)
+        self.rods.add(ball4, ball5, length=1.5)
+
+        for body in self.bodies:
+            body.trace = []
 
 '''
 
@@ -32,141 +32,42 @@
 
 import arcade
 import arcade.gui 
-import numpy as np
-
-
-# Die Klasse `Body` modelliert ein physikalisches Objekt in der Simulation, 
-# das durch seine Position, Geschwindigkeit und Masse beschrieben wird.
-
-class Body:
-    def __init__(self, position, velocity, mass=1.0, radius=1.0, fixed=False, color=arcade.color.BLUE):
-        self.mass = mass                                 # Masse in kg
-        self.position = np.array(position, dtype=float)  # Position in m
-        self.velocity = np.array(velocity, dtype=float)  # Geschwindigkeit in m/s
-        self.acceleration = np.array([0.0, 0.0])         # Beschleunigung in m/s^2
-        self.force = np.array([0.0, 0.0])                # Resultierende Kraft in N
-        self.radius = radius    # Radius des Körpers in m
-        self.fixed = fixed      # Körper wird festgehalten
-        self.color = color      # Farbe für die Darstellung
-        
-
-    # Setzt die resultierende Kraft auf null
-    def clear_force(self):
-        self.force = np.array([0.0, 0.0])
-
-
-    # Fügt eine Kraft zum Objekt hinzu, z.B. die Schwerkraft
-    def add_force(self, force):
-        self.force += np.array(force, dtype=float)
-
-
-    # Berechnet die neue Geschwindigkeit und Position mithilfe des 
-    # Euler-Cromer-Verfahrens, wobei die Beschleunigung auf Basis der Kraft 
-    # und Masse aktualisiert wird.
-    def update_ec(self, dt):
-        if self.fixed:
-            self.force = np.array([0.0, 0.0]) 
-            self.velocity = np.array([0.0, 0.0]) 
-            return
-        
-        self.acceleration = self.force / self.mass
-        self.velocity += self.acceleration * dt
-        self.position += self.velocity * dt
-        
-
-# Die Klasse `Interaction` ist die Basisklasse für alle Wechselwirkungen. 
-class Interaction:
-    def __init__(self, bodyA, bodyB):
-        self.bodyA = bodyA
-        self.bodyB = bodyB
-
-    def update(self):
-        pass
-
-
-
-# Die Klasse `Spring` simuliert eine Feder zwischen zwei Körpern. 
-class Spring(Interaction):
-
-    def __init__(self, bodyA, bodyB, k=1.0, length=None, damping=0.9, color=arcade.color.YELLOW):
-        super().__init__(bodyA, bodyB)
-
-        self.k = k # Federkonstante
-        
-        # Ursprungslänge der Feder
-        if length is None:
-            self.length = np.linalg.norm(bodyA.position - bodyB.position)
-        else:
-            self.length = length
-        
-        self.damping = damping # Dämpfungskonstante
-        
-        self.color = color 
-
-
-    def calculate_spring_force(self):
-        # Berechnet die Federkraft nach dem Hookeschen Gesetz.
-        r_vector = self.bodyB.position - self.bodyA.position
-        distance = np.linalg.norm(r_vector)
-        extension = distance - self.length  # Auslenkung der Feder
-
-        # Berechnet die Federkraft basierend auf der Auslenkung
-        force_magnitude = -self.k * extension
-        force_direction = r_vector / distance  # Einheitsvektor in Richtung des Abstandsvektors
-
-        # Dämpfungskraft parallel zur Federkraft
-        v_rel = self.bodyB.velocity - self.bodyA.velocity
-        force_magnitude += -self.damping * np.dot(v_rel, force_direction)
-        
-        # Berechne die Federkraft
-        return force_magnitude * force_direction
-
-
-    def update(self):
-        force = self.calculate_spring_force()
-        self.bodyA.add_force(-force)
-        self.bodyB.add_force(force)
-    
-
-
-# Die Klasse `Collision` verwaltet die Kollisionserkennung und -berechnung 
-# zwischen zwei Körpern.
-class Collision(Interaction):
-
-    def __init__(self, bodyA, bodyB, restitution=1.0):
-        super().__init__(bodyA, bodyB)
-        self.restitution = restitution
-
-
-    def check_collision(self):
-        # Prüft, ob zwei Körper kollidieren.
-        distance = np.linalg.norm(self.bodyA.position - self.bodyB.position)
-        return distance <= (self.bodyA.radius + self.bodyB.radius)
-
-
-    def resolve_collision(self):
-        # Berechnet die neuen Geschwindigkeiten der beiden Körper nach einer Kollision.
-        normal = (self.bodyB.position - self.bodyA.position) / np.linalg.norm(self.bodyB.position - self.bodyA.position)
-        relative_velocity = self.bodyA.velocity - self.bodyB.velocity
-        velocity_along_normal = np.dot(relative_velocity, normal)
 
-        # Berechnet nur, wenn die Körper aufeinander zu bewegen
-        if velocity_along_normal < 0:
-            return
-
-        # Impulsberechnung
-        impulse = ((1 + self.restitution) * velocity_along_normal) / (1 / self.bodyA.mass + 1 / self.bodyB.mass)
-        impulse_vector = impulse * normal
-
-        # Aktualisiert die Geschwindigkeit der beiden Körper
-        self.bodyA.velocity -= (impulse_vector / self.bodyA.mass)
-        self.bodyB.velocity += (impulse_vector / self.bodyB.mass)
+from physik.darstellung import CircleBatch, LineBatch, TextPanel, arrows
+from physik.federn import SpringNetwork
+from physik.partikel import ParticleSystem
+from physik.simulation import Simulation
+from physik.zeitmessung import PhaseTimer
+from physik.zeitschritt import FixedTimestep
 
 
-    # Überprüft und berechnet die Kollision, falls nötig
-    def update(self):
-        if self.check_collision():
-            self.resolve_collision()
+# Die Körper werden wie in Lektion 13.6.2 gemeinsam in einem `ParticleSystem`
+# gespeichert. Auch die Federn sind keine einzelnen `Spring`-Objekte mehr,
+# sondern werden in einem `SpringNetwork` aus dem Paket `physik` als Arrays
+# abgelegt ("Kantenliste"):
+#
+#        i, j          Indizes der beiden Körper jeder Feder
+#        k             Federkonstanten
+#        rest_length   Ruhelängen
+#        damping       Dämpfungskonstanten
+#
+# Die Federkraft wird mit derselben Formel wie bisher berechnet,
+#
+#        F = (-k * (|r| - L) - c * v_rel · e) * e       mit e = r / |r|,
+#
+# aber für alle Federn gleichzeitig. Danach werden die Kräfte mit
+# `np.bincount` zu den Körpern addiert (siehe `physik/federn.py`). So lassen
+# sich auch weiche Körper aus tausenden Massen und Federn simulieren.
+#
+# Die Funktion `soft_body` aus `physik.szenen` erzeugt einen solchen Körper aus
+# n x n Massen, die in einem Gitter mit Federn verbunden sind. Ersetze dazu in
+# `__init__` die Simulation mit den drei Körpern durch
+#
+#        from physik.szenen import soft_body
+#        self.simulation = soft_body(n_side=20)
+#
+# Mit lattice="triangle" wird ein Dreiecksgitter statt eines Quadratgitters
+# verwendet.
 
 
     
@@ -174,7 +75,7 @@ class Collision(Interaction):
 # der Partikelbewegungen.
 class AnimationWindow(arcade.Window):
 
-    def __init__(self, width, height, title):
+    def __init__(self, width, height, title, profile=False):
         super().__init__(width, height, title, resizable=True)
         
         # Hintergrundfarbe des Fensters auf Weiß setzen
@@ -186,11 +87,16 @@ class AnimationWindow(arcade.Window):
         # Ursprung des Koordinatensystems in die Mitte des Fensters setzen
         self.center_point = [width // 2 + 100, height // 2]  
         
-        # Liste für alle zu simulierenden Körper
-        self.bodies = []
-        
-        # Liste für alle Interaktionen zwischen den Körpern
-        self.interactions = []  
+        # Simulation mit drei Körpern, die mit Federn verbunden sind
+        self.simulation = self.three_bodies()
+
+        # Partikelsystem, Körper (BodyView-Objekte) und Federnetz für die Darstellung
+        self.particles = self.simulation.particles
+        self.bodies = self.particles.bodies
+        self.springs = self.simulation.force_terms[0]
+
+        # Fester Zeitschritt der Physik, höchstens 20 Schritte pro Bild
+        self.timestep = FixedTimestep(0.002, max_substeps=20, snapshot=lambda: self.particles.positions)
 
         # Simulationszeit in Sekunden
         self.t = 0
@@ -198,8 +104,17 @@ class AnimationWindow(arcade.Window):
         # Simulationsstatus (0 = Pause, 1 = Ausführen)
         self.state = 0
         
-        # FPS-Berechnung mit gleitendem Durchschnitt
-        self.fps_history = [0] * 30
+        # Zeitmessung für die FPS-Anzeige. Mit profile=True wird auch gemessen,
+        # wie lange die Teile von on_update dauern (siehe physik/zeitmessung.py).
+        self.profiler = PhaseTimer(enabled=profile)
+        self.profile_panel = TextPanel()
+        self.simulation.profiler = self.profiler
+
+        # Körper, Federn und Pfeile werden je mit einem einzigen Auftrag gezeichnet
+        self.circles = CircleBatch()
+        self.spring_lines = LineBatch(arcade.color.YELLOW)
+        self.velocity_lines = LineBatch(arcade.color.GREEN)
+        self.force_lines = LineBatch(arcade.color.BARN_RED)
         
         self.frame = 0
         
@@ -223,18 +138,22 @@ class AnimationWindow(arcade.Window):
         # UI-Komponenten zur Benutzeroberfläche hinzufügen
         self.uimanager.add(anchor)
 
-        # Initialisiere die Körper und Wechselwirkungen
-        body1 = Body([-1, -1], [0, 5], mass=0.5, radius=0.2, color=arcade.color.RED)
-        body2 = Body([0, 1], [0, 5], mass=0.5, radius=0.2, color=arcade.color.GREEN)
-        body3 = Body([1, -1], [-5, 0], mass=0.5, radius=0.2, color=arcade.color.BLUE)
-        
-        self.bodies.extend([body1, body2, body3])
-        
-        spring12 = Spring(body1, body2, k=40.0, damping=0.98)
-        spring13 = Spring(body1, body3, k=40.0, damping=0.98)
-        spring23 = Spring(body2, body3, k=40.0, damping=0.98)
 
-        self.interactions.extend([spring12, spring13, spring23])
+    # Erzeugt die drei Körper und die Federn zwischen allen Paaren
+    def three_bodies(self):
+        particles = ParticleSystem()
+        particles.add_body([-1, -1], [0, 5], mass=0.5, radius=0.2, color=arcade.color.RED)
+        particles.add_body([0, 1], [0, 5], mass=0.5, radius=0.2, color=arcade.color.GREEN)
+        particles.add_body([1, -1], [-5, 0], mass=0.5, radius=0.2, color=arcade.color.BLUE)
+
+        # Federn 1-2, 1-3 und 2-3. Die Ruhelänge ist der Abstand zu Beginn.
+        springs = SpringNetwork()
+        springs.add_springs([0, 0, 1], [1, 2, 2], k=40.0, damping=0.98, positions=particles.positions)
+
+        # Box mit Boden, Decke und Seitenwänden
+        simulation = Simulation(particles, box=(-4.5, 4.5, -4.5, 4.5))
+        simulation.add_force_term(springs)
+        return simulation
 
     
     # Passt die Ursprungsposition bei Fenstergrößenänderung an
@@ -264,6 +183,9 @@ class AnimationWindow(arcade.Window):
     def on_draw(self):
         self.clear()
         
+        # Positionen zwischen den letzten beiden Physikschritten interpolieren
+        positions = self.timestep.interpolated()
+        
         # Zeichnet die Benutzeroberfläche
         self.uimanager.draw() 
         
@@ -283,30 +205,27 @@ class AnimationWindow(arcade.Window):
         arcade.draw_text(f"t = {time} s", x, y, arcade.color.BLACK)
         
         # Zeigt die FPS an
-        fps = round(sum(self.fps_history) / len(self.fps_history), 1)
+        fps = round(self.profiler.fps(), 1)
         x, y = self.meter_to_pixel(-9, 2.5)
         arcade.draw_text(f"FPS = {fps}", x, y, arcade.color.BLACK)
 
-        # Zeichnet die Federn
-        for interaction in self.interactions:
-            xA, yA = self.meter_to_pixel(interaction.bodyA.position[0], interaction.bodyA.position[1])
-            xB, yB = self.meter_to_pixel(interaction.bodyB.position[0], interaction.bodyB.position[1])
-            
-            arcade.draw_line(xA, yA, xB, yB , interaction.color, 2)
+        # Zeichnet die Federn. `segments` liefert Anfangs- und Endpunkt jeder
+        # Feder abwechselnd hintereinander.
+        self.spring_lines.draw(self.springs.segments(positions), self.center_point, self.scale_factor)
         
         # Zeichnet alle Körper in der Szene
-        for body in self.bodies:
-            x, y = self.meter_to_pixel(body.position[0], body.position[1])
-            r = body.radius * self.scale_factor
-            arcade.draw_circle_filled(x, y, r, body.color)
+        if self.circles.count != len(self.particles):
+            self.circles.set_bodies(self.particles.radii, self.particles.colors)
+        self.circles.draw(positions, self.center_point, self.scale_factor)
 
-            # zeichne die Geschwindigkeit
-            arcade.draw_line(x, y, x + 2*body.velocity[0], y + 2*body.velocity[1] , arcade.color.GREEN, 2)
-            
-            # zeichne die resultierende Kraft
-            arcade.draw_line(x, y, x + 2*body.force[0], y + 2*body.force[1] , arcade.color.BARN_RED, 2)
-                
+        # Geschwindigkeit und resultierende Kraft als Pfeile (2 Pixel pro m/s bzw. N)
+        velocities = self.particles.velocities
+        forces = self.particles.forces
+        self.velocity_lines.draw(arrows(positions, 2 * velocities / self.scale_factor), self.center_point, self.scale_factor)
+        self.force_lines.draw(arrows(positions, 2 * forces / self.scale_factor), self.center_point, self.scale_factor)
 
+        # Zeigt die Zeitmessung oben rechts über allem an (nur mit profile=True)
+        self.profile_panel.draw(self.profiler.lines(), self.width - 10, self.height - 10)
 
     # Aktualisiert die Simulation um einen Zeitschritt
     def on_update(self, dt):
@@ -314,46 +233,23 @@ class AnimationWindow(arcade.Window):
         if self.state != 1:
             return
         
-        # FPS berechnen und als gleitenden Durchschnitt speichern
-        self.fps_history.append(1.0/dt)               
-        self.fps_history.pop(0)
-        
-        # Setzt die Kräfte aller Körper auf null
-        for body in self.bodies:
-            body.clear_force()
-        
+        # Startet die Zeitmessung für dieses Bild
+        self.profiler.start()
         
-        # Aktualisiert die Kollisionen
-        for interacion in self.interactions:
-            interacion.update()
+        # Berechnet so viele Schritte mit festem Zeitschritt, wie in dt passen.
+        # Ein Schritt berechnet die Federkräfte, den Euler-Cromer-Schritt und
+        # die Stösse mit den Wänden der Box.
+        self.timestep.advance(dt, self.simulation.step)
             
-        # Berechnet die Kräfte und aktualisiert die Bewegungen der Objekte
-        for body in self.bodies:
-            body.update_ec(dt)  # Aktualisiert Position und Geschwindigkeit
-        
-        # Überprüft und verarbeitet Kollisionen mit dem Boden
-        for body in self.bodies:
-            # Überprüft und verarbeitet Kollisionen mit dem Boden und der Decke
-            if body.position[1] > 4.5 - body.radius:
-                body.position[1] = 4.5 - body.radius
-                body.velocity[1] *= -1
-            if body.position[1] < -4.5 + body.radius:
-                body.position[1] = -4.5 + body.radius
-                body.velocity[1] *= -1
-                
-            # Überprüft die Kollisionen mit den Seitenwänden
-            if body.position[0] > 4.5 - body.radius:
-                body.position[0] = 4.5 - body.radius
-                body.velocity[0] *= -1
-            elif body.position[0] < -4.5 + body.radius:
-                body.position[0] = -4.5 + body.radius
-                body.velocity[0] *= -1
-            
-        # Erhöht die Simulationszeit
-        self.t += dt
+        # Simulationszeit
+        self.t = self.simulation.t
         
         # erhöhre die Framenummer
         self.frame += 1
+        
+        # Beendet die Zeitmessung für dieses Bild
+        self.profiler.count("Teilchen", len(self.particles))
+        self.profiler.stop(dt)
 
 
 
@@ -364,6 +260,12 @@ if __name__ == "__main__":
     # starte die Simulation
     arcade.run()
 
+    # Mit `profile=True` zeigt das Fenster, wie lange die Teile von
+    # `on_update` dauern. Nach dem Schliessen werden die Messwerte der
+    # letzten Bilder in eine CSV-Datei geschrieben.
+    if window.profiler.enabled:
+        window.profiler.save_csv("profil.csv")
+
 
 
 
@@ -467,18 +369,15 @@ if __name__ == "__main__":
 # Dämpfung ändern. Stelle die Werte so ein, dass die Bewegung stabil bleibt.
 
 '''
-        # Initialisiere die Körper und Wechselwirkungen
-        body1 = Body([-1, -1], [0, 5], mass=1.0, radius=0.2, color=arcade.color.RED)
-        body2 = Body([0, 1], [0, 5], mass=1.0, radius=0.2, color=arcade.color.GREEN)
-        body3 = Body([1, -1], [-5, 0], mass=1.0, radius=0.2, color=arcade.color.BLUE)
-        
-        self.bodies.extend([body1, body2, body3])
-        
-        spring12 = Spring(body1, body2, k=4.0, damping=0.98)
-        spring13 = Spring(body1, body3, k=4.0, damping=0.98)
-        spring23 = Spring(body2, body3, k=4.0, damping=0.98)
-
-        self.interactions.extend([spring12, spring13, spring23])
+    # Erzeugt die drei Körper und die Federn zwischen allen Paaren
+    def three_bodies(self):
+        particles = ParticleSystem()
+        particles.add_body([-1, -1], [0, 5], mass=1.0, radius=0.2, color=arcade.color.RED)
+        particles.add_body([0, 1], [0, 5], mass=1.0, radius=0.2, color=arcade.color.GREEN)
+        particles.add_body([1, -1], [-5, 0], mass=1.0, radius=0.2, color=arcade.color.BLUE)
+
+        springs = SpringNetwork()
+        springs.add_springs([0, 0, 1], [1, 2, 2], k=4.0, damping=0.98, positions=particles.positions)
 '''
 
 # ___________
@@ -494,23 +393,26 @@ if __name__ == "__main__":
 # verhalten.
 
 '''
-        # Initialisiere die Körper und Wechselwirkungen
-        body1 = Body([-1, 1], [-2, -1], mass=1.0, radius=0.2, color=arcade.color.RED)
-        body2 = Body([1, 1], [-2, -1], mass=1.0, radius=0.2, color=arcade.color.BLUE)
-        body3 = Body([-1, -1], [1, 1], mass=1.0, radius=0.2, color=arcade.color.GREEN)
-        body4 = Body([1, -1], [-1, -1], mass=1.0, radius=0.2, color=arcade.color.ORANGE)
-        
-        self.bodies.extend([body1, body2, body3, body4])
-        
+    # Erzeugt vier Körper, die mit Federn zu einem Rechteck verbunden sind
+    def rectangle(self):
+        particles = ParticleSystem()
+        particles.add_body([-1, 1], [-2, -1], mass=1.0, radius=0.2, color=arcade.color.RED)      # 0
+        particles.add_body([1, 1], [-2, -1], mass=1.0, radius=0.2, color=arcade.color.BLUE)      # 1
+        particles.add_body([-1, -1], [1, 1], mass=1.0, radius=0.2, color=arcade.color.GREEN)     # 2
+        particles.add_body([1, -1], [-1, -1], mass=1.0, radius=0.2, color=arcade.color.ORANGE)   # 3
+
         # Füge die elastischen Verbindungen zwischen den Körpern hinzu, um das Rechteck zu bilden
-        spring12 = Spring(body1, body2, k=50.0, damping=0.9)
-        spring13 = Spring(body1, body3, k=50.0, damping=0.9)
-        spring24 = Spring(body2, body4, k=50.0, damping=0.9)
-        spring34 = Spring(body3, body4, k=50.0, damping=0.9)
+        springs = SpringNetwork()
+        springs.add_springs([0, 0, 1, 2], [1, 2, 3, 3], k=50.0, damping=0.9, positions=particles.positions)
 
         # Verbindungen entlang der Diagonalen für zusätzliche Stabilität
-        spring14 = Spring(body1, body4, k=50.0, damping=0.9)
-        spring23 = Spring(body2, body3, k=50.0, damping=0.9)
+        springs.add_springs([0, 1], [3, 2], k=50.0, damping=0.9, positions=particles.positions)
+
+        simulation = Simulation(particles, box=(-4.5, 4.5, -4.5, 4.5))
+        simulation.add_force_term(springs)
+        return simulation
+
+# und ersetze in `__init__` den Aufruf `self.three_bodies()` durch `self.rectangle()`.
 '''
 
 # >< >< >< >< >< >< >< >< >< >< >< >< >< >< >< >< >< >< >< >< < >< >< >< >< >< ><
@@ -16,6 +16,13 @@ import arcade.gui
 import numpy as np
 import math
 
+from physik.darstellung import CircleBatch, LineBatch, TextPanel, arrows
+from physik.federn import SpringNetwork, rope
+from physik.integratoren import EulerCromer
+from physik.partikel import ParticleSystem
+from physik.zeitmessung import PhaseTimer
+from physik.zeitschritt import FixedTimestep
+
 
 # Rechteckige Wellenbewegung
 def square_wave(t, frequenz=1):
@@ -33,143 +40,26 @@ def sinus_wave(t, frequenz=1):
 
 
 
-# Die Klasse `Body` modelliert ein physikalisches Objekt in der Simulation, 
-# das durch seine Position, Geschwindigkeit und Masse beschrieben wird.
-
-class Body:
-    def __init__(self, position, velocity, mass=1.0, radius=1.0, fixed=False, fixed_x=False, color=arcade.color.BLUE):
-        self.mass = mass                                 # Masse in kg
-        self.position = np.array(position, dtype=float)  # Position in m
-        self.velocity = np.array(velocity, dtype=float)  # Geschwindigkeit in m/s
-        self.acceleration = np.array([0.0, 0.0])         # Beschleunigung in m/s^2
-        self.force = np.array([0.0, 0.0])                # Resultierende Kraft in N
-        self.radius = radius    # Radius des Körpers in m
-        self.fixed = fixed      # Körper wird festgehalten
-        self.fixed_x = fixed_x      # x-Koordinate des Körpers bleibt unverändert
-        self.color = color      # Farbe für die Darstellung
-        
-
-    # Setzt die resultierende Kraft auf null
-    def clear_force(self):
-        self.force = np.array([0.0, 0.0])
-
-
-    # Fügt eine Kraft zum Objekt hinzu, z.B. die Schwerkraft
-    def add_force(self, force):
-        self.force += np.array(force, dtype=float)
-
-
-    # Berechnet die neue Geschwindigkeit und Position mithilfe des 
-    # Euler-Cromer-Verfahrens, wobei die Beschleunigung auf Basis der Kraft 
-    # und Masse aktualisiert wird.
-    def update_ec(self, dt):
-        if self.fixed:
-            self.force = np.array([0.0, 0.0]) 
-            self.velocity = np.array([0.0, 0.0]) 
-            return
-        
-        self.acceleration = self.force / self.mass
-        self.velocity += self.acceleration * dt
-        
-        if self.fixed_x:
-            self.velocity[0] = 0.0
-            
-        self.position += self.velocity * dt
-        
-
-# Die Klasse `Interaction` ist die Basisklasse für alle Wechselwirkungen. 
-class Interaction:
-    def __init__(self, bodyA, bodyB):
-        self.bodyA = bodyA
-        self.bodyB = bodyB
-
-    def update(self):
-        pass
-
-
-
-# Die Klasse `Spring` simuliert eine Feder zwischen zwei Körpern. 
-class Spring(Interaction):
-
-    def __init__(self, bodyA, bodyB, k=1.0, length=None, damping=0.9, color=arcade.color.YELLOW):
-        super().__init__(bodyA, bodyB)
-
-        self.k = k # Federkonstante
-        
-        # Ursprungslänge der Feder
-        if length is None:
-            self.length = np.linalg.norm(bodyA.position - bodyB.position)
-        else:
-            self.length = length
-        
-        self.damping = damping # Dämpfungskonstante
-        
-        self.color = color 
-
-
-    def calculate_spring_force(self):
-        # Berechnet die Federkraft nach dem Hookeschen Gesetz.
-        r_vector = self.bodyB.position - self.bodyA.position
-        distance = np.linalg.norm(r_vector)
-        extension = distance - self.length  # Auslenkung der Feder
-
-        # Berechnet die Federkraft basierend auf der Auslenkung
-        force_magnitude = -self.k * extension
-        force_direction = r_vector / distance  # Einheitsvektor in Richtung des Abstandsvektors
-
-        # Dämpfungskraft parallel zur Federkraft
-        v_rel = self.bodyB.velocity - self.bodyA.velocity
-        force_magnitude += -self.damping * np.dot(v_rel, force_direction)
-        
-        # Berechne die Federkraft
-        return force_magnitude * force_direction
-
-
-    def update(self):
-        force = self.calculate_spring_force()
-        self.bodyA.add_force(-force)
-        self.bodyB.add_force(force)
-    
-
-
-# Die Klasse `Collision` verwaltet die Kollisionserkennung und -berechnung 
-# zwischen zwei Körpern.
-class Collision(Interaction):
-
-    def __init__(self, bodyA, bodyB, restitution=1.0):
-        super().__init__(bodyA, bodyB)
-        self.restitution = restitution
-
-
-    def check_collision(self):
-        # Prüft, ob zwei Körper kollidieren.
-        distance = np.linalg.norm(self.bodyA.position - self.bodyB.position)
-        return distance <= (self.bodyA.radius + self.bodyB.radius)
-
-
-    def resolve_collision(self):
-        # Berechnet die neuen Geschwindigkeiten der beiden Körper nach einer Kollision.
-        normal = (self.bodyB.position - self.bodyA.position) / np.linalg.norm(self.bodyB.position - self.bodyA.position)
-        relative_velocity = self.bodyA.velocity - self.bodyB.velocity
-        velocity_along_normal = np.dot(relative_velocity, normal)
-
-        # Berechnet nur, wenn die Körper aufeinander zu bewegen
-        if velocity_along_normal < 0:
-            return
-
-        # Impulsberechnung
-        impulse = ((1 + self.restitution) * velocity_along_normal) / (1 / self.bodyA.mass + 1 / self.bodyB.mass)
-        impulse_vector = impulse * normal
-
-        # Aktualisiert die Geschwindigkeit der beiden Körper
-        self.bodyA.velocity -= (impulse_vector / self.bodyA.mass)
-        self.bodyB.velocity += (impulse_vector / self.bodyB.mass)
-
-
-    # Überprüft und berechnet die Kollision, falls nötig
-    def update(self):
-        if self.check_collision():
-            self.resolve_collision()
+# Das Seil besteht aus 29 Körpern in einem `ParticleSystem`, die wie in Lektion
+# 13.8.3 mit einem `SpringNetwork` verbunden sind. Die Funktion `rope` aus
+# `physik.federn` liefert die Positionen der Körper und die Federn zwischen
+# jeweils zwei benachbarten Körpern.
+#
+# - Die Körper bewegen sich nur senkrecht. Bisher besass jeder `Body` dafür die
+#   Eigenschaft `fixed_x`. Jetzt gibt das Array `free` für jede Koordinate an,
+#   ob sie sich bewegen darf (1) oder nicht (0). Die Beschleunigung wird mit
+#   `free` multipliziert, so dass alle x-Koordinaten stehen bleiben.
+#
+# - Der letzte Körper ist ganz festgehalten und wird von der Funktion
+#   `sinus_wave` auf und ab bewegt.
+#
+# - Ein Zeitschritt wird mit einem Verfahren aus `physik.integratoren`
+#   berechnet, normalerweise mit Euler-Cromer. Bei einer sehr steifen Feder
+#   (z.B. k = 2000) muss der Zeitschritt dafür sehr klein sein. Das implizite
+#   Verfahren aus `physik.implizit` bleibt auch bei grossem dt stabil:
+#
+#        from physik.implizit import ImplicitEuler
+#        self.integrator = ImplicitEuler(self.springs, self.particles.masses, free=self.free)
 
 
     
@@ -177,7 +67,7 @@ class Collision(Interaction):
 # der Partikelbewegungen.
 class AnimationWindow(arcade.Window):
 
-    def __init__(self, width, height, title):
+    def __init__(self, width, height, title, profile=False):
         super().__init__(width, height, title, resizable=True)
         
         # Hintergrundfarbe des Fensters auf Weiß setzen
@@ -189,20 +79,22 @@ class AnimationWindow(arcade.Window):
         # Ursprung des Koordinatensystems in die Mitte des Fensters setzen
         self.center_point = [width // 2 + 100, height // 2]  
         
-        # Liste für alle zu simulierenden Körper
-        self.bodies = []
-        
-        # Liste für alle Interaktionen zwischen den Körpern
-        self.interactions = []  
-
         # Simulationszeit in Sekunden
         self.t = 0
         
         # Simulationsstatus (0 = Pause, 1 = Ausführen)
         self.state = 0
         
-        # FPS-Berechnung mit gleitendem Durchschnitt
-        self.fps_history = [0] * 30
+        # Zeitmessung für die FPS-Anzeige. Mit profile=True wird auch gemessen,
+        # wie lange die Teile von on_update dauern (siehe physik/zeitmessung.py).
+        self.profiler = PhaseTimer(enabled=profile)
+        self.profile_panel = TextPanel()
+
+        # Körper, Federn und Pfeile werden je mit einem einzigen Auftrag gezeichnet
+        self.circles = CircleBatch()
+        self.spring_lines = LineBatch(arcade.color.YELLOW)
+        self.velocity_lines = LineBatch(arcade.color.GREEN)
+        self.force_lines = LineBatch(arcade.color.BARN_RED)
         
         # UI-Manager zur Steuerung der Benutzeroberfläche (Buttons)
         self.uimanager = arcade.gui.UIManager() 
@@ -223,19 +115,26 @@ class AnimationWindow(arcade.Window):
         # UI-Komponenten zur Benutzeroberfläche hinzufügen
         self.uimanager.add(anchor)
 
-        # Initialisiere die Körper und Wechselwirkungen
-        last_body = None
-        for i in range(-14,15,1):
-            body = Body([i/4, 0], [0, 0], mass=0.1, radius=0.1, fixed_x=True, color=arcade.color.RED)
-            
-            if last_body is not None:
-                spring = Spring(last_body, body, k=20.0, damping=1, length=0)
-                self.interactions.append(spring)
-                
-            self.bodies.append(body)
-            last_body = body
+        # Initialisiere die Körper des Seils von x = -3.5 m bis x = 3.5 m
+        positions, edges = rope(29, start=(-3.5, 0), end=(3.5, 0))
+        
+        self.particles = ParticleSystem(capacity=len(positions))
+        self.bodies = self.particles.add_bodies(positions, np.zeros_like(positions), mass=0.1, radius=0.1, color=arcade.color.RED)
+        
+        # Federn zwischen benachbarten Körpern
+        self.springs = SpringNetwork()
+        self.springs.add_edges(edges, k=20.0, rest_length=0, damping=1)
             
-        last_body.fixed = True
+        # Die Körper bewegen sich nur senkrecht, der letzte Körper gar nicht
+        self.free = np.ones_like(positions)
+        self.free[:, 0] = 0.0
+        self.free[-1] = 0.0
+        
+        # Verfahren für die Zeitschritte
+        self.integrator = EulerCromer()
+        
+        # Fester Zeitschritt der Physik, höchstens 20 Schritte pro Bild
+        self.timestep = FixedTimestep(0.005, max_substeps=20, snapshot=lambda: self.particles.positions)
     
     # Passt die Ursprungsposition bei Fenstergrößenänderung an
     def on_resize(self, width, height):
@@ -264,6 +163,9 @@ class AnimationWindow(arcade.Window):
     def on_draw(self):
         self.clear()
         
+        # Positionen zwischen den letzten beiden Physikschritten interpolieren
+        positions = self.timestep.interpolated()
+        
         # Zeichnet die Benutzeroberfläche
         self.uimanager.draw() 
         
@@ -283,30 +185,26 @@ class AnimationWindow(arcade.Window):
         arcade.draw_text(f"t = {time} s", x, y, arcade.color.BLACK)
         
         # Zeigt die FPS an
-        fps = round(sum(self.fps_history) / len(self.fps_history), 1)
+        fps = round(self.profiler.fps(), 1)
         x, y = self.meter_to_pixel(-9, 2.5)
         arcade.draw_text(f"FPS = {fps}", x, y, arcade.color.BLACK)
 
         # Zeichnet die Federn
-        for interaction in self.interactions:
-            xA, yA = self.meter_to_pixel(interaction.bodyA.position[0], interaction.bodyA.position[1])
-            xB, yB = self.meter_to_pixel(interaction.bodyB.position[0], interaction.bodyB.position[1])
-            
-            arcade.draw_line(xA, yA, xB, yB , interaction.color, 2)
+        self.spring_lines.draw(self.springs.segments(positions), self.center_point, self.scale_factor)
         
         # Zeichnet alle Körper in der Szene
-        for body in self.bodies:
-            x, y = self.meter_to_pixel(body.position[0], body.position[1])
-            r = body.radius * self.scale_factor
-            arcade.draw_circle_filled(x, y, r, body.color)
+        if self.circles.count != len(self.particles):
+            self.circles.set_bodies(self.particles.radii, self.particles.colors)
+        self.circles.draw(positions, self.center_point, self.scale_factor)
 
-            # zeichne die Geschwindigkeit
-            arcade.draw_line(x, y, x + 2*body.velocity[0], y + 2*body.velocity[1] , arcade.color.GREEN, 2)
-            
-            # zeichne die resultierende Kraft
-            arcade.draw_line(x, y, x + 2*body.force[0], y + 2*body.force[1] , arcade.color.BARN_RED, 2)
-                
+        # Geschwindigkeit und resultierende Kraft als Pfeile (2 Pixel pro m/s bzw. N)
+        velocities = self.particles.velocities
+        forces = self.particles.forces
+        self.velocity_lines.draw(arrows(positions, 2 * velocities / self.scale_factor), self.center_point, self.scale_factor)
+        self.force_lines.draw(arrows(positions, 2 * forces / self.scale_factor), self.center_point, self.scale_factor)
 
+        # Zeigt die Zeitmessung oben rechts über allem an (nur mit profile=True)
+        self.profile_panel.draw(self.profiler.lines(), self.width - 10, self.height - 10)
 
     # Aktualisiert die Simulation um einen Zeitschritt
     def on_update(self, dt):
@@ -314,42 +212,42 @@ class AnimationWindow(arcade.Window):
         if self.state != 1:
             return
         
-        # FPS berechnen und als gleitenden Durchschnitt speichern
-        self.fps_history.append(1.0/dt)               
-        self.fps_history.pop(0)
+        # Startet die Zeitmessung für dieses Bild
+        self.profiler.start()
         
-        # Setzt die Kräfte aller Körper auf null
-        for body in self.bodies:
-            body.clear_force()
+        # Berechnet so viele Schritte mit festem Zeitschritt, wie in dt passen
+        self.timestep.advance(dt, self.physics_step)
         
-        # Aktualisiert die Kollisionen
-        for interaction in self.interactions:
-            interaction.update()
-            
-        # Berechnet die Kräfte und aktualisiert die Bewegungen der Objekte
-        for body in self.bodies:
-            body.update_ec(dt)  # Aktualisiert Position und Geschwindigkeit
+        # Beendet die Zeitmessung für dieses Bild
+        self.profiler.count("Teilchen", len(self.particles))
+        self.profiler.stop(dt)
+
+
+    # Beschleunigungen aller Körper für die Positionen x und Geschwindigkeiten v
+    def acceleration(self, x, v):
+        forces = self.springs.forces(x, v) * self.free
+        
+        # Kräfte für die Darstellung merken
+        self.particles.forces[:] = forces
+        return forces / self.particles.masses[:, None]
+
+
+    # Berechnet einen Physikschritt mit dem festen Zeitschritt dt
+    def physics_step(self, dt):
+        particles = self.particles
+        
+        # Aktualisiert Position und Geschwindigkeit aller Körper
+        x, v = self.integrator.step(particles.positions.copy(), particles.velocities.copy(), dt, self.acceleration)
+        particles.positions[:] = x
+        particles.velocities[:] = v
+        self.profiler.lap("Bewegung")
             
         # move last body in periodic order
-        self.bodies[-1].position[1] = sinus_wave(self.t, frequenz=0.5)
+        particles.positions[-1, 1] = sinus_wave(self.t, frequenz=0.5)
         
-        # Überprüft und verarbeitet Kollisionen mit dem Boden
-        for body in self.bodies:
-            # Überprüft und verarbeitet Kollisionen mit dem Boden und der Decke
-            if body.position[1] > 4.5 - body.radius:
-                body.position[1] = 4.5 - body.radius
-                body.velocity[1] *= -1
-            if body.position[1] < -4.5 + body.radius:
-                body.position[1] = -4.5 + body.radius
-                body.velocity[1] *= -1
-                
-            # Überprüft die Kollisionen mit den Seitenwänden
-            if body.position[0] > 4.5 - body.radius:
-                body.position[0] = 4.5 - body.radius
-                body.velocity[0] *= -1
-            elif body.position[0] < -4.5 + body.radius:
-                body.position[0] = -4.5 + body.radius
-                body.velocity[0] *= -1
+        # Überprüft und verarbeitet Kollisionen mit den Wänden, dem Boden und der Decke
+        particles.reflect_walls(-4.5, 4.5, -4.5, 4.5)
+        self.profiler.lap("Wände")
             
         # Erhöht die Simulationszeit
         self.t += dt
@@ -363,6 +261,12 @@ if __name__ == "__main__":
     # starte die Simulation
     arcade.run()
 
+    # Mit `profile=True` zeigt das Fenster, wie lange die Teile von
+    # `on_update` dauern. Nach dem Schliessen werden die Messwerte der
+    # letzten Bilder in eine CSV-Datei geschrieben.
+    if window.profiler.enabled:
+        window.profiler.save_csv("profil.csv")
+
 
 
 
@@ -447,21 +351,11 @@ if __name__ == "__main__":
 
 '''
 # Um die Federkonstante `k` und die Dämpfung anzupassen, ändere die Werte 
-# direkt in den Initialisierungen der `Spring`-Objekte in der Klasse `AnimationWindow`.
+# beim Hinzufügen der Federn in der Klasse `AnimationWindow`.
         
-        # Zeile 246
-        
-        # Initialisiere die Körper und Wechselwirkungen
-        last_body = None
-        for i in range(-14,15,1):
-            body = Body([i/4, 0], [0, 0], mass=0.1, radius=0.1, fixed_x=True, color=arcade.color.RED)
-            
-            if last_body is not None:
-                spring = Spring(last_body, body, k=60.0, damping=0.5)
-                self.interactions.append(spring)
-                
-            self.bodies.append(body)
-            last_body = body
+        # Federn zwischen benachbarten Körpern
+        self.springs = SpringNetwork()
+        self.springs.add_edges(edges, k=60.0, rest_length=0, damping=0.5)
             
 # Beobachte die Effekte:
 # - Ein höherer Wert für `k` erhöht die Wellenfortpflanzungsgeschwindigkeit.
@@ -484,13 +378,13 @@ if __name__ == "__main__":
 # wie sich diese Wellenform entlang des Seils ausbreitet und an den Enden reflektiert wird.
 
 '''
-# Ersetze die Bewegung in Zeile 354 mit 
+# Ersetze die Bewegung in der Methode `physics_step` mit 
 
-    self.bodies[-1].position[1] = square_wave(self.t, frequenz=0.5)
+    particles.positions[-1, 1] = square_wave(self.t, frequenz=0.5)
     
 # oder
 
-    self.bodies[-1].position[1] = triangle_wave(self.t, frequenz=0.5)
+    particles.positions[-1, 1] = triangle_wave(self.t, frequenz=0.5)
 
 # Beobachtungen:
 # - Die rechteckige Welle erzeugt schnelle Wechsel in der Auslenkung,
@@ -37,6 +37,9 @@ import arcade
 import arcade.gui 
 import numpy as np
 
+from physik.darstellung import CircleBatch, TextPanel
+from physik.zeitmessung import PhaseTimer
+
 
 class Body:
     def __init__(self, position, velocity, mass=1.0, radius=1.0, color=arcade.color.BLUE):
@@ -154,11 +157,20 @@ class Gravity(Interaction):
             
             
             
+# Bei vielen Körpern wächst die Anzahl der `Gravity`-Objekte quadratisch: 
+# 1000 Sterne benötigen bereits fast 500'000 Paare. Dem `AnimationWindow` kann 
+# deshalb ein `gravity_solver` übergeben werden, z.B. `BarnesHut(theta=0.5)` 
+# aus dem Paket `physik`. Dieser fasst weit entfernte Körper zu Gruppen zusammen 
+# und berechnet alle Gravitationskräfte mit einem Aufwand von etwa N * log(N). 
+# In diesem Fall werden keine `Gravity`-Objekte erzeugt.
+
+
+
 # Die Klasse `AnimationWindow` steuert die grafische Darstellung und die Simulation 
 # der Partikelbewegungen.
 class AnimationWindow(arcade.Window):
 
-    def __init__(self, width, height, title):
+    def __init__(self, width, height, title, gravity_solver=None, profile=False):
         super().__init__(width, height, title, resizable=True)
         
         # Hintergrundfarbe des Fensters auf Weiß setzen
@@ -173,8 +185,13 @@ class AnimationWindow(arcade.Window):
         # Liste für alle zu simulierenden Körper
         self.bodies = []
         
-        # Liste für alle Interaktionen zwischen den Körpern
+        # Liste für alle Interaktionen zwischen den Körpern. Für sehr viele Körper
+        # gibt es in physik/wechselwirkungen.py die `InteractionList`, die
+        # gleichartige Interaktionen gemeinsam rechnet.
         self.interactions = []  
+        
+        # Verfahren für die Gravitationskräfte aller Körper (None = Gravity-Paare)
+        self.gravity_solver = gravity_solver
 
         # Simulationszeit in Sekunden
         self.t = 0
@@ -185,13 +202,20 @@ class AnimationWindow(arcade.Window):
         # Simulationsstatus (0 = Pause, 1 = Ausführen)
         self.state = 0
         
-        # FPS-Berechnung mit gleitendem Durchschnitt
-        self.fps_history = [0] * 30
+        # Zeitmessung für die FPS-Anzeige. Mit profile=True wird auch gemessen,
+        # wie lange die Teile von on_update dauern (siehe physik/zeitmessung.py).
+        self.profiler = PhaseTimer(enabled=profile)
+        self.profile_panel = TextPanel()
         self.frame = 0
         
         # Maximale Anzahl Tracepunkte
         self.max_trace = 100
         
+        # Körper und Spuren werden je mit einem einzigen Auftrag gezeichnet.
+        # Die Körper sind mindestens 5 Pixel gross, die Spurpunkte 1 Pixel.
+        self.circles = CircleBatch(min_radius=5)
+        self.trace_points = CircleBatch(min_radius=1)
+        
         # UI-Manager zur Steuerung der Benutzeroberfläche (Buttons)
         self.uimanager = arcade.gui.UIManager() 
         self.uimanager.enable() 
@@ -213,13 +237,15 @@ class AnimationWindow(arcade.Window):
 
         
         # Initialisiere zwei Himmelskörper, z.B. Sonne und Planet
+        # (dieselben Werte stehen in der Szene `gravitation` in `physik/szenen.py`)
         sun = Body([0, 0], [0, 0], mass=1.989e30, radius=1e9, color=arcade.color.RED)
         planet = Body([1.5e11, 0], [0, 2.98e4], mass=5.972e24, radius=1e8, color=arcade.color.BLUE)
         
         self.bodies.extend([sun, planet])
         
-        gravity_sun_planet = Gravity(sun, planet)
-        self.interactions.extend([gravity_sun_planet])
+        if self.gravity_solver is None:
+            gravity_sun_planet = Gravity(sun, planet)
+            self.interactions.extend([gravity_sun_planet])
 
 
 
@@ -259,30 +285,35 @@ class AnimationWindow(arcade.Window):
         arcade.draw_text(f"t = {time} d", x, y, arcade.color.BLACK)
         
         # Zeigt die FPS an
-        fps = round(sum(self.fps_history) / len(self.fps_history), 1)
+        fps = round(self.profiler.fps(), 1)
         x, y = (-450 + self.center_point[0], 100 + self.center_point[1])
         arcade.draw_text(f"FPS = {fps}", x, y, arcade.color.BLACK)
         
-        # Zeichnet alle Körper in der Szene
-        for body in self.bodies:
-            
-            # zeichne Körper
-            if self.frame % 10 == 0:
+        # Speichert die Spuren ab
+        if self.frame % 10 == 0:
+            for body in self.bodies:
                 body.trace.append(body.position.copy())
                 if len(body.trace) > self.max_trace:
                     body.trace.pop(0)
-            
-            # zeichne die Spur
-            for pos in body.trace:
-                x1, y1 = self.meter_to_pixel(pos[0], pos[1])
-                arcade.draw_point(x1, y1, color=body.color, size=2)
-                
-            x, y = self.meter_to_pixel(body.position[0], body.position[1])
-            r = body.radius * self.scale_factor
-            r = max(5,r)
-            arcade.draw_circle_filled(x, y, r, body.color)
-
+        
+        # Zeichnet alle Spuren
+        traces = [pos for body in self.bodies for pos in body.trace]
+        if self.trace_points.count != len(traces):
+            colors = [body.color for body in self.bodies for pos in body.trace]
+            self.trace_points.set_bodies(np.zeros(len(traces)), colors)
+        if traces:
+            self.trace_points.draw(np.array(traces), self.center_point, self.scale_factor)
+        
+        # Zeichnet alle Körper in der Szene
+        if self.circles.count != len(self.bodies):
+            radii = [body.radius for body in self.bodies]
+            colors = [body.color for body in self.bodies]
+            self.circles.set_bodies(radii, colors)
+        positions = np.array([body.position for body in self.bodies])
+        self.circles.draw(positions, self.center_point, self.scale_factor)
 
+        # Zeigt die Zeitmessung oben rechts über allem an (nur mit profile=True)
+        self.profile_panel.draw(self.profiler.lines(), self.width - 10, self.height - 10)
 
     # Aktualisiert die Simulation um einen Zeitschritt
     def on_update(self, dt):
@@ -290,21 +321,28 @@ class AnimationWindow(arcade.Window):
         if self.state != 1:
             return
         
-        # FPS berechnen und als gleitenden Durchschnitt speichern
-        self.fps_history.append(1.0/dt)               
-        self.fps_history.pop(0)
+        # Startet die Zeitmessung für dieses Bild
+        self.profiler.start()
         
         # Setzt die Kräfte aller Körper auf null
         for body in self.bodies:
             body.clear_force()
+        self.profiler.lap("Kräfte null")
+        
+        # Aktualisiert alle Interaktionen einzeln
+        for interaction in self.interactions:
+            interaction.update()
+        self.profiler.lap("Interaktionen")
         
-        # Aktualisiert die Kollisionen
-        for interacion in self.interactions:
-            interacion.update()
+        # Berechnet die Gravitationskräfte aller Körper auf einmal
+        if self.gravity_solver is not None:
+            self.gravity_solver.apply(self.bodies)
+        self.profiler.lap("Gravitation")
             
         # Berechnet die Kräfte und aktualisiert die Bewegungen der Objekte
         for body in self.bodies:
             body.update_ec(self.dt)  # Aktualisiert Position und Geschwindigkeit
+        self.profiler.lap("Bewegung")
         
             
         # Erhöht die Simulationszeit
@@ -312,16 +350,32 @@ class AnimationWindow(arcade.Window):
         
         # erhöhe Framenummer
         self.frame += 1
+        
+        # Beendet die Zeitmessung für dieses Bild
+        self.profiler.count("Teilchen", len(self.bodies))
+        self.profiler.count("Paare", len(self.interactions))
+        self.profiler.stop(dt)
 
 
 
 if __name__ == "__main__":
     # Initialisiert das Fenster für die Simulation
+    # Mit `gravity_solver=BarnesHut(theta=0.5)` werden die Kräfte mit dem 
+    # Barnes-Hut-Verfahren berechnet:
+    #
+    #     from physik.barnes_hut import BarnesHut
+    #     window = AnimationWindow(800, 600, "Stern und Planet", gravity_solver=BarnesHut(theta=0.5))
     window = AnimationWindow(800, 600, "Stern und Planet")
 
     # starte die Simulation
     arcade.run()
 
+    # Mit `profile=True` zeigt das Fenster, wie lange die Teile von
+    # `on_update` dauern. Nach dem Schliessen werden die Messwerte der
+    # letzten Bilder in eine CSV-Datei geschrieben.
+    if window.profiler.enabled:
+        window.profiler.save_csv("profil.csv")
+
 
 
 
@@ -20,6 +20,11 @@
 import numpy as np
 import matplotlib.pyplot as plt
 
+from physik.gravitation import gravity_forces
+from physik.auswertung import Snapshot, consume
+from physik.sicherung import save_checkpoint
+from physik.trajektorie import Trajectory
+
 
 # _______________________
 #                        /
@@ -63,6 +68,21 @@ class World:
         
         self.bodies = []
         
+        # Glättungslänge in m gegen unendlich grosse Kräfte bei engen Begegnungen
+        self.softening = 0.0
+        
+        # Optionales Verfahren für die Kräfte, z.B. `BarnesHut(theta=0.5)` aus 
+        # `physik.barnes_hut` für Sternhaufen mit tausenden Körpern
+        self.force_solver = None
+        
+        # Optionales Verfahren für die Zeitschritte aus `physik.integratoren`,
+        # z.B. `get_integrator("yoshida")` oder `DormandPrince(rtol=1e-9)`.
+        # Ohne Angabe wird `update_rk2` verwendet.
+        self.integrator = None
+        
+        # Anzahl berechneter Zeitschritte. Die Zeit der Welt ist step_count * dt.
+        self.step_count = 0
+        
     
     # Hinzufügen eines Körpers zur Welt
     def add_body(self, body):
@@ -74,31 +94,63 @@ class World:
         self.masses.append(body.mass)
         
 
-    # Berechne die Gravitationskraft zwischen zwei Massen.
-    def gravity(self, pos1, pos2, m1, m2):
-        r_vec = pos2 - pos1
-        distance = np.linalg.norm(r_vec)
-        
-        if distance == 0:
-            return np.array([0.0, 0.0])  # Keine Kraft bei null Abstand
-        
-        force_magnitude = World.G * m1 * m2 / distance**2
-        force_direction = r_vec / distance  # Einheitsvektor
+    # Berechne die Kräfte zwischen den Körpern nach dem Gravitationsgesetz
+    #
+    #        F_ij = G * m_i * m_j * r_ij / |r_ij|^3
+    #
+    # Statt einer Doppelschleife über alle Paare verwenden wir `gravity_forces`
+    # aus dem Paket `physik`: Die
+    # Funktion berechnet die Abstandsvektoren aller Paare als (N, N, 2)-Array
+    # und daraus alle Kräfte auf einmal. Für viele Körper rechnet sie
+    # automatisch in Blöcken, damit der Speicherbedarf begrenzt bleibt.
+    def calculate_forces(self, positions, masses):
+        if self.force_solver is not None:
+            return self.force_solver.forces(positions, masses)
         
-        return force_magnitude * force_direction
-
+        return gravity_forces(positions, masses, G=World.G, softening=self.softening)
     
-    # Berechne die Kräfte zwischen den Körpern
-    def calculate_forces(self, positions, masses):
-        forces = np.zeros_like(positions)
     
-        for i in range(len(masses)):
-            for j in range(i + 1, len(masses)):
-                force = self.gravity(positions[i], positions[j], masses[i], masses[j])
-                forces[i] += force
-                forces[j] -= force
-        
-        return forces
+    # Beschleunigungen aller Körper a_i = F_i / m_i (für die Integratoren)
+    def acceleration(self, positions, velocities):
+        return self.calculate_forces(positions, self.masses) / self.masses[:, None]
+    
+    
+    # Kopiert die Körperdaten in numpy-Arrays für die Berechnung
+    def prepare(self):
+        self.positions = np.array(self.positions, dtype=float)
+        self.velocities = np.array(self.velocities, dtype=float)
+        self.masses = np.array(self.masses, dtype=float)
+    
+    
+    # Zustand der Welt als Dictionary mit Arrays für einen Sicherungspunkt
+    # (siehe `physik.sicherung`)
+    def get_state(self):
+        self.prepare()
+        state = {"positions": self.positions.copy(), "velocities": self.velocities.copy(),
+                 "masses": self.masses.copy(), "step_count": np.int64(self.step_count)}
+        if hasattr(self.integrator, "get_state"):
+            state["integrator"] = self.integrator.get_state()
+        return state
+    
+    
+    # Stellt den Zustand aus `get_state` wieder her
+    def set_state(self, state):
+        self.positions = np.array(state["positions"], dtype=float)
+        self.velocities = np.array(state["velocities"], dtype=float)
+        self.masses = np.array(state["masses"], dtype=float)
+        self.step_count = int(state["step_count"])
+        if hasattr(self.integrator, "set_state"):
+            self.integrator.set_state(state.get("integrator", {}))
+    
+    
+    # Berechnet einen Zeitschritt mit dem gewählten Verfahren
+    def step(self, dt):
+        if self.integrator is None:
+            self.update_rk2(dt)
+        else:
+            self.positions, self.velocities = self.integrator.step(
+                self.positions, self.velocities, dt, self.acceleration)
+        self.step_count += 1
     
     
     # Runge-Kutta-2-Update zur Berechnung des nächsten Zeitschritts
@@ -128,30 +180,112 @@ class World:
         
         
     # Simulation ausführen
-    def simulate(self, dt, time_end):
+    #
+    # Die Positionen werden in eine `Trajectory` aus `physik.trajektorie`
+    # geschrieben, ein einziges Array der Form (Schritte, N, 2):
+    #
+    # - `stride`: nur jeder stride-te Schritt wird gespeichert
+    # - `dtype`:  z.B. np.float32, um nur halb so viel Speicher zu brauchen
+    # - `path`:   Dateiname einer `.npy`-Datei, falls die Bahnen nicht in den
+    #             Arbeitsspeicher passen
+    def simulate(self, dt, time_end, stride=1, dtype=np.float64, path=None):
         
         # Kopiere die Körperdaten in numpy-Arrays für die Berechnung
-        self.positions = np.array(self.positions)
-        self.velocities = np.array(self.velocities)
-        self.masses = np.array(self.masses)
+        self.prepare()
         
-        # Erstelle ein Array für die Visualisierung der Positionen
-        positions = [[] for _ in self.bodies]
+        steps = int(np.ceil(time_end / dt))
         
-        time_elapsed = 0
-
-        while time_elapsed < time_end:
-            
-            self.update_rk2(dt)
+        # Ein adaptives Verfahren wählt die Zeitschritte selbst
+        if getattr(self.integrator, "adaptive", False):
+            return self.simulate_adaptive(dt, steps, stride, dtype, path)
+        
+        # Reserviere den Speicher für die Bahnen aller Körper
+        self.trajectory = Trajectory.for_steps(len(self.bodies), steps, stride=stride, dtype=dtype, path=path)
+        
+        for _ in range(steps):
+            self.step(dt)
             
-            # Füge die berechneten Positionen zum array positions hinzu.
-            for i, body in enumerate(self.bodies):
-                body.update(self.positions[i], self.velocities[i])
-                positions[i].append(body.position.copy())
+            # Speichere die berechneten Positionen in der Trajektorie
+            self.trajectory.append(self.positions)
+        
+        # Endzustand in die Körper übernehmen
+        for i, body in enumerate(self.bodies):
+            body.update(self.positions[i].copy(), self.velocities[i].copy())
+        
+        self.trajectory.flush()
+        return self.trajectory.bodies()
+    
+    
+    # Generator, der die Simulation Schritt für Schritt ausführt und nach jeweils
+    # `every` Schritten einen `Snapshot` mit Kopien des Zustands liefert. Ohne
+    # `time_end` läuft er, bis die Schleife mit `break` verlassen wird. Es wird
+    # immer nur der aktuelle Zustand gespeichert.
+    #
+    # Mit `checkpoint` wird alle `checkpoint_every` Schritte ein Sicherungspunkt
+    # in diese Datei geschrieben. Die Zeit läuft ab `step_count` weiter, nach
+    # `simulate` also ab dem Ende der bereits berechneten Bahnen und nach
+    # `load_checkpoint` ab dem Sicherungspunkt.
+    def iter_steps(self, dt, every=1, time_end=None, checkpoint=None, checkpoint_every=10000):
+        if getattr(self.integrator, "adaptive", False):
+            raise ValueError("iter_steps benötigt ein Verfahren mit festem Zeitschritt")
+        
+        self.prepare()
+        
+        while time_end is None or self.step_count * dt < time_end:
+            self.step(dt)
             
-            time_elapsed += dt
+            if checkpoint is not None and self.step_count % checkpoint_every == 0:
+                save_checkpoint(checkpoint, self, dt=dt)
             
-        return [np.array(pos) for pos in positions]
+            if self.step_count % every == 0:
+                yield Snapshot(self.step_count * dt, self.positions.copy(), self.velocities.copy(), self.masses)
+    
+    
+    # Führt die Simulation aus und gibt jeden Schnappschuss an die Auswertungen
+    # `consumers` aus `physik.auswertung` weiter (z.B. `Energy`, `MinDistance`
+    # oder `LivePlot`). Mit `stop` kann die Simulation vorzeitig beendet werden,
+    # z.B. mit `Escape(1e13)`, sobald ein Körper das System verlässt.
+    def stream(self, dt, consumers, every=1, time_end=None, stop=None, checkpoint=None, checkpoint_every=10000):
+        steps = self.iter_steps(dt, every, checkpoint=checkpoint, checkpoint_every=checkpoint_every)
+        snapshot = consume(steps, consumers, stop=stop, time_end=time_end)
+        
+        # Endzustand in die Körper übernehmen
+        for i, body in enumerate(self.bodies):
+            body.update(self.positions[i].copy(), self.velocities[i].copy())
+        
+        return snapshot
+    
+    
+    # Simulation mit adaptiver Schrittweite. Das Verfahren wählt die Länge der
+    # Zeitschritte selbst: kurz bei nahen Begegnungen, lang auf ruhigen Bahnen.
+    # `dt` legt nur fest, in welchen Abständen die Positionen gespeichert werden.
+    #
+    # Die Rechnung endet wie mit festem Zeitschritt nach `steps` Schritten der
+    # Länge `dt`. Gespeichert wird jeder `stride`-te Schritt und immer auch das
+    # Ende, selbst wenn `stride` die Anzahl Schritte nicht teilt.
+    def simulate_adaptive(self, dt, steps, stride=1, dtype=np.float64, path=None):
+        t_end = steps * dt
+        times = dt * stride * np.arange(1, steps // stride + 1)
+        if steps % stride:
+            times = np.append(times, t_end)
+        times[-1] = t_end
+        
+        self.trajectory = Trajectory(len(self.bodies), capacity=len(times), stride=stride, dtype=dtype, path=path)
+        
+        # Die Positionen werden nach jedem Schritt direkt in die Trajektorie geschrieben
+        self.positions, self.velocities = self.integrator.integrate(
+            self.positions, self.velocities, times, self.acceleration, dt=dt,
+            record=lambda x, v: self.trajectory.extend(x))
+        
+        # Die Zeit zählt weiter, als wären Schritte der Länge `dt` berechnet worden
+        self.step_count += steps
+        
+        # Endzustand in die Körper übernehmen
+        for i, body in enumerate(self.bodies):
+            body.update(self.positions[i].copy(), self.velocities[i].copy())
+        
+        self.trajectory.flush()
+        return self.trajectory.bodies()
 
 
 # ____________________________________
@@ -162,6 +296,21 @@ class World:
 # Instanziiere das `World`-Objekt und füge Körper hinzu (Sonne, Erde und Mond)
 world = World()
 
+# Statt `update_rk2` kann jedes Verfahren aus `physik.integratoren` verwendet
+# werden, z.B. das symplektische Yoshida-Verfahren 4. Ordnung:
+#
+#        from physik.integratoren import get_integrator
+#        world.integrator = get_integrator("yoshida")
+#
+# Welches Verfahren eine gewünschte Genauigkeit mit der kleinsten Rechenzeit
+# erreicht, zeigt der Aufruf `python -m physik.integratoren`.
+#
+# Mit einer adaptiven Schrittweite wählt das Verfahren die Zeitschritte selbst.
+# `dt` bestimmt dann nur noch, wie oft die Positionen gespeichert werden:
+#
+#        from physik.integratoren import DormandPrince
+#        world.integrator = DormandPrince(rtol=1e-9)
+
 # Sonne
 sun = Body([0.0, 0.0], [0.0, 0.0], mass=1.989e30)  
 world.add_body(sun)
@@ -182,6 +331,28 @@ time_end = 3.154e7  # Sekunden eines Jahres
 # Simulation ausführen und Positionen zurückgeben
 positions = world.simulate(dt, time_end)
 
+# Statt auf das Ende der Simulation zu warten, kann man sie auch laufend
+# auswerten. `world.stream` gibt die Zustände an Auswertungen aus
+# `physik.auswertung` weiter und kann vorzeitig abbrechen, z.B. wenn ein Körper
+# das Sonnensystem verlässt. Der Speicherbedarf wächst dabei nicht mit der Zeit:
+#
+#        from physik.auswertung import Energy, MinDistance, Escape, LivePlot
+#        energy = Energy(G=World.G)
+#        distance = MinDistance(1, 2)
+#        world.stream(dt, [energy, distance, LivePlot()], every=10,
+#                     time_end=10*time_end, stop=Escape(1e13))
+#        print(energy.result["max_drift"], distance.result["distance"])
+#
+# Eine Rechnung über Jahrhunderte kann regelmässig einen Sicherungspunkt
+# schreiben. Wird sie abgebrochen, lädt man beim nächsten Start den Zustand
+# und rechnet ab dort weiter, mit genau denselben Zahlen wie ohne Abbruch:
+#
+#        import os
+#        from physik.sicherung import load_checkpoint
+#        if os.path.exists("dreikoerper.npz"):
+#            load_checkpoint("dreikoerper.npz", world)
+#        world.stream(dt, [energy], time_end=300*time_end, checkpoint="dreikoerper.npz")
+
 
 # Visualisiere die Resultate
 plt.figure(figsize=(10, 10))
@@ -0,0 +1,27 @@
+# Das Paket `physik` enthält wiederverwendbare Bausteine für die Simulationen
+# in Kapitel 13. Die Lektionen importieren sie mit z.B.
+#
+#        from physik import ParticleSystem
+#        from physik.simulation import Simulation
+#
+# Der Import funktioniert für alle Skripte, die im selben Ordner wie das Paket
+# liegen (siehe Kapitel 8.9 "Eigene Module erstellen").
+#
+# Hier werden nur Module importiert, die keine eigene Vergleichsmessung
+# enthalten. Module wie `physik.integratoren` oder `physik.nachbarn` werden mit
+#
+#        python -m physik.nachbarn
+#
+# als Programm gestartet. Wären sie schon beim Laden des Pakets importiert,
+# würde Python sie dabei ein zweites Mal laden und eine Warnung ausgeben. Sie
+# werden deshalb direkt aus ihrem Modul importiert, z.B.
+#
+#        from physik.nachbarn import NeighbourList
+
+from .austausch import Frame, FrameBuffer, SharedFrameBuffer
+from .gitter import CellList, resolve_collisions
+from .gravitation import gravity_forces, gravity_potential_energy
+from .kraefte import Coulomb, PairGravity
+from .partikel import BodyView, ParticleSystem
+from .trajektorie import Trajectory
+from .zeitmessung import PhaseTimer
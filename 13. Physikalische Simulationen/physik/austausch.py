@@ -0,0 +1,272 @@
+#              _________________________________
+#       ______|                                 |_____
+#       \     |   PHYSIK - DATENAUSTAUSCH       |    /
+#        )    |_________________________________|   (
+#       /________)                          (________\      CC BY-NC-SA 4.0 (https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+# Läuft die Physik in einem eigenen Thread, verändert sie die Positionen,
+# während die Oberfläche sie gerade zeichnet. Ein Bild kann dann zur Hälfte
+# den alten und zur Hälfte den neuen Zustand zeigen ("Tearing").
+#
+# Die Klasse `FrameBuffer` verhindert das mit mehreren Plätzen für den Zustand
+# und einem `Lock`, der festhält, welcher Platz wem gehört:
+#
+#        1. Der Physik-Thread kopiert nach einem Schritt den Zustand in einen
+#           freien Platz des Puffers und "veröffentlicht" ihn mit `publish`.
+#        2. Die Oberfläche holt mit `latest` den zuletzt veröffentlichten
+#           Zustand (ein `Frame`). Die Arrays eines Frames sind schreibgeschützt
+#           und ändern sich nicht, bis die Oberfläche das nächste Frame holt.
+#
+# Der Puffer hat drei Plätze ("Triple Buffering"): einen, den die Oberfläche
+# gerade liest, einen mit dem neusten Zustand und einen, in den die Physik
+# schreibt. So findet die Physik immer einen freien Platz und kann beliebig
+# viele Schritte rechnen, während die Oberfläche ein Bild zeichnet. Zwischen-
+# zustände, die niemand abholt, werden einfach überschrieben.
+#
+#        # im Physik-Thread
+#        frames.publish(t, step, particles.positions, particles.velocities)
+#
+#        # in der Oberfläche
+#        frame = frames.latest()
+#        draw(frame.positions)
+#
+# Die Plätze werden über zwei ganze Zahlen vergeben: den neusten Platz und den
+# Platz, den die Oberfläche liest. Diese Zahlen werden nur mit einem `Lock`
+# gelesen und gesetzt. Es reicht nicht, dass jede Zahl in einem Stück
+# geschrieben wird: Ohne Lock darf der Prozessor Lese- und Schreibzugriffe
+# umordnen. Die Oberfläche könnte dann den neuen Platz sehen, bevor die Arrays
+# darin fertig geschrieben sind, oder die Physik könnte den Platz überschreiben,
+# den die Oberfläche gerade übernommen hat. Der Lock wird nur für das Vergeben
+# der Plätze gehalten, nicht für das Kopieren und Zeichnen. Beide Seiten warten
+# deshalb höchstens so lange, wie die andere braucht, um ein paar Zahlen zu
+# lesen oder zu setzen.
+
+
+import threading
+
+import numpy as np
+
+
+# Ein veröffentlichter Zustand. Die Arrays sind schreibgeschützt.
+class Frame:
+    def __init__(self, t, step, positions, velocities):
+        self.t = t
+        self.step = step
+        self.positions = positions
+        self.velocities = velocities
+
+    def __repr__(self):
+        return f"Frame(t={self.t}, step={self.step}, N={len(self.positions)})"
+
+    # Beträge der Geschwindigkeiten aller Körper
+    def speeds(self):
+        return np.sqrt(np.einsum("ij,ij->i", self.velocities, self.velocities))
+
+    # Gesamte kinetische Energie für die Massen `masses`
+    def kinetic_energy(self, masses):
+        return float(0.5 * np.sum(masses * np.einsum("ij,ij->i", self.velocities, self.velocities)))
+
+
+
+# _______________________
+#                        /
+# Klasse FrameBuffer    (
+# _______________________\
+#
+# - `n`:      Anzahl Körper
+# - `slots`:  Anzahl Plätze, mindestens 3
+# - `lock`:   Lock für das Vergeben der Plätze (None = neuer `threading.Lock`)
+#
+# Alle Daten liegen hintereinander in einem einzigen Speicherblock `buffer`:
+#
+#        control      4 ganze Zahlen: neuster Platz, gelesener Platz,
+#                     Anzahl veröffentlichter Zustände, zuletzt beschriebener Platz
+#        times        Zeit jedes Platzes
+#        steps        Schrittzahl jedes Platzes
+#        positions    Positionen, Form (slots, n, 2)
+#        velocities   Geschwindigkeiten, Form (slots, n, 2)
+#
+# Die Physik beschreibt die Plätze reihum und überspringt dabei den neusten und
+# den gelesenen Platz. Bis ein Platz wieder beschrieben wird, vergehen so
+# mindestens zwei ganze Physikschritte.
+
+LATEST, READING, PUBLISHED, WRITTEN = range(4)
+
+
+class FrameBuffer:
+    def __init__(self, n, slots=3, buffer=None, lock=None):
+        if slots < 3:
+            raise ValueError("FrameBuffer braucht mindestens 3 Plätze")
+
+        self.n = n
+        self.slots = slots
+        self.lock = threading.Lock() if lock is None else lock
+
+        fresh = buffer is None
+        if fresh:
+            buffer = bytearray(self.nbytes(n, slots))
+        self._arrays(buffer)
+        if fresh:
+            self.control[:] = (-1, -1, 0, -1)
+
+
+    # Grösse des Speicherblocks in Bytes
+    @staticmethod
+    def nbytes(n, slots=3):
+        return 8 * (4 + 2 * slots + 4 * slots * n)
+
+
+    # Legt die Arrays als Sichten auf den Speicherblock an
+    def _arrays(self, buffer):
+        n, slots = self.n, self.slots
+        self.control = np.ndarray(4, dtype=np.int64, buffer=buffer)
+        self.times = np.ndarray(slots, dtype=np.float64, buffer=buffer, offset=8 * 4)
+        self.steps = np.ndarray(slots, dtype=np.int64, buffer=buffer, offset=8 * (4 + slots))
+        self.positions = np.ndarray((slots, n, 2), dtype=np.float64, buffer=buffer,
+                                    offset=8 * (4 + 2 * slots))
+        self.velocities = np.ndarray((slots, n, 2), dtype=np.float64, buffer=buffer,
+                                     offset=8 * (4 + 2 * slots + 2 * slots * n))
+
+        # Schreibgeschützte Sicht auf jeden Platz für die Oberfläche
+        self._frames_positions = [self._read_only(a) for a in self.positions]
+        self._frames_velocities = [self._read_only(a) for a in self.velocities]
+
+
+    @staticmethod
+    def _read_only(array):
+        view = array.view()
+        view.flags.writeable = False
+        return view
+
+
+    # Anzahl veröffentlichter Zustände
+    @property
+    def published(self):
+        return int(self.control[PUBLISHED])
+
+
+    # Der nächste Platz nach dem zuletzt beschriebenen, der weder den neusten
+    # Zustand enthält noch gelesen wird (nur mit `lock` aufrufen)
+    def _free_slot(self):
+        latest = self.control[LATEST]
+        reading = self.control[READING]
+        k = self.control[WRITTEN]
+        while True:
+            k = (k + 1) % self.slots
+            if k != latest and k != reading:
+                return k
+
+
+    # Kopiert den Zustand in einen freien Platz und macht ihn zum neusten
+    # (nur vom Physik-Thread aufrufen)
+    def publish(self, t, step, positions, velocities):
+        with self.lock:
+            k = self._free_slot()
+            self.control[WRITTEN] = k
+
+        # Der Platz k gehört jetzt der Physik und wird ohne Lock beschrieben
+        self.positions[k] = positions
+        self.velocities[k] = velocities
+        self.times[k] = t
+        self.steps[k] = step
+
+        with self.lock:
+            self.control[LATEST] = k
+            self.control[PUBLISHED] += 1
+
+
+    # Liefert den neusten Zustand als `Frame` oder None, wenn noch nichts
+    # veröffentlicht wurde (nur von der Oberfläche aufrufen). Das Frame bleibt
+    # gültig bis zum nächsten Aufruf.
+    def latest(self):
+        with self.lock:
+            k = int(self.control[LATEST])
+            if k < 0:
+                return None
+            self.control[READING] = k
+
+        return Frame(float(self.times[k]), int(self.steps[k]), self._frames_positions[k], self._frames_velocities[k])
+
+
+
+# _________________________
+#                          /
+# Klasse SharedFrameBuffer(
+# _________________________\
+#
+# Ein `FrameBuffer`, dessen Speicherblock als `SharedMemory` zwischen mehreren
+# Prozessen geteilt wird. Die Physik kann so in einem eigenen Prozess mit einem
+# eigenen Prozessorkern laufen, und die Oberfläche liest die Arrays direkt aus
+# dem gemeinsamen Speicher, ohne sie zu kopieren.
+#
+# - Ohne `name` wird ein neuer Speicherblock angelegt. Dieser Prozess ist der
+#   Besitzer und muss den Block am Ende mit `unlink` freigeben.
+# - Mit `name` verbindet sich ein anderer Prozess mit dem bestehenden Block.
+#
+# Ein `SharedFrameBuffer` kann an `multiprocessing.Process` übergeben werden. Im
+# neuen Prozess verbindet er sich über den Namen mit demselben Block und
+# verwendet denselben `multiprocessing.Lock` für das Vergeben der Plätze.
+#
+#        frames = SharedFrameBuffer(n)
+#        process = multiprocessing.Process(target=run, args=(frames,))
+#
+# Der Lock sorgt auch zwischen Prozessen dafür, dass die Arrays eines Platzes
+# fertig geschrieben sind, bevor die Oberfläche ihn als neusten Platz sieht.
+
+class SharedFrameBuffer(FrameBuffer):
+    def __init__(self, n, slots=3, name=None, lock=None):
+        import multiprocessing
+        from multiprocessing import shared_memory
+
+        self.owner = name is None
+        if self.owner:
+            self.memory = shared_memory.SharedMemory(create=True, size=self.nbytes(n, slots))
+            if lock is None:
+                lock = multiprocessing.Lock()
+        else:
+            if lock is None:
+                raise ValueError("SharedFrameBuffer braucht den Lock des Besitzers")
+            self.memory = _attach(name)
+
+        super().__init__(n, slots, buffer=self.memory.buf, lock=lock)
+        if self.owner:
+            self.control[:] = (-1, -1, 0, -1)
+
+
+    @property
+    def name(self):
+        return self.memory.name
+
+
+    # Beim Übergeben an einen anderen Prozess werden nur der Name und der Lock
+    # verschickt
+    def __reduce__(self):
+        return (SharedFrameBuffer, (self.n, self.slots, self.name, self.lock))
+
+
+    # Trennt diesen Prozess vom Speicherblock. Frames, die noch auf den Block
+    # zeigen, dürfen danach nicht mehr benutzt werden.
+    def close(self):
+        self.control = self.times = self.steps = None
+        self.positions = self.velocities = None
+        self._frames_positions = self._frames_velocities = None
+        self.memory.close()
+
+
+    # Gibt den Speicherblock frei (nur der Besitzer)
+    def unlink(self):
+        if self.owner:
+            self.memory.unlink()
+
+
+# Verbindet sich mit einem bestehenden Speicherblock. Der Block gehört dem
+# Prozess, der ihn angelegt hat; ab Python 3.13 wird das mit `track=False`
+# angegeben. Davor teilen sich die Kindprozesse den `resource_tracker` mit dem
+# Besitzer, und der Block wird dort nur einmal gezählt.
+def _attach(name):
+    from multiprocessing import shared_memory
+
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
@@ -0,0 +1,236 @@
+#              _________________________________
+#       ______|                                 |_____
+#       \     |   PHYSIK - LAUFENDE AUSWERTUNG  |    /
+#        )    |_________________________________|   (
+#       /________)                          (________\      CC BY-NC-SA 4.0 (https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+# `World.simulate` liefert die Bahnen erst, wenn die ganze Simulation fertig
+# ist. Mit `World.iter_steps` erhalten wir stattdessen einen Generator, der nach
+# jeweils `every` Zeitschritten einen Schnappschuss liefert. Ein Generator ist
+# eine Funktion, die mit `yield` einen Wert zurückgibt, danach pausiert und
+# erst weiterrechnet, wenn die for-Schleife den nächsten Wert verlangt:
+#
+#        for snapshot in world.iter_steps(dt=1000, every=100):
+#            print(snapshot.t, snapshot.positions)
+#            if snapshot.t > 3.154e7:
+#                break
+#
+# Die Simulation rechnet nur so weit, wie wir Schnappschüsse abholen. Wir können
+# also jederzeit anhalten, und es wird nie mehr als ein Zustand gespeichert.
+#
+# Die Klassen in diesem Modul werten die Schnappschüsse laufend aus, ohne sie
+# aufzubewahren. Jede Klasse besitzt die Methode `update(snapshot)` und das
+# Attribut `result` mit dem aktuellen Ergebnis. Die Funktion `consume` gibt
+# jeden Schnappschuss an alle Auswertungen weiter:
+#
+#        energy = Energy(G=World.G)
+#        distance = MinDistance(1, 2)
+#        consume(world.iter_steps(1000, every=10), [energy, distance],
+#                stop=Escape(1e13), time_end=3.154e8)
+#        print(energy.result, distance.result)
+
+
+from collections import deque
+
+import numpy as np
+
+from .gravitation import G, gravity_potential_energy
+
+
+# Ein Schnappschuss enthält die Zeit und Kopien der Arrays des Zustands
+class Snapshot:
+    def __init__(self, t, positions, velocities, masses):
+        self.t = t
+        self.positions = positions
+        self.velocities = velocities
+        self.masses = masses
+
+    def __repr__(self):
+        return f"Snapshot(t={self.t}, N={len(self.masses)})"
+
+
+
+# _______________________
+#                        /
+# Laufende Auswertungen (
+# _______________________\
+
+# Gesamtenergie E = E_kin + E_pot. Gespeichert werden der Anfangswert, der
+# aktuelle Wert und die grösste relative Abweichung |E - E0| / |E0|.
+class Energy:
+    def __init__(self, G=G, softening=0.0):
+        self.G = G
+        self.softening = softening
+        self.initial = None
+        self.current = None
+        self.max_drift = 0.0
+
+    def update(self, snapshot):
+        kinetic = 0.5 * np.sum(snapshot.masses * np.einsum("ij,ij->i", snapshot.velocities, snapshot.velocities))
+        potential = gravity_potential_energy(snapshot.positions, snapshot.masses, G=self.G, softening=self.softening)
+        self.current = kinetic + potential
+
+        if self.initial is None:
+            self.initial = self.current
+        elif self.initial != 0:
+            self.max_drift = max(self.max_drift, abs(self.current - self.initial) / abs(self.initial))
+
+    @property
+    def result(self):
+        return {"E0": self.initial, "E": self.current, "max_drift": self.max_drift}
+
+
+# Drehimpuls L = sum m_i * (x_i * vy_i - y_i * vx_i) bezüglich des Ursprungs
+class AngularMomentum:
+    def __init__(self):
+        self.initial = None
+        self.current = None
+        self.max_drift = 0.0
+
+    def update(self, snapshot):
+        x, y = snapshot.positions[:, 0], snapshot.positions[:, 1]
+        vx, vy = snapshot.velocities[:, 0], snapshot.velocities[:, 1]
+        self.current = float(np.sum(snapshot.masses * (x * vy - y * vx)))
+
+        if self.initial is None:
+            self.initial = self.current
+        elif self.initial != 0:
+            self.max_drift = max(self.max_drift, abs(self.current - self.initial) / abs(self.initial))
+
+    @property
+    def result(self):
+        return {"L0": self.initial, "L": self.current, "max_drift": self.max_drift}
+
+
+# Kleinster Abstand zwischen den Körpern i und j (oder zwischen allen Paaren,
+# wenn i und j fehlen) und der Zeitpunkt, zu dem er auftritt
+class MinDistance:
+    def __init__(self, i=None, j=None):
+        self.i = i
+        self.j = j
+        self.distance = np.inf
+        self.t = None
+        self.pair = None
+
+    def update(self, snapshot):
+        positions = snapshot.positions
+
+        if self.i is not None:
+            distance = np.linalg.norm(positions[self.j] - positions[self.i])
+            pair = (self.i, self.j)
+        else:
+            r_vec = positions[None, :, :] - positions[:, None, :]
+            distances = np.sqrt(np.einsum("ijk,ijk->ij", r_vec, r_vec))
+            distances[np.tril_indices(len(positions))] = np.inf
+            k = np.argmin(distances)
+            pair = np.unravel_index(k, distances.shape)
+            distance = distances[pair]
+
+        if distance < self.distance:
+            self.distance = float(distance)
+            self.t = snapshot.t
+            self.pair = tuple(int(p) for p in pair)
+
+    @property
+    def result(self):
+        return {"distance": self.distance, "t": self.t, "pair": self.pair}
+
+
+
+# _______________________
+#                        /
+# Abbruchbedingungen    (
+# _______________________\
+
+# Bricht ab, sobald ein Körper weiter als `distance` vom Schwerpunkt entfernt ist
+class Escape:
+    def __init__(self, distance):
+        self.distance = distance
+        self.body = None
+
+    def __call__(self, snapshot):
+        center = snapshot.masses @ snapshot.positions / np.sum(snapshot.masses)
+        distances = np.linalg.norm(snapshot.positions - center, axis=1)
+        if np.any(distances > self.distance):
+            self.body = int(np.argmax(distances))
+            return True
+        return False
+
+
+
+# _______________________
+#                        /
+# Live-Plot             (
+# _______________________\
+#
+# Zeichnet die Bahnen während der Simulation. Für jeden Körper werden nur die
+# letzten `history` Positionen in einer `deque` aufbewahrt, damit der Speicher
+# auch bei beliebig langen Simulationen nicht wächst. Neu gezeichnet wird nur
+# bei jedem `redraw_every`-ten Schnappschuss.
+
+class LivePlot:
+    def __init__(self, history=2000, redraw_every=10, labels=None):
+        self.history = history
+        self.redraw_every = redraw_every
+        self.labels = labels
+        self.count = 0
+        self.traces = None
+        self.figure = None
+
+    def _setup(self, n):
+        import matplotlib.pyplot as plt
+
+        plt.ion()
+        self.figure, self.axes = plt.subplots(figsize=(8, 8))
+        self.axes.set_aspect("equal")
+        self.axes.grid()
+        self.lines = []
+        for i in range(n):
+            label = self.labels[i] if self.labels else f"Körper {i + 1}"
+            line, = self.axes.plot([], [], label=label)
+            self.lines.append(line)
+        self.axes.legend()
+        self.traces = [deque(maxlen=self.history) for _ in range(n)]
+
+    def update(self, snapshot):
+        if self.traces is None:
+            self._setup(len(snapshot.positions))
+
+        for trace, position in zip(self.traces, snapshot.positions):
+            trace.append(position.copy())
+
+        self.count += 1
+        if self.count % self.redraw_every == 0:
+            self.redraw(snapshot.t)
+
+    def redraw(self, t):
+        for line, trace in zip(self.lines, self.traces):
+            data = np.array(trace)
+            line.set_data(data[:, 0], data[:, 1])
+        self.axes.relim()
+        self.axes.autoscale_view()
+        self.axes.set_title(f"t = {t:.3g} s")
+        self.figure.canvas.draw_idle()
+        self.figure.canvas.flush_events()
+
+    @property
+    def result(self):
+        return self.figure
+
+
+
+# Gibt die Schnappschüsse an alle Auswertungen weiter, bis `stop(snapshot)` True
+# liefert oder die Zeit `time_end` erreicht ist. Gibt den letzten Schnappschuss
+# zurück.
+def consume(snapshots, consumers, stop=None, time_end=None):
+    snapshot = None
+    for snapshot in snapshots:
+        for consumer in consumers:
+            consumer.update(snapshot)
+
+        if stop is not None and stop(snapshot):
+            break
+        if time_end is not None and snapshot.t >= time_end:
+            break
+
+    return snapshot
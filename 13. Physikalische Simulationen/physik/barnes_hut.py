@@ -0,0 +1,337 @@
+#              _________________________________
+#       ______|                                 |_____
+#       \     |   PHYSIK - BARNES-HUT           |    /
+#        )    |_________________________________|   (
+#       /________)                          (________\      CC BY-NC-SA 4.0 (https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+# Bei der direkten Summe wird die Gravitationskraft für jedes Paar von Körpern
+# berechnet. Der Aufwand wächst mit N^2: Für 50'000 Sterne sind das über eine
+# Milliarde Paare pro Zeitschritt.
+#
+# Der Barnes-Hut-Algorithmus nutzt aus, dass eine weit entfernte Gruppe von
+# Körpern fast dieselbe Kraft ausübt wie ein einzelner Körper mit der
+# Gesamtmasse der Gruppe in ihrem Schwerpunkt.
+#
+# - Quadtree:
+#   Der Raum wird in ein Quadrat gelegt, das rekursiv in 4 Teilquadrate zerlegt
+#   wird, bis jedes Teilquadrat höchstens einen Körper enthält. Für jedes
+#   Quadrat (Knoten) speichern wir die Gesamtmasse und den Schwerpunkt.
+#
+#        +-------+-------+
+#        |   o   | o |   |
+#        |       |---+---|
+#        |       |   | o |
+#        +-------+-------+
+#        |  o  o |       |
+#        |       |   o   |
+#        +-------+-------+
+#
+# - Öffnungswinkel θ:
+#   Ist ein Knoten mit der Seitenlänge s vom Körper d entfernt und gilt
+#
+#        s / d < θ
+#
+#   so wird der ganze Knoten wie ein einzelner Körper behandelt. Sonst werden
+#   seine 4 Teilquadrate einzeln betrachtet. Mit θ = 0 erhalten wir wieder die
+#   direkte Summe, grössere θ sind schneller, aber ungenauer. Typisch ist θ = 0.5.
+#
+# Der Aufwand sinkt damit auf etwa N * log(N).
+#
+# Umsetzung mit numpy:
+# Statt den Baum mit Python-Objekten und Rekursion zu durchlaufen, sortieren wir
+# die Körper nach ihrem Morton-Code (einer Nummerierung der Gitterzellen, bei
+# der benachbarte Zellen meist benachbarte Nummern haben). Alle Körper eines
+# Knotens stehen dann direkt hintereinander, und jede Ebene des Baumes lässt
+# sich mit wenigen Array-Operationen aufbauen. Auch der Durchlauf geschieht für
+# viele Körper gleichzeitig: Wir verwalten eine Liste von Paaren (Körper, Knoten),
+# die bei jedem Schritt entweder berechnet oder durch die Kinder ersetzt werden.
+
+
+import time
+
+import numpy as np
+
+from .gravitation import G, gravity_forces, _block_forces
+
+
+# Maximale Tiefe des Baumes. Körper, die sich auch auf der tiefsten Ebene eine
+# Zelle teilen, werden gemeinsam als ein Körper behandelt.
+MAX_DEPTH = 20
+
+# Anzahl Körper, deren Baumdurchlauf gleichzeitig berechnet wird
+CHUNK_SIZE = 2048
+
+
+
+# Verteilt die Bits einer ganzen Zahl auf jede zweite Stelle:
+# 0b1011 -> 0b01000101. Zwei solche Zahlen ergeben zusammen den Morton-Code.
+def _spread_bits(v):
+    v = v.astype(np.uint64)
+    v = (v | (v << np.uint64(16))) & np.uint64(0x0000FFFF0000FFFF)
+    v = (v | (v << np.uint64(8))) & np.uint64(0x00FF00FF00FF00FF)
+    v = (v | (v << np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    v = (v | (v << np.uint64(2))) & np.uint64(0x3333333333333333)
+    v = (v | (v << np.uint64(1))) & np.uint64(0x5555555555555555)
+    return v
+
+
+
+# _______________________
+#                        /
+# Klasse QuadTree       (
+# _______________________\
+#
+# Der Baum wird Ebene für Ebene aufgebaut. Alle Knoten aller Ebenen stehen in
+# gemeinsamen Arrays:
+#
+#        mass[k]          Gesamtmasse des Knotens k
+#        com[k]           Schwerpunkt des Knotens k
+#        size[k]          Seitenlänge des Quadrats
+#        first[k], last[k]   Bereich der (sortierten) Körper im Knoten
+#        child_start[k], child_end[k]   Bereich der Kindknoten
+#        leaf[k]          True, wenn der Knoten nicht weiter unterteilt wird
+
+class QuadTree:
+    def __init__(self, positions, masses, max_depth=MAX_DEPTH):
+        positions = np.asarray(positions, dtype=float)
+        masses = np.asarray(masses, dtype=float)
+        n = len(masses)
+
+        # Umgebendes Quadrat aller Körper
+        lower = positions.min(axis=0)
+        extent = float((positions.max(axis=0) - lower).max())
+        extent = extent * (1 + 1e-9) if extent > 0 else 1.0
+
+        # Ganzzahlige Gitterkoordinaten auf der tiefsten Ebene und Morton-Code
+        cells = 1 << max_depth
+        grid = np.floor((positions - lower) / extent * cells).astype(np.int64)
+        grid = np.clip(grid, 0, cells - 1)
+        codes = _spread_bits(grid[:, 0]) | (_spread_bits(grid[:, 1]) << np.uint64(1))
+
+        # Körper nach Morton-Code sortieren
+        self.order = np.argsort(codes, kind="stable")
+        codes = codes[self.order]
+        self.positions = positions[self.order]
+        self.masses = masses[self.order]
+
+        weighted = self.positions * self.masses[:, None]
+
+        levels = []
+        for level in range(max_depth + 1):
+            keys = codes >> np.uint64(2 * (max_depth - level))
+
+            # Knoten = Abschnitte mit gleichem Schlüssel
+            new_node = np.empty(n, dtype=bool)
+            new_node[0] = True
+            np.not_equal(keys[1:], keys[:-1], out=new_node[1:])
+            first = np.flatnonzero(new_node)
+            last = np.append(first[1:], n)
+
+            mass = np.add.reduceat(self.masses, first)
+            com = np.add.reduceat(weighted, first, axis=0)
+            np.divide(com, mass[:, None], out=com, where=mass[:, None] > 0)
+
+            count = last - first
+            done = level == max_depth or count.max() == 1
+            leaf = np.ones(len(first), dtype=bool) if done else count == 1
+
+            levels.append((first, last, mass, com, leaf, extent / (1 << level)))
+            if done:
+                break
+
+        # Ebenen zu gemeinsamen Arrays zusammenfügen
+        offsets = np.cumsum([0] + [len(lv[0]) for lv in levels])
+
+        self.first = np.concatenate([lv[0] for lv in levels])
+        self.last = np.concatenate([lv[1] for lv in levels])
+        self.mass = np.concatenate([lv[2] for lv in levels])
+        self.com = np.concatenate([lv[3] for lv in levels])
+        self.leaf = np.concatenate([lv[4] for lv in levels])
+        self.size = np.concatenate([np.full(len(lv[0]), lv[5]) for lv in levels])
+
+        # Die Kinder eines Knotens sind die Knoten der nächsten Ebene, die in
+        # seinem Körperbereich beginnen.
+        child_start = [np.zeros(len(lv[0]), dtype=np.int64) for lv in levels]
+        child_end = [np.zeros(len(lv[0]), dtype=np.int64) for lv in levels]
+        for level in range(len(levels) - 1):
+            first, last = levels[level][0], levels[level][1]
+            next_first = levels[level + 1][0]
+            child_start[level] = offsets[level + 1] + np.searchsorted(next_first, first)
+            child_end[level] = offsets[level + 1] + np.searchsorted(next_first, last)
+
+        self.child_start = np.concatenate(child_start)
+        self.child_end = np.concatenate(child_end)
+
+
+    def __len__(self):
+        return len(self.mass)
+
+
+
+# _______________________
+#                        /
+# Klasse BarnesHut      (
+# _______________________\
+#
+# Die Klasse `BarnesHut` berechnet die Gravitationskräfte mit dem Quadtree.
+# Die Methode `forces` hat dieselbe Form wie `gravity_forces` und kann deshalb
+# direkt in `World.calculate_forces` verwendet werden. Mit `apply` werden die
+# Kräfte zu einer Liste von Körpern (z.B. `self.bodies` im `AnimationWindow`)
+# hinzugefügt.
+
+class BarnesHut:
+    def __init__(self, theta=0.5, G=G, softening=0.0):
+        self.theta = theta
+        self.G = G
+        self.softening = softening
+
+
+    # Berechnet die Kräfte auf alle Körper
+    def forces(self, positions, masses):
+        tree = QuadTree(positions, masses)
+        n = len(tree.masses)
+
+        sorted_forces = np.zeros((n, 2))
+        for start in range(0, n, CHUNK_SIZE):
+            end = min(start + CHUNK_SIZE, n)
+            self._walk(tree, np.arange(start, end), sorted_forces)
+
+        forces = np.empty_like(sorted_forces)
+        forces[tree.order] = sorted_forces
+        return forces
+
+
+    # Fügt die Gravitationskräfte zu den Körpern hinzu
+    def apply(self, bodies):
+        positions = np.array([body.position for body in bodies], dtype=float)
+        masses = np.array([body.mass for body in bodies], dtype=float)
+
+        for body, force in zip(bodies, self.forces(positions, masses)):
+            body.add_force(force)
+
+
+    # Durchläuft den Baum für die Körper `bodies` (aufeinanderfolgende Indizes in
+    # sortierter Reihenfolge) gleichzeitig und addiert die Kräfte zu `forces`.
+    def _walk(self, tree, bodies, forces):
+        theta_sq = self.theta**2
+        eps_sq = self.softening**2
+        offset = bodies[0]
+        n = len(bodies)
+
+        # Zu Beginn wird jeder Körper mit der Wurzel (Knoten 0) verglichen
+        b = bodies
+        node = np.zeros(len(bodies), dtype=np.int64)
+
+        while len(b) > 0:
+            dx = tree.com[node] - tree.positions[b]
+            d_sq = np.einsum("ij,ij->i", dx, dx)
+
+            # Enthält der Knoten den Körper selbst?
+            contains = (tree.first[node] <= b) & (b < tree.last[node])
+            leaf = tree.leaf[node]
+            far = ~contains & (tree.size[node]**2 < theta_sq * d_sq)
+            accept = leaf | far
+
+            # Knoten, die als Ganzes berechnet werden
+            ab = b[accept]
+            mass = tree.mass[node[accept]]
+            adx = dx[accept]
+
+            # Enthält ein Blatt den Körper selbst, wird dieser aus Masse und
+            # Schwerpunkt entfernt: x_s' - x_b = M * (x_s - x_b) / (M - m_b)
+            own = contains[accept]
+            if own.any():
+                mb = tree.masses[ab[own]]
+                rest = mass[own] - mb
+                scale = np.zeros_like(rest)
+                np.divide(mass[own], rest, out=scale, where=rest > 0)
+                adx[own] *= scale[:, None]
+                mass[own] = np.maximum(rest, 0.0)
+
+            ad_sq = np.einsum("ij,ij->i", adx, adx) + eps_sq
+            strength = np.zeros_like(ad_sq)
+            np.power(ad_sq, -1.5, out=strength, where=ad_sq > 0)
+            strength *= self.G * tree.masses[ab] * mass
+
+            chunk = forces[offset:offset + n]
+            chunk[:, 0] += np.bincount(ab - offset, weights=strength * adx[:, 0], minlength=n)
+            chunk[:, 1] += np.bincount(ab - offset, weights=strength * adx[:, 1], minlength=n)
+
+            # Alle anderen Knoten werden durch ihre Kinder ersetzt
+            open_b = b[~accept]
+            open_node = node[~accept]
+            start = tree.child_start[open_node]
+            counts = tree.child_end[open_node] - start
+
+            total = counts.sum()
+            first = np.cumsum(counts) - counts
+            b = np.repeat(open_b, counts)
+            node = np.repeat(start, counts) + np.arange(total) - np.repeat(first, counts)
+
+
+
+# ____________________________
+#                            /
+# Genauigkeit und Laufzeit  (
+# ___________________________\
+#
+# `accuracy_report` vergleicht Barnes-Hut mit der direkten Summe für eine
+# scheibenförmige "Galaxie". Damit die direkte Summe auch für 50'000 Körper
+# nicht zu lange dauert, wird sie nur für eine Stichprobe von Körpern berechnet
+# und ihre Laufzeit auf alle N Körper hochgerechnet.
+#
+# Ausgeführt wird der Vergleich mit
+#
+#        python -m physik.barnes_hut
+#
+# aus dem Ordner des Kapitels 13.
+
+# Erzeugt Positionen und Massen einer flachen Galaxie mit N Sternen
+def galaxy(n, radius=1.0, seed=0):
+    rng = np.random.default_rng(seed)
+    r = radius * rng.exponential(0.3, n)
+    phi = rng.uniform(0, 2 * np.pi, n)
+    positions = np.column_stack((r * np.cos(phi), r * np.sin(phi)))
+    masses = np.full(n, 1.0 / n)
+    return positions, masses
+
+
+# Relativer Fehler (Median und 99%-Quantil) und Laufzeiten für verschiedene N und θ
+def accuracy_report(n_values=(1000, 10000, 50000), thetas=(0.3, 0.5, 0.8, 1.0), sample=500, softening=1e-3):
+    rows = []
+
+    for n in n_values:
+        positions, masses = galaxy(n)
+
+        # Direkte Summe für eine Stichprobe der Körper
+        rng = np.random.default_rng(1)
+        picked = np.sort(rng.choice(n, size=min(sample, n), replace=False))
+
+        t0 = time.perf_counter()
+        if n <= sample:
+            exact = gravity_forces(positions, masses, G=1.0, softening=softening)
+        else:
+            exact = np.concatenate([
+                _block_forces(positions, masses, i, i + 1, 1.0, softening) for i in picked
+            ])
+        direct_time = (time.perf_counter() - t0) * n / len(picked) if n > sample else time.perf_counter() - t0
+        if n <= sample:
+            exact = exact[picked]
+
+        for theta in thetas:
+            solver = BarnesHut(theta=theta, G=1.0, softening=softening)
+
+            t0 = time.perf_counter()
+            approx = solver.forces(positions, masses)[picked]
+            tree_time = time.perf_counter() - t0
+
+            error = np.linalg.norm(approx - exact, axis=1) / np.linalg.norm(exact, axis=1)
+            rows.append((n, theta, np.median(error), np.quantile(error, 0.99), tree_time, direct_time))
+
+    return rows
+
+
+if __name__ == "__main__":
+    print(f"{'N':>7} {'θ':>5} {'Fehler (Median)':>16} {'Fehler (99%)':>13} {'Barnes-Hut':>11} {'direkt':>9} {'Faktor':>7}")
+    for n, theta, median, q99, tree_time, direct_time in accuracy_report():
+        print(f"{n:>7} {theta:>5.2f} {median:>16.2e} {q99:>13.2e} {tree_time:>10.2f}s {direct_time:>8.2f}s {direct_time / tree_time:>7.1f}")
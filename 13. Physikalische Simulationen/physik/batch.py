@@ -0,0 +1,138 @@
+#              _________________________________
+#       ______|                                 |_____
+#       \     |   PHYSIK - BATCH-BETRIEB        |    /
+#        )    |_________________________________|   (
+#       /________)                          (________\      CC BY-NC-SA 4.0 (https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+# Berechnet eine Szene ohne Fenster und schreibt die Messgrössen in eine
+# CSV-Datei. Aufruf im Ordner von Kapitel 13:
+#
+#        python -m physik.batch gas --steps 100000 --dt 0.01 --every 100 --out gas.csv
+#
+# Ohne Fenster wird kein Bild gezeichnet und der Zeitschritt ist fest. Die
+# Simulation läuft deshalb so schnell, wie der Computer rechnen kann, und liefert
+# bei gleichem `--seed` immer dieselben Werte.
+#
+# Mit `--checkpoint` wird regelmässig ein Sicherungspunkt geschrieben (siehe
+# `physik.sicherung`). Wurde die Rechnung abgebrochen, setzt derselbe Aufruf mit
+# `--resume` sie am letzten Sicherungspunkt fort. Die CSV-Datei wird an dieser
+# Stelle weitergeschrieben:
+#
+#        python -m physik.batch gas --steps 100000 --out gas.csv --checkpoint gas.npz --resume
+#
+# Die Simulation kann auch aus einem eigenen Programm gestartet werden:
+#
+#        from physik.batch import run_batch
+#        data = run_batch("gas", steps=1000, dt=0.01)
+#        print(data["energy"])
+
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from .integratoren import INTEGRATORS, get_integrator
+from .messgroessen import OBSERVABLES, speed_histogram
+from .sicherung import load_checkpoint
+from .szenen import SCENES
+
+
+# Erzeugt die Szene `scene` und berechnet `steps` Zeitschritte. Mit `out` werden
+# die Messwerte in eine CSV-Datei geschrieben, sonst als Arrays zurückgegeben.
+#
+# Mit `checkpoint` wird alle `checkpoint_every` Schritte ein Sicherungspunkt
+# geschrieben. Mit `resume` wird ein vorhandener Sicherungspunkt geladen und nur
+# noch die fehlenden Schritte bis `steps` berechnet.
+def run_batch(scene, steps, dt, **options):
+    simulation, run_options = prepare_batch(scene, steps, dt, **options)
+    return simulation.run(**run_options)
+
+
+# Erzeugt die Simulation für `run_batch` und lädt beim Fortsetzen den
+# Sicherungspunkt. Gibt die Simulation und die Argumente für `Simulation.run`
+# zurück. `simulation.step_count` ist die Anzahl bereits berechneter Schritte.
+def prepare_batch(scene, steps, dt, every=1, out=None, observables=("energy", "momentum"),
+                  histogram_bins=None, seed=None, integrator=None, checkpoint=None, checkpoint_every=1000,
+                  resume=False, **scene_options):
+    simulation = SCENES[scene](seed=seed, **scene_options)
+    if integrator is not None:
+        simulation.integrator = get_integrator(integrator)
+
+    selected = {name: OBSERVABLES[name] for name in observables}
+    if histogram_bins is not None:
+        selected["v_hist"] = speed_histogram(histogram_bins)
+
+    # Alles, was die Rechnung und die Spalten der CSV-Datei festlegt. Beim
+    # Fortsetzen muss es übereinstimmen.
+    bins = None if histogram_bins is None else [float(edge) for edge in histogram_bins]
+    info = {"scene": scene, "dt": dt, "every": every, "seed": seed, "integrator": integrator,
+            "observables": list(selected), "histogram_bins": bins, "options": scene_options}
+
+    csv_offset = None
+    if resume and checkpoint is not None and os.path.exists(checkpoint):
+        saved = load_checkpoint(checkpoint, simulation)
+        csv_offset = saved.pop("csv_offset")
+        if saved != info:
+            raise ValueError(f"Der Sicherungspunkt {checkpoint} gehört zu einer anderen Rechnung: {saved}")
+        if out is not None and csv_offset is None:
+            raise ValueError("Der Sicherungspunkt wurde ohne CSV-Datei geschrieben")
+
+    run_options = {"steps": max(steps - simulation.step_count, 0), "dt": dt, "observables": selected,
+                   "every": every, "path": out, "checkpoint": checkpoint, "checkpoint_every": checkpoint_every,
+                   "info": info, "csv_offset": csv_offset}
+    return simulation, run_options
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Berechnet eine Simulation ohne Fenster.")
+    parser.add_argument("scene", choices=sorted(SCENES), help="Name der Szene")
+    parser.add_argument("--steps", type=int, default=1000, help="Anzahl Zeitschritte")
+    parser.add_argument("--dt", type=float, default=0.01, help="Zeitschritt in s")
+    parser.add_argument("--every", type=int, default=10, help="Messung alle n Schritte")
+    parser.add_argument("--out", default=None, help="CSV-Datei für die Messwerte")
+    parser.add_argument("--observables", nargs="+", default=["energy", "momentum"],
+                        choices=sorted(OBSERVABLES), help="Messgrössen")
+    parser.add_argument("--hist", type=int, default=0, help="Anzahl Säulen des v-Histogramms")
+    parser.add_argument("--vmax", type=float, default=1.0, help="Obere Grenze des v-Histogramms")
+    parser.add_argument("--n", type=int, default=None, help="Teilchen pro Seite (nur gas und softbody)")
+    parser.add_argument("--seed", type=int, default=None, help="Startwert des Zufallsgenerators")
+    parser.add_argument("--integrator", default=None, choices=sorted(INTEGRATORS),
+                        help="Verfahren für die Zeitschritte (Standard: Euler-Cromer)")
+    parser.add_argument("--checkpoint", default=None, help="Datei (.npz) für Sicherungspunkte")
+    parser.add_argument("--checkpoint-every", type=int, default=1000, help="Sicherungspunkt alle n Schritte")
+    parser.add_argument("--resume", action="store_true", help="Am letzten Sicherungspunkt fortsetzen")
+    args = parser.parse_args(argv)
+
+    scene_options = {}
+    if args.n is not None:
+        scene_options["n_side"] = args.n
+
+    bins = np.linspace(0, args.vmax, args.hist + 1) if args.hist else None
+
+    simulation, run_options = prepare_batch(args.scene, args.steps, args.dt, every=args.every, out=args.out,
+                                            observables=args.observables, histogram_bins=bins, seed=args.seed,
+                                            integrator=args.integrator, checkpoint=args.checkpoint,
+                                            checkpoint_every=args.checkpoint_every, resume=args.resume,
+                                            **scene_options)
+
+    # Beim Fortsetzen werden nur die fehlenden Schritte berechnet
+    first = simulation.step_count
+    start = time.perf_counter()
+    result = simulation.run(**run_options)
+    elapsed = time.perf_counter() - start
+    computed = simulation.step_count - first
+
+    if first > 0:
+        print(f"Fortgesetzt bei Schritt {first} von {args.steps}")
+    print(f"{computed} Schritte in {elapsed:.2f} s ({computed / elapsed:.0f} Schritte/s)")
+    if args.out is None:
+        for name, values in result.items():
+            print(f"{name:>16}: {values[-1]}")
+    else:
+        print(f"Messwerte gespeichert in {result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+#              _________________________________
+#       ______|                                 |_____
+#       \     |   PHYSIK - DARSTELLUNG          |    /
+#        )    |_________________________________|   (
+#       /________)                          (________\      CC BY-NC-SA 4.0 (https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+# In `on_draw` wird jeder Körper mit einem eigenen Aufruf von
+# `arcade.draw_circle_filled` gezeichnet und jede Feder mit `arcade.draw_line`.
+# Jeder Aufruf schickt ein paar Zahlen an die Grafikkarte und wartet, bis sie
+# gezeichnet sind. Bei 10'000 Körpern sind das 10'000 kleine Aufträge pro Bild,
+# und das Zeichnen dauert länger als die ganze Physik.
+#
+# Die Klassen in diesem Modul zeichnen deshalb alle Körper bzw. alle Linien mit
+# einem einzigen Auftrag ("Batch"):
+#
+#        1. Die Daten aller Körper liegen in einem Puffer auf der Grafikkarte.
+#           Radien und Farben werden nur geschrieben, wenn sie sich ändern.
+#        2. In jedem Bild wird nur das Array der Positionen (in m) auf einmal
+#           in den Puffer kopiert.
+#        3. Ein kleines Programm auf der Grafikkarte (Shader) rechnet die Meter
+#           in Pixel um und zeichnet alle Kreise gleichzeitig.
+#
+# Verwendung in einem `AnimationWindow`:
+#
+#        # in __init__
+#        self.circles = CircleBatch()
+#        self.circles.set_bodies(self.particles.radii, self.particles.colors)
+#
+#        # in on_draw
+#        self.circles.draw(positions, self.center_point, self.scale_factor)
+#
+# Für die Federn gibt es die Klasse `LineBatch`, die die Punkte von
+# `SpringNetwork.segments` als Linien zeichnet. Die Funktion `arrows` liefert
+# dieselbe Form für Pfeile, z.B. für die Geschwindigkeiten aller Körper.
+
+
+import arcade
+import numpy as np
+from arcade.gl import BufferDescription
+
+
+# Umrechnung von Meter in Pixel, gemeinsam für alle Shader:
+# pixel = center + scale * position
+_TRANSFORM = """
+uniform WindowBlock {
+    mat4 projection;
+    mat4 view;
+} window;
+
+uniform vec2 center;
+uniform float scale;
+
+vec4 to_screen(vec2 position) {
+    return window.projection * window.view * vec4(center + scale * position, 0.0, 1.0);
+}
+"""
+
+
+# Jeder Körper ist ein Punkt, der im Geometrie-Shader zu einem Quadrat mit der
+# Seitenlänge 2 r wird. Der Fragment-Shader lässt nur die Pixel innerhalb des
+# Kreises stehen.
+_CIRCLE_VERTEX = """
+#version 330
+
+in vec2 in_position;
+in float in_radius;
+in vec4 in_color;
+
+out float v_radius;
+out vec4 v_color;
+
+void main() {
+    gl_Position = vec4(in_position, 0.0, 1.0);
+    v_radius = in_radius;
+    v_color = in_color;
+}
+"""
+
+_CIRCLE_GEOMETRY = """
+#version 330
+
+layout (points) in;
+layout (triangle_strip, max_vertices = 4) out;
+""" + _TRANSFORM + """
+uniform float min_radius;
+
+in float v_radius[];
+in vec4 v_color[];
+
+out vec2 g_offset;
+out vec4 g_color;
+
+void main() {
+    vec2 position = gl_in[0].gl_Position.xy;
+    float radius = max(v_radius[0], min_radius / scale);
+
+    for (int k = 0; k < 4; k++) {
+        vec2 corner = vec2(k % 2, k / 2) * 2.0 - 1.0;
+        g_offset = corner;
+        g_color = v_color[0];
+        gl_Position = to_screen(position + radius * corner);
+        EmitVertex();
+    }
+    EndPrimitive();
+}
+"""
+
+_CIRCLE_FRAGMENT = """
+#version 330
+
+in vec2 g_offset;
+in vec4 g_color;
+
+out vec4 f_color;
+
+void main() {
+    if (dot(g_offset, g_offset) > 1.0) {
+        discard;
+    }
+    f_color = g_color;
+}
+"""
+
+
+# Jede Linie wird im Geometrie-Shader zu einem Rechteck der Breite `line_width`
+# (in Pixel)
+_LINE_VERTEX = """
+#version 330
+
+in vec2 in_position;
+
+void main() {
+    gl_Position = vec4(in_position, 0.0, 1.0);
+}
+"""
+
+_LINE_GEOMETRY = """
+#version 330
+
+layout (lines) in;
+layout (triangle_strip, max_vertices = 4) out;
+""" + _TRANSFORM + """
+uniform float line_width;
+
+void main() {
+    vec2 start = gl_in[0].gl_Position.xy;
+    vec2 end = gl_in[1].gl_Position.xy;
+
+    vec2 direction = end - start;
+    float length = max(length(direction), 1e-12);
+    vec2 normal = vec2(-direction.y, direction.x) / length * line_width / (2.0 * scale);
+
+    gl_Position = to_screen(start + normal);
+    EmitVertex();
+    gl_Position = to_screen(start - normal);
+    EmitVertex();
+    gl_Position = to_screen(end + normal);
+    EmitVertex();
+    gl_Position = to_screen(end - normal);
+    EmitVertex();
+    EndPrimitive();
+}
+"""
+
+_LINE_FRAGMENT = """
+#version 330
+
+uniform vec4 color;
+
+out vec4 f_color;
+
+void main() {
+    f_color = color;
+}
+"""
+
+
+# Wandelt eine arcade-Farbe (3 oder 4 Werte von 0 bis 255) in RGBA um
+def _rgba(color):
+    if color is None:
+        color = arcade.color.BLUE
+    color = tuple(color)
+    return color if len(color) == 4 else color + (255,)
+
+
+# Anfangs- und Endpunkte der Pfeile von `starts` nach `starts + vectors`
+# abwechselnd hintereinander (Form (2N, 2)), wie bei `SpringNetwork.segments`
+def arrows(starts, vectors):
+    starts = np.asarray(starts, dtype=float)
+    points = np.empty((2 * len(starts), 2))
+    points[0::2] = starts
+    points[1::2] = starts + vectors
+    return points
+
+
+
+# _______________________
+#                        /
+# Klasse CircleBatch    (
+# _______________________\
+#
+# Zeichnet N gefüllte Kreise mit einem Auftrag. Die Puffer werden beim ersten
+# Aufruf angelegt und verdoppelt, wenn mehr Körper dazukommen.
+#
+# - `min_radius`: kleinster Radius in Pixel, damit auch sehr kleine Körper
+#                 (z.B. Planeten bei 1e-9 Pixel/m) sichtbar bleiben
+
+class CircleBatch:
+    def __init__(self, capacity=1024, min_radius=0.0):
+        self.capacity = capacity
+        self.min_radius = min_radius
+        self.count = 0
+
+        self.ctx = arcade.get_window().ctx
+        self.program = self.ctx.program(vertex_shader=_CIRCLE_VERTEX,
+                                        geometry_shader=_CIRCLE_GEOMETRY,
+                                        fragment_shader=_CIRCLE_FRAGMENT)
+        self._allocate(capacity)
+
+
+    # Legt die Puffer für `capacity` Körper an
+    def _allocate(self, capacity):
+        self.capacity = capacity
+        self.position_buffer = self.ctx.buffer(reserve=capacity * 2 * 4)
+        self.radius_buffer = self.ctx.buffer(reserve=capacity * 4)
+        self.color_buffer = self.ctx.buffer(reserve=capacity * 4)
+        self.geometry = self.ctx.geometry([
+            BufferDescription(self.position_buffer, "2f", ["in_position"]),
+            BufferDescription(self.radius_buffer, "1f", ["in_radius"]),
+            BufferDescription(self.color_buffer, "4f1", ["in_color"], normalized=["in_color"]),
+        ], mode=self.ctx.POINTS)
+
+
+    # Schreibt die Radien (in m) und Farben aller Körper. Muss nur wieder
+    # aufgerufen werden, wenn Körper dazukommen oder sich Radius oder Farbe ändern.
+    def set_bodies(self, radii, colors):
+        radii = np.asarray(radii, dtype=np.float32)
+        n = len(radii)
+
+        if n > self.capacity:
+            capacity = self.capacity
+            while capacity < n:
+                capacity *= 2
+            self._allocate(capacity)
+
+        if isinstance(colors, np.ndarray) and colors.ndim == 2:
+            rgba = np.asarray(colors, dtype=np.uint8)
+            if rgba.shape[1] == 3:
+                rgba = np.column_stack([rgba, np.full(n, 255, dtype=np.uint8)])
+        else:
+            rgba = np.array([_rgba(color) for color in colors], dtype=np.uint8).reshape(n, 4)
+
+        self.radius_buffer.write(radii.tobytes())
+        self.color_buffer.write(np.ascontiguousarray(rgba).tobytes())
+        self.count = n
+
+
+    # Kopiert die Positionen (in m, Form (N, 2)) in den Puffer
+    def update(self, positions):
+        data = np.ascontiguousarray(positions[:self.count], dtype=np.float32)
+        self.position_buffer.write(data.tobytes())
+
+
+    # Zeichnet alle Kreise. Mit `positions` werden vorher die Positionen
+    # aktualisiert.
+    def draw(self, positions=None, center=(0.0, 0.0), scale=1.0):
+        if positions is not None:
+            self.update(positions)
+        if self.count == 0:
+            return
+
+        self.program["center"] = (float(center[0]), float(center[1]))
+        self.program["scale"] = float(scale)
+        self.program["min_radius"] = float(self.min_radius)
+
+        self.ctx.enable(self.ctx.BLEND)
+        self.geometry.render(self.program, vertices=self.count)
+
+
+
+# _______________________
+#                        /
+# Klasse LineBatch      (
+# _______________________\
+#
+# Zeichnet M Linien gleicher Farbe mit einem Auftrag. Die Punkte werden wie
+# bei `arcade.draw_lines` abwechselnd als Anfangs- und Endpunkt angegeben
+# (Form (2M, 2)), so wie sie `SpringNetwork.segments` liefert.
+
+class LineBatch:
+    def __init__(self, color=arcade.color.YELLOW, line_width=2.0, capacity=1024):
+        self.color = color
+        self.line_width = line_width
+        self.count = 0
+
+        self.ctx = arcade.get_window().ctx
+        self.program = self.ctx.program(vertex_shader=_LINE_VERTEX,
+                                        geometry_shader=_LINE_GEOMETRY,
+                                        fragment_shader=_LINE_FRAGMENT)
+        self._allocate(capacity)
+
+
+    # Legt den Puffer für `capacity` Punkte an
+    def _allocate(self, capacity):
+        self.capacity = capacity
+        self.buffer = self.ctx.buffer(reserve=capacity * 2 * 4)
+        self.geometry = self.ctx.geometry([BufferDescription(self.buffer, "2f", ["in_position"])],
+                                          mode=self.ctx.LINES)
+
+
+    # Kopiert die Punkte (in m, Form (2M, 2)) in den Puffer
+    def update(self, points):
+        data = np.ascontiguousarray(points, dtype=np.float32)
+        n = len(data)
+
+        if n > self.capacity:
+            capacity = self.capacity
+            while capacity < n:
+                capacity *= 2
+            self._allocate(capacity)
+
+        self.buffer.write(data.tobytes())
+        self.count = n
+
+
+    # Zeichnet alle Linien. Mit `points` werden vorher die Punkte aktualisiert.
+    def draw(self, points=None, center=(0.0, 0.0), scale=1.0):
+        if points is not None:
+            self.update(points)
+        if self.count == 0:
+            return
+
+        self.program["center"] = (float(center[0]), float(center[1]))
+        self.program["scale"] = float(scale)
+        self.program["line_width"] = float(self.line_width)
+        self.program["color"] = tuple(c / 255 for c in _rgba(self.color))
+
+        self.ctx.enable(self.ctx.BLEND)
+        self.geometry.render(self.program, vertices=self.count)
+
+
+
+# _______________________
+#                        /
+# Klasse TextPanel      (
+# _______________________\
+#
+# Zeichnet einige Textzeilen auf einem halb durchsichtigen Hintergrund, z.B.
+# die Zeitmessung aus `physik.zeitmessung` in einer Ecke des Fensters.
+# `arcade.draw_text` erzeugt bei jedem Aufruf ein neues Textobjekt. Das Panel
+# behält seine `arcade.Text`-Objekte und ändert nur ihren Text.
+#
+#        # in __init__
+#        self.panel = TextPanel()
+#
+#        # in on_draw: rechte obere Ecke des Panels bei (x, y)
+#        self.panel.draw(self.profiler.lines(), self.width - 10, self.height - 10)
+
+class TextPanel:
+    def __init__(self, font_size=10, line_height=16, color=arcade.color.BLACK, background=(255, 255, 255, 200)):
+        self.font_size = font_size
+        self.line_height = line_height
+        self.color = color
+        self.background = background
+        self.texts = []
+
+
+    def draw(self, lines, right, top, padding=6):
+        if not lines:
+            return
+
+        while len(self.texts) < len(lines):
+            self.texts.append(arcade.Text("", 0, 0, self.color, self.font_size))
+
+        texts = self.texts[:len(lines)]
+        for text, line in zip(texts, lines):
+            text.text = line
+        width = max(text.content_width for text in texts)
+
+        left = right - width - 2 * padding
+        bottom = top - len(lines) * self.line_height - 2 * padding
+        arcade.draw_rect_filled(arcade.rect.LRBT(left, right, bottom, top), self.background)
+
+        for k, text in enumerate(texts):
+            text.x = left + padding
+            text.y = top - padding - (k + 1) * self.line_height + 4
+            text.draw()
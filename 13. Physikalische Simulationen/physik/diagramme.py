@@ -0,0 +1,238 @@
+#              _________________________________
+#       ______|                                 |_____
+#       \     |   PHYSIK - LIVE-DIAGRAMME       |    /
+#        )    |_________________________________|   (
+#       /________)                          (________\      CC BY-NC-SA 4.0 (https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+# Ein Diagramm mit `canvas.draw()` neu zu zeichnen, dauert lange: matplotlib
+# zeichnet jedes Mal die Achsen, die Beschriftungen, das Gitter und berechnet
+# das Layout neu. Wird das 100 Mal pro Sekunde gemacht, braucht das mehr Zeit
+# als die ganze Physik.
+#
+# Bei einem Live-Diagramm ändern sich aber meistens nur die Daten. Die Klassen
+# in diesem Modul verwenden deshalb "Blitting":
+#
+#        1. Einmal wird das ganze Diagramm ohne die Daten gezeichnet und als
+#           Bild gespeichert (der Hintergrund).
+#        2. Bei jeder Aktualisierung wird nur dieses Bild zurückkopiert und
+#           die Linie darüber gezeichnet.
+#
+# Nur wenn sich die Achsen ändern müssen (z.B. weil die Energie grösser wird
+# als die y-Achse), wird das ganze Diagramm neu gezeichnet.
+#
+# Verwendung mit einer Figur, die z.B. in tkinter eingebettet ist:
+#
+#        energy_plot = EnergyPlot(ax1)
+#        histogram = SpeedHistogram(ax2)
+#
+#        # bei jedem Bild
+#        energy_plot.append(frame.t, frame.kinetic_energy(masses))
+#
+#        # seltener, z.B. alle 100 ms
+#        energy_plot.redraw()
+#        histogram.redraw(frame.speeds())
+
+
+import numpy as np
+
+
+# _______________________
+#                        /
+# Klasse RingBuffer     (
+# _______________________\
+#
+# Speichert die letzten `size` Werte in einem Array fester Grösse. Jeder Wert
+# wird an zwei Stellen geschrieben, an i und an i + size. Dadurch liegen die
+# letzten `size` Werte immer am Stück im Speicher, und `values` liefert sie
+# ohne Kopie in der richtigen Reihenfolge.
+
+class RingBuffer:
+    def __init__(self, size):
+        self.size = size
+        self.data = np.zeros(2 * size)
+        self.index = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, value):
+        self.data[self.index] = value
+        self.data[self.index + self.size] = value
+        self.index = (self.index + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    # Die gespeicherten Werte vom ältesten zum neusten
+    def values(self):
+        end = self.index + self.size
+        return self.data[end - self.count:end]
+
+
+
+# _______________________
+#                        /
+# Klasse BlitPlot       (
+# _______________________\
+#
+# Grundklasse für die Diagramme. Die Artists in `artists` werden mit
+# `animated=True` erzeugt, damit sie beim ganzen Neuzeichnen nicht im
+# Hintergrund landen. Nach jedem ganzen Neuzeichnen (auch nach einer
+# Grössenänderung des Fensters oder einem Zoom mit der Toolbar) speichert
+# `_on_draw` den neuen Hintergrund.
+
+class BlitPlot:
+    def __init__(self, axes):
+        self.axes = axes
+        self.canvas = axes.figure.canvas
+        self.artists = []
+        self.background = None
+        self.full_redraws = 0
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+
+
+    def _on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.axes.bbox)
+        self._draw_artists()
+
+
+    def _draw_artists(self):
+        for artist in self.artists:
+            self.axes.draw_artist(artist)
+
+
+    # Zeichnet das ganze Diagramm neu, nachdem sich die Achsen geändert haben
+    def full_redraw(self):
+        self.full_redraws += 1
+        self.canvas.draw()
+
+
+    # Zeichnet nur die Artists über den gespeicherten Hintergrund
+    def blit(self):
+        if self.background is None:
+            self.full_redraw()
+            return
+
+        self.canvas.restore_region(self.background)
+        self._draw_artists()
+        self.canvas.blit(self.axes.bbox)
+
+
+
+# _______________________
+#                        /
+# Klasse EnergyPlot     (
+# _______________________\
+#
+# Zeitverlauf einer Grösse, z.B. der Energie. Die letzten `history` Werte liegen
+# in Ringpuffern. Die x-Achse zeigt immer `span` Sekunden. Läuft die Zeit rechts
+# hinaus, wird die Achse um eine halbe Breite verschoben, wie bei einem
+# Oszilloskop. Die y-Achse beginnt bei 0 und ist mindestens `min_top` hoch.
+
+class EnergyPlot(BlitPlot):
+    def __init__(self, axes, history=600, span=600.0, min_top=20.0, color="blue"):
+        super().__init__(axes)
+        self.times = RingBuffer(history)
+        self.values = RingBuffer(history)
+        self.span = span
+        self.min_top = min_top
+
+        self.line, = axes.plot([], [], color=color, animated=True)
+        self.artists.append(self.line)
+        axes.set_xlim(0, span)
+        axes.set_ylim(0, min_top)
+
+
+    # Speichert einen neuen Wert (ohne zu zeichnen)
+    def append(self, t, value):
+        self.times.append(t)
+        self.values.append(value)
+
+
+    # Passt die Achsen an. Gibt True zurück, wenn sie sich geändert haben.
+    def _rescale(self, times, values):
+        changed = False
+
+        left, right = self.axes.get_xlim()
+        if times[-1] > right or times[-1] < left:
+            left = max(0.0, times[-1] - self.span / 2)
+            self.axes.set_xlim(left, left + self.span)
+            changed = True
+
+        top = self.axes.get_ylim()[1]
+        highest = values.max()
+        if highest > top or (top > self.min_top and highest < top / 4):
+            self.axes.set_ylim(0, max(self.min_top, 1.5 * highest))
+            changed = True
+
+        return changed
+
+
+    def redraw(self):
+        if len(self.times) == 0:
+            return
+
+        times = self.times.values()
+        values = self.values.values()
+        self.line.set_data(times, values)
+
+        if self._rescale(times, values):
+            self.full_redraw()
+        else:
+            self.blit()
+
+
+
+# _______________________
+#                        /
+# Klasse SpeedHistogram (
+# _______________________\
+#
+# Histogramm der Geschwindigkeitsbeträge mit `bins` gleich breiten Klassen von
+# 0 bis `v_max`. Mit festen Klassen und `range` zählt `np.histogram` alle Werte
+# in einem Durchgang. Wird eine Geschwindigkeit grösser als `v_max` (oder sind
+# alle viel kleiner), werden die Klassen neu festgelegt.
+
+class SpeedHistogram(BlitPlot):
+    def __init__(self, axes, bins=20, v_max=1.0, top=50, color="blue"):
+        super().__init__(axes)
+        self.bins = bins
+        self.v_max = v_max
+
+        self.edges = np.linspace(0, v_max, bins + 1)
+        self.stairs = axes.stairs(np.zeros(bins), self.edges, color=color, animated=True)
+        self.artists.append(self.stairs)
+        axes.set_xlim(0, v_max)
+        axes.set_ylim(0, top)
+
+
+    # Legt neue Klassen fest, wenn die Geschwindigkeiten nicht mehr passen.
+    # Gibt True zurück, wenn sich die x-Achse geändert hat.
+    def _rescale_bins(self, speeds):
+        fastest = speeds.max() if len(speeds) else 0.0
+        if fastest > self.v_max or 0 < fastest < self.v_max / 4:
+            self.v_max = 1.5 * fastest
+            self.edges = np.linspace(0, self.v_max, self.bins + 1)
+            self.axes.set_xlim(0, self.v_max)
+            return True
+        return False
+
+
+    # Vergrössert die y-Achse, wenn eine Klasse nicht mehr Platz hat
+    def _rescale_counts(self, counts):
+        if counts.max() > self.axes.get_ylim()[1]:
+            self.axes.set_ylim(0, 1.5 * counts.max())
+            return True
+        return False
+
+
+    def redraw(self, speeds):
+        changed = self._rescale_bins(speeds)
+
+        counts, _ = np.histogram(speeds, bins=self.bins, range=(0, self.v_max))
+        self.stairs.set_data(counts, self.edges)
+        changed = self._rescale_counts(counts) or changed
+
+        if changed:
+            self.full_redraw()
+        else:
+            self.blit()
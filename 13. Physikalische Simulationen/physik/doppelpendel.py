@@ -0,0 +1,260 @@
+#              _________________________________
+#       ______|                                 |_____
+#       \     |   PHYSIK - DOPPELPENDEL-KARTE   |    /
+#        )    |_________________________________|   (
+#       /________)                          (________\      CC BY-NC-SA 4.0 (https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+# Wie empfindlich ist das Doppelpendel auf die Anfangsbedingungen? Eine schöne
+# Antwort ist eine "Überschlagskarte": Für jeden Startwinkel (theta1, theta2)
+# wird das Pendel aus der Ruhe losgelassen und die Zeit gemessen, bis sich
+# einer der beiden Arme zum ersten Mal überschlägt (|theta| > pi). Jeder Punkt
+# der Karte ist ein eigenes Pendel, für ein Bild mit 1000 x 1000 Pixeln also
+# eine Million Pendel.
+#
+# Mit einem `ParticleSystem` und Fäden wie in Lektion 13.8.2 würde das ewig
+# dauern. Dieses Modul rechnet deshalb alle Pendel gleichzeitig:
+#
+#        1. Der Zustand aller Pendel liegt in einem Array der Form (4, N) mit
+#           den Zeilen theta1, theta2, omega1, omega2.
+#        2. Die Bewegungsgleichungen werden direkt aus den Winkeln berechnet
+#           (Lagrange-Formalismus, siehe unten), für alle Pendel mit denselben
+#           NumPy-Operationen.
+#        3. Ein Runge-Kutta-Schritt (RK4) bewegt alle Pendel gleichzeitig um dt.
+#           Pendel, die sich schon überschlagen haben, werden regelmässig aus dem
+#           Array entfernt, damit nur noch die übrigen gerechnet werden.
+#        4. Die Karte wird in Streifen aufgeteilt, die auf alle Prozessorkerne
+#           verteilt werden.
+#
+# Mit Delta = theta1 - theta2, M = m1 + m2 und D = 2 m1 + m2 - m2 cos(2 Delta)
+# lauten die Bewegungsgleichungen (Winkel von der Senkrechten nach unten):
+#
+#        omega1' = (-g (2 m1 + m2) sin(theta1) - m2 g sin(theta1 - 2 theta2)
+#                   - 2 m2 sin(Delta) (omega2^2 l2 + omega1^2 l1 cos(Delta))) / (l1 D)
+#
+#        omega2' = 2 sin(Delta) (omega1^2 l1 M + g M cos(theta1)
+#                   + omega2^2 l2 m2 cos(Delta)) / (l2 D)
+#
+# Aus der Ruhe kann sich ein Arm nur überschlagen, wenn die Energie dafür
+# reicht. Pendel mit zu wenig Energie werden gar nicht erst gerechnet.
+#
+#        python -m physik.doppelpendel --n 1000 --t-max 20 --out karte.png karte.npy
+#
+# Die Längen und Massen sind dieselben wie in Lektion 13.8.2.
+
+
+import argparse
+import multiprocessing
+import time
+
+import numpy as np
+
+
+# Parameter des Pendels aus Lektion 13.8.2: Längen in m, Massen in kg, g in m/s^2
+PARAMETERS = {"l1": 1.5, "l2": 1.5, "m1": 0.2, "m2": 0.1, "g": 9.81}
+
+
+# Ableitung des Zustands `state` (Form (4, N)) für alle Pendel gleichzeitig
+def derivatives(state, l1, l2, m1, m2, g):
+    theta1, theta2, omega1, omega2 = state
+    delta = theta1 - theta2
+    sin_delta = np.sin(delta)
+    cos_delta = np.cos(delta)
+    denominator = 2 * m1 + m2 - m2 * np.cos(2 * delta)
+
+    omega1_sq = omega1 * omega1
+    omega2_sq = omega2 * omega2
+
+    result = np.empty_like(state)
+    result[0] = omega1
+    result[1] = omega2
+    result[2] = (-g * (2 * m1 + m2) * np.sin(theta1) - m2 * g * np.sin(theta1 - 2 * theta2)
+                 - 2 * m2 * sin_delta * (omega2_sq * l2 + omega1_sq * l1 * cos_delta)) / (l1 * denominator)
+    result[3] = (2 * sin_delta * (omega1_sq * l1 * (m1 + m2) + g * (m1 + m2) * np.cos(theta1)
+                                  + omega2_sq * l2 * m2 * cos_delta)) / (l2 * denominator)
+    return result
+
+
+# Ein RK4-Schritt für alle Pendel
+def rk4_step(state, dt, parameters):
+    k1 = derivatives(state, **parameters)
+    k2 = derivatives(state + 0.5 * dt * k1, **parameters)
+    k3 = derivatives(state + 0.5 * dt * k2, **parameters)
+    k4 = derivatives(state + dt * k3, **parameters)
+    return state + dt / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+
+
+# Gesamtenergie aller Pendel (Nullpunkt der Lageenergie am Aufhängepunkt)
+def energy(state, l1, l2, m1, m2, g):
+    theta1, theta2, omega1, omega2 = state
+    kinetic = (0.5 * (m1 + m2) * l1 ** 2 * omega1 ** 2 + 0.5 * m2 * l2 ** 2 * omega2 ** 2
+               + m2 * l1 * l2 * omega1 * omega2 * np.cos(theta1 - theta2))
+    potential = -(m1 + m2) * g * l1 * np.cos(theta1) - m2 * g * l2 * np.cos(theta2)
+    return kinetic + potential
+
+
+# True für Pendel, die aus der Ruhe genug Energie haben, um einen Arm zu
+# überschlagen. Die kleinste Lageenergie mit einem Arm oben ist
+# min(M g l1 - m2 g l2, m2 g l2 - M g l1), alle anderen bleiben unten.
+def can_flip(theta1, theta2, l1, l2, m1, m2, g):
+    lowest = min((m1 + m2) * g * l1 - m2 * g * l2, m2 * g * l2 - (m1 + m2) * g * l1)
+    start = -(m1 + m2) * g * l1 * np.cos(theta1) - m2 * g * l2 * np.cos(theta2)
+    return start >= lowest
+
+
+# Zeit bis zum ersten Überschlag für Pendel, die aus der Ruhe bei den Winkeln
+# `theta1` und `theta2` starten. Pendel ohne Überschlag bis `t_max` erhalten
+# `np.inf`. Alle `compact_every` Schritte werden die Pendel, die sich schon
+# überschlagen haben, aus dem Zustand entfernt.
+def flip_times(theta1, theta2, t_max=20.0, dt=0.01, parameters=None, compact_every=10):
+    parameters = dict(PARAMETERS if parameters is None else parameters)
+    theta1 = np.asarray(theta1, dtype=float).ravel()
+    theta2 = np.asarray(theta2, dtype=float).ravel()
+
+    times = np.full(len(theta1), np.inf)
+    active = np.flatnonzero(can_flip(theta1, theta2, **parameters))
+    state = np.zeros((4, len(active)))
+    state[0] = theta1[active]
+    state[1] = theta2[active]
+
+    # Pendel im Zustand, deren Überschlag noch nicht gemessen wurde
+    waiting = np.ones(len(active), dtype=bool)
+
+    steps = int(round(t_max / dt))
+    for step in range(1, steps + 1):
+        if len(active) == 0:
+            break
+
+        state = rk4_step(state, dt, parameters)
+
+        flipped = waiting & ((np.abs(state[0]) > np.pi) | (np.abs(state[1]) > np.pi))
+        if flipped.any():
+            times[active[flipped]] = step * dt
+            waiting &= ~flipped
+
+        if step % compact_every == 0 and not waiting.all():
+            state = state[:, waiting]
+            active = active[waiting]
+            waiting = waiting[waiting]
+
+    return times
+
+
+# Startwinkel der n Pixel einer Zeile oder Spalte der Karte. Die Winkel liegen
+# in der Mitte der Pixel zwischen -pi und pi.
+def _angles(n):
+    return -np.pi + (np.arange(n) + 0.5) * 2 * np.pi / n
+
+
+# Rechnet die Zeilen `start` bis `stop` der Karte. Zeile k gehört zu theta2,
+# Spalte zu theta1.
+def _map_rows(task):
+    start, stop, n, t_max, dt, parameters = task
+    angles = _angles(n)
+    theta1, theta2 = np.meshgrid(angles, angles[start:stop])
+    return start, flip_times(theta1, theta2, t_max, dt, parameters).reshape(stop - start, n)
+
+
+# Überschlagskarte mit n x n Pendeln. Die Zeilen werden in Streifen von
+# `rows` Zeilen auf `processes` Prozesse (None = alle Kerne) verteilt.
+def flip_time_map(n=500, t_max=20.0, dt=0.01, parameters=None, processes=None, rows=16, progress=False):
+    parameters = dict(PARAMETERS if parameters is None else parameters)
+    tasks = [(start, min(start + rows, n), n, t_max, dt, parameters) for start in range(0, n, rows)]
+
+    result = np.empty((n, n))
+    with multiprocessing.Pool(processes) as pool:
+        for k, (start, block) in enumerate(pool.imap_unordered(_map_rows, tasks), start=1):
+            result[start:start + len(block)] = block
+            if progress:
+                print(f"\r{k}/{len(tasks)} Streifen", end="", flush=True)
+    if progress:
+        print()
+
+    return result
+
+
+# Speichert die Karte als Array (.npy) oder als Bild (z.B. .png). Im Bild ist
+# die Farbe der Logarithmus der Zeit, Pendel ohne Überschlag sind weiss.
+def save_map(path, times, cmap="viridis"):
+    if str(path).endswith(".npy"):
+        np.save(path, times)
+        return
+
+    import matplotlib.pyplot as plt
+
+    finite = np.isfinite(times)
+    image = np.ones(times.shape + (4,))
+    if finite.any():
+        logs = np.log10(times[finite])
+        low, high = logs.min(), logs.max()
+        scaled = (logs - low) / (high - low) if high > low else np.zeros_like(logs)
+        image[finite] = plt.get_cmap(cmap)(scaled)
+
+    # Zeile 0 ist theta2 = -pi und soll unten liegen
+    plt.imsave(path, image[::-1])
+
+
+
+# _______________________
+#                        /
+# Vergleich             (
+# _______________________\
+#
+# Rechnet dieselben Pendel einzeln (ein Aufruf pro Pendel) und gemeinsam und
+# vergleicht die Rechenzeit. Zusätzlich wird die Energieerhaltung von RK4 über
+# `t_max` geprüft.
+#
+#        python -m physik.doppelpendel --benchmark
+
+def benchmark(n=20, t_max=5.0, dt=0.01):
+    rng = np.random.default_rng(1)
+    theta1 = rng.uniform(-np.pi, np.pi, n * n)
+    theta2 = rng.uniform(-np.pi, np.pi, n * n)
+
+    start = time.perf_counter()
+    single = np.array([flip_times(a, b, t_max, dt)[0] for a, b in zip(theta1[:n], theta2[:n])])
+    single_time = (time.perf_counter() - start) / n
+
+    start = time.perf_counter()
+    together = flip_times(theta1, theta2, t_max, dt)
+    together_time = (time.perf_counter() - start) / (n * n)
+
+    same = np.array_equal(single, together[:n])
+    print(f"einzeln:    {1e3 * single_time:8.3f} ms pro Pendel")
+    print(f"gemeinsam:  {1e3 * together_time:8.3f} ms pro Pendel ({n * n} Pendel, gleiche Zeiten: {same})")
+
+    state = np.zeros((4, n * n))
+    state[0], state[1] = theta1, theta2
+    start_energy = energy(state, **PARAMETERS)
+    for _ in range(int(round(t_max / dt))):
+        state = rk4_step(state, dt, PARAMETERS)
+    drift = np.abs(energy(state, **PARAMETERS) - start_energy).max()
+    print(f"grösste Energieänderung nach {t_max} s: {drift:.2e} J")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Berechnet die Überschlagskarte des Doppelpendels.")
+    parser.add_argument("--n", type=int, default=500, help="Pixel pro Seite der Karte")
+    parser.add_argument("--t-max", type=float, default=20.0, help="längste Zeit in s")
+    parser.add_argument("--dt", type=float, default=0.01, help="Zeitschritt in s")
+    parser.add_argument("--processes", type=int, default=None, help="Anzahl Prozesse (Standard: alle Kerne)")
+    parser.add_argument("--out", nargs="+", default=["doppelpendel.png"], help="Dateien (.png, .npy, ...)")
+    parser.add_argument("--benchmark", action="store_true", help="einzeln und gemeinsam vergleichen")
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        benchmark()
+        return
+
+    start = time.perf_counter()
+    times = flip_time_map(args.n, args.t_max, args.dt, processes=args.processes, progress=True)
+    elapsed = time.perf_counter() - start
+
+    flipped = np.isfinite(times).mean()
+    print(f"{args.n * args.n} Pendel in {elapsed:.1f} s, {100 * flipped:.1f}% überschlagen sich")
+    for path in args.out:
+        save_map(path, times)
+        print(f"gespeichert in {path}")
+
+
+if __name__ == "__main__":
+    main()
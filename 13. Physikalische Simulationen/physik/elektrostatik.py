@@ -0,0 +1,391 @@
+#              _________________________________
+#       ______|                                 |_____
+#       \     |   PHYSIK - ELEKTROSTATIK        |    /
+#        )    |_________________________________|   (
+#       /________)                          (________\      CC BY-NC-SA 4.0 (https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+# Der Kraftterm `Coulomb` aus `physik.kraefte` rechnet alle N*(N-1)/2 Paare.
+# Für ein Plasma oder einen Ionenkristall mit einigen tausend Ladungen ist das
+# zu langsam. Dieses Modul enthält zwei schnellere Kraftterme:
+#
+# - `CutoffCoulomb` (offene Box):
+#   Positive und negative Ladungen schirmen sich gegenseitig ab. In einem
+#   neutralen Gemisch heben sich die Kräfte weit entfernter Ladungen deshalb
+#   fast auf. Wir berücksichtigen nur Paare mit einem Abstand kleiner als
+#   `cutoff` und finden sie wie bei den Kollisionen mit einer `CellList`, deren
+#   Zellen so gross sind wie `cutoff`. Würde die Kraft bei `cutoff` einfach
+#   abgeschnitten, wäre die Kugel um jede Ladung nicht genau neutral, und es
+#   bliebe ein grosser Fehler. Stattdessen wird von der Kraft ihr Wert bei
+#   `cutoff` abgezogen ("shifted force"), so dass sie stetig auf null abfällt:
+#
+#        F(r) = K q_i q_j (1 / r^2 - 1 / cutoff^2)
+#
+#   Das verkleinert den Fehler bei gleichem `cutoff` etwa um den Faktor 5.
+#
+# - `EwaldCoulomb` (periodische Box, "Particle Mesh Ewald"):
+#   Die Box wiederholt sich in x und y unendlich oft. Das Potential 1/r wird in
+#   zwei Teile zerlegt:
+#
+#        1/r = erfc(alpha r) / r  +  erf(alpha r) / r
+#              \______________/      \____________/
+#                kurzreichweitig       glatt, langreichweitig
+#
+#   Der erste Teil fällt so schnell ab, dass er wie bei `CutoffCoulomb` nur bis
+#   `cutoff` gerechnet wird. Der zweite Teil hat keine Spitze bei r = 0 und wird
+#   auf einem Gitter gerechnet:
+#
+#        1. Die Ladungen werden auf die 4 nächsten Gitterpunkte verteilt
+#           ("Cloud in Cell").
+#        2. Die Fourier-Transformation (FFT) der Gitterladungen wird mit der
+#           Transformierten von erf(alpha r) / r multipliziert. Für Ladungen in
+#           einer Ebene ist das 2 pi / k * erfc(k / (2 alpha)).
+#        3. Die Rücktransformation von -i k mal dem Ergebnis ist das elektrische
+#           Feld auf dem Gitter. Es wird mit denselben Gewichten zu den Ladungen
+#           zurück interpoliert.
+#
+#   Der Aufwand wächst mit N (Kurzreichweite) und M^2 log M (Gitter mit M x M
+#   Punkten) statt mit N^2. Der Anteil k = 0 wird weggelassen. Das entspricht
+#   einem gleichmässigen Hintergrund, der die Box neutral macht.
+#
+# Beide Kraftterme werden wie `Coulomb` verwendet:
+#
+#        simulation.add_force_term(CutoffCoulomb(cutoff=4.0))
+#        simulation.add_force_term(EwaldCoulomb(box=(-16, 16, -16, 16), cutoff=4.0, mesh=64))
+#
+# Die Genauigkeit und die Rechenzeit im Vergleich zu `Coulomb` zeigt
+#
+#        python -m physik.elektrostatik
+
+
+import time
+
+import numpy as np
+
+from .gitter import CellList
+from .kraefte import Coulomb
+from .nachbarn import NeighbourList
+
+
+# Komplementäre Fehlerfunktion erfc(x) für x >= 0. numpy hat keine eigene
+# Funktion dafür. Die Näherung von Abramowitz und Stegun (7.1.26) ist auf
+# 1.5e-7 genau und verwendet nur Arrayrechnungen.
+def erfc(x):
+    t = 1.0 / (1.0 + 0.3275911 * x)
+    polynomial = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    return polynomial * np.exp(-x * x)
+
+
+# Addiert die Kräfte `pair_forces` (Kraft auf i durch j) zu `forces`. Jedes
+# Paar wirkt nach actio = reactio entgegengesetzt auf j. `np.bincount` summiert
+# alle Beiträge eines Körpers in einem Durchgang.
+def _scatter(forces, i, j, pair_forces):
+    n = len(forces)
+    for axis in range(2):
+        forces[:, axis] += np.bincount(i, weights=pair_forces[:, axis], minlength=n)
+        forces[:, axis] -= np.bincount(j, weights=pair_forces[:, axis], minlength=n)
+
+
+
+# _______________________
+#                        /
+# Klasse CutoffCoulomb  (
+# _______________________\
+#
+# - `cutoff`:     grösster Abstand in m, bis zu dem Paare gerechnet werden
+# - `softening`:  wie bei `Coulomb`, |r|^2 wird durch |r|^2 + eps^2 ersetzt
+# - `skin`:       Reserve einer Nachbarliste in m (siehe `physik.nachbarn`).
+#                 None = Zellenliste bei jedem Aufruf.
+#
+# `pairs_tested` und `pairs_used` zählen im letzten Aufruf die Kandidatenpaare
+# aus der Zellenliste und die Paare innerhalb von `cutoff`.
+
+class CutoffCoulomb:
+    def __init__(self, cutoff, softening=0.0, skin=None):
+        self.cutoff = cutoff
+        self.softening = softening
+        self.cell_list = CellList(cutoff) if skin is None else NeighbourList(cutoff, skin)
+        self.pairs_tested = 0
+        self.pairs_used = 0
+
+
+    # Zustand der Nachbarliste (siehe `physik.sicherung`)
+    def get_state(self):
+        return {"cell_list": self.cell_list.get_state()} if hasattr(self.cell_list, "get_state") else {}
+
+    def set_state(self, state):
+        if "cell_list" in state:
+            self.cell_list.set_state(state["cell_list"])
+
+
+    # Paare innerhalb von `cutoff` mit Abstandsvektor r = x_j - x_i und |r|^2
+    def _pairs(self, positions):
+        i, j = self.cell_list.candidate_pairs(positions)
+        r_vec = positions[j] - positions[i]
+        distance_sq = np.einsum("ij,ij->i", r_vec, r_vec)
+
+        inside = distance_sq < self.cutoff ** 2
+        self.pairs_tested = len(i)
+        self.pairs_used = int(inside.sum())
+        return i[inside], j[inside], r_vec[inside], distance_sq[inside]
+
+
+    # Betrag f(r) = r / (r^2 + eps^2)^(3/2) der Kraft ohne K q_i q_j
+    def _magnitude(self, distance):
+        return distance * (distance ** 2 + self.softening ** 2) ** -1.5
+
+
+    def apply(self, particles):
+        i, j, r_vec, distance_sq = self._pairs(particles.positions)
+        charges = particles.charges
+
+        # F_i = -K q_i q_j (f(r) - f(cutoff)) r / |r|
+        distance = np.sqrt(distance_sq)
+        magnitude = self._magnitude(distance) - self._magnitude(self.cutoff)
+        weights = -Coulomb.K * charges[i] * charges[j] * magnitude / distance
+        _scatter(particles.forces, i, j, weights[:, None] * r_vec)
+
+
+    # Potential zur verschobenen Kraft: es ist bei `cutoff` null und seine
+    # Ableitung ist -F(r)
+    def potential_energy(self, particles):
+        i, j, _, distance_sq = self._pairs(particles.positions)
+        charges = particles.charges
+
+        distance = np.sqrt(distance_sq)
+        eps_sq = self.softening ** 2
+        potential = (1.0 / np.sqrt(distance_sq + eps_sq) - 1.0 / np.sqrt(self.cutoff ** 2 + eps_sq)
+                     + (distance - self.cutoff) * self._magnitude(self.cutoff))
+        return float(Coulomb.K * np.sum(charges[i] * charges[j] * potential))
+
+
+
+# _______________________
+#                        /
+# Klasse EwaldCoulomb   (
+# _______________________\
+#
+# - `box`:     (x_min, x_max, y_min, y_max) der periodischen Box
+# - `cutoff`:  Reichweite des kurzreichweitigen Teils, höchstens die halbe Box
+# - `mesh`:    Anzahl Gitterpunkte pro Richtung (am schnellsten mit 2er-Potenzen)
+# - `alpha`:   Trennung der beiden Teile in 1/m. Ohne Angabe so, dass
+#              erfc(alpha * cutoff) etwa 1e-5 ist.
+#
+# Für die Paare über den Rand der Box hinweg werden die Körper in der Nähe des
+# Randes als "Geister" auf die andere Seite kopiert. Die Zellenliste findet
+# dann auch diese Paare.
+
+class EwaldCoulomb:
+    def __init__(self, box, cutoff, mesh=64, alpha=None):
+        x_min, x_max, y_min, y_max = box
+        self.lower = np.array([x_min, y_min], dtype=float)
+        self.lengths = np.array([x_max - x_min, y_max - y_min], dtype=float)
+        if cutoff > self.lengths.min() / 2:
+            raise ValueError("cutoff darf höchstens die halbe Boxlänge sein")
+
+        self.box = box
+        self.cutoff = cutoff
+        self.mesh = mesh
+        self.alpha = 3.12 / cutoff if alpha is None else alpha
+        self.cell_list = CellList(cutoff)
+        self.pairs_tested = 0
+        self.pairs_used = 0
+        self._setup_mesh()
+
+
+    # Wellenvektoren und Green-Funktion des Gitters (werden nur einmal berechnet)
+    def _setup_mesh(self):
+        m = self.mesh
+        self.spacing = self.lengths / m
+        kx = 2 * np.pi * np.fft.fftfreq(m, d=self.spacing[0])
+        ky = 2 * np.pi * np.fft.fftfreq(m, d=self.spacing[1])
+        self.kx, self.ky = np.meshgrid(kx, ky, indexing="ij")
+        k = np.hypot(self.kx, self.ky)
+
+        # Die Verteilung auf das Gitter und die Interpolation zurück glätten
+        # beide mit W(k). Die Division durch W^2 macht das rückgängig.
+        window = (np.sinc(self.kx * self.spacing[0] / (2 * np.pi)) * np.sinc(self.ky * self.spacing[1] / (2 * np.pi))) ** 2
+
+        self.green = np.zeros_like(k)
+        nonzero = k > 0
+        self.green[nonzero] = 2 * np.pi / k[nonzero] * erfc(k[nonzero] / (2 * self.alpha)) / window[nonzero] ** 2
+
+
+    # Positionen in der Box und Paare innerhalb von `cutoff` über den Rand hinweg
+    def _pairs(self, positions):
+        n = len(positions)
+        wrapped = self.lower + np.mod(positions - self.lower, self.lengths)
+        offsets = wrapped - self.lower
+
+        # Geister der Körper, die näher als `cutoff` bei einem Rand liegen
+        near_low = offsets < self.cutoff
+        near_high = offsets > self.lengths - self.cutoff
+        all_positions = [wrapped]
+        owners = [np.arange(n)]
+        for sx in (-1, 0, 1):
+            for sy in (-1, 0, 1):
+                if sx == 0 and sy == 0:
+                    continue
+                mask = np.ones(n, dtype=bool)
+                for axis, s in ((0, sx), (1, sy)):
+                    if s == 1:
+                        mask &= near_low[:, axis]
+                    elif s == -1:
+                        mask &= near_high[:, axis]
+                all_positions.append(wrapped[mask] + np.array([sx, sy]) * self.lengths)
+                owners.append(np.flatnonzero(mask))
+
+        all_positions = np.concatenate(all_positions)
+        owners = np.concatenate(owners)
+
+        i, j = self.cell_list.candidate_pairs(all_positions)
+        r_vec = all_positions[j] - all_positions[i]
+        distance_sq = np.einsum("ij,ij->i", r_vec, r_vec)
+
+        # Jedes Paar nur einmal: beide echt, oder ein echter Körper mit dem
+        # Geist eines Körpers mit grösserem Index
+        oi, oj = owners[i], owners[j]
+        real_i, real_j = i < n, j < n
+        keep = (distance_sq < self.cutoff ** 2) & (real_i | real_j)
+        keep &= (real_i & real_j) | (real_i & (oi < oj)) | (real_j & (oj < oi))
+
+        self.pairs_tested = len(i)
+        self.pairs_used = int(keep.sum())
+        return wrapped, oi[keep], oj[keep], r_vec[keep], distance_sq[keep]
+
+
+    # Gitterpunkte und Gewichte der 4 nächsten Gitterpunkte jedes Körpers
+    def _cloud_in_cell(self, wrapped):
+        m = self.mesh
+        u = (wrapped - self.lower) / self.spacing
+        cell = np.floor(u).astype(np.int64)
+        fraction = u - cell
+
+        indices, weights = [], []
+        for dx in (0, 1):
+            for dy in (0, 1):
+                wx = fraction[:, 0] if dx else 1 - fraction[:, 0]
+                wy = fraction[:, 1] if dy else 1 - fraction[:, 1]
+                indices.append(((cell[:, 0] + dx) % m) * m + (cell[:, 1] + dy) % m)
+                weights.append(wx * wy)
+        return indices, weights
+
+
+    # Potential und Feld des langreichweitigen Teils an den Orten der Körper
+    def _mesh_field(self, wrapped, charges):
+        m = self.mesh
+        indices, weights = self._cloud_in_cell(wrapped)
+
+        grid = np.zeros(m * m)
+        for index, weight in zip(indices, weights):
+            grid += np.bincount(index, weights=charges * weight, minlength=m * m)
+
+        # phi_k = K / A * G(k) * rho_k. Die Faktoren m^2 gleichen die
+        # Normierung von np.fft.ifft2 aus.
+        factor = Coulomb.K / np.prod(self.lengths) * m * m
+        potential_k = factor * self.green * np.fft.fft2(grid.reshape(m, m))
+
+        potential = np.fft.ifft2(potential_k).real.ravel()
+        field_x = np.fft.ifft2(-1j * self.kx * potential_k).real.ravel()
+        field_y = np.fft.ifft2(-1j * self.ky * potential_k).real.ravel()
+
+        phi = np.zeros(len(charges))
+        field = np.zeros((len(charges), 2))
+        for index, weight in zip(indices, weights):
+            phi += weight * potential[index]
+            field[:, 0] += weight * field_x[index]
+            field[:, 1] += weight * field_y[index]
+        return phi, field
+
+
+    def apply(self, particles):
+        charges = particles.charges
+        wrapped, i, j, r_vec, distance_sq = self._pairs(particles.positions)
+
+        # Kurzreichweitiger Teil: F_i = -K q_i q_j g(r) r mit
+        # g(r) = (erfc(alpha r) / r + 2 alpha / sqrt(pi) exp(-alpha^2 r^2)) / r^2
+        distance = np.sqrt(distance_sq)
+        alpha_r = self.alpha * distance
+        g = (erfc(alpha_r) / distance + 2 * self.alpha / np.sqrt(np.pi) * np.exp(-alpha_r ** 2)) / distance_sq
+        weights = -Coulomb.K * charges[i] * charges[j] * g
+        _scatter(particles.forces, i, j, weights[:, None] * r_vec)
+
+        # Langreichweitiger Teil: F = q E
+        _, field = self._mesh_field(wrapped, charges)
+        particles.forces += charges[:, None] * field
+
+
+    def potential_energy(self, particles):
+        charges = particles.charges
+        wrapped, i, j, _, distance_sq = self._pairs(particles.positions)
+
+        distance = np.sqrt(distance_sq)
+        short = Coulomb.K * np.sum(charges[i] * charges[j] * erfc(self.alpha * distance) / distance)
+
+        # Jede Ladung spürt im glatten Teil auch sich selbst: erf(alpha r) / r
+        # geht für r -> 0 gegen 2 alpha / sqrt(pi). Dieser Anteil wird abgezogen.
+        phi, _ = self._mesh_field(wrapped, charges)
+        long = 0.5 * np.sum(charges * phi) - Coulomb.K * self.alpha / np.sqrt(np.pi) * np.sum(charges ** 2)
+        return float(short + long)
+
+
+
+# _______________________
+#                        /
+# Vergleich             (
+# _______________________\
+#
+# 1. Offene Box: `CutoffCoulomb` mit verschiedenen `cutoff` gegen alle Paare
+#    (`Coulomb`), für einen Ionenkristall mit N Ladungen. Die Ladungen sind
+#    stark aus dem Gitter verschoben (`jitter`), wie in einer Schmelze. In einem
+#    perfekten Gitter würden sich viele Fehler zufällig aufheben.
+# 2. Periodische Box: `EwaldCoulomb` mit verschiedenen Gittern gegen eine sehr
+#    genaue Rechnung mit feinem Gitter und grossem `cutoff`.
+#
+# Der Fehler ist die Wurzel aus dem mittleren quadratischen Fehler der Kräfte,
+# geteilt durch die Wurzel aus dem mittleren Quadrat der Kräfte.
+#
+#        python -m physik.elektrostatik
+
+def _forces(term, particles):
+    particles.clear_forces()
+    start = time.perf_counter()
+    term.apply(particles)
+    return particles.forces.copy(), time.perf_counter() - start
+
+
+def _relative_error(forces, reference):
+    return float(np.sqrt(np.mean((forces - reference) ** 2) / np.mean(reference ** 2)))
+
+
+def benchmark(n_sides=(16, 32, 64), cutoffs=(2.0, 4.0, 8.0), meshes=(32, 64, 128, 256), jitter=0.45):
+    from .szenen import ionic_crystal
+
+    print("Offene Box: CutoffCoulomb gegen alle Paare")
+    print(f"{'N':>6} {'cutoff':>7} {'Paare':>9} {'Zeit':>9} {'alle Paare':>11} {'Fehler':>9}")
+    for n_side in n_sides:
+        particles = ionic_crystal(n_side=n_side, seed=1, jitter=jitter).particles
+        reference, direct_time = _forces(Coulomb(), particles)
+        for cutoff in cutoffs:
+            term = CutoffCoulomb(cutoff)
+            forces, elapsed = _forces(term, particles)
+            print(f"{len(particles):>6} {cutoff:>7} {term.pairs_used:>9} {1e3 * elapsed:>7.1f}ms "
+                  f"{1e3 * direct_time:>9.1f}ms {_relative_error(forces, reference):>9.1e}")
+
+    print()
+    print("Periodische Box: EwaldCoulomb gegen feines Gitter")
+    n_side = n_sides[-1]
+    simulation = ionic_crystal(n_side=n_side, seed=1, jitter=jitter)
+    particles, box = simulation.particles, simulation.box
+    size = box[1] - box[0]
+    reference, _ = _forces(EwaldCoulomb(box, cutoff=size / 4, mesh=512, alpha=16 / size), particles)
+
+    print(f"{'N':>6} {'cutoff':>7} {'Gitter':>7} {'Zeit':>9} {'Fehler':>9}")
+    for cutoff in cutoffs:
+        for mesh in meshes:
+            forces, elapsed = _forces(EwaldCoulomb(box, cutoff=cutoff, mesh=mesh), particles)
+            print(f"{len(particles):>6} {cutoff:>7} {mesh:>7} {1e3 * elapsed:>7.1f}ms "
+                  f"{_relative_error(forces, reference):>9.1e}")
+
+
+if __name__ == "__main__":
+    benchmark()
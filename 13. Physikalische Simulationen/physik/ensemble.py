@@ -0,0 +1,256 @@
+#              _________________________________
+#       ______|                                 |_____
+#       \     |   PHYSIK - ENSEMBLE             |    /
+#        )    |_________________________________|   (
+#       /________)                          (________\      CC BY-NC-SA 4.0 (https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+# Ein einzelner Lauf des idealen Gases zeigt ein verrauschtes Histogramm und
+# einen schwankenden Druck. Um z.B. die Maxwell-Boltzmann-Verteilung oder das
+# Gasgesetz p A = N k T zu prüfen, rechnen wir viele unabhängige Läufe (ein
+# "Ensemble") mit verschiedenen Temperaturen und Boxgrössen und mitteln.
+#
+#        python -m physik.ensemble --runs 50 --factors 0.8 1 1.25 --sizes 8 16 --out ensemble.csv
+#
+# - Jeder Lauf ist eine eigene Aufgabe. Ein `multiprocessing.Pool` verteilt die
+#   Aufgaben auf alle Prozessorkerne.
+# - Jeder Lauf erhält einen eigenen Zufallsgenerator. `SeedSequence.spawn`
+#   erzeugt aus einem einzigen Startwert beliebig viele unabhängige Folgen von
+#   Zufallszahlen. Mit demselben `--seed` entstehen wieder dieselben Läufe.
+# - Die Läufe rechnen ereignisgesteuert (`EventDrivenGas`). So bleibt die
+#   Energie exakt erhalten, und der Druck ergibt sich aus dem Impuls, den die
+#   Teilchen an die Wände abgeben.
+# - Die Ergebnisse werden gesammelt, sobald ein Lauf fertig ist. Es wird nie
+#   mehr als das laufende Mittel und ein Histogramm pro Parametersatz
+#   gespeichert.
+#
+# Mit k T = E / N (in 2D) werden die Geschwindigkeiten in die reduzierte
+# Geschwindigkeit u = v * sqrt(m / (k T)) umgerechnet. Bei jeder Temperatur
+# sollte das Histogramm dann der 2D-Maxwell-Boltzmann-Verteilung
+#
+#        f(u) = u * exp(-u^2 / 2)
+#
+# folgen. Die Teilchen sind harte Scheiben mit dem Flächenanteil eta. Für sie
+# ist p A / (N k T) etwas grösser als 1, ungefähr (Henderson-Näherung)
+#
+#        Z = (1 + eta^2 / 8) / (1 - eta)^2
+#
+# In kleinen Boxen liegt Z etwas darüber: Die Mittelpunkte der Teilchen kommen
+# nur bis auf einen Radius an die Wände heran, die verfügbare Fläche ist also
+# kleiner als A.
+
+
+import argparse
+import multiprocessing
+import time
+
+import numpy as np
+
+from .ereignisse import EventDrivenGas
+from .simulation import CsvRecorder
+from .szenen import ideal_gas
+
+
+# Ein Lauf des Ensembles. `task` ist ein Dictionary mit den Parametern, damit es
+# an einen anderen Prozess geschickt werden kann.
+def run_member(task):
+    simulation = ideal_gas(n_side=task["n_side"], size=task["size"], radius=task["radius"],
+                           speed=task["speed"], seed=task["seed"])
+    particles = simulation.particles
+    n = len(particles)
+
+    # Heizen oder Kühlen wie mit den Buttons in Lektion 13.6
+    particles.velocities *= task["factor"]
+
+    gas = EventDrivenGas(particles, simulation.box)
+    gas.advance(task["warmup"])
+    impulse = gas.wall_impulse
+
+    # Die Energie bleibt erhalten, k T ist deshalb während des ganzen Laufs gleich
+    kT = particles.kinetic_energy() / n
+    scale = np.sqrt(particles.masses / kT)
+
+    counts = np.zeros(task["bins"])
+    for _ in range(task["samples"]):
+        gas.advance(task["duration"] / task["samples"])
+        counts += np.histogram(particles.speeds() * scale, bins=task["bins"], range=(0, task["u_max"]))[0]
+
+    x_min, x_max, y_min, y_max = simulation.box
+    area = (x_max - x_min) * (y_max - y_min)
+    perimeter = 2 * (x_max - x_min) + 2 * (y_max - y_min)
+    pressure = (gas.wall_impulse - impulse) / (task["duration"] * perimeter)
+
+    return {
+        "factor": task["factor"],
+        "size": task["size"],
+        "N": n,
+        "area": area,
+        "eta": float(np.sum(np.pi * particles.radii ** 2)) / area,
+        "kT": kT,
+        "pressure": pressure,
+        "counts": counts,
+        "events": gas.events,
+    }
+
+
+
+# _______________________
+#                        /
+# Klasse RunningMean    (
+# _______________________\
+#
+# Mittelwert und Standardabweichung einer Folge von Zahlen, ohne die Zahlen zu
+# speichern (Verfahren von Welford)
+
+class RunningMean:
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    @property
+    def std(self):
+        return np.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+
+
+# _______________________
+#                        /
+# Klasse EnsembleSummary(
+# _______________________\
+#
+# Sammelt die Ergebnisse der Läufe getrennt nach Parametersatz (Faktor, Boxgrösse)
+
+class EnsembleSummary:
+    def __init__(self, bins, u_max):
+        self.bins = bins
+        self.u_max = u_max
+        self.edges = np.linspace(0, u_max, bins + 1)
+        self.groups = {}
+
+
+    def add(self, result):
+        key = (result["factor"], result["size"])
+        group = self.groups.get(key)
+        if group is None:
+            group = {"N": result["N"], "area": result["area"], "eta": result["eta"],
+                     "kT": RunningMean(), "pressure": RunningMean(), "Z": RunningMean(),
+                     "counts": np.zeros(self.bins), "events": 0}
+            self.groups[key] = group
+
+        group["kT"].add(result["kT"])
+        group["pressure"].add(result["pressure"])
+        group["Z"].add(result["pressure"] * result["area"] / (result["N"] * result["kT"]))
+        group["counts"] += result["counts"]
+        group["events"] += result["events"]
+
+
+    # Eine Zeile pro Parametersatz, sortiert nach Faktor und Boxgrösse
+    def rows(self):
+        width = self.edges[1] - self.edges[0]
+        centers = 0.5 * (self.edges[1:] + self.edges[:-1])
+        maxwell = centers * np.exp(-centers ** 2 / 2)
+
+        for (factor, size), group in sorted(self.groups.items()):
+            eta = group["eta"]
+            counts = group["counts"]
+            yield {
+                "factor": factor,
+                "size": size,
+                "runs": group["Z"].count,
+                "N": group["N"],
+                "eta": eta,
+                "kT": group["kT"].mean,
+                "pressure": group["pressure"].mean,
+                "pressure_std": group["pressure"].std,
+                "Z": group["Z"].mean,
+                "Z_std": group["Z"].std,
+                "Z_henderson": (1 + eta ** 2 / 8) / (1 - eta) ** 2,
+                "events": group["events"],
+                "f": counts / (counts.sum() * width),
+                "maxwell": maxwell,
+            }
+
+
+
+# Erzeugt die Aufgaben für alle Kombinationen von Faktor und Boxgrösse, je
+# `runs` Läufe mit unabhängigen Zufallsfolgen
+def make_tasks(factors, sizes, runs, seed=None, n_side=8, radius=0.1, speed=0.4,
+               warmup=20.0, duration=200.0, samples=100, bins=30, u_max=4.0):
+    combinations = [(factor, size) for factor in factors for size in sizes]
+    seeds = np.random.SeedSequence(seed).spawn(len(combinations) * runs)
+
+    tasks = []
+    for k, (factor, size) in enumerate(combinations):
+        for run in range(runs):
+            tasks.append({
+                "factor": factor, "size": size, "n_side": n_side, "radius": radius,
+                "speed": speed, "seed": seeds[k * runs + run], "warmup": warmup,
+                "duration": duration, "samples": samples, "bins": bins, "u_max": u_max,
+            })
+    return tasks
+
+
+# Rechnet alle Läufe auf `processes` Prozessen (None = alle Kerne) und gibt die
+# Zusammenfassung zurück. Mit `out` wird sie als CSV-Datei gespeichert.
+def run_ensemble(factors=(1.0,), sizes=(8.0,), runs=10, seed=None, processes=None, out=None,
+                 progress=False, **options):
+    tasks = make_tasks(factors, sizes, runs, seed=seed, **options)
+    summary = EnsembleSummary(tasks[0]["bins"], tasks[0]["u_max"])
+
+    with multiprocessing.Pool(processes) as pool:
+        for k, result in enumerate(pool.imap_unordered(run_member, tasks), start=1):
+            summary.add(result)
+            if progress:
+                print(f"\r{k}/{len(tasks)} Läufe", end="", flush=True)
+    if progress:
+        print()
+
+    if out is not None:
+        recorder = CsvRecorder(out)
+        try:
+            for row in summary.rows():
+                recorder.record(row)
+        finally:
+            recorder.close()
+
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Berechnet viele Läufe des idealen Gases parallel.")
+    parser.add_argument("--runs", type=int, default=20, help="Läufe pro Parametersatz")
+    parser.add_argument("--factors", type=float, nargs="+", default=[1.0],
+                        help="Faktoren für die Geschwindigkeiten (heizen > 1, kühlen < 1)")
+    parser.add_argument("--sizes", type=float, nargs="+", default=[8.0], help="Seitenlängen der Box in m")
+    parser.add_argument("--n", type=int, default=8, help="Teilchen pro Seite")
+    parser.add_argument("--radius", type=float, default=0.1, help="Radius der Teilchen in m")
+    parser.add_argument("--duration", type=float, default=200.0, help="Messdauer pro Lauf in s")
+    parser.add_argument("--bins", type=int, default=30, help="Anzahl Säulen des Histogramms")
+    parser.add_argument("--processes", type=int, default=None, help="Anzahl Prozesse (Standard: alle Kerne)")
+    parser.add_argument("--seed", type=int, default=None, help="Startwert des Zufallsgenerators")
+    parser.add_argument("--out", default=None, help="CSV-Datei für die Zusammenfassung")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    summary = run_ensemble(args.factors, args.sizes, args.runs, seed=args.seed, processes=args.processes,
+                           out=args.out, progress=True, n_side=args.n, radius=args.radius,
+                           duration=args.duration, bins=args.bins)
+    elapsed = time.perf_counter() - start
+
+    print(f"{'Faktor':>7} {'Box':>5} {'Läufe':>6} {'kT':>8} {'p':>9} {'pA/NkT':>14} {'Henderson':>10}")
+    for row in summary.rows():
+        print(f"{row['factor']:>7} {row['size']:>5} {row['runs']:>6} {row['kT']:>8.4f} {row['pressure']:>9.5f} "
+              f"{row['Z']:>7.3f} ± {row['Z_std']:.3f} {row['Z_henderson']:>10.3f}")
+    print(f"Rechenzeit {elapsed:.1f} s")
+    if args.out is not None:
+        print(f"Zusammenfassung gespeichert in {args.out}")
+
+
+if __name__ == "__main__":
+    main()
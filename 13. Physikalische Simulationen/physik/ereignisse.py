@@ -0,0 +1,310 @@
+#              _________________________________
+#       ______|                                 |_____
+#       \     |   PHYSIK - EREIGNISSE           |    /
+#        )    |_________________________________|   (
+#       /________)                          (________\      CC BY-NC-SA 4.0 (https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+# Im idealen Gas bewegen sich die Teilchen zwischen zwei Stössen geradlinig mit
+# konstanter Geschwindigkeit. Mit festen Zeitschritten wird trotzdem in jedem
+# Schritt geprüft, ob sich zwei Teilchen überlappen. In einem dünnen Gas passiert
+# in den meisten Schritten gar nichts. Und ein schnelles Teilchen kann in einem
+# Schritt an einem anderen vorbeifliegen, ohne dass die Überlappung bemerkt wird.
+#
+# Eine ereignisgesteuerte Simulation ("event-driven molecular dynamics") rechnet
+# stattdessen aus, WANN der nächste Stoss stattfindet, und springt direkt dorthin:
+#
+#        1. Für jedes Teilchen wird der Zeitpunkt seines nächsten Ereignisses
+#           berechnet: ein Stoss mit einem anderen Teilchen oder mit einer Wand.
+#        2. Alle Ereignisse kommen in eine Warteschlange, die nach der Zeit
+#           sortiert ist (ein "Heap" aus dem Modul `heapq`).
+#        3. Das früheste Ereignis wird herausgenommen, die beteiligten Teilchen
+#           werden genau bis zum Stoss bewegt und ihre Geschwindigkeiten mit der
+#           Impulsformel aus Kapitel 13.5 berechnet.
+#        4. Für die beteiligten Teilchen werden neue Ereignisse vorhergesagt.
+#
+# Zwei Teilchen mit Abstand r = x_j - x_i und Relativgeschwindigkeit
+# v = v_j - v_i berühren sich, wenn |r + v t| = r_i + r_j = sigma. Das ist eine
+# quadratische Gleichung in t:
+#
+#        (v.v) t^2 + 2 (r.v) t + (r.r - sigma^2) = 0
+#
+# Mit b = r.v < 0 (die Teilchen nähern sich) und d = b^2 - (v.v)(r.r - sigma^2)
+# >= 0 ist die frühere Lösung t = -(b + sqrt(d)) / (v.v).
+#
+# Nach einem Stoss sind die vorhergesagten Ereignisse der beteiligten Teilchen
+# falsch. Statt sie aus der Warteschlange zu löschen, zählt `counts` die Stösse
+# jedes Teilchens. Jedes Ereignis merkt sich die Zählerstände bei der Vorhersage
+# und wird beim Herausnehmen übersprungen, wenn sich einer geändert hat
+# ("lazy invalidation").
+#
+# Jedes Teilchen wird nur bis zu seinem letzten Ereignis bewegt und merkt sich
+# die Zeit dazu (`times`). Für die Darstellung berechnet `positions_at(t)` die
+# Positionen zu einer beliebigen Zeit exakt aus der geradlinigen Bewegung.
+#
+# Verwendung anstelle von `simulation.step(dt)`:
+#
+#        gas = EventDrivenGas(particles, box=(-4, 4, -4, 4))
+#        gas.advance(dt)
+
+
+import heapq
+import time
+
+import numpy as np
+
+
+# Partner für Stösse mit den Wänden und für Teilchen ohne Ereignis
+WALL_X, WALL_Y, NO_EVENT = -1, -2, -3
+
+
+# _______________________
+#                        /
+# Klasse EventDrivenGas (
+# _______________________\
+#
+# - `particles`:  ParticleSystem mit den Teilchen
+# - `box`:        (x_min, x_max, y_min, y_max) der Wände
+#
+# `events` zählt die bearbeiteten Ereignisse, `collisions` die Stösse zwischen
+# Teilchen und `skipped` die übersprungenen, ungültigen Ereignisse.
+#
+# `wall_impulse` summiert den Impuls 2 m |v|, den die Teilchen bei Stössen an die
+# Wände abgeben. Geteilt durch die Zeit und den Umfang der Box ergibt das den
+# Druck (in 2D eine Kraft pro Länge).
+
+class EventDrivenGas:
+    def __init__(self, particles, box):
+        self.particles = particles
+        self.box = box
+        self.t = 0.0
+        self.events = 0
+        self.collisions = 0
+        self.skipped = 0
+        self.wall_impulse = 0.0
+        self.reset()
+
+
+    # Sagt alle Ereignisse neu voraus. Muss aufgerufen werden, nachdem die
+    # Geschwindigkeiten von aussen verändert wurden (z.B. beim Heizen).
+    def reset(self):
+        n = len(self.particles)
+        self.times = np.full(n, self.t)
+        self.counts = np.zeros(n, dtype=np.int64)
+        self.partners = np.full(n, NO_EVENT)
+        self.queue = []
+        self._order = 0
+
+        for i in range(n):
+            self._predict(i)
+
+
+    # Positionen aller Teilchen zur Zeit t (nicht vor dem letzten Ereignis)
+    def positions_at(self, t):
+        return self.particles.positions + self.particles.velocities * (t - self.times)[:, None]
+
+
+    # Bewegt Teilchen i geradlinig bis zur Zeit t
+    def _move(self, i, t):
+        self.particles.positions[i] += self.particles.velocities[i] * (t - self.times[i])
+        self.times[i] = t
+
+
+    # Zeit bis zum nächsten Stoss von Teilchen i mit einer Wand und die Wand
+    def _wall_time(self, i, position):
+        velocity = self.particles.velocities[i]
+        radius = self.particles.radii[i]
+        x_min, x_max, y_min, y_max = self.box
+
+        best, wall = np.inf, NO_EVENT
+        for axis, low, high, kind in ((0, x_min, x_max, WALL_X), (1, y_min, y_max, WALL_Y)):
+            if velocity[axis] > 0:
+                dt = (high - radius - position[axis]) / velocity[axis]
+            elif velocity[axis] < 0:
+                dt = (low + radius - position[axis]) / velocity[axis]
+            else:
+                continue
+            if dt < best:
+                best, wall = max(dt, 0.0), kind
+
+        return best, wall
+
+
+    # Sagt das nächste Ereignis von Teilchen i voraus und legt es in die
+    # Warteschlange. Die Stosszeiten mit allen anderen Teilchen werden mit
+    # einer einzigen Array-Rechnung bestimmt.
+    def _predict(self, i):
+        positions = self.positions_at(self.t)
+        velocities = self.particles.velocities
+        radii = self.particles.radii
+
+        r_vec = positions - positions[i]
+        v_vec = velocities - velocities[i]
+        b = np.einsum("ij,ij->i", r_vec, v_vec)
+        vv = np.einsum("ij,ij->i", v_vec, v_vec)
+        rr = np.einsum("ij,ij->i", r_vec, r_vec)
+        sigma = radii + radii[i]
+        d = b * b - vv * (rr - sigma * sigma)
+
+        # Nur Teilchen, die sich nähern und deren Bahnen sich berühren
+        candidates = np.flatnonzero((b < 0) & (d >= 0))
+        candidates = candidates[candidates != i]
+
+        best, partner = np.inf, NO_EVENT
+        if len(candidates):
+            dt = -(b[candidates] + np.sqrt(d[candidates])) / vv[candidates]
+            k = np.argmin(dt)
+            best, partner = max(dt[k], 0.0), int(candidates[k])
+
+        wall_dt, wall = self._wall_time(i, positions[i])
+        if wall_dt < best:
+            best, partner = wall_dt, wall
+
+        self.partners[i] = partner
+        if partner == NO_EVENT:
+            return
+
+        count_j = self.counts[partner] if partner >= 0 else 0
+        self._order += 1
+        heapq.heappush(self.queue, (self.t + best, self._order, i, partner, self.counts[i], count_j))
+
+
+    # Elastischer Stoss zwischen den Teilchen i und j, die sich berühren
+    def _collide(self, i, j):
+        positions = self.particles.positions
+        velocities = self.particles.velocities
+        masses = self.particles.masses
+
+        normal = positions[j] - positions[i]
+        normal /= np.linalg.norm(normal)
+        velocity_along_normal = np.dot(velocities[i] - velocities[j], normal)
+        impulse = 2 * velocity_along_normal / (1 / masses[i] + 1 / masses[j])
+
+        velocities[i] -= impulse * normal / masses[i]
+        velocities[j] += impulse * normal / masses[j]
+
+
+    # Stoss von Teilchen i mit einer Wand: die Geschwindigkeit senkrecht zur
+    # Wand wechselt das Vorzeichen
+    def _bounce(self, i, wall):
+        axis = 0 if wall == WALL_X else 1
+        velocities = self.particles.velocities
+        self.wall_impulse += 2 * self.particles.masses[i] * abs(velocities[i, axis])
+        velocities[i, axis] *= -1
+
+
+    # Bearbeitet ein Ereignis und sagt die betroffenen Ereignisse neu voraus
+    def _process(self, t, i, j):
+        self.t = t
+        self._move(i, t)
+        self.counts[i] += 1
+        involved = [i]
+
+        if j >= 0:
+            self._move(j, t)
+            self._collide(i, j)
+            self.counts[j] += 1
+            involved.append(j)
+            self.collisions += 1
+        else:
+            self._bounce(i, j)
+
+        # Teilchen, deren nächstes Ereignis ein Stoss mit i oder j war
+        affected = self.partners == i
+        if j >= 0:
+            affected |= self.partners == j
+        dependents = np.flatnonzero(affected)
+        for k in dict.fromkeys(involved + dependents.tolist()):
+            self._predict(k)
+
+        self.events += 1
+
+
+    # Rechnet bis zur Zeit t_end: alle Ereignisse bis dahin werden der Reihe
+    # nach bearbeitet. Danach liegen alle Teilchen an ihrer Position zur Zeit
+    # t_end in `particles.positions`.
+    def advance_to(self, t_end):
+        queue = self.queue
+        while queue and queue[0][0] <= t_end:
+            t, _, i, j, count_i, count_j = heapq.heappop(queue)
+
+            # Ungültige Ereignisse überspringen
+            if self.counts[i] != count_i or (j >= 0 and self.counts[j] != count_j):
+                self.skipped += 1
+                continue
+
+            self._process(t, i, j)
+
+        self.particles.positions[:] = self.positions_at(t_end)
+        self.times[:] = t_end
+        self.t = t_end
+
+
+    # Rechnet um die Zeit dt weiter (gleiche Verwendung wie `Simulation.step`)
+    def advance(self, dt):
+        self.advance_to(self.t + dt)
+
+    step = advance
+
+
+    # Gesamtenergie (nur kinetische Energie, sie bleibt bei jedem Stoss erhalten)
+    def total_energy(self):
+        return self.particles.kinetic_energy()
+
+
+
+# _______________________
+#                        /
+# Vergleich             (
+# _______________________\
+#
+# Rechnet dasselbe Gas mit festen Zeitschritten (`Simulation` mit Zellenliste)
+# und ereignisgesteuert über dieselbe Zeit und vergleicht Rechenzeit,
+# Energieerhaltung und die grösste Überlappung zweier Teilchen.
+#
+#        python -m physik.ereignisse
+
+def _max_overlap(particles):
+    positions, radii = particles.positions, particles.radii
+    r_vec = positions[None, :, :] - positions[:, None, :]
+    distances = np.sqrt(np.einsum("ijk,ijk->ij", r_vec, r_vec))
+    overlap = radii[:, None] + radii[None, :] - distances
+    np.fill_diagonal(overlap, -np.inf)
+    return max(float(overlap.max()), 0.0)
+
+
+def benchmark(n_sides=(8, 16), radii=(0.2, 0.05), duration=200.0, dt=0.01, speed=0.4, seed=1):
+    from .szenen import ideal_gas
+
+    print(f"{'N':>6} {'Radius':>7} {'Verfahren':>10} {'Rechenzeit':>11} {'Ereignisse':>11} "
+          f"{'Energie':>9} {'Überlappung':>12}")
+    for n_side in n_sides:
+        for radius in radii:
+            for method in ("fest", "Ereignis"):
+                simulation = ideal_gas(n_side=n_side, seed=seed, speed=speed, radius=radius)
+                particles = simulation.particles
+                energy = particles.kinetic_energy()
+
+                start = time.perf_counter()
+                overlap = 0.0
+                if method == "fest":
+                    steps = int(round(duration / dt))
+                    for k in range(steps):
+                        simulation.step(dt)
+                        if k % 100 == 0:
+                            overlap = max(overlap, _max_overlap(particles))
+                    count = steps
+                else:
+                    gas = EventDrivenGas(particles, simulation.box)
+                    for _ in range(int(round(duration))):
+                        gas.advance(1.0)
+                        overlap = max(overlap, _max_overlap(particles))
+                    count = gas.events
+                elapsed = time.perf_counter() - start
+
+                drift = abs(particles.kinetic_energy() - energy) / energy
+                print(f"{len(particles):>6} {radius:>7} {method:>10} {elapsed:>10.2f}s {count:>11} "
+                      f"{drift:>9.1e} {overlap:>11.3f}m")
+
+
+if __name__ == "__main__":
+    benchmark()
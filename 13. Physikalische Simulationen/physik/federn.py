@@ -0,0 +1,345 @@
+#              _________________________________
+#       ______|                                 |_____
+#       \     |   PHYSIK - FEDERNETZE           |    /
+#        )    |_________________________________|   (
+#       /________)                          (________\      CC BY-NC-SA 4.0 (https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+# In den Lektionen 13.8.3 und 13.8.4 ist jede Feder ein eigenes `Spring`-Objekt,
+# dessen Methode `calculate_spring_force` in jedem Zeitschritt aufgerufen wird.
+# Für ein Seil mit 29 Körpern ist das kein Problem. Ein Tuch oder ein weicher
+# Körper aus 100 x 100 Massen besitzt aber fast 40'000 Federn, und die Schleife
+# über alle Federn braucht dann mehr Zeit als ein Bild.
+#
+# Ein `SpringNetwork` speichert deshalb alle Federn in Arrays ("Kantenliste"):
+#
+#        i, j          (M,)   Indizes der beiden Körper jeder Feder
+#        k             (M,)   Federkonstanten in N/m
+#        rest_length   (M,)   Ruhelängen in m
+#        damping       (M,)   Dämpfungskonstanten in Ns/m
+#
+# Die Kräfte aller Federn werden mit denselben Formeln wie in `Spring` berechnet,
+# aber für alle Federn gleichzeitig:
+#
+#        1. Gather:   r = x[j] - x[i] für alle Federn auf einmal
+#        2. Kraft:    F = (-k * (|r| - L) - c * v_rel · e) * e   mit e = r / |r|
+#        3. Scatter:  F zu Körper j addieren und von Körper i abziehen
+#
+# Für den ersten Schritt verwenden wir `np.take(x, j, axis=0)` statt `x[j]`.
+# Das Ergebnis ist dasselbe, bei zweidimensionalen Arrays ist `np.take` aber
+# um ein Vielfaches schneller. Für den dritten Schritt genügt `np.add.at` nicht,
+# weil es sehr langsam ist. `np.bincount(j, weights=F_x)` summiert dagegen alle
+# Kräfte, die auf denselben Körper wirken, in einem einzigen schnellen Durchgang.
+#
+# Die Funktionen `rope`, `grid` und `triangle_lattice` erzeugen die Positionen
+# und Federn für Seile und weiche Körper:
+#
+#        positions, edges = grid(100, 100, spacing=0.04)
+#        bodies = particles.add_bodies(positions, np.zeros_like(positions), mass=1e-4)
+#        springs = SpringNetwork()
+#        springs.add_edges(edges, particles.positions, k=5.0, damping=0.01)
+#        simulation.add_force_term(springs)
+
+
+import time
+
+import numpy as np
+
+
+# _______________________
+#                        /
+# Klasse SpringNetwork  (
+# _______________________\
+#
+# Das Netz kann wie `Coulomb` oder `PairGravity` als Kraftterm zu einer
+# `Simulation` hinzugefügt werden (`apply` und `potential_energy`). Mit
+# `forces(positions, velocities)` lassen sich die Federkräfte auch direkt für
+# beliebige Arrays berechnen, z.B. in einer eigenen `on_update`-Methode.
+
+class SpringNetwork:
+    def __init__(self):
+        self.i = np.zeros(0, dtype=np.intp)
+        self.j = np.zeros(0, dtype=np.intp)
+        self.k = np.zeros(0)
+        self.rest_length = np.zeros(0)
+        self.damping = np.zeros(0)
+
+
+    def __len__(self):
+        return len(self.i)
+
+
+    # Alle Federn als Arrays (siehe `physik.sicherung`)
+    def get_state(self):
+        return {"i": self.i.copy(), "j": self.j.copy(), "k": self.k.copy(),
+                "rest_length": self.rest_length.copy(), "damping": self.damping.copy()}
+
+
+    def set_state(self, state):
+        self.i = np.array(state["i"], dtype=np.intp)
+        self.j = np.array(state["j"], dtype=np.intp)
+        self.k = np.array(state["k"], dtype=float)
+        self.rest_length = np.array(state["rest_length"], dtype=float)
+        self.damping = np.array(state["damping"], dtype=float)
+
+
+    # Fügt viele Federn auf einmal hinzu. Fehlt die Ruhelänge, wird der
+    # aktuelle Abstand der beiden Körper aus `positions` verwendet.
+    def add_springs(self, i, j, k=1.0, rest_length=None, damping=0.0, positions=None):
+        i = np.atleast_1d(np.asarray(i, dtype=np.intp))
+        j = np.atleast_1d(np.asarray(j, dtype=np.intp))
+
+        if rest_length is None:
+            if positions is None:
+                raise ValueError("Ohne Ruhelänge werden die Positionen der Körper benötigt")
+            positions = np.asarray(positions, dtype=float)
+            rest_length = np.linalg.norm(positions[j] - positions[i], axis=1)
+
+        m = len(i)
+        self.i = np.concatenate([self.i, i])
+        self.j = np.concatenate([self.j, j])
+        self.k = np.concatenate([self.k, np.broadcast_to(np.asarray(k, dtype=float), m)])
+        self.rest_length = np.concatenate([self.rest_length, np.broadcast_to(np.asarray(rest_length, dtype=float), m)])
+        self.damping = np.concatenate([self.damping, np.broadcast_to(np.asarray(damping, dtype=float), m)])
+
+
+    # Fügt eine einzelne Feder zwischen den Körpern i und j hinzu
+    def add_spring(self, i, j, k=1.0, rest_length=None, damping=0.0, positions=None):
+        self.add_springs([i], [j], k=k, rest_length=rest_length, damping=damping, positions=positions)
+
+
+    # Fügt die Federn einer Kantenliste (Form (M, 2)) hinzu, wie sie `rope`,
+    # `grid` und `triangle_lattice` liefern. `offset` ist der Index des ersten
+    # Körpers, falls das Netz nicht bei Körper 0 beginnt.
+    def add_edges(self, edges, positions=None, k=1.0, rest_length=None, damping=0.0, offset=0):
+        edges = np.asarray(edges, dtype=np.intp) + offset
+        self.add_springs(edges[:, 0], edges[:, 1], k=k, rest_length=rest_length,
+                         damping=damping, positions=positions)
+
+
+    # Verbindungsvektoren r = x[j] - x[i] und Längen |r| aller Federn
+    def _geometry(self, positions):
+        r_vec = np.take(positions, self.j, axis=0) - np.take(positions, self.i, axis=0)
+        distance = np.sqrt(np.einsum("ij,ij->i", r_vec, r_vec))
+        return r_vec, distance
+
+
+    # Federkraft jeder Feder, die auf den Körper j wirkt (Form (M, 2)).
+    # Auf den Körper i wirkt die Gegenkraft. Statt den Einheitsvektor
+    # e = r / |r| als eigenes Array zu berechnen, wird nur 1 / |r| gebildet und
+    # am Schluss mit r multipliziert.
+    def spring_forces(self, positions, velocities):
+        r_vec, distance = self._geometry(positions)
+
+        # Federn mit Länge 0 (z.B. im Seil) besitzen keine Richtung
+        inverse = 1.0 / np.where(distance > 0, distance, 1.0)
+
+        v_rel = np.take(velocities, self.j, axis=0) - np.take(velocities, self.i, axis=0)
+        magnitude = -self.k * (distance - self.rest_length)
+        magnitude -= self.damping * np.einsum("ij,ij->i", v_rel, r_vec) * inverse
+
+        return (magnitude * inverse)[:, None] * r_vec
+
+
+    # Ableitungen der Federkraft für implizite Verfahren (`physik.implizit`).
+    # Für jede Feder gilt mit dem Einheitsvektor e und P = e e^T:
+    #
+    #        dF/dx = -(k * P + k_quer * (1 - P))      dF/dv = -c * P
+    #
+    # mit k_quer = k * (1 - L / |r|). Eine gestauchte Feder hätte ein negatives
+    # k_quer. Es wird deshalb auf 0 begrenzt, damit das Gleichungssystem des
+    # impliziten Verfahrens immer lösbar bleibt.
+    def jacobian(self, positions):
+        r_vec, distance = self._geometry(positions)
+        inverse = 1.0 / np.where(distance > 0, distance, 1.0)
+
+        direction = r_vec * inverse[:, None]
+        transverse = self.k * np.maximum(1.0 - self.rest_length * inverse, 0.0)
+        return direction, self.k, transverse, self.damping
+
+
+    # Resultierende Federkraft auf jeden Körper (Form (N, 2))
+    def forces(self, positions, velocities):
+        return self.scatter(self.spring_forces(positions, velocities), len(positions))
+
+
+    # Verteilt Vektoren f (Form (M, 2)), die an den Federn berechnet wurden, auf
+    # die n Körper: +f auf Körper j und -f auf Körper i (Form (n, 2))
+    def scatter(self, f, n):
+        result = np.empty((n, 2))
+        for axis in (0, 1):
+            result[:, axis] = (np.bincount(self.j, weights=f[:, axis], minlength=n)
+                               - np.bincount(self.i, weights=f[:, axis], minlength=n))
+        return result
+
+
+    # Addiert die Federkräfte zu den Kräften des Partikelsystems
+    def apply(self, particles):
+        particles.forces += self.forces(particles.positions, particles.velocities)
+
+
+    # Spannenergie aller Federn E = sum 1/2 * k * (|r| - L)^2
+    def potential_energy(self, particles):
+        _, distance = self._geometry(particles.positions)
+        return float(0.5 * np.sum(self.k * (distance - self.rest_length)**2))
+
+
+    # Grösster stabiler Zeitschritt für Euler-Cromer bei den Massen `masses`.
+    #
+    # Eine Feder zwischen zwei leichten Körpern schwingt sehr schnell. Für die
+    # höchste Frequenz ω_max des ganzen Netzes und die stärkste Dämpfung μ_max
+    # (in 1/s) ist Euler-Cromer stabil, solange dt^2 * ω_max^2 + 2 * dt * μ_max < 4.
+    # Beide Werte werden nach oben abgeschätzt (Satz von Gerschgorin):
+    #
+    #        ω_max^2 <= max über i von  sum k * (1/m_i + 1/sqrt(m_i * m_j))
+    #
+    # summiert über alle Federn am Körper i, ebenso μ_max mit c statt k.
+    # Zurückgegeben wird das dt, bei dem die linke Seite 2 ist, also die Hälfte
+    # der Grenze.
+    def stable_dt(self, masses):
+        omega2 = self._rate_bound(self.k, masses)
+        mu = self._rate_bound(self.damping, masses)
+        if omega2 == 0:
+            return np.inf if mu == 0 else 1.0 / mu
+        return (np.sqrt(mu**2 + 2 * omega2) - mu) / omega2
+
+
+    # max über i von sum value * (1/m_i + 1/sqrt(m_i * m_j)) über die Federn am Körper i
+    def _rate_bound(self, values, masses):
+        if len(self.i) == 0:
+            return 0.0
+        masses = np.asarray(masses, dtype=float)
+        m_i, m_j = masses[self.i], masses[self.j]
+        coupling = values / np.sqrt(m_i * m_j)
+        n = len(masses)
+        rate = (np.bincount(self.i, weights=values / m_i + coupling, minlength=n)
+                + np.bincount(self.j, weights=values / m_j + coupling, minlength=n))
+        return float(rate.max())
+
+
+    # Anfangs- und Endpunkte aller Federn abwechselnd hintereinander
+    # (Form (2M, 2)), z.B. zum Zeichnen der Federn als Linien
+    def segments(self, positions):
+        positions = np.asarray(positions)
+        points = np.empty((2 * len(self.i), 2))
+        points[0::2] = np.take(positions, self.i, axis=0)
+        points[1::2] = np.take(positions, self.j, axis=0)
+        return points
+
+
+
+# _______________________
+#                        /
+# Netzgeneratoren       (
+# _______________________\
+#
+# Jede Funktion gibt die Positionen der Körper (Form (N, 2)) und die Federn als
+# Kantenliste (Form (M, 2)) zurück. Die Körper werden zeilenweise nummeriert:
+# Der Körper in Zeile r und Spalte c hat den Index r * nx + c.
+
+# Seil aus n Körpern auf der Strecke von `start` nach `end`
+def rope(n, start=(0.0, 0.0), end=(1.0, 0.0)):
+    s = np.linspace(0.0, 1.0, n)[:, None]
+    positions = (1 - s) * np.asarray(start, dtype=float) + s * np.asarray(end, dtype=float)
+
+    index = np.arange(n)
+    edges = np.column_stack([index[:-1], index[1:]])
+    return positions, edges
+
+
+# Quadratisches Gitter aus nx x ny Körpern mit dem Abstand `spacing`.
+# Ein Gitter nur aus waagrechten und senkrechten Federn knickt bei einer
+# Scherung einfach ein. Mit `diagonals=True` werden deshalb in jedem Quadrat
+# zusätzlich beide Diagonalen verbunden.
+def grid(nx, ny, spacing=1.0, origin=(0.0, 0.0), diagonals=True):
+    index = np.arange(nx * ny).reshape(ny, nx)
+
+    x, y = np.meshgrid(np.arange(nx) * spacing, np.arange(ny) * spacing)
+    positions = np.column_stack([x.ravel(), y.ravel()]) + np.asarray(origin, dtype=float)
+
+    pairs = [
+        (index[:, :-1], index[:, 1:]),       # waagrecht
+        (index[:-1, :], index[1:, :]),       # senkrecht
+    ]
+    if diagonals:
+        pairs.append((index[:-1, :-1], index[1:, 1:]))
+        pairs.append((index[:-1, 1:], index[1:, :-1]))
+
+    edges = np.concatenate([np.column_stack([a.ravel(), b.ravel()]) for a, b in pairs])
+    return positions, edges
+
+
+# Dreiecksgitter aus nx x ny Körpern. Jede zweite Zeile ist um einen halben
+# Abstand verschoben, so dass alle Federn gleich lang sind und das Gitter
+# auch ohne Diagonalen formstabil ist:
+#
+#        o---o---o---o
+#         \ / \ / \ / \
+#          o---o---o---o
+#         / \ / \ / \ /
+#        o---o---o---o
+def triangle_lattice(nx, ny, spacing=1.0, origin=(0.0, 0.0)):
+    index = np.arange(nx * ny).reshape(ny, nx)
+
+    row = np.arange(ny)[:, None]
+    x = np.arange(nx)[None, :] * spacing + (row % 2) * spacing / 2
+    y = np.broadcast_to(row * spacing * np.sqrt(3) / 2, (ny, nx))
+    positions = np.column_stack([x.ravel(), y.ravel()]) + np.asarray(origin, dtype=float)
+
+    # Gerade Zeilen (0, 2, ...) mit der ungeraden Zeile darüber und
+    # ungerade Zeilen (1, 3, ...) mit der geraden Zeile darüber
+    even, odd_above = index[0:-1:2], index[1::2]
+    odd, even_above = index[1:-1:2], index[2::2]
+    pairs = [
+        (index[:, :-1], index[:, 1:]),           # waagrecht
+        (index[:-1, :], index[1:, :]),           # nach oben, gleiche Spalte
+        (even[:, 1:], odd_above[:, :-1]),        # gerade Zeile nach oben links
+        (odd[:, :-1], even_above[:, 1:]),        # ungerade Zeile nach oben rechts
+    ]
+
+    edges = np.concatenate([np.column_stack([a.ravel(), b.ravel()]) for a, b in pairs])
+    return positions, edges
+
+
+
+# _______________________
+#                        /
+# Messung               (
+# _______________________\
+#
+# Misst, wie viele Zeitschritte pro Sekunde ein weicher Körper aus n x n Massen
+# schafft. Die Szene teilt jeden Schritt in so viele Teilschritte auf, wie für
+# einen stabilen Zeitschritt nötig sind (siehe `stable_dt`). Vor der Ausgabe
+# wird geprüft, dass die Energie endlich ist und nicht zugenommen hat: Durch
+# die Dämpfung darf sie nur abnehmen. Aufruf im Ordner von Kapitel 13:
+#
+#        python -m physik.federn
+
+def benchmark(sizes=(10, 30, 100), steps=200, dt=0.005, seconds=5.0):
+    from .szenen import soft_body
+
+    print(f"{'Körper':>8} {'Federn':>8} {'Teilschritte':>13} {'Schritte/s':>12} {'Echtzeit':>10}")
+    for n in sizes:
+        simulation = soft_body(n_side=n)
+        springs = simulation.force_terms[0]
+        substeps = int(np.ceil(dt / simulation.max_dt))
+        e0 = simulation.total_energy()
+        scale = abs(e0) + simulation.particles.kinetic_energy()
+        simulation.step(dt)
+
+        # Höchstens `steps` Schritte oder `seconds` Sekunden
+        done = 0
+        start = time.perf_counter()
+        while done < steps and time.perf_counter() - start < seconds:
+            simulation.step(dt)
+            done += 1
+        rate = done / (time.perf_counter() - start)
+
+        energy = simulation.total_energy()
+        if not np.isfinite(energy) or energy > e0 + 1e-3 * scale:
+            raise RuntimeError(f"Simulation mit {n * n} Körpern ist instabil: E = {energy:.3g} J (Anfang {e0:.3g} J)")
+
+        print(f"{n * n:>8} {len(springs):>8} {substeps:>13} {rate:>12.0f} {rate * dt:>9.2f}x")
+
+
+if __name__ == "__main__":
+    benchmark()
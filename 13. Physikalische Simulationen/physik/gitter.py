@@ -0,0 +1,170 @@
+#              _________________________________
+#       ______|                                 |_____
+#       \     |   PHYSIK - ZELLEN-GITTER        |    /
+#        )    |_________________________________|   (
+#       /________)                          (________\      CC BY-NC-SA 4.0 (https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+# Um Kollisionen zu finden, haben wir bisher für jedes Paar von Körpern ein
+# `Collision`-Objekt erzeugt und in jedem Zeitschritt den Abstand berechnet.
+# Bei N Körpern sind das N*(N-1)/2 Paare: 2016 Paare für 64 Teilchen, aber
+# schon fast 50 Millionen Paare für 10'000 Teilchen.
+#
+# Zwei Kugeln können sich aber nur berühren, wenn sie nahe beieinander liegen.
+# Wir teilen den Raum deshalb in ein Gitter aus quadratischen Zellen, deren
+# Seitenlänge mindestens so gross ist wie der grösste Kugeldurchmesser:
+#
+#        +-----+-----+-----+
+#        |     |  o  |     |       Ein Teilchen in der mittleren Zelle kann
+#        +-----+-----+-----+       nur mit Teilchen aus derselben Zelle oder
+#        |   o | o   |     |       aus den 8 Nachbarzellen kollidieren.
+#        +-----+-----+-----+
+#        |     |     |  o  |
+#        +-----+-----+-----+
+#
+# Diese Vorauswahl heisst "Broad Phase". Nur die gefundenen Kandidatenpaare
+# werden danach genau geprüft ("Narrow Phase"). Der Aufwand wächst so nur noch
+# ungefähr linear mit der Anzahl der Teilchen.
+
+
+import numpy as np
+
+
+# Nachbarzellen, die von jeder Zelle aus durchsucht werden. Es genügt die
+# Hälfte der 8 Nachbarn, weil jedes Zellenpaar sonst doppelt gefunden würde.
+HALF_NEIGHBOURS = ((1, -1), (1, 0), (1, 1), (0, 1))
+
+
+
+# _______________________
+#                        /
+# Klasse CellList       (
+# _______________________\
+#
+# Die Klasse `CellList` ordnet alle Teilchen ihren Gitterzellen zu und liefert
+# alle Paare (i, j) mit i != j, die in derselben oder in benachbarten Zellen
+# liegen. Alle Schritte sind numpy-Operationen auf ganzen Arrays:
+#
+# 1. Zellkoordinaten (cx, cy) berechnen und zu einem Schlüssel zusammenfassen.
+# 2. Die Teilchen nach Schlüssel sortieren. Teilchen derselben Zelle stehen
+#    danach direkt hintereinander.
+# 3. Für jede Nachbarzelle mit `np.searchsorted` den Bereich der Teilchen
+#    bestimmen und daraus die Paare erzeugen.
+
+class CellList:
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+
+
+    # Erzeugt eine Zellenliste, deren Zellen so gross sind wie der grösste
+    # Durchmesser der Körper
+    @classmethod
+    def from_radii(cls, radii):
+        return cls(2.0 * float(np.max(radii)))
+
+
+    # Liefert zwei Index-Arrays i und j mit allen Kandidatenpaaren
+    def candidate_pairs(self, positions):
+        n = len(positions)
+        if n < 2:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+
+        cells = np.floor(positions / self.cell_size).astype(np.int64)
+        cells -= cells.min(axis=0)
+
+        # Mit `stride = ny + 1` liegt die Zelle (cx, cy±1) am Rand nie in der
+        # nächsten Spalte, deshalb gibt es keine falschen Nachbarn.
+        stride = cells[:, 1].max() + 2
+        keys = cells[:, 0] * stride + cells[:, 1]
+
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        rank = np.arange(n)
+
+        pairs_i = [np.zeros(0, dtype=np.int64)]
+        pairs_j = [np.zeros(0, dtype=np.int64)]
+
+        # Paare innerhalb derselben Zelle: nur mit den nachfolgenden Teilchen
+        start = rank + 1
+        end = np.searchsorted(sorted_keys, sorted_keys, side="right")
+        self._collect(start, end, pairs_i, pairs_j)
+
+        # Paare mit den Nachbarzellen
+        for dx, dy in HALF_NEIGHBOURS:
+            neighbour_keys = sorted_keys + dx * stride + dy
+            start = np.searchsorted(sorted_keys, neighbour_keys, side="left")
+            end = np.searchsorted(sorted_keys, neighbour_keys, side="right")
+            self._collect(start, end, pairs_i, pairs_j)
+
+        # Positionen in der sortierten Reihenfolge zurück in Teilchenindizes
+        i = order[np.concatenate(pairs_i)]
+        j = order[np.concatenate(pairs_j)]
+        return i, j
+
+
+    # Erzeugt für jedes Teilchen a die Paare (a, b) mit start[a] <= b < end[a]
+    @staticmethod
+    def _collect(start, end, pairs_i, pairs_j):
+        counts = np.maximum(end - start, 0)
+        total = counts.sum()
+        if total == 0:
+            return
+
+        a = np.repeat(np.arange(len(counts)), counts)
+        first = np.cumsum(counts) - counts
+        b = np.repeat(start, counts) + np.arange(total) - np.repeat(first, counts)
+
+        pairs_i.append(a)
+        pairs_j.append(b)
+
+
+
+# _______________________
+#                        /
+# Narrow Phase          (
+# _______________________\
+#
+# Die Funktion `resolve_collisions` prüft die Kandidatenpaare genau und
+# berechnet die Stösse mit derselben Impulsformel wie `Collision.resolve_collision`:
+#
+#        n = (x_B - x_A) / |x_B - x_A|
+#        v_n = (v_A - v_B) · n
+#        J = (1 + e) * v_n / (1/m_A + 1/m_B)
+#
+#        v_A -= J * n / m_A
+#        v_B += J * n / m_B
+#
+# Alle Paare werden gleichzeitig berechnet. Ist ein Teilchen an mehreren Stössen
+# beteiligt, werden die Impulse mit `np.add.at` aufsummiert. Die Funktion gibt
+# die Anzahl der berechneten Stösse zurück.
+
+def resolve_collisions(system, i, j, restitution=1.0):
+    positions = system.positions
+    velocities = system.velocities
+    masses = system.masses
+    radii = system.radii
+
+    r_vec = positions[j] - positions[i]
+    distance = np.sqrt(np.einsum("ij,ij->i", r_vec, r_vec))
+
+    # Nur Paare, die sich berühren (und nicht genau aufeinander liegen)
+    touching = (distance <= radii[i] + radii[j]) & (distance > 0)
+    i, j = i[touching], j[touching]
+    normal = r_vec[touching] / distance[touching, None]
+
+    # Nur Paare, die sich aufeinander zu bewegen
+    velocity_along_normal = np.einsum("ij,ij->i", velocities[i] - velocities[j], normal)
+    approaching = velocity_along_normal > 0
+    i, j = i[approaching], j[approaching]
+    normal = normal[approaching]
+    velocity_along_normal = velocity_along_normal[approaching]
+
+    # Impulsberechnung
+    impulse = (1 + restitution) * velocity_along_normal / (1 / masses[i] + 1 / masses[j])
+    impulse_vector = impulse[:, None] * normal
+
+    # Aktualisiert die Geschwindigkeiten aller beteiligten Körper
+    np.add.at(velocities, i, -impulse_vector / masses[i, None])
+    np.add.at(velocities, j, impulse_vector / masses[j, None])
+
+    return len(i)
@@ -0,0 +1,119 @@
+#              _________________________________
+#       ______|                                 |_____
+#       \     |   PHYSIK - GRAVITATION          |    /
+#        )    |_________________________________|   (
+#       /________)                          (________\      CC BY-NC-SA 4.0 (https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+# Die Gravitationskraft, die Körper j auf Körper i ausübt, ist
+#
+#        F_ij = G * m_i * m_j * r_ij / |r_ij|^3       mit  r_ij = x_j - x_i
+#
+# Mit einer Doppelschleife in Python wird diese Formel für jedes Paar einzeln
+# ausgewertet. Hier berechnen wir alle Paare auf einmal mit numpy-Broadcasting:
+# Aus den Positionen der Form (N, 2) entsteht ein Array der Abstandsvektoren
+# der Form (N, N, 2), aus dem alle Kräfte mit wenigen Rechnungen folgen.
+#
+# - Softening:
+#   Kommen sich zwei Körper sehr nahe, wird die Kraft beliebig gross. Mit einer
+#   kleinen Länge eps ersetzen wir |r|^2 durch |r|^2 + eps^2. Für eps = 0 erhalten
+#   wir die exakte Formel.
+#
+# - Speicherbedarf:
+#   Das (N, N, 2)-Array braucht für 10'000 Körper bereits 1.6 GB. Für grosse N
+#   rechnen wir deshalb in Blöcken von `block_size` Zeilen. Der Speicherbedarf
+#   bleibt dann bei block_size * N * 2 Zahlen.
+
+
+import numpy as np
+
+
+# Gravitationskonstante
+G = 6.67430e-11  # m^3 kg^-1 s^-2
+
+# Bis zu dieser Anzahl Körper wird das ganze (N, N, 2)-Array auf einmal berechnet
+DIRECT_LIMIT = 1024
+
+# Anzahl Zeilen pro Block für grosse N
+BLOCK_SIZE = 256
+
+
+# Berechnet die Gravitationskräfte auf alle Körper. Für kleine N wird das
+# direkte Verfahren verwendet, sonst das blockweise.
+def gravity_forces(positions, masses, G=G, softening=0.0, block_size=None):
+    positions = np.asarray(positions, dtype=float)
+    masses = np.asarray(masses, dtype=float)
+    n = len(masses)
+
+    if block_size is None and n <= DIRECT_LIMIT:
+        return _direct_forces(positions, masses, G, softening)
+
+    block_size = block_size or BLOCK_SIZE
+    forces = np.empty_like(positions)
+    for start in range(0, n, block_size):
+        end = min(start + block_size, n)
+        forces[start:end] = _block_forces(positions, masses, start, end, G, softening)
+
+    return forces
+
+
+# Direktes Verfahren mit dem vollständigen (N, N, 2)-Array. Es kommt mit möglichst
+# wenigen numpy-Aufrufen aus, damit es auch für 2 oder 3 Körper schnell ist.
+def _direct_forces(positions, masses, G, softening):
+    n = len(masses)
+
+    # Abstandsvektoren r_ij = x_j - x_i
+    r_vec = positions - positions[:, None]
+    distance_sq = np.einsum("ijk,ijk->ij", r_vec, r_vec)
+    if softening:
+        distance_sq += softening**2
+
+    # Der Körper selbst (und Körper am selben Ort) liefern keine Kraft: 1/inf^3 = 0
+    distance_sq.flat[::n + 1] = np.inf
+    if not distance_sq.all():
+        distance_sq[distance_sq == 0] = np.inf
+
+    # F_i = G * m_i * sum_j m_j * r_ij / |r_ij|^3
+    weights = distance_sq**-1.5
+    weights *= masses
+    forces = np.einsum("ij,ijk->ik", weights, r_vec)
+    forces *= G * masses[:, None]
+    return forces
+
+
+# Berechnet die Kräfte auf die Körper start bis end-1 durch alle Körper
+def _block_forces(positions, masses, start, end, G, softening):
+    # Abstandsvektoren r_ij = x_j - x_i, Form (end-start, N, 2)
+    r_vec = positions[None, :, :] - positions[start:end, None, :]
+    distance_sq = np.einsum("ijk,ijk->ij", r_vec, r_vec) + softening**2
+
+    # Der Körper selbst (und Körper am selben Ort) liefern keine Kraft
+    rows = np.arange(end - start)
+    distance_sq[rows, rows + start] = np.inf
+    distance_sq[distance_sq == 0] = np.inf
+
+    weights = distance_sq**-1.5
+    weights *= masses
+    return G * masses[start:end, None] * np.einsum("ij,ijk->ik", weights, r_vec)
+
+
+# Potentielle Energie aller Paare (nützlich zur Kontrolle der Energieerhaltung)
+def gravity_potential_energy(positions, masses, G=G, softening=0.0):
+    positions = np.asarray(positions, dtype=float)
+    masses = np.asarray(masses, dtype=float)
+
+    energy = 0.0
+    for start in range(0, len(masses), BLOCK_SIZE):
+        end = min(start + BLOCK_SIZE, len(masses))
+        r_vec = positions[None, :, :] - positions[start:end, None, :]
+        distance = np.sqrt(np.einsum("ijk,ijk->ij", r_vec, r_vec) + softening**2)
+
+        # Nur Paare mit j > i zählen, damit kein Paar doppelt vorkommt
+        j = np.arange(len(masses))[None, :]
+        i = np.arange(start, end)[:, None]
+        pair = (j > i) & (distance > 0)
+
+        inv_distance = np.zeros_like(distance)
+        np.divide(1.0, distance, out=inv_distance, where=pair)
+        energy -= G * np.sum(masses[start:end, None] * masses[None, :] * inv_distance)
+
+    return energy
@@ -0,0 +1,410 @@
+#              _________________________________
+#       ______|                                 |_____
+#       \     |   PHYSIK - IMPLIZITES VERFAHREN |    /
+#        )    |_________________________________|   (
+#       /________)                          (________\      CC BY-NC-SA 4.0 (https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+# Eine steife Feder schwingt sehr schnell. Beim Euler-Cromer-Verfahren muss der
+# Zeitschritt kleiner sein als etwa 2 / omega mit omega = sqrt(k / m), sonst
+# schaukelt sich die Schwingung auf und die Simulation explodiert. Verdoppeln wir
+# k im Seil von Lektion 13.8.4, muss dt also um den Faktor 1.4 kleiner werden,
+# auch wenn sich an der sichtbaren Bewegung kaum etwas ändert.
+#
+# Das implizite Euler-Verfahren ("Backward Euler") verwendet die Kraft am Ende
+# des Schritts statt am Anfang:
+#
+#        v_neu = v + dt * F(x_neu, v_neu) / m
+#        x_neu = x + dt * v_neu
+#
+# Weil x_neu und v_neu auf beiden Seiten stehen, muss in jedem Schritt ein
+# Gleichungssystem gelöst werden. Dafür ist das Verfahren bei jedem dt stabil:
+# Sehr schnelle Schwingungen werden gedämpft, statt sich aufzuschaukeln.
+#
+# Wir ersetzen F(x_neu, v_neu) durch die Tangente (Baraff und Witkin, 1998):
+#
+#        F(x + dx, v + dv) ≈ F + K * dx + D * dv
+#
+# K = dF/dx und D = dF/dv sind die Ableitungen der Federkräfte. Mit dx = dt * v_neu
+# und dv = v_neu - v erhalten wir ein lineares Gleichungssystem für dv:
+#
+#        (M - dt * D - dt^2 * K) dv = dt * (F + dt * K * v)
+#
+# Die Matrix A = M - dt * D - dt^2 * K ist symmetrisch und positiv definit. Ein
+# solches System löst das Verfahren der konjugierten Gradienten (CG), ohne dass
+# die Matrix gespeichert werden muss: Es braucht nur Produkte A * y, und diese
+# berechnet das `SpringNetwork` mit derselben Gather/Scatter-Technik wie die
+# Kräfte. Die Anzahl Rechenschritte wächst deshalb nur mit der Anzahl Federn.
+#
+# Das implizite Euler-Verfahren ist nur 1. Ordnung genau und dämpft auch die
+# langsamen, sichtbaren Schwingungen, umso stärker, je grösser dt ist. Genauer
+# ist die Trapezregel, die den Mittelwert der Kräfte am Anfang und am Ende des
+# Schritts verwendet. Beide Verfahren unterscheiden sich nur im Gewicht theta
+# der Kraft am Ende des Schritts:
+#
+#        theta = 1:    implizites Euler-Verfahren (dämpft stark, sehr robust)
+#        theta = 0.5:  Trapezregel (2. Ordnung, dämpft nicht)
+#
+# Weil die Tangente die Kraft nur ungefähr beschreibt, ist die Trapezregel erst
+# mit einer Newton-Korrektur (`newton=1`) wirklich 2. Ordnung genau: Mit der
+# Kraft am geschätzten Ende des Schritts wird das Gleichungssystem ein zweites
+# Mal gelöst.
+#
+# Ob sich ein grösseres dt lohnt, zeigt die Messung am Ende des Moduls:
+#
+#        python -m physik.implizit
+
+
+import time
+
+import numpy as np
+
+from .federn import SpringNetwork, rope
+from .integratoren import EulerCromer, Integrator
+
+
+# _______________________
+#                        /
+# Konjugierte Gradienten(
+# _______________________\
+#
+# Löst A * x = b für eine symmetrische, positiv definite Matrix A, die nur als
+# Funktion `matrix(y) = A * y` gegeben ist.
+#
+# - `preconditioner`: Kehrwerte der Diagonale von A (Jacobi-Vorkonditionierung).
+#                     Sie gleicht unterschiedlich grosse Massen aus und spart
+#                     viele Iterationen.
+# - `mask`:           1 für freie und 0 für festgehaltene Koordinaten. Für
+#                     festgehaltene Koordinaten bleibt x = 0.
+#
+# Abgebrochen wird, wenn |b - A x| < tolerance * |b| ist. Zurückgegeben werden
+# die Lösung und die Anzahl Iterationen.
+
+def conjugate_gradient(matrix, b, x0=None, preconditioner=None, mask=None, tolerance=1e-6, max_iterations=200):
+    mask = 1.0 if mask is None else mask
+    preconditioner = 1.0 if preconditioner is None else preconditioner
+
+    b = b * mask
+    x = np.zeros_like(b) if x0 is None else x0 * mask
+
+    limit = tolerance**2 * np.vdot(b, b)
+    residual = (b - matrix(x)) * mask
+    z = preconditioner * residual
+    direction = z.copy()
+    rz = np.vdot(residual, z)
+
+    for iteration in range(max_iterations):
+        if np.vdot(residual, residual) <= limit:
+            return x, iteration
+
+        A_direction = matrix(direction) * mask
+        alpha = rz / np.vdot(direction, A_direction)
+        x += alpha * direction
+        residual -= alpha * A_direction
+
+        z = preconditioner * residual
+        rz_new = np.vdot(residual, z)
+        direction = z + (rz_new / rz) * direction
+        rz = rz_new
+
+    return x, max_iterations
+
+
+
+# _______________________
+#                        /
+# Klasse ImplicitEuler  (
+# _______________________\
+#
+# Implizites Euler-Verfahren für Körper, die mit einem `SpringNetwork` verbunden
+# sind. Es hat dieselbe Methode `step(x, v, dt, acceleration)` wie die Verfahren
+# in `physik.integratoren` und kann deshalb auch in einer `Simulation` verwendet
+# werden:
+#
+#        simulation.integrator = ImplicitEuler(springs, particles.masses, free=~particles.fixed)
+#
+# `acceleration(x, v)` liefert die Beschleunigung durch alle Kräfte (Federn,
+# Schwerkraft, ...). Die Ableitungen K und D werden nur für die Federn berechnet,
+# die übrigen Kräfte werden explizit behandelt.
+#
+# - `free`:    False für festgehaltene Körper (Form (N,)) oder Koordinaten
+#              (Form (N, 2)), z.B. die x-Koordinaten im Seil von Lektion 13.8.4
+#
+# Festgehaltene Koordinaten können auch vorgegeben bewegt werden, z.B. das
+# angetriebene Ende des Seils. Dazu erhält `step` mit `v_end` die
+# Geschwindigkeiten am Ende des Schritts. Für die festgehaltenen Koordinaten
+# ist dv dann bekannt und wird auf die rechte Seite des Gleichungssystems
+# gebracht. Die Federn spüren die Bewegung des Antriebs so schon während des
+# Schritts und nicht erst danach.
+#
+# - `theta`:   1 = implizites Euler-Verfahren, 0.5 = Trapezregel
+# - `newton`:  Anzahl Newton-Korrekturen pro Schritt
+#
+# Weil das Verfahren ein Netz und Massen braucht, steht es nicht in der Liste
+# `INTEGRATORS`.
+
+class ImplicitEuler(Integrator):
+    name = "implicit_euler"
+    order = 1
+
+    def __init__(self, springs, masses, free=None, theta=1.0, newton=0, tolerance=1e-6, max_iterations=200):
+        self.springs = springs
+        self.masses = masses
+        self.free = free
+        self.theta = theta
+        self.newton = newton
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+
+        # CG-Iterationen im letzten Schritt und insgesamt
+        self.iterations = 0
+        self.total_iterations = 0
+
+
+    # Maske der freien Koordinaten als Array der Form (N, 2)
+    def _mask(self, shape):
+        if self.free is None:
+            return np.ones(shape)
+        free = np.asarray(self.free, dtype=float)
+        return np.broadcast_to(free.reshape(len(free), -1), shape)
+
+
+    def step(self, x, v, dt, acceleration, v_end=None):
+        n = len(x)
+        masses = np.asarray(self.masses, dtype=float)[:, None]
+        mask = self._mask(x.shape)
+        springs = self.springs
+
+        # Kraft am Anfang des Schritts und Ableitungen der Federkräfte
+        force = masses * acceleration(x, v)
+        direction, k, transverse, damping = springs.jacobian(x)
+
+        # Jede Feder trägt a * (e · dy) * e + b * dy zu A * y bei (dy = y_j - y_i)
+        h = self.theta * dt
+        along = h * damping + h**2 * (k - transverse)
+        across = h**2 * transverse
+
+        def spring_product(parallel, isotropic, y):
+            dy = np.take(y, springs.j, axis=0) - np.take(y, springs.i, axis=0)
+            projection = np.einsum("ij,ij->i", direction, dy)
+            return springs.scatter(parallel[:, None] * projection[:, None] * direction
+                                   + isotropic[:, None] * dy, n)
+
+        def matrix(y):
+            return masses * y + spring_product(along, across, y)
+
+        # Rechte Seite dt * (F + h * K * v) mit K * v = -spring_product(k - k_quer, k_quer, v)
+        b = dt * (force - h * spring_product(k - transverse, transverse, v))
+
+        # Diagonale von A: Masse plus die Beiträge aller Federn am Körper
+        per_spring = along[:, None] * direction**2 + across[:, None]
+        diagonal = np.repeat(masses, 2, axis=1)
+        for axis in (0, 1):
+            diagonal[:, axis] += (np.bincount(springs.i, weights=per_spring[:, axis], minlength=n)
+                                  + np.bincount(springs.j, weights=per_spring[:, axis], minlength=n))
+
+        def solve(b, x0=None):
+            solution, iterations = conjugate_gradient(matrix, b, x0=x0, preconditioner=1.0 / diagonal,
+                                                      mask=mask, tolerance=self.tolerance,
+                                                      max_iterations=self.max_iterations)
+            self.iterations += iterations
+            return solution
+
+        # Vorgegebene Änderung dv der festgehaltenen Koordinaten
+        held = 0.0
+        if v_end is not None:
+            held = (np.asarray(v_end, dtype=float) - v) * (1 - mask)
+            b = b - matrix(held)
+
+        # Startwert: der Schritt des expliziten Verfahrens
+        self.iterations = 0
+        dv = solve(b, x0=dt * force / masses) + held
+
+        # Newton-Korrekturen mit der exakten Kraft am Ende des Schritts
+        for _ in range(self.newton):
+            force_new = masses * acceleration(x + dt * (v + self.theta * dv), v + dv)
+            residual = dt * ((1 - self.theta) * force + self.theta * force_new) - masses * dv
+            dv += solve(residual)
+
+        self.total_iterations += self.iterations
+        return x + dt * (v + self.theta * dv), v + dv
+
+    def __repr__(self):
+        return f"ImplicitEuler(theta={self.theta}, tolerance={self.tolerance})"
+
+
+
+# _______________________
+#                        /
+# Messung               (
+# _______________________\
+#
+# Wie lange dauert es, bis t = 2 s berechnet ist, wenn die Bewegung gleich
+# genau sein soll? Für zwei Federsysteme mit erhöhtem k wird zuerst eine
+# Referenzlösung mit sehr kleinem dt berechnet. Dann wird dt für Euler-Cromer
+# (explizit) und für die impliziten Verfahren so lange verkleinert, bis alle
+# Körper zu den Zeiten 0.1 s, 0.2 s, ..., 2 s höchstens `tolerance` von der
+# Referenz entfernt sind. Das implizite Euler-Verfahren ist nur von erster
+# Ordnung und dämpft stark; es braucht dafür ein kleineres dt als Euler-Cromer.
+# Bei 50 Pixel pro Meter sind 0.02 m ein Pixel.
+#
+# - Seil:   das Seil aus Lektion 13.8.4 mit k = 2000 N/m (100-mal steifer)
+# - Pendel: das Fadenpendel aus Lektion 13.8.1 mit k = 1'000'000 N/m, so dass
+#           sich der Faden kaum noch dehnt
+#
+# Verglichen werden Euler-Cromer, das implizite Euler-Verfahren und die
+# Trapezregel (theta = 0.5) mit einer Newton-Korrektur.
+#
+# Das angetriebene Ende des Seils erhält vor jedem Schritt Ort und
+# Geschwindigkeit des Antriebs. Die impliziten Verfahren bekommen zusätzlich
+# mit `v_end` die Geschwindigkeit am Ende des Schritts. Würde das Ende erst nach
+# dem Schritt und ohne Geschwindigkeit versetzt, entstünde ein Fehler, der auch
+# mit kleinerem dt nicht verschwindet.
+#
+# Zum Schluss wird geprüft, bei welchem k die Verfahren mit einem ganzen Frame
+# (dt = 1/60 s) pro Schritt noch stabil bleiben.
+
+def _rope_problem(k=2000.0):
+    positions, edges = rope(29, start=(-3.5, 0), end=(3.5, 0))
+    springs = SpringNetwork()
+    springs.add_edges(edges, k=k, rest_length=0, damping=1)
+
+    # Nur senkrechte Bewegung, der letzte Körper wird angetrieben
+    free = np.ones((29, 2), dtype=bool)
+    free[:, 0] = False
+    free[-1] = False
+
+    # Ort und Geschwindigkeit des angetriebenen Endes zur Zeit t
+    def drive(t):
+        omega = 2 * np.pi * 0.5
+        return np.sin(omega * t), omega * np.cos(omega * t)
+
+    return positions, np.zeros_like(positions), np.full(29, 0.1), springs, free, 0.0, drive
+
+
+def _pendulum_problem(k=1e6):
+    # Die Anfangsgeschwindigkeit steht senkrecht zum Faden
+    positions = np.array([[0.0, 2.0], [2.0, 1.0]])
+    velocities = np.array([[0.0, 0.0], [-1.0, -2.0]])
+    springs = SpringNetwork()
+    springs.add_spring(0, 1, k=k, damping=0.9, positions=positions)
+
+    free = np.array([False, True])
+    return positions, velocities, np.array([1.0, 1.0]), springs, free, 9.81, None
+
+
+# Berechnet ein Problem bis t_end und liefert die Positionen zu den Zeiten
+# sample_dt, 2 * sample_dt, ... und die benötigte Zeit in s
+def _simulate(problem, integrator, dt, t_end=10.0, sample_dt=0.1):
+    x, v, masses, springs, free, gravity, drive = problem
+    x, v = x.copy(), v.copy()
+    mask = np.broadcast_to(np.asarray(free, dtype=float).reshape(len(x), -1), x.shape)
+
+    def acceleration(x, v):
+        a = springs.forces(x, v) / masses[:, None]
+        a[:, 1] -= gravity
+        return a * mask
+
+    steps = int(round(t_end / dt))
+    every = max(int(round(sample_dt / dt)), 1)
+    samples = []
+
+    implicit = isinstance(integrator, ImplicitEuler)
+
+    start = time.perf_counter()
+    with np.errstate(all="ignore"):
+        for n in range(steps):
+            if drive is None:
+                x, v = integrator.step(x, v, dt, acceleration)
+            else:
+                x[-1, 1], v[-1, 1] = drive(n * dt)
+                y_end, vy_end = drive((n + 1) * dt)
+                if implicit:
+                    v_end = v.copy()
+                    v_end[-1, 1] = vy_end
+                    x, v = integrator.step(x, v, dt, acceleration, v_end=v_end)
+                else:
+                    x, v = integrator.step(x, v, dt, acceleration)
+                x[-1, 1], v[-1, 1] = y_end, vy_end
+            if (n + 1) % every == 0:
+                samples.append(x.copy())
+    elapsed = time.perf_counter() - start
+
+    return np.array(samples), elapsed
+
+
+def benchmark(tolerance=0.02, t_end=2.0, max_tries=8):
+    problems = {
+        "Seil, k = 2000 N/m": _rope_problem,
+        "Pendel, k = 1000000 N/m": _pendulum_problem,
+    }
+
+    for title, make_problem in problems.items():
+        problem = make_problem()
+        masses, springs, free = problem[2], problem[3], problem[4]
+
+        # Verfahren, Start-dt und Funktion, die den Integrator erzeugt
+        methods = (
+            ("explizit", 0.02, lambda: EulerCromer()),
+            ("implizit", 0.1, lambda: ImplicitEuler(springs, masses, free=free)),
+            ("trapez", 0.1, lambda: ImplicitEuler(springs, masses, free=free, theta=0.5, newton=1)),
+        )
+
+        reference, _ = _simulate(problem, EulerCromer(), 1e-4, t_end)
+        print(f"\n{title} (Ziel: Abweichung < {tolerance} m bis t = {t_end} s)")
+        print(f"{'Verfahren':>10} {'dt':>10} {'Schritte':>9} {'CG/Schritt':>11} "
+              f"{'Abweichung':>11} {'Zeit [s]':>9}")
+
+        results = {}
+        for name, dt, make_integrator in methods:
+            # dt verkleinern, bis die Abweichung unter der Toleranz liegt. Aus
+            # den letzten zwei Versuchen wird die Konvergenzordnung geschätzt
+            # und das nächste dt direkt auf die Toleranz hin extrapoliert
+            # (mindestens Faktor 2, höchstens Faktor 16 kleiner).
+            previous = None
+            for _ in range(max_tries):
+                integrator = make_integrator()
+                samples, elapsed = _simulate(problem, integrator, dt, t_end)
+                error = np.max(np.abs(samples - reference)) if samples.shape == reference.shape else np.inf
+                if np.isfinite(error) and error < tolerance:
+                    break
+                factor = 2.0
+                if previous is not None and np.isfinite(error) and np.isfinite(previous[1]) and error < previous[1]:
+                    order = np.clip(np.log(previous[1] / error) / np.log(previous[0] / dt), 0.5, 2.0)
+                    factor = np.clip((error / (0.8 * tolerance)) ** (1 / order), 2.0, 16.0)
+                previous = (dt, error)
+                # Ganze Anzahl Schritte pro 0.1 s, damit die Messzeitpunkte
+                # mit denen der Referenz übereinstimmen
+                dt = 0.1 / np.ceil(0.1 * factor / dt)
+
+            if not error < tolerance:
+                print(f"{name:>10} {'-':>10} {'Ziel nicht erreicht':>21}")
+                continue
+
+            steps = int(round(t_end / dt))
+            cg = getattr(integrator, "total_iterations", 0) / steps
+            print(f"{name:>10} {dt:>10.3g} {steps:>9} {cg:>11.1f} {error:>11.4f} {elapsed:>9.3f}")
+            results[name] = (dt, elapsed)
+
+        for name in ("implizit", "trapez"):
+            if name in results and "explizit" in results:
+                dt_ratio = results[name][0] / results["explizit"][0]
+                time_ratio = results[name][1] / results["explizit"][1]
+                print(f"{name:>10}: dt {dt_ratio:g}-mal so gross, Rechenzeit {time_ratio:.2f}-mal so lang")
+
+    # Stabilität: bleibt das Seil bei dt = 1/60 s beschränkt?
+    print("\nSeil mit dt = 1/60 s während 10 s (stabil = alle |y| < 10 m)")
+    print(f"{'k [N/m]':>10} {'explizit':>10} {'implizit':>10} {'trapez':>10}")
+    for k in (20.0, 200.0, 2000.0, 20000.0):
+        problem = _rope_problem(k)
+        masses, springs, free = problem[2], problem[3], problem[4]
+        row = []
+        for integrator in (EulerCromer(), ImplicitEuler(springs, masses, free=free),
+                           ImplicitEuler(springs, masses, free=free, theta=0.5, newton=1)):
+            samples, _ = _simulate(problem, integrator, 1 / 60, 10.0)
+            stable = np.all(np.isfinite(samples)) and np.max(np.abs(samples[:, :, 1])) < 10
+            row.append("stabil" if stable else "instabil")
+        print(f"{k:>10g} {row[0]:>10} {row[1]:>10} {row[2]:>10}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,634 @@
+#              _________________________________
+#       ______|                                 |_____
+#       \     |   PHYSIK - INTEGRATOREN         |    /
+#        )    |_________________________________|   (
+#       /________)                          (________\      CC BY-NC-SA 4.0 (https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+# In den Kapiteln 13.1, 13.2 und 13.10 haben wir drei Verfahren kennengelernt,
+# um die Bewegungsgleichung
+#
+#        dx/dt = v        dv/dt = a(x, v)
+#
+# Schritt für Schritt zu lösen: Euler, Euler-Cromer und Runge-Kutta. Hier sind
+# diese und weitere Verfahren als Klassen mit derselben Methode
+#
+#        x, v = integrator.step(x, v, dt, acceleration)
+#
+# zusammengefasst. `x` und `v` sind numpy-Arrays beliebiger Form, z.B. (N, 2)
+# für N Körper. `acceleration(x, v)` liefert die Beschleunigungen aller Körper.
+#
+# Die Verfahren unterscheiden sich in ihrer Genauigkeit (Ordnung) und darin,
+# wie oft pro Schritt die Beschleunigung berechnet wird. Bei vielen Körpern ist
+# diese Berechnung der teuerste Teil. Ein Verfahren 4. Ordnung mit 4 Auswertungen
+# kann deshalb günstiger sein als ein Verfahren 1. Ordnung mit sehr kleinem dt.
+#
+# Symplektische Verfahren (Euler-Cromer, Leapfrog, Verlet, Yoshida) halten die
+# Energie auch über sehr lange Zeit in einem schmalen Band, während sie bei
+# Euler und Runge-Kutta langsam wegdriftet.
+#
+#        Name             Ordnung   Auswertungen pro Schritt   symplektisch
+#        euler            1         1                          nein
+#        euler_cromer     1         1                          ja
+#        rk2              2         2                          nein
+#        rk4              4         4                          nein
+#        velocity_verlet  2         1 (*)                      ja
+#        leapfrog         2         1                          ja
+#        yoshida          4         3                          ja
+#
+#        (*) die Beschleunigung am Ende eines Schritts wird im nächsten
+#            Schritt wiederverwendet
+#
+# Dazu kommt das Verfahren `DormandPrince` mit adaptiver Schrittweite. Es wählt
+# die Länge jedes Zeitschritts so, dass der geschätzte Fehler eine Toleranz
+# einhält.
+
+
+import time
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+
+# Alle Verfahren, die über ihren Namen ausgewählt werden können
+INTEGRATORS = {}
+
+
+# Dekorator, der eine Integrator-Klasse unter ihrem Namen registriert. Eigene
+# Verfahren können so ebenfalls hinzugefügt werden.
+def register(cls):
+    INTEGRATORS[cls.name] = cls
+    return cls
+
+
+# Erzeugt einen Integrator aus seinem Namen, z.B. get_integrator("rk4")
+def get_integrator(name):
+    if name not in INTEGRATORS:
+        raise ValueError(f"Unbekanntes Verfahren '{name}', möglich sind: {', '.join(INTEGRATORS)}")
+    return INTEGRATORS[name]()
+
+
+
+# _______________________
+#                        /
+# Klasse Integrator     (
+# _______________________\
+#
+# Basisklasse aller Verfahren. Eine Unterklasse legt `name`, `order`,
+# `evaluations` und `symplectic` fest und muss `step` überschreiben.
+
+class Integrator(ABC):
+    name = None
+    order = 0
+    evaluations = 1
+    symplectic = False
+
+    # Vergisst gespeicherte Zwischenwerte (z.B. nach einer Kollision)
+    def reset(self):
+        pass
+
+    # Gespeicherte Zwischenwerte als Arrays (siehe `physik.sicherung`)
+    def get_state(self):
+        return {}
+
+    def set_state(self, state):
+        pass
+
+    # Berechnet einen Zeitschritt und gibt die neuen Positionen und
+    # Geschwindigkeiten zurück
+    @abstractmethod
+    def step(self, x, v, dt, acceleration):
+        pass
+
+    def __repr__(self):
+        return f"{type(self).__name__}()"
+
+
+
+# Euler-Verfahren (Kapitel 13.1): Position und Geschwindigkeit mit den alten Werten
+@register
+class Euler(Integrator):
+    name = "euler"
+    order = 1
+
+    def step(self, x, v, dt, acceleration):
+        a = acceleration(x, v)
+        return x + v * dt, v + a * dt
+
+
+# Euler-Cromer-Verfahren (Kapitel 13.2): zuerst die Geschwindigkeit, dann die
+# Position mit der neuen Geschwindigkeit
+@register
+class EulerCromer(Integrator):
+    name = "euler_cromer"
+    order = 1
+    symplectic = True
+
+    def step(self, x, v, dt, acceleration):
+        v = v + acceleration(x, v) * dt
+        return x + v * dt, v
+
+
+# Runge-Kutta 2. Ordnung (Kapitel 13.10): Steigung in der Mitte des Schritts
+@register
+class RK2(Integrator):
+    name = "rk2"
+    order = 2
+    evaluations = 2
+
+    def step(self, x, v, dt, acceleration):
+        k1_v = dt * acceleration(x, v)
+        k1_x = dt * v
+
+        k2_v = dt * acceleration(x + 0.5 * k1_x, v + 0.5 * k1_v)
+        k2_x = dt * (v + 0.5 * k1_v)
+
+        return x + k2_x, v + k2_v
+
+
+# Klassisches Runge-Kutta-Verfahren 4. Ordnung
+@register
+class RK4(Integrator):
+    name = "rk4"
+    order = 4
+    evaluations = 4
+
+    def step(self, x, v, dt, acceleration):
+        k1_v = acceleration(x, v)
+        k1_x = v
+
+        k2_v = acceleration(x + 0.5 * dt * k1_x, v + 0.5 * dt * k1_v)
+        k2_x = v + 0.5 * dt * k1_v
+
+        k3_v = acceleration(x + 0.5 * dt * k2_x, v + 0.5 * dt * k2_v)
+        k3_x = v + 0.5 * dt * k2_v
+
+        k4_v = acceleration(x + dt * k3_x, v + dt * k3_v)
+        k4_x = v + dt * k3_v
+
+        x = x + dt / 6 * (k1_x + 2 * k2_x + 2 * k3_x + k4_x)
+        v = v + dt / 6 * (k1_v + 2 * k2_v + 2 * k3_v + k4_v)
+        return x, v
+
+
+# Velocity-Verlet ("Kick-Drift-Kick"):
+#
+#        v_halb = v + a(x) * dt/2
+#        x_neu  = x + v_halb * dt
+#        v_neu  = v_halb + a(x_neu) * dt/2
+#
+# Die Beschleunigung a(x_neu) wird gespeichert und im nächsten Schritt als a(x)
+# verwendet, solange x seither nicht verändert wurde. Das Verfahren ist für
+# Kräfte gedacht, die nur vom Ort abhängen.
+@register
+class VelocityVerlet(Integrator):
+    name = "velocity_verlet"
+    order = 2
+    symplectic = True
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._x = None
+        self._a = None
+
+    # Ohne die letzte Beschleunigung würde der erste Schritt nach dem Laden
+    # eine zusätzliche Auswertung machen und leicht andere Werte liefern
+    def get_state(self):
+        return {} if self._x is None else {"x": self._x.copy(), "a": np.array(self._a, copy=True)}
+
+    def set_state(self, state):
+        self._x = np.array(state["x"]) if "x" in state else None
+        self._a = np.array(state["a"]) if "a" in state else None
+
+    def step(self, x, v, dt, acceleration):
+        if self._x is not None and self._x.shape == np.shape(x) and np.array_equal(self._x, x):
+            a = self._a
+        else:
+            a = acceleration(x, v)
+
+        v_half = v + 0.5 * dt * a
+        x_new = x + dt * v_half
+        a_new = acceleration(x_new, v_half)
+        v_new = v_half + 0.5 * dt * a_new
+
+        self._x = np.array(x_new, copy=True)
+        self._a = a_new
+        return x_new, v_new
+
+
+# Leapfrog ("Drift-Kick-Drift"): eine Auswertung in der Mitte des Schritts
+@register
+class Leapfrog(Integrator):
+    name = "leapfrog"
+    order = 2
+    symplectic = True
+
+    def step(self, x, v, dt, acceleration):
+        x_half = x + 0.5 * dt * v
+        v_new = v + dt * acceleration(x_half, v)
+        return x_half + 0.5 * dt * v_new, v_new
+
+
+# Yoshida 4. Ordnung: drei Leapfrog-Schritte mit den Längen w1*dt, w0*dt und
+# w1*dt. Der mittlere Schritt geht rückwärts (w0 < 0), dadurch heben sich die
+# Fehler 2. und 3. Ordnung auf.
+@register
+class Yoshida(Integrator):
+    name = "yoshida"
+    order = 4
+    evaluations = 3
+    symplectic = True
+
+    W0 = -2**(1 / 3) / (2 - 2**(1 / 3))
+    W1 = 1 / (2 - 2**(1 / 3))
+    C = (W1 / 2, (W0 + W1) / 2, (W0 + W1) / 2, W1 / 2)
+    D = (W1, W0, W1)
+
+    def step(self, x, v, dt, acceleration):
+        for c, d in zip(self.C, self.D):
+            x = x + c * dt * v
+            v = v + d * dt * acceleration(x, v)
+        return x + self.C[3] * dt * v, v
+
+
+
+# _______________________
+#                        /
+# Klasse DormandPrince  (
+# _______________________\
+#
+# Bei einem festen Zeitschritt muss dt so klein sein, dass auch die schwierigste
+# Stelle der Bahn genau berechnet wird, z.B. eine nahe Begegnung zweier Körper.
+# Auf dem Rest der Bahn sind die Schritte dann unnötig klein.
+#
+# Das Verfahren von Dormand und Prince berechnet in jedem Schritt zwei Lösungen,
+# eine 5. und eine 4. Ordnung, aus denselben 7 Auswertungen. Ihre Differenz ist
+# eine Schätzung des Fehlers:
+#
+# - Ist der Fehler grösser als die Toleranz, wird der Schritt verworfen und mit
+#   kleinerem dt wiederholt.
+#
+# - Sonst wird der Schritt angenommen und dt für den nächsten Schritt angepasst:
+#
+#        dt_neu = dt * 0.9 * (1 / Fehler)^(1/5)
+#
+# Die letzte Auswertung eines Schritts ist gleich der ersten des nächsten
+# Schritts ("First Same As Last"), deshalb braucht ein Schritt nur 6 neue
+# Auswertungen.
+#
+# Der Fehler wird relativ zur Grösse der Positionen bzw. Geschwindigkeiten
+# gemessen: Toleranz = atol + rtol * max|x| (bzw. max|v|).
+#
+# - Dichte Ausgabe (Dense Output):
+#   Weil die Schritte unterschiedlich lang sind, liegen die berechneten Zeiten
+#   unregelmässig. Aus den 7 Auswertungen eines Schritts lässt sich aber ein
+#   Polynom bilden, das die Lösung im ganzen Schritt 4. Ordnung genau beschreibt.
+#   Damit werten wir die Lösung an beliebigen Zeiten `t_eval` aus, z.B. auf einem
+#   regelmässigen Gitter für einen Plot.
+
+class DormandPrince:
+    name = "dopri45"
+    order = 5
+    adaptive = True
+
+    # Butcher-Tabelle
+    C = np.array([0, 1/5, 3/10, 4/5, 8/9, 1])
+    A = [
+        [],
+        [1/5],
+        [3/40, 9/40],
+        [44/45, -56/15, 32/9],
+        [19372/6561, -25360/2187, 64448/6561, -212/729],
+        [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656],
+    ]
+    B = np.array([35/384, 0, 500/1113, 125/192, -2187/6784, 11/84])
+
+    # Differenz der Lösungen 5. und 4. Ordnung (Gewichte der 7 Auswertungen)
+    E = np.array([-71/57600, 0, 71/16695, -71/1920, 17253/339200, -22/525, 1/40])
+
+    # Koeffizienten des Polynoms für die dichte Ausgabe
+    P = np.array([
+        [1, -8048581381/2820520608, 8663915743/2820520608, -12715105075/11282082432],
+        [0, 0, 0, 0],
+        [0, 131558114200/32700410799, -68118460800/10900136933, 87487479700/32700410799],
+        [0, -1754552775/470086768, 14199869525/1410260304, -10690763975/1880347072],
+        [0, 127303824393/49829197408, -318862633887/49829197408, 701980252875/199316789632],
+        [0, -282668133/205662961, 2019193451/616988883, -1453857185/822651844],
+        [0, 40617522/29380423, -110615467/29380423, 69997945/29380423],
+    ])
+
+    SAFETY = 0.9
+    MIN_FACTOR = 0.2
+    MAX_FACTOR = 10.0
+
+    def __init__(self, rtol=1e-9, atol=0.0):
+        self.rtol = rtol
+        self.atol = atol
+        self.reset()
+
+
+    # Setzt die Zähler zurück
+    def reset(self):
+        self.evaluations = 0
+        self.accepted = 0
+        self.rejected = 0
+
+
+    # Löst die Bewegungsgleichung von t = 0 bis t_eval[-1] und gibt die
+    # Positionen und Geschwindigkeiten zu den Zeiten t_eval zurück (Arrays der
+    # Form (len(t_eval), ...)). `dt` ist der erste Versuch für die Schrittweite.
+    #
+    # Mit `record` werden die Werte nicht gesammelt, sondern nach jedem Schritt
+    # als Blöcke `record(x_block, v_block)` weitergegeben, z.B. an eine
+    # `Trajectory`. Zurückgegeben wird dann nur der Zustand bei t_eval[-1].
+    def integrate(self, x, v, t_eval, acceleration, dt=None, record=None):
+        t_eval = np.asarray(t_eval, dtype=float)
+        t_end = t_eval[-1]
+
+        # Zustand y = (x, v) und seine Ableitung f(y) = (v, a(x, v))
+        def derivative(y):
+            self.evaluations += 1
+            return np.stack([y[1], acceleration(y[0], y[1])])
+
+        y = np.stack([np.asarray(x, dtype=float), np.asarray(v, dtype=float)])
+        f = derivative(y)
+        t = 0.0
+
+        collect = record is None
+        if collect:
+            out = np.empty((len(t_eval),) + y.shape)
+
+            def record(x_block, v_block):
+                out[filled[0]:filled[0] + len(x_block), 0] = x_block
+                out[filled[0]:filled[0] + len(x_block), 1] = v_block
+                filled[0] += len(x_block)
+
+            filled = [0]
+
+        next_index = np.searchsorted(t_eval, t, side="right")
+        if next_index:
+            record(np.repeat(y[None, 0], next_index, axis=0), np.repeat(y[None, 1], next_index, axis=0))
+
+        h = dt if dt is not None else self._initial_step(y, f, t_end)
+        stages = np.empty((7,) + y.shape)
+
+        while t < t_end:
+            h = min(h, t_end - t)
+
+            # 6 Stufen des Verfahrens, die erste ist f vom letzten Schritt
+            stages[0] = f
+            for s in range(1, 6):
+                dy = np.tensordot(self.A[s], stages[:s], axes=1)
+                stages[s] = derivative(y + h * dy)
+
+            y_new = y + h * np.tensordot(self.B, stages[:6], axes=1)
+            f_new = derivative(y_new)
+            stages[6] = f_new
+
+            # Fehlerschätzung relativ zur Grösse von x und v
+            error = h * np.tensordot(self.E, stages, axes=1)
+            scale = self._scale(np.maximum(np.abs(y), np.abs(y_new)))
+            error_norm = np.sqrt(np.mean((error.reshape(2, -1) / scale[:, None])**2))
+
+            if not np.isfinite(error_norm) or error_norm > 1:
+                # Schritt verwerfen und mit kleinerem h wiederholen
+                self.rejected += 1
+                if np.isfinite(error_norm):
+                    h *= max(self.MIN_FACTOR, self.SAFETY * error_norm**-0.2)
+                else:
+                    h *= self.MIN_FACTOR
+                continue
+
+            # Schritt annehmen und Ausgabezeiten in diesem Schritt interpolieren
+            self.accepted += 1
+            t_new = t + h
+            end_index = np.searchsorted(t_eval, t_new, side="right")
+            if t_new >= t_end:
+                end_index = len(t_eval)
+            if end_index > next_index:
+                dense = self._dense(y, h, stages, (t_eval[next_index:end_index] - t) / h)
+                record(dense[:, 0], dense[:, 1])
+                next_index = end_index
+
+            t, y, f = t_new, y_new, f_new
+
+            factor = self.MAX_FACTOR if error_norm == 0 else self.SAFETY * error_norm**-0.2
+            h *= min(self.MAX_FACTOR, max(self.MIN_FACTOR, factor))
+
+        if collect:
+            return out[:, 0], out[:, 1]
+        return y[0], y[1]
+
+
+    # Wertet das Interpolationspolynom an den relativen Zeiten theta (0..1) aus
+    def _dense(self, y, h, stages, theta):
+        powers = np.cumprod(np.repeat(theta[:, None], 4, axis=1), axis=1)
+        weights = powers @ self.P.T
+        return y + h * np.tensordot(weights, stages, axes=1)
+
+
+    # Toleranz für die Positionen und für die Geschwindigkeiten
+    def _scale(self, magnitude):
+        scale = self.atol + self.rtol * magnitude.reshape(2, -1).max(axis=1)
+        scale[scale == 0] = 1.0
+        return scale
+
+
+    # Schätzt eine erste Schrittweite aus der Grösse von y und f
+    def _initial_step(self, y, f, t_end):
+        scale = self._scale(np.abs(y))
+        d0 = np.sqrt(np.mean((y.reshape(2, -1) / scale[:, None])**2))
+        d1 = np.sqrt(np.mean((f.reshape(2, -1) / scale[:, None])**2))
+        if d0 < 1e-5 or d1 < 1e-5:
+            return 1e-6 * t_end
+        return min(0.01 * d0 / d1, t_end)
+
+    def __repr__(self):
+        return f"DormandPrince(rtol={self.rtol}, atol={self.atol})"
+
+
+
+# _______________________
+#                        /
+# Energiedrift          (
+# _______________________\
+#
+# Welches Verfahren ist am günstigsten? Wir lösen drei Testprobleme mit allen
+# Verfahren und messen den grössten relativen Energiefehler max |E - E0| / |E0|
+# und die benötigte Rechenzeit (CPU-Sekunden):
+#
+# - Feder:   1000 unabhängige harmonische Oszillatoren (a = -x), 10 Perioden
+# - Pendel:  1000 Fadenpendel mit grosser Auslenkung (a = -sin x), 10 Perioden
+# - Kepler:  Planet auf einer Ellipse mit Exzentrizität 0.5 (GM = 1), 10 Umläufe
+#
+# Für jedes Verfahren wird dt so lange halbiert, bis der Energiefehler unter dem
+# Ziel `tolerance` liegt. Das günstigste Verfahren ist das mit der kleinsten
+# Rechenzeit.
+
+# Beschleunigungen und Energien der Testprobleme
+def _spring_acceleration(x, v):
+    return -x
+
+def _spring_energy(x, v):
+    return 0.5 * np.sum(v**2 + x**2)
+
+def _pendulum_acceleration(x, v):
+    return -np.sin(x)
+
+def _pendulum_energy(x, v):
+    return np.sum(0.5 * v**2 + 1 - np.cos(x))
+
+def _kepler_acceleration(x, v):
+    r = np.sqrt(np.sum(x**2, axis=-1, keepdims=True))
+    return -x / r**3
+
+def _kepler_energy(x, v):
+    return np.sum(0.5 * np.sum(v**2, axis=-1) - 1 / np.sqrt(np.sum(x**2, axis=-1)))
+
+
+# Anfangswerte, Beschleunigung, Energie und Dauer der Testprobleme
+def test_problems(n=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    eccentricity = 0.5
+
+    return {
+        "Feder": (rng.uniform(0.5, 1.5, n), np.zeros(n),
+                  _spring_acceleration, _spring_energy, 10 * 2 * np.pi),
+        "Pendel": (rng.uniform(0.5, 2.5, n), np.zeros(n),
+                   _pendulum_acceleration, _pendulum_energy, 10 * 7.4),
+        "Kepler": (np.array([[1 - eccentricity, 0.0]]),
+                   np.array([[0.0, np.sqrt((1 + eccentricity) / (1 - eccentricity))]]),
+                   _kepler_acceleration, _kepler_energy, 10 * 2 * np.pi),
+    }
+
+
+# Löst ein Problem bis t_end und misst den Energiefehler, die Anzahl
+# Auswertungen der Beschleunigung und die Rechenzeit
+def energy_drift(integrator, x, v, acceleration, energy, t_end, dt):
+    evaluations = 0
+
+    def counted(x, v):
+        nonlocal evaluations
+        evaluations += 1
+        return acceleration(x, v)
+
+    integrator.reset()
+    e0 = energy(x, v)
+    drift = 0.0
+    steps = int(round(t_end / dt))
+
+    start = time.process_time()
+    with np.errstate(all="ignore"):
+        for _ in range(steps):
+            x, v = integrator.step(x, v, dt, counted)
+            drift = max(drift, abs(energy(x, v) - e0))
+    cpu_time = time.process_time() - start
+
+    drift = drift / abs(e0) if np.isfinite(drift) else np.inf
+    return drift, evaluations, cpu_time
+
+
+# Sucht für jedes Verfahren das grösste dt = dt_start / 2^k, bei dem der
+# Energiefehler unter `tolerance` liegt, und gibt eine Tabelle aus
+def drift_report(tolerance=1e-4, dt_start=0.5, max_halvings=8, names=None):
+    names = names or list(INTEGRATORS)
+
+    for problem, (x, v, acceleration, energy, t_end) in test_problems().items():
+        print(f"\n{problem} (Ziel: Energiefehler < {tolerance:g})")
+        print(f"{'Verfahren':>16} {'dt':>10} {'Fehler':>10} {'Auswertungen':>13} "
+              f"{'CPU [s]':>9} {'Fehler/CPU-s':>13}")
+
+        best = None
+        for name in names:
+            dt = dt_start
+            for _ in range(max_halvings):
+                drift, evaluations, cpu_time = energy_drift(
+                    get_integrator(name), x, v, acceleration, energy, t_end, dt)
+                if drift < tolerance:
+                    break
+                dt /= 2
+
+            if drift >= tolerance:
+                print(f"{name:>16} {'-':>10} {drift:>10.2e} {'Ziel nicht erreicht':>24}")
+                continue
+
+            print(f"{name:>16} {dt:>10.5f} {drift:>10.2e} {evaluations:>13} "
+                  f"{cpu_time:>9.3f} {drift / max(cpu_time, 1e-9):>13.2e}")
+            if best is None or cpu_time < best[1]:
+                best = (name, cpu_time)
+
+        if best is not None:
+            print(f"{'Am günstigsten:':>16} {best[0]}")
+
+
+# _______________________
+#                        /
+# Auswertungen pro Umlauf(
+# _______________________\
+#
+# Wie viele Kraftberechnungen braucht ein Verfahren pro Umlauf eines Planeten,
+# damit er nach 10 Umläufen höchstens `tolerance` von seinem exakten Ort
+# entfernt ist? Je grösser die Exzentrizität, desto näher kommt der Planet der
+# Sonne und desto stärker profitiert die adaptive Schrittweite.
+
+def _kepler_orbit(eccentricity):
+    x = np.array([[1 - eccentricity, 0.0]])
+    v = np.array([[0.0, np.sqrt((1 + eccentricity) / (1 - eccentricity))]])
+    return x, v
+
+
+def orbit_report(tolerance=1e-4, orbits=10, eccentricities=(0.5, 0.9), names=("rk4", "yoshida"), max_halvings=8):
+    period = 2 * np.pi
+
+    for eccentricity in eccentricities:
+        x0, v0 = _kepler_orbit(eccentricity)
+        print(f"\nKepler-Bahn mit e = {eccentricity} (Ziel: Ortsfehler < {tolerance:g} nach {orbits} Umläufen)")
+        print(f"{'Verfahren':>16} {'Parameter':>14} {'Fehler':>10} {'Auswertungen/Umlauf':>20}")
+
+        # Verfahren mit festem Zeitschritt: dt halbieren, bis das Ziel erreicht ist
+        for name in names:
+            dt = period / 64
+            for _ in range(max_halvings):
+                steps = orbits * int(round(period / dt))
+                dt_exact = orbits * period / steps
+                integrator = get_integrator(name)
+                evaluations = 0
+
+                def counted(x, v):
+                    nonlocal evaluations
+                    evaluations += 1
+                    return _kepler_acceleration(x, v)
+
+                x, v = x0, v0
+                with np.errstate(all="ignore"):
+                    for _ in range(steps):
+                        x, v = integrator.step(x, v, dt_exact, counted)
+                error = np.linalg.norm(x - x0)
+                if error < tolerance:
+                    break
+                dt /= 2
+
+            if error >= tolerance:
+                print(f"{name:>16} {'-':>14} {error:>10.2e} {'Ziel nicht erreicht':>20}")
+                continue
+            print(f"{name:>16} {'dt = ' + format(dt_exact, '.2e'):>14} {error:>10.2e} {evaluations / orbits:>20.0f}")
+
+        # Adaptives Verfahren: Toleranz verkleinern, bis das Ziel erreicht ist
+        for rtol in 10.0**-np.arange(4, 14):
+            integrator = DormandPrince(rtol=rtol)
+            x, v = integrator.integrate(x0, v0, [orbits * period], _kepler_acceleration)
+            error = np.linalg.norm(x[-1] - x0)
+            if error < tolerance:
+                break
+
+        if error >= tolerance:
+            print(f"{integrator.name:>16} {'-':>14} {error:>10.2e} {'Ziel nicht erreicht':>20}")
+            continue
+        print(f"{integrator.name:>16} {'rtol = ' + format(rtol, '.0e'):>14} {error:>10.2e} "
+              f"{integrator.evaluations / orbits:>20.0f}")
+
+
+if __name__ == "__main__":
+    drift_report()
+    orbit_report()
@@ -0,0 +1,49 @@
+#              _________________________________
+#       ______|                                 |_____
+#       \     |   PHYSIK - KRAFTTERME           |    /
+#        )    |_________________________________|   (
+#       /________)                          (________\      CC BY-NC-SA 4.0 (https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+# Kraftterme für die `Simulation`. Ein Kraftterm berechnet mit `apply` die Kräfte
+# auf alle Körper eines `ParticleSystem` auf einmal und addiert sie zu
+# `particles.forces`. Mit `potential_energy` liefert er die zugehörige
+# potentielle Energie, damit die Energieerhaltung überprüft werden kann.
+#
+# Die Coulomb-Kraft hat dieselbe Form wie die Gravitationskraft:
+#
+#        F_ij = -K * q_i * q_j * r_ij / |r_ij|^3       mit  r_ij = x_j - x_i
+#
+# Gleichnamige Ladungen stossen sich ab, deshalb das Minuszeichen. Wir können
+# also den Gravitations-Kernel mit den Ladungen statt der Massen und mit G = -K
+# verwenden.
+
+
+from .gravitation import G, gravity_forces, gravity_potential_energy
+
+
+# Gravitationskraft zwischen allen Paaren von Körpern
+class PairGravity:
+    def __init__(self, G=G, softening=0.0):
+        self.G = G
+        self.softening = softening
+
+    def apply(self, particles):
+        particles.forces += gravity_forces(particles.positions, particles.masses, G=self.G, softening=self.softening)
+
+    def potential_energy(self, particles):
+        return gravity_potential_energy(particles.positions, particles.masses, G=self.G, softening=self.softening)
+
+
+# Coulomb-Kraft zwischen allen Paaren von geladenen Körpern
+class Coulomb:
+    # Die Coulomb-Konstante k in Nm²/C²
+    K = 8.99e9
+
+    def __init__(self, softening=0.0):
+        self.softening = softening
+
+    def apply(self, particles):
+        particles.forces += gravity_forces(particles.positions, particles.charges, G=-Coulomb.K, softening=self.softening)
+
+    def potential_energy(self, particles):
+        return gravity_potential_energy(particles.positions, particles.charges, G=-Coulomb.K, softening=self.softening)
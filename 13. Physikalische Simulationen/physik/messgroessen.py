@@ -0,0 +1,51 @@
+#              _________________________________
+#       ______|                                 |_____
+#       \     |   PHYSIK - MESSGRÖSSEN          |    /
+#        )    |_________________________________|   (
+#       /________)                          (________\      CC BY-NC-SA 4.0 (https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+# Messgrössen (Observables) werden während einer Simulation regelmässig
+# ausgewertet. Jede Messgrösse ist eine Funktion, die eine `Simulation` erhält
+# und eine Zahl oder ein numpy-Array zurückgibt, z.B.
+#
+#        simulation.run(1000, 0.01, observables={"E": energy, "p": momentum})
+
+
+import numpy as np
+
+
+# Gesamtenergie (kinetische und potentielle Energie)
+def energy(simulation):
+    return simulation.total_energy()
+
+
+# Kinetische Energie aller Körper
+def kinetic_energy(simulation):
+    return simulation.particles.kinetic_energy()
+
+
+# Gesamtimpuls p = sum m_i * v_i als Vektor (px, py)
+def momentum(simulation):
+    particles = simulation.particles
+    return particles.masses @ particles.velocities
+
+
+# Erzeugt eine Messgrösse, die das Histogramm der Geschwindigkeitsbeträge
+# liefert. Die Grenzen der Säulen (`bins`) bleiben während der ganzen
+# Simulation gleich, damit die Histogramme vergleichbar sind.
+def speed_histogram(bins):
+    bins = np.asarray(bins, dtype=float)
+
+    def histogram(simulation):
+        counts, _ = np.histogram(simulation.particles.speeds(), bins=bins)
+        return counts
+
+    return histogram
+
+
+# Alle Messgrössen, die über ihren Namen ausgewählt werden können
+OBSERVABLES = {
+    "energy": energy,
+    "kinetic_energy": kinetic_energy,
+    "momentum": momentum,
+}
@@ -0,0 +1,206 @@
+#              _________________________________
+#       ______|                                 |_____
+#       \     |   PHYSIK - NACHBARLISTE         |    /
+#        )    |_________________________________|   (
+#       /________)                          (________\      CC BY-NC-SA 4.0 (https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+# Die `CellList` aus `physik.gitter` sortiert in jedem Zeitschritt alle Teilchen
+# neu in ihre Zellen und sucht die Kandidatenpaare. Zwischen zwei Zeitschritten
+# bewegen sich die Teilchen aber nur ein kleines Stück, und die Paare bleiben
+# fast dieselben.
+#
+# Eine Nachbarliste ("Verlet-Liste") merkt sich deshalb die Paare und sucht sie
+# nur ab und zu neu. Damit dazwischen kein Paar verloren geht, werden beim Suchen
+# alle Paare mit einem Abstand bis `cutoff + skin` gespeichert, also mit einer
+# Reserve `skin` ("Haut"):
+#
+#        1. Beim Aufbau sucht eine `CellList` mit Zellen der Grösse
+#           `cutoff + skin` alle Paare und speichert die Positionen.
+#        2. Bei jedem Aufruf wird geprüft, wie weit sich jedes Teilchen seit dem
+#           Aufbau bewegt hat.
+#        3. Erst wenn sich ein Teilchen weiter als `skin / 2` bewegt hat, wird die
+#           Liste neu aufgebaut. Vorher können sich zwei Teilchen zusammen um
+#           höchstens `skin` genähert haben. Jedes Paar, das jetzt näher als
+#           `cutoff` ist, steht also sicher in der Liste.
+#
+# Eine grössere Haut bedeutet seltener neu aufbauen, aber mehr Paare, die bei
+# jedem Schritt geprüft werden.
+#
+# `NeighbourList` hat dieselbe Methode `candidate_pairs` wie `CellList` und kann
+# überall an ihrer Stelle verwendet werden, für Kollisionen und für Kräfte
+# zwischen Paaren:
+#
+#        simulation = Simulation(particles, collisions=True, skin=0.2)
+#        simulation.add_force_term(CutoffCoulomb(cutoff=4.0, skin=0.5))
+#
+# Wie oft die Liste neu aufgebaut wurde und wie viel Zeit das spart, zeigen
+# `rebuild_rate` und `speedup`. Einen Vergleich mit der `CellList` zeigt
+#
+#        python -m physik.nachbarn
+
+
+import time
+
+import numpy as np
+
+from .gitter import CellList
+
+
+# _______________________
+#                        /
+# Klasse NeighbourList  (
+# _______________________\
+#
+# - `cutoff`:  grösster Abstand eines Paares, das gefunden werden muss
+# - `skin`:    Reserve in m
+#
+# Messgrössen:
+#
+# - `calls`:       Aufrufe von `candidate_pairs`
+# - `builds`:      Aufbauten der Liste
+# - `build_time`:  gesamte Zeit für die Aufbauten in s
+# - `check_time`:  gesamte Zeit für die Prüfung der Verschiebungen in s
+
+class NeighbourList:
+    def __init__(self, cutoff, skin):
+        self.cutoff = cutoff
+        self.skin = skin
+        self.cell_list = CellList(cutoff + skin)
+
+        self.reference = None
+        self.i = self.j = None
+
+        self.calls = 0
+        self.builds = 0
+        self.build_time = 0.0
+        self.check_time = 0.0
+
+
+    # Nachbarliste für Kollisionen zwischen Körpern mit den Radien `radii`
+    @classmethod
+    def from_radii(cls, radii, skin):
+        return cls(2.0 * float(np.max(radii)), skin)
+
+
+    # Baut die Liste beim nächsten Aufruf neu auf, z.B. nachdem Körper
+    # hinzugefügt oder versetzt wurden
+    def invalidate(self):
+        self.reference = None
+
+
+    # True, wenn die Liste neu aufgebaut werden muss
+    def needs_rebuild(self, positions):
+        if self.reference is None or len(self.reference) != len(positions):
+            return True
+
+        displacement = positions - self.reference
+        largest = np.max(np.einsum("ij,ij->i", displacement, displacement), initial=0.0)
+        return largest > (self.skin / 2) ** 2
+
+
+    # Liefert zwei Index-Arrays i und j mit allen Paaren, die näher als `cutoff`
+    # sein können
+    def candidate_pairs(self, positions):
+        self.calls += 1
+
+        start = time.perf_counter()
+        rebuild = self.needs_rebuild(positions)
+        self.check_time += time.perf_counter() - start
+
+        if rebuild:
+            self.build(positions)
+        return self.i, self.j
+
+
+    # Sucht alle Paare näher als `cutoff + skin`
+    def build(self, positions):
+        start = time.perf_counter()
+
+        i, j = self.cell_list.candidate_pairs(positions)
+        r_vec = positions[j] - positions[i]
+        inside = np.einsum("ij,ij->i", r_vec, r_vec) <= (self.cutoff + self.skin) ** 2
+        self.i, self.j = i[inside], j[inside]
+        self.reference = positions.copy()
+
+        self.builds += 1
+        self.build_time += time.perf_counter() - start
+
+
+    # Gespeicherte Paare und Positionen beim letzten Aufbau (siehe
+    # `physik.sicherung`). Ohne sie würde die Liste nach dem Laden früher neu
+    # aufgebaut und die Paare kämen in einer anderen Reihenfolge.
+    def get_state(self):
+        state = {"calls": np.int64(self.calls), "builds": np.int64(self.builds)}
+        if self.reference is not None:
+            state.update(reference=self.reference.copy(), i=self.i.copy(), j=self.j.copy())
+        return state
+
+
+    def set_state(self, state):
+        self.calls = int(state["calls"])
+        self.builds = int(state["builds"])
+        if "reference" in state:
+            self.reference = np.array(state["reference"], dtype=float)
+            self.i = np.array(state["i"])
+            self.j = np.array(state["j"])
+        else:
+            self.reference = self.i = self.j = None
+
+
+    # Anteil der Aufrufe, bei denen die Liste neu aufgebaut wurde
+    @property
+    def rebuild_rate(self):
+        return self.builds / self.calls if self.calls else 0.0
+
+
+    # Geschätzter Zeitgewinn gegenüber einem Aufbau bei jedem Aufruf
+    @property
+    def speedup(self):
+        if self.builds == 0:
+            return 1.0
+        every_call = self.calls * self.build_time / self.builds
+        return every_call / (self.build_time + self.check_time)
+
+
+
+# _______________________
+#                        /
+# Vergleich             (
+# _______________________\
+#
+# Rechnet das ideale Gas aus Lektion 13.6 mit der `CellList` in jedem Schritt
+# und mit Nachbarlisten verschiedener Haut und vergleicht die Zeit pro Schritt.
+#
+#        python -m physik.nachbarn
+
+def benchmark(n_sides=(32, 64), skins=(None, 0.05, 0.1, 0.2, 0.4), steps=300, dt=0.01):
+    from .szenen import ideal_gas
+
+    print(f"{'N':>6} {'Haut':>6} {'ms/Schritt':>11} {'Aufbauten':>10} {'Paare':>8} {'Stösse':>8} {'Gewinn':>7}")
+    for n_side in n_sides:
+        baseline = None
+        for skin in skins:
+            simulation = ideal_gas(n_side=n_side, seed=1, radius=0.05, size=n_side * 0.25, skin=skin)
+
+            start = time.perf_counter()
+            collisions = 0
+            for _ in range(steps):
+                simulation.step(dt)
+                collisions += simulation.collision_count
+            elapsed = (time.perf_counter() - start) / steps
+
+            if skin is None:
+                baseline = elapsed
+                builds, pairs = steps, len(simulation.cell_list.candidate_pairs(simulation.particles.positions)[0])
+                label = "-"
+            else:
+                neighbours = simulation.cell_list
+                builds, pairs = neighbours.builds, len(neighbours.i)
+                label = skin
+
+            print(f"{n_side ** 2:>6} {label:>6} {1e3 * elapsed:>11.3f} {builds:>10} {pairs:>8} {collisions:>8} "
+                  f"{baseline / elapsed:>6.2f}x")
+
+
+if __name__ == "__main__":
+    benchmark()
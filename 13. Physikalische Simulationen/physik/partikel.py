@@ -0,0 +1,346 @@
+#              _________________________________
+#       ______|                                 |_____
+#       \     |   PHYSIK - PARTIKELSYSTEM       |    /
+#        )    |_________________________________|   (
+#       /________)                          (________\      CC BY-NC-SA 4.0 (https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+# In den Simulationen des Kapitels 13 besitzt jeder Körper seine eigenen kleinen
+# numpy-Arrays für Position, Geschwindigkeit und Kraft. Bei wenigen Körpern ist
+# das übersichtlich, bei tausenden Körpern verbringt das Programm aber fast die
+# gesamte Zeit mit dem Aufruf von numpy-Funktionen für winzige Arrays.
+#
+# Das `ParticleSystem` speichert deshalb die Daten aller Körper in grossen,
+# zusammenhängenden Arrays ("Structure of Arrays"):
+#
+#        positions   (N, 2)   Positionen in m
+#        velocities  (N, 2)   Geschwindigkeiten in m/s
+#        forces      (N, 2)   resultierende Kräfte in N
+#        masses      (N,)     Massen in kg
+#        charges     (N,)     Ladungen in C
+#        radii       (N,)     Radien in m
+#
+# Ein Euler-Cromer-Schritt ist dann eine einzige Rechnung mit ganzen Arrays,
+# egal ob 10 oder 10'000 Körper simuliert werden.
+#
+# Damit der bestehende Code (z.B. `on_draw` oder die Klasse `Collision`) weiterhin
+# mit `body.position`, `body.velocity` usw. arbeiten kann, liefert das System für
+# jeden Körper ein `BodyView`-Objekt. Dieses speichert keine eigenen Daten, sondern
+# nur seinen Index und greift direkt auf die Arrays des Systems zu.
+
+
+import json
+
+import numpy as np
+
+
+# _______________________
+#                        /
+# Klasse BodyView       (
+# _______________________\
+#
+# Ein `BodyView` verhält sich wie ein `Body`, zeigt aber auf eine Zeile in den
+# Arrays des `ParticleSystem`. `body.position` ist deshalb eine Sicht (View) auf
+# `system.positions[index]`: Änderungen wie `body.position[1] = 0` oder
+# `body.velocity *= 1.2` landen direkt im System.
+#
+# Die Sichten werden als gewöhnliche Attribute gespeichert, damit der Zugriff
+# so schnell ist wie bei einem `Body`. Wenn das System neuen Speicher reserviert,
+# ruft es `bind` auf und die Sichten zeigen wieder auf die aktuellen Arrays.
+# Eine Zuweisung wie `body.position = [0, 1]` kopiert die Werte in das System.
+
+class BodyView:
+    _ARRAYS = ("position", "velocity", "force")
+
+    def __init__(self, system, index):
+        object.__setattr__(self, "system", system)
+        object.__setattr__(self, "index", index)
+        self.bind()
+
+
+    # Verknüpft die Attribute mit den Zeilen der System-Arrays
+    def bind(self):
+        i = self.index
+        object.__setattr__(self, "position", self.system._positions[i])
+        object.__setattr__(self, "velocity", self.system._velocities[i])
+        object.__setattr__(self, "force", self.system._forces[i])
+
+
+    def __setattr__(self, name, value):
+        if name in BodyView._ARRAYS:
+            getattr(self, name)[:] = value
+        else:
+            object.__setattr__(self, name, value)
+
+    @property
+    def acceleration(self):
+        return self.force / self.mass
+
+    @property
+    def mass(self):
+        return self.system.masses[self.index]
+
+    @mass.setter
+    def mass(self, value):
+        self.system.masses[self.index] = value
+
+    @property
+    def charge(self):
+        return self.system.charges[self.index]
+
+    @charge.setter
+    def charge(self, value):
+        self.system.charges[self.index] = value
+
+    @property
+    def radius(self):
+        return self.system.radii[self.index]
+
+    @radius.setter
+    def radius(self, value):
+        self.system.radii[self.index] = value
+
+    @property
+    def fixed(self):
+        return bool(self.system.fixed[self.index])
+
+    @fixed.setter
+    def fixed(self, value):
+        self.system.fixed[self.index] = value
+
+    @property
+    def color(self):
+        return self.system.colors[self.index]
+
+    @color.setter
+    def color(self, value):
+        self.system.colors[self.index] = value
+
+
+    # Setzt die resultierende Kraft auf null
+    def clear_force(self):
+        self.force[:] = 0.0
+
+
+    # Fügt eine Kraft zum Körper hinzu
+    def add_force(self, force):
+        self.force += force
+
+
+    # Berechnet die kinetische Energie des Körpers
+    def kinetic_energy(self):
+        return 0.5 * self.mass * np.dot(self.velocity, self.velocity)
+
+
+
+# _______________________
+#                        /
+# Klasse ParticleSystem (
+# _______________________\
+#
+# Das `ParticleSystem` reserviert Speicher für `capacity` Körper. Werden mehr
+# Körper hinzugefügt, verdoppelt es die Kapazität. Die öffentlichen Arrays
+# (`positions`, `velocities`, ...) sind Sichten auf die ersten `n` Zeilen des
+# reservierten Speichers.
+
+class ParticleSystem:
+    def __init__(self, capacity=64):
+        self.n = 0
+        self.colors = []
+        self.bodies = []
+        self._allocate(capacity)
+
+
+    # Reserviert neue Arrays und kopiert die vorhandenen Daten hinein
+    def _allocate(self, capacity):
+        old = getattr(self, "_positions", None)
+
+        positions = np.zeros((capacity, 2))
+        velocities = np.zeros((capacity, 2))
+        forces = np.zeros((capacity, 2))
+        masses = np.ones(capacity)
+        charges = np.zeros(capacity)
+        radii = np.ones(capacity)
+        fixed = np.zeros(capacity, dtype=bool)
+
+        if old is not None:
+            n = self.n
+            positions[:n] = self._positions[:n]
+            velocities[:n] = self._velocities[:n]
+            forces[:n] = self._forces[:n]
+            masses[:n] = self._masses[:n]
+            charges[:n] = self._charges[:n]
+            radii[:n] = self._radii[:n]
+            fixed[:n] = self._fixed[:n]
+
+        self._positions = positions
+        self._velocities = velocities
+        self._forces = forces
+        self._masses = masses
+        self._charges = charges
+        self._radii = radii
+        self._fixed = fixed
+        self._update_views()
+
+        for body in self.bodies:
+            body.bind()
+
+
+    # Aktualisiert die Sichten auf die belegten Zeilen
+    def _update_views(self):
+        n = self.n
+        self.positions = self._positions[:n]
+        self.velocities = self._velocities[:n]
+        self.forces = self._forces[:n]
+        self.masses = self._masses[:n]
+        self.charges = self._charges[:n]
+        self.radii = self._radii[:n]
+        self.fixed = self._fixed[:n]
+
+
+    def __len__(self):
+        return self.n
+
+
+    # Fügt einen Körper hinzu und gibt einen `BodyView` darauf zurück
+    def add_body(self, position, velocity, mass=1.0, radius=1.0, charge=0.0, fixed=False, color=None):
+        if self.n == len(self._masses):
+            self._allocate(2 * len(self._masses))
+
+        i = self.n
+        self._positions[i] = position
+        self._velocities[i] = velocity
+        self._forces[i] = 0.0
+        self._masses[i] = mass
+        self._charges[i] = charge
+        self._radii[i] = radius
+        self._fixed[i] = fixed
+        self.colors.append(color)
+
+        self.n += 1
+        self._update_views()
+
+        body = BodyView(self, i)
+        self.bodies.append(body)
+        return body
+
+
+    # Fügt viele Körper auf einmal hinzu (Arrays der Form (k, 2) bzw. (k,))
+    def add_bodies(self, positions, velocities, mass=1.0, radius=1.0, charge=0.0, color=None):
+        positions = np.asarray(positions, dtype=float)
+        k = len(positions)
+
+        capacity = len(self._masses)
+        while self.n + k > capacity:
+            capacity *= 2
+        if capacity != len(self._masses):
+            self._allocate(capacity)
+
+        start, end = self.n, self.n + k
+        self._positions[start:end] = positions
+        self._velocities[start:end] = velocities
+        self._forces[start:end] = 0.0
+        self._masses[start:end] = mass
+        self._charges[start:end] = charge
+        self._radii[start:end] = radius
+        self._fixed[start:end] = False
+        self.colors.extend([color] * k)
+
+        self.n = end
+        self._update_views()
+
+        new_bodies = [BodyView(self, i) for i in range(start, end)]
+        self.bodies.extend(new_bodies)
+        return new_bodies
+
+
+    # Setzt die Kräfte aller Körper auf null
+    def clear_forces(self):
+        self.forces[:] = 0.0
+
+
+    # Fügt allen Körpern dieselbe Kraft hinzu
+    def add_force(self, force):
+        self.forces += force
+
+
+    # Fügt allen Körpern die Schwerkraft F_G = m * g hinzu
+    def add_gravity(self, g=9.81):
+        self.forces[:, 1] -= self.masses * g
+
+
+    # Euler-Cromer-Schritt für alle Körper gleichzeitig. Fixierte Körper
+    # bleiben an ihrer Position.
+    def update_ec(self, dt):
+        acceleration = self.forces / self.masses[:, None]
+        self.velocities += acceleration * dt
+        self.velocities[self.fixed] = 0.0
+        self.positions += self.velocities * dt
+
+
+    # Reflektiert alle Körper an den Wänden einer rechteckigen Box
+    def reflect_walls(self, x_min, x_max, y_min, y_max):
+        for axis, low, high in ((0, x_min, x_max), (1, y_min, y_max)):
+            pos = self.positions[:, axis]
+            vel = self.velocities[:, axis]
+
+            below = pos < low + self.radii
+            pos[below] = low + self.radii[below]
+            vel[below] *= -1
+
+            above = pos > high - self.radii
+            pos[above] = high - self.radii[above]
+            vel[above] *= -1
+
+
+    # Beträge der Geschwindigkeiten aller Körper
+    def speeds(self):
+        return np.sqrt(np.einsum("ij,ij->i", self.velocities, self.velocities))
+
+
+    # Kinetische Energien aller Körper
+    def kinetic_energies(self):
+        return 0.5 * self.masses * np.einsum("ij,ij->i", self.velocities, self.velocities)
+
+
+    # Gesamte kinetische Energie des Systems
+    def kinetic_energy(self):
+        return float(self.kinetic_energies().sum())
+
+
+    # Zustand aller Körper als Arrays, z.B. für einen Sicherungspunkt (siehe
+    # `physik.sicherung`). Die Farben werden als JSON-Text gespeichert.
+    def get_state(self):
+        return {
+            "positions": self.positions.copy(),
+            "velocities": self.velocities.copy(),
+            "forces": self.forces.copy(),
+            "masses": self.masses.copy(),
+            "charges": self.charges.copy(),
+            "radii": self.radii.copy(),
+            "fixed": self.fixed.copy(),
+            "colors": np.array(json.dumps([None if c is None else list(c) for c in self.colors])),
+        }
+
+
+    # Stellt den Zustand aus `get_state` wieder her. Hat der Sicherungspunkt eine
+    # andere Anzahl Körper, werden die `BodyView`-Objekte neu erzeugt.
+    def set_state(self, state):
+        n = len(state["masses"])
+        colors = [None if c is None else tuple(c) for c in json.loads(str(state["colors"]))]
+
+        if n != self.n:
+            self.n = 0
+            self.bodies = []
+            self._allocate(max(n, len(self._masses)))
+            self.n = n
+            self._update_views()
+            self.bodies = [BodyView(self, i) for i in range(n)]
+
+        self.positions[:] = state["positions"]
+        self.velocities[:] = state["velocities"]
+        self.forces[:] = state["forces"]
+        self.masses[:] = state["masses"]
+        self.charges[:] = state["charges"]
+        self.radii[:] = state["radii"]
+        self.fixed[:] = state["fixed"]
+        self.colors = colors
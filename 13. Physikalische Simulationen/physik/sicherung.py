@@ -0,0 +1,163 @@
+#              _________________________________
+#       ______|                                 |_____
+#       \     |   PHYSIK - SICHERUNGSPUNKTE     |    /
+#        )    |_________________________________|   (
+#       /________)                          (________\      CC BY-NC-SA 4.0 (https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+# Eine lange Rechnung ohne Fenster, z.B. ein grosses Gas oder das
+# Dreikörperproblem über Jahrhunderte, kann Stunden dauern. Wird das Programm
+# abgebrochen oder stürzt der Computer ab, beginnt die Rechnung ohne
+# Sicherungspunkte wieder von vorne.
+#
+# Ein Sicherungspunkt ("Checkpoint") speichert den ganzen Zustand einer
+# Simulation in einer `.npz`-Datei: die Arrays aller Körper, die Federn und
+# Fäden, die Zwischenwerte des Verfahrens und der Nachbarliste, die Zeit und
+# den Zustand des Zufallsgenerators. Nach dem Laden rechnet die Simulation
+# genau gleich weiter, als wäre sie nie unterbrochen worden. Die Ergebnisse
+# sind Bit für Bit dieselben.
+#
+# Gespeichert werden kann jedes Objekt mit den Methoden `get_state` und
+# `set_state`, z.B. eine `Simulation` oder die `World` aus Lektion 13.10.2.
+# `get_state` liefert ein verschachteltes Dictionary mit Arrays:
+#
+#        {"t": 1.5, "particles": {"positions": ..., "velocities": ...}, ...}
+#
+# In der Datei werden die Namen mit Punkten verbunden, z.B.
+# "particles.positions". Damit eine abgebrochene Rechnung keine halbe Datei
+# hinterlässt, wird zuerst eine temporäre Datei geschrieben und diese dann
+# umbenannt.
+#
+#        simulation = ideal_gas(n_side=64, seed=1)
+#        simulation.run(100000, 0.01, checkpoint="gas.npz", checkpoint_every=5000)
+#
+#        # später, nach einem Abbruch
+#        simulation = ideal_gas(n_side=64, seed=1)
+#        load_checkpoint("gas.npz", simulation)
+#        simulation.run(100000 - simulation.step_count, 0.01, checkpoint="gas.npz")
+#
+# `physik.batch` macht dasselbe mit `--checkpoint gas.npz --resume`. Mit
+# `compress=False` wird die Datei nicht komprimiert. Sie ist dann grösser, wird
+# aber schneller geschrieben, und `np.load` liest jedes Array erst, wenn es
+# gebraucht wird.
+#
+#        python -m physik.sicherung
+
+
+import json
+import os
+import time
+
+import numpy as np
+
+
+# Verbindet die Namen eines verschachtelten Dictionarys mit Punkten.
+# Werte None werden weggelassen.
+def flatten_state(state, prefix=""):
+    arrays = {}
+    for name, value in state.items():
+        key = prefix + name
+        if isinstance(value, dict):
+            arrays.update(flatten_state(value, key + "."))
+        elif value is not None:
+            arrays[key] = np.asarray(value)
+    return arrays
+
+
+# Gegenstück zu `flatten_state`
+def unflatten_state(arrays):
+    state = {}
+    for key, value in arrays.items():
+        *path, name = key.split(".")
+        node = state
+        for part in path:
+            node = node.setdefault(part, {})
+        node[name] = value
+    return state
+
+
+# Schreibt den Zustand von `system` nach `path`. Weitere Angaben `info` (z.B.
+# der Name der Szene) werden als JSON-Text mitgespeichert.
+def save_checkpoint(path, system, compress=True, **info):
+    arrays = flatten_state(system.get_state())
+    arrays["info"] = np.array(json.dumps(info))
+
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as file:
+        if compress:
+            np.savez_compressed(file, **arrays)
+        else:
+            np.savez(file, **arrays)
+    os.replace(temporary, path)
+
+
+# Lädt den Zustand aus `path` in `system` und gibt die Angaben `info` zurück
+def load_checkpoint(path, system):
+    with np.load(path) as data:
+        arrays = {key: data[key] for key in data.files}
+
+    info = json.loads(str(arrays.pop("info")))
+    system.set_state(unflatten_state(arrays))
+    return info
+
+
+
+# _______________________
+#                        /
+# Vergleich             (
+# _______________________\
+#
+# Rechnet einige Szenen einmal am Stück und einmal mit einem Sicherungspunkt in
+# der Mitte, nach dem eine neu erzeugte Simulation weiterrechnet. Die
+# Endzustände müssen exakt gleich sein.
+#
+#        python -m physik.sicherung
+
+def benchmark(steps=400, dt=0.005, path="sicherung_test.npz"):
+    from .integratoren import get_integrator
+    from .szenen import SCENES
+
+    cases = [
+        ("gas", {"n_side": 32, "seed": 1}, None),
+        ("gas", {"n_side": 32, "seed": 1, "skin": 0.1}, None),
+        ("crystal", {"n_side": 16, "seed": 1}, "velocity_verlet"),
+        ("softbody", {"n_side": 10}, None),
+        ("gravitation", {}, "rk4"),
+    ]
+
+    print(f"{'Szene':>12} {'Verfahren':>16} {'kB':>8} {'Speichern':>10} {'Laden':>8} {'identisch':>10}")
+    try:
+        for scene, options, integrator in cases:
+            def create():
+                simulation = SCENES[scene](**options)
+                if integrator is not None:
+                    simulation.integrator = get_integrator(integrator)
+                return simulation
+
+            reference = create()
+            reference.run(steps, dt)
+
+            first = create()
+            first.run(steps // 2, dt)
+            start = time.perf_counter()
+            save_checkpoint(path, first, scene=scene)
+            save_time = time.perf_counter() - start
+
+            second = create()
+            start = time.perf_counter()
+            load_checkpoint(path, second)
+            load_time = time.perf_counter() - start
+            second.run(steps - second.step_count, dt)
+
+            identical = (np.array_equal(reference.particles.positions, second.particles.positions)
+                         and np.array_equal(reference.particles.velocities, second.particles.velocities)
+                         and reference.t == second.t)
+
+            print(f"{scene:>12} {integrator or 'euler_cromer':>16} {os.path.getsize(path) / 1024:>8.1f} "
+                  f"{1e3 * save_time:>8.2f}ms {1e3 * load_time:>6.2f}ms {str(identical):>10}")
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    benchmark()
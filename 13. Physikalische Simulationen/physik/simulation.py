@@ -0,0 +1,398 @@
+#              _________________________________
+#       ______|                                 |_____
+#       \     |   PHYSIK - SIMULATION           |    /
+#        )    |_________________________________|   (
+#       /________)                          (________\      CC BY-NC-SA 4.0 (https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+# In den Lektionen 13.4 bis 13.9 steckt die Physik in der Methode `on_update`
+# des `AnimationWindow`. Die Simulation läuft deshalb nur, solange ein Fenster
+# offen ist, und immer nur so schnell, wie das Fenster neue Bilder zeichnet.
+#
+# Die Klasse `Simulation` enthält nur die Physik eines Zeitschritts:
+#
+#        1. Kräfte auf null setzen
+#        2. Kräfte berechnen (Schwerkraft und weitere Kraftterme)
+#        3. Kollisionen zwischen den Körpern berechnen
+#        4. Euler-Cromer-Schritt (oder ein Verfahren aus `physik.integratoren`)
+#        5. Zwangsbedingungen, z.B. starre Fäden (siehe `physik.stangen`)
+#        6. Kollisionen mit den Wänden der Box
+#
+# Ein Fenster kann die Simulation anzeigen, indem es in `on_update` die Methode
+# `step` aufruft und in `on_draw` die Positionen zeichnet. Ohne Fenster lässt
+# sich die Simulation mit `run` beliebig schnell und mit festem Zeitschritt
+# ausführen, z.B. auf einem Server ohne Bildschirm. Lange Rechnungen können
+# dabei regelmässig einen Sicherungspunkt schreiben (siehe `physik.sicherung`).
+#
+# Die Fenster der Lektionen 13.6.2 und 13.8.1 bis 13.8.3 zeigen nur noch eine
+# `Simulation` an. Die Lektionen 13.4 bis 13.9 rechnen weiterhin selbst in
+# `on_update`, weil sie die Klassen `Body` und `Interaction` Schritt für
+# Schritt erklären.
+
+
+import csv
+import json
+
+import numpy as np
+
+from .gitter import CellList, resolve_collisions
+from .nachbarn import NeighbourList
+from .sicherung import save_checkpoint
+
+
+# _______________________
+#                        /
+# Klasse Simulation     (
+# _______________________\
+#
+# - `particles`:  das `ParticleSystem` mit allen Körpern
+# - `box`:        Wände (x_min, x_max, y_min, y_max) oder None. Fehlende Wände
+#                 werden mit `np.inf` angegeben, z.B. eine Box ohne Decke.
+# - `gravity`:    Erdbeschleunigung g in m/s^2 (0 = keine Schwerkraft)
+# - `collisions`: True, wenn die Körper elastisch zusammenstossen
+# - `integrator`: Verfahren aus `physik.integratoren` (None = Euler-Cromer)
+# - `skin`:       Reserve der Nachbarliste für die Kollisionen in m (siehe
+#                 `physik.nachbarn`). None = Zellenliste in jedem Schritt.
+# - `max_dt`:     grösster Zeitschritt in s, der noch stabil ist. Ein längerer
+#                 Schritt `dt` wird in gleich lange Teilschritte aufgeteilt
+#                 (None = immer ein Schritt, siehe `SpringNetwork.stable_dt`).
+#
+# Weitere Kräfte werden mit `add_force_term` hinzugefügt. Ein Kraftterm ist ein
+# Objekt mit der Methode `apply(particles)`, die Kräfte zu `particles.forces`
+# addiert. Besitzt er zusätzlich `potential_energy(particles)`, wird diese
+# Energie in `total_energy` mitgezählt.
+#
+# Zwangsbedingungen werden mit `add_constraints` hinzugefügt. Sie besitzen die
+# Methode `solve(particles, previous, dt)`, die nach dem Zeitschritt die
+# Positionen korrigiert und die Geschwindigkeiten aus der Bewegung seit den
+# Positionen `previous` neu berechnet.
+#
+# Mit `get_state` und `set_state` lässt sich der ganze Zustand speichern und
+# wiederherstellen. Kraftterme, Zwangsbedingungen und Integratoren mit eigenem
+# Zustand (z.B. ein `SpringNetwork`) besitzen dafür dieselben zwei Methoden.
+
+class Simulation:
+    def __init__(self, particles, box=None, gravity=0.0, collisions=False, restitution=1.0, integrator=None,
+                 skin=None, max_dt=None):
+        self.particles = particles
+        self.box = box
+        self.gravity = gravity
+        self.collisions = collisions
+        self.restitution = restitution
+        self.integrator = integrator
+        self.skin = skin
+        self.max_dt = max_dt
+
+        self.force_terms = []
+        self.constraints = []
+        self.cell_list = None
+
+        # Simulationszeit in s und Anzahl berechneter Zeitschritte
+        self.t = 0.0
+        self.step_count = 0
+
+        # Anzahl geprüfter Paare und Stösse zwischen Körpern im letzten Zeitschritt
+        self.pairs_tested = 0
+        self.collision_count = 0
+
+        # Optionaler `PhaseTimer` aus `physik.zeitmessung`, der die Zeit für die
+        # Teile jedes Zeitschritts misst
+        self.profiler = None
+
+        # Zufallsgenerator der Szene (z.B. für zufällige Kräfte). Sein Zustand
+        # wird in Sicherungspunkten mitgespeichert.
+        self.rng = None
+
+
+    # Fügt einen Kraftterm hinzu
+    def add_force_term(self, term):
+        self.force_terms.append(term)
+        return term
+
+
+    # Fügt Zwangsbedingungen hinzu (z.B. `DistanceConstraints`)
+    def add_constraints(self, constraints):
+        self.constraints.append(constraints)
+        return constraints
+
+
+    # Berechnet die Kräfte auf alle Körper
+    def compute_forces(self):
+        particles = self.particles
+        particles.clear_forces()
+
+        if self.gravity:
+            particles.add_gravity(self.gravity)
+
+        for term in self.force_terms:
+            term.apply(particles)
+
+
+    # Beschleunigungen aller Körper für die Positionen x und Geschwindigkeiten v.
+    # Die Integratoren rufen diese Methode mehrmals pro Zeitschritt auf.
+    def acceleration(self, x, v):
+        particles = self.particles
+        particles.positions[:] = x
+        particles.velocities[:] = v
+        self.compute_forces()
+
+        acceleration = particles.forces / particles.masses[:, None]
+        acceleration[particles.fixed] = 0.0
+        return acceleration
+
+
+    # Zellen- oder Nachbarliste für die Stösse (wird beim ersten Aufruf erzeugt)
+    def collision_grid(self):
+        if self.cell_list is None:
+            if self.skin is None:
+                self.cell_list = CellList.from_radii(self.particles.radii)
+            else:
+                self.cell_list = NeighbourList.from_radii(self.particles.radii, self.skin)
+        return self.cell_list
+
+
+    # Berechnet die Stösse zwischen den Körpern
+    def resolve_collisions(self):
+        i, j = self.collision_grid().candidate_pairs(self.particles.positions)
+        self.pairs_tested = len(i)
+        return resolve_collisions(self.particles, i, j, self.restitution)
+
+
+    # Führt einen Zeitschritt der Länge dt aus. Ist dt grösser als `max_dt`,
+    # wird er in mehrere Teilschritte aufgeteilt.
+    def step(self, dt):
+        substeps = 1
+        if self.max_dt is not None and dt > self.max_dt:
+            substeps = int(np.ceil(dt / self.max_dt))
+
+        for _ in range(substeps):
+            self._substep(dt / substeps)
+
+        self.t += dt
+        self.step_count += 1
+
+
+    # Ein einzelner Schritt der Länge dt (ohne Teilschritte)
+    def _substep(self, dt):
+        particles = self.particles
+        profiler = self.profiler
+        previous = particles.positions.copy() if self.constraints else None
+
+        if self.integrator is None:
+            self.compute_forces()
+            if profiler is not None:
+                profiler.lap("Kräfte")
+            if self.collisions:
+                self.collision_count = self.resolve_collisions()
+                if profiler is not None:
+                    profiler.lap("Kollisionen")
+            particles.update_ec(dt)
+        else:
+            if self.collisions:
+                self.collision_count = self.resolve_collisions()
+                if profiler is not None:
+                    profiler.lap("Kollisionen")
+            x, v = self.integrator.step(particles.positions.copy(), particles.velocities.copy(),
+                                        dt, self.acceleration)
+            particles.positions[:] = x
+            particles.velocities[:] = v
+            particles.velocities[particles.fixed] = 0.0
+        if profiler is not None:
+            profiler.lap("Bewegung")
+
+        if self.constraints:
+            for constraints in self.constraints:
+                constraints.solve(particles, previous, dt)
+            if profiler is not None:
+                profiler.lap("Zwangsbedingungen")
+
+        if self.box is not None:
+            particles.reflect_walls(*self.box)
+            if profiler is not None:
+                profiler.lap("Wände")
+
+        if profiler is not None and self.collisions:
+            profiler.count("Paare", self.pairs_tested)
+            profiler.count("Stösse", self.collision_count)
+
+
+    # Gesamtenergie: kinetische Energie, Lageenergie und Energie der Kraftterme
+    def total_energy(self):
+        particles = self.particles
+        energy = particles.kinetic_energy()
+
+        if self.gravity:
+            energy += self.gravity * float(np.dot(particles.masses, particles.positions[:, 1]))
+
+        for term in self.force_terms:
+            if hasattr(term, "potential_energy"):
+                energy += term.potential_energy(particles)
+
+        return energy
+
+
+    # Die Teile der Simulation, die einen eigenen Zustand haben können
+    def _components(self):
+        parts = {"integrator": self.integrator, "cell_list": self.cell_list}
+        parts.update({f"force_term_{k}": term for k, term in enumerate(self.force_terms)})
+        parts.update({f"constraints_{k}": c for k, c in enumerate(self.constraints)})
+        return parts
+
+
+    # Ganzer Zustand als verschachteltes Dictionary mit Arrays. `components`
+    # enthält die Klassennamen der Teile, damit beim Laden geprüft werden kann,
+    # ob die Simulation gleich aufgebaut ist.
+    def get_state(self):
+        state = {
+            "t": np.float64(self.t),
+            "step_count": np.int64(self.step_count),
+            "collision_count": np.int64(self.collision_count),
+            "particles": self.particles.get_state(),
+        }
+
+        components = {}
+        for name, part in self._components().items():
+            components[name] = None if part is None else type(part).__name__
+            if hasattr(part, "get_state"):
+                state[name] = part.get_state()
+        state["components"] = np.array(json.dumps(components))
+
+        if self.rng is not None:
+            state["rng"] = np.array(json.dumps(self.rng.bit_generator.state))
+        return state
+
+
+    # Stellt den Zustand aus `get_state` wieder her. Die Simulation muss mit
+    # denselben Krafttermen, Zwangsbedingungen und demselben Verfahren erzeugt
+    # worden sein, z.B. mit derselben Szene aus `physik.szenen`.
+    def set_state(self, state):
+        if self.collisions:
+            self.collision_grid()
+
+        saved = json.loads(str(state["components"]))
+        current = {name: None if part is None else type(part).__name__
+                   for name, part in self._components().items()}
+        if saved != current:
+            raise ValueError(f"Der Sicherungspunkt passt nicht zur Simulation: {saved} statt {current}")
+
+        self.t = float(state["t"])
+        self.step_count = int(state["step_count"])
+        self.collision_count = int(state["collision_count"])
+        self.particles.set_state(state["particles"])
+
+        for name, part in self._components().items():
+            if hasattr(part, "set_state"):
+                part.set_state(state.get(name, {}))
+
+        if "rng" in state:
+            if self.rng is None:
+                self.rng = np.random.default_rng()
+            self.rng.bit_generator.state = json.loads(str(state["rng"]))
+
+
+    # Führt `steps` Zeitschritte mit festem dt aus. Alle `every` Schritte
+    # werden die Messgrössen (`observables`) ausgewertet. Mit `path` werden die
+    # Werte laufend in eine CSV-Datei geschrieben, sonst als Arrays zurückgegeben.
+    #
+    # Mit `checkpoint` wird alle `checkpoint_every` Schritte ein Sicherungspunkt
+    # in diese Datei geschrieben. `info` wird darin mitgespeichert. `csv_offset`
+    # setzt eine CSV-Datei an der Stelle eines geladenen Sicherungspunkts fort.
+    def run(self, steps, dt, observables=None, every=1, path=None, checkpoint=None, checkpoint_every=1000,
+            info=None, csv_offset=None):
+        observables = observables or {}
+        recorder = CsvRecorder(path, csv_offset) if path is not None else ArrayRecorder()
+
+        try:
+            for _ in range(steps):
+                self.step(dt)
+
+                if self.step_count % every == 0:
+                    row = {"t": self.t}
+                    for name, observable in observables.items():
+                        row[name] = observable(self)
+                    recorder.record(row)
+
+                if checkpoint is not None and self.step_count % checkpoint_every == 0:
+                    save_checkpoint(checkpoint, self, csv_offset=recorder.position(), **(info or {}))
+        finally:
+            recorder.close()
+
+        return recorder.result()
+
+
+
+# _______________________
+#                        /
+# Aufzeichnung          (
+# _______________________\
+#
+# Eine Messgrösse kann eine Zahl (z.B. die Energie) oder ein Array (z.B. ein
+# Histogramm) liefern. Arrays werden in einzelne Spalten `name_0`, `name_1`, ...
+# aufgeteilt.
+
+def _flatten(row):
+    flat = {}
+    for name, value in row.items():
+        value = np.asarray(value, dtype=float)
+        if value.ndim == 0:
+            flat[name] = float(value)
+        else:
+            for k, v in enumerate(value.ravel()):
+                flat[f"{name}_{k}"] = float(v)
+    return flat
+
+
+# Sammelt die Messwerte im Speicher und gibt sie als Arrays zurück
+class ArrayRecorder:
+    def __init__(self):
+        self.rows = []
+
+    def record(self, row):
+        self.rows.append(row)
+
+    def position(self):
+        return None
+
+    def close(self):
+        pass
+
+    def result(self):
+        if not self.rows:
+            return {}
+        return {name: np.array([row[name] for row in self.rows]) for name in self.rows[0]}
+
+
+# Schreibt die Messwerte Zeile für Zeile in eine CSV-Datei. Der Speicherbedarf
+# bleibt dadurch konstant, auch bei sehr langen Simulationen.
+#
+# Mit `offset` wird eine bestehende Datei fortgesetzt: Alles nach dieser Stelle
+# (z.B. Zeilen, die nach dem letzten Sicherungspunkt geschrieben wurden) wird
+# abgeschnitten. `position` liefert die Stelle für den nächsten Sicherungspunkt.
+class CsvRecorder:
+    def __init__(self, path, offset=None):
+        self.path = path
+        if offset is None:
+            self.file = open(path, "w", newline="")
+        else:
+            self.file = open(path, "r+", newline="")
+            self.file.seek(offset)
+            self.file.truncate()
+        self.header = not offset
+        self.writer = None
+
+    def record(self, row):
+        row = _flatten(row)
+        if self.writer is None:
+            self.writer = csv.DictWriter(self.file, fieldnames=list(row))
+            if self.header:
+                self.writer.writeheader()
+        self.writer.writerow(row)
+
+    def position(self):
+        self.file.flush()
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+    def result(self):
+        return self.path
@@ -0,0 +1,403 @@
+#              _________________________________
+#       ______|                                 |_____
+#       \     |   PHYSIK - STARRE STANGEN       |    /
+#        )    |_________________________________|   (
+#       /________)                          (________\      CC BY-NC-SA 4.0 (https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+# In den Lektionen 13.8.1 und 13.8.2 ist der Faden des Pendels eine sehr steife
+# Feder. Je steifer die Feder, desto kleiner muss der Zeitschritt sein, und
+# trotzdem dehnt sich der Faden sichtbar. Bei einer Kette aus hunderten
+# Gliedern wird das hoffnungslos.
+#
+# Hier wird die Länge des Fadens deshalb nicht mit einer Kraft, sondern als
+# Bedingung ("Zwangsbedingung") erzwungen:
+#
+#        C = |x_j - x_i| - L = 0
+#
+# Das Verfahren heisst "Position Based Dynamics" (PBD):
+#
+#        1. Euler-Cromer-Schritt ohne Fäden:  v += a * dt,  x_neu = x + v * dt
+#        2. Die Positionen x_neu so verschieben, dass alle Fäden wieder die
+#           Länge L haben (siehe unten).
+#        3. Die Geschwindigkeit aus der tatsächlichen Bewegung berechnen:
+#           v = (x_neu - x) / dt
+#
+# Im zweiten Schritt werden die beiden Körper jedes Fadens entlang des Fadens
+# aufeinander zu oder voneinander weg geschoben. Der schwerere Körper bewegt
+# sich weniger. Mit den inversen Massen w = 1 / m (w = 0 für fixierte Körper)
+# und e = (x_j - x_i) / |x_j - x_i| gilt:
+#
+#        Δλ = -C / (w_i + w_j)
+#        x_i -= w_i * Δλ * e
+#        x_j += w_j * Δλ * e
+#
+# Korrigiert man einen Faden, verändert man die Länge seiner Nachbarn. Die
+# Korrektur wird deshalb `iterations`-mal wiederholt. Mehr Iterationen geben
+# genauere Längen, kosten aber mehr Zeit. Bei einer langen Kette ohne genügend
+# Iterationen dehnt sich die Kette unter ihrem Gewicht etwas.
+#
+# Mit `compliance` (Nachgiebigkeit α = 1 / k in m/N) wird ein Faden zu einer
+# Feder, deren Steifigkeit nicht von der Anzahl Iterationen abhängt ("XPBD"):
+#
+#        Δλ = (-C - α̃ * λ) / (w_i + w_j + α̃)      mit α̃ = α / dt²
+#
+# λ summiert die Korrekturen eines Zeitschritts. Für α = 0 erhält man wieder
+# einen starren Faden.
+#
+# Lange Ketten:
+# Jede Iteration gibt eine Korrektur nur an die Nachbarn weiter. Bei einer
+# Kette aus hunderten Gliedern erfährt das untere Ende in wenigen Iterationen
+# kaum etwas von der Aufhängung, und die Kette dehnt sich wie ein Gummiband.
+# Mit `long_range=True` erhält deshalb jeder Körper zusätzlich eine "Leine" zum
+# nächsten fixierten Körper ("Long Range Attachment"). Die Leine ist so lang
+# wie der Weg entlang der Fäden und greift nur, wenn der Körper weiter weg ist:
+#
+#        |x_k - x_anker| <= D_k
+#
+# Weil der Anker fixiert ist, wird nur der Körper k verschoben. Alle Leinen
+# lassen sich deshalb gleichzeitig korrigieren.
+#
+# Noch wirksamer sind kleinere Zeitschritte: Bei gleichem Rechenaufwand ist
+# eine Kette mit 20 Schritten zu je einer Iteration viel genauer als mit einem
+# Schritt und 20 Iterationen, weil sich die Körper in einem kleinen Schritt
+# kaum bewegen (siehe Messung unten). In einem Fenster wählt man dazu z.B.
+#
+#        FixedTimestep(1 / 600, max_substeps=20)      mit iterations=2
+#
+# Gauss-Seidel mit Arrays:
+# Ein Faden soll bereits die korrigierten Positionen seiner Nachbarn sehen.
+# Mit einer Python-Schleife über alle Fäden wäre das langsam. Die Fäden werden
+# deshalb in Gruppen ("Farben") aufgeteilt, in denen jeder Körper höchstens
+# einmal vorkommt. Alle Fäden einer Gruppe lassen sich ohne Konflikt gleichzeitig
+# mit Arrays korrigieren. Eine Kette braucht nur zwei Gruppen:
+#
+#        o===o---o===o---o===o        === Gruppe 0,  --- Gruppe 1
+#
+# Verwendung mit einer `Simulation`:
+#
+#        rods = DistanceConstraints(iterations=10)
+#        rods.add(anchor, ball)                    # BodyView-Objekte
+#        simulation.add_constraints(rods)
+
+
+import heapq
+import time
+
+import numpy as np
+
+
+# _____________________________
+#                              /
+# Klasse DistanceConstraints  (
+# _____________________________\
+#
+# - `iterations`: Anzahl Korrekturdurchgänge pro Zeitschritt
+# - `compliance`: Nachgiebigkeit in m/N für neue Fäden (0 = starr)
+# - `long_range`: Leinen zu den fixierten Körpern verwenden
+#
+# Die Fäden werden wie im `SpringNetwork` als Arrays gespeichert:
+#
+#        i, j          (M,)   Indizes der beiden Körper
+#        length        (M,)   Längen in m
+#        compliance    (M,)   Nachgiebigkeiten in m/N
+
+class DistanceConstraints:
+    def __init__(self, iterations=10, compliance=0.0, long_range=True):
+        self.iterations = iterations
+        self.default_compliance = compliance
+        self.long_range = long_range
+
+        self.i = np.zeros(0, dtype=np.intp)
+        self.j = np.zeros(0, dtype=np.intp)
+        self.length = np.zeros(0)
+        self.compliance = np.zeros(0)
+
+        # Gruppen von Fäden ohne gemeinsame Körper und Leinen (werden bei
+        # Bedarf berechnet)
+        self._batches = None
+        self._tethers = None
+
+        # Summierte Korrekturen λ jedes Fadens und dt des letzten Schritts
+        self.multipliers = np.zeros(0)
+        self.dt = None
+
+
+    def __len__(self):
+        return len(self.i)
+
+
+    # Fäden und Korrekturen des letzten Schritts als Arrays (siehe `physik.sicherung`)
+    def get_state(self):
+        state = {"i": self.i.copy(), "j": self.j.copy(), "length": self.length.copy(),
+                 "compliance": self.compliance.copy(), "multipliers": self.multipliers.copy()}
+        if self.dt is not None:
+            state["dt"] = np.float64(self.dt)
+        return state
+
+
+    def set_state(self, state):
+        self.i = np.array(state["i"], dtype=np.intp)
+        self.j = np.array(state["j"], dtype=np.intp)
+        self.length = np.array(state["length"], dtype=float)
+        self.compliance = np.array(state["compliance"], dtype=float)
+        self.multipliers = np.array(state["multipliers"], dtype=float)
+        self.dt = float(state["dt"]) if "dt" in state else None
+        self._batches = None
+        self._tethers = None
+
+
+    # Fügt viele Fäden auf einmal hinzu. Fehlt die Länge, wird der aktuelle
+    # Abstand der beiden Körper aus `positions` verwendet.
+    def add_constraints(self, i, j, length=None, positions=None, compliance=None):
+        i = np.atleast_1d(np.asarray(i, dtype=np.intp))
+        j = np.atleast_1d(np.asarray(j, dtype=np.intp))
+
+        if length is None:
+            if positions is None:
+                raise ValueError("Ohne Länge werden die Positionen der Körper benötigt")
+            positions = np.asarray(positions, dtype=float)
+            length = np.linalg.norm(positions[j] - positions[i], axis=1)
+
+        if compliance is None:
+            compliance = self.default_compliance
+
+        m = len(i)
+        self.i = np.concatenate([self.i, i])
+        self.j = np.concatenate([self.j, j])
+        self.length = np.concatenate([self.length, np.broadcast_to(np.asarray(length, dtype=float), m)])
+        self.compliance = np.concatenate([self.compliance, np.broadcast_to(np.asarray(compliance, dtype=float), m)])
+        self._batches = None
+        self._tethers = None
+
+
+    # Verbindet zwei Körper (`BodyView`-Objekte eines `ParticleSystem`) mit
+    # einem Faden. Ohne Länge wird der aktuelle Abstand verwendet.
+    def add(self, body_a, body_b, length=None, compliance=None):
+        if length is None:
+            length = np.linalg.norm(body_b.position - body_a.position)
+        self.add_constraints([body_a.index], [body_b.index], length=length, compliance=compliance)
+
+
+    # Fügt die Fäden einer Kantenliste (Form (M, 2)) hinzu, z.B. von `rope`
+    # aus `physik.federn`
+    def add_edges(self, edges, positions=None, length=None, compliance=None, offset=0):
+        edges = np.asarray(edges, dtype=np.intp) + offset
+        self.add_constraints(edges[:, 0], edges[:, 1], length=length, positions=positions,
+                             compliance=compliance)
+
+
+    # Teilt die Fäden in Gruppen auf, in denen kein Körper zweimal vorkommt.
+    # Jeder Faden erhält die kleinste Gruppe, die keiner seiner beiden Körper
+    # schon verwendet.
+    def _color(self):
+        used = {}
+        colors = np.zeros(len(self.i), dtype=np.intp)
+
+        for c, (a, b) in enumerate(zip(self.i.tolist(), self.j.tolist())):
+            taken = used.setdefault(a, set()) | used.setdefault(b, set())
+            color = 0
+            while color in taken:
+                color += 1
+            colors[c] = color
+            used[a].add(color)
+            used[b].add(color)
+
+        return [np.flatnonzero(colors == color) for color in range(colors.max(initial=-1) + 1)]
+
+
+    @property
+    def batches(self):
+        if self._batches is None:
+            self._batches = self._color()
+        return self._batches
+
+
+    # Leinen: Für jeden Körper, der über Fäden mit einem fixierten Körper
+    # verbunden ist, der Anker und die kürzeste Weglänge entlang der Fäden
+    # (Dijkstra-Algorithmus, ausgehend von allen fixierten Körpern)
+    def _attach(self, fixed):
+        neighbours = {}
+        for a, b, length in zip(self.i.tolist(), self.j.tolist(), self.length.tolist()):
+            neighbours.setdefault(a, []).append((b, length))
+            neighbours.setdefault(b, []).append((a, length))
+
+        distance = {}
+        anchor = {}
+        queue = [(0.0, k, k) for k in np.flatnonzero(fixed).tolist() if k in neighbours]
+        heapq.heapify(queue)
+        while queue:
+            d, k, a = heapq.heappop(queue)
+            if k in distance:
+                continue
+            distance[k] = d
+            anchor[k] = a
+            for other, length in neighbours[k]:
+                if other not in distance:
+                    heapq.heappush(queue, (d + length, other, a))
+
+        bodies = np.array([k for k in distance if distance[k] > 0], dtype=np.intp)
+        anchors = np.array([anchor[k] for k in bodies.tolist()], dtype=np.intp)
+        lengths = np.array([distance[k] for k in bodies.tolist()])
+        return bodies, anchors, lengths
+
+
+    # Leinen für die fixierten Körper `fixed` (werden nur bei Änderungen neu berechnet)
+    def tethers(self, fixed):
+        fixed = np.asarray(fixed, dtype=bool)
+        if self._tethers is None or not np.array_equal(self._tethers[0], fixed):
+            self._tethers = (fixed.copy(), self._attach(fixed))
+        return self._tethers[1]
+
+
+    # Verschiebt die Positionen (Array der Form (N, 2), wird verändert), bis alle
+    # Fäden ungefähr ihre Länge haben. `inverse_masses` ist 1 / m, für fixierte
+    # Körper 0.
+    def project(self, positions, inverse_masses, dt):
+        tethers = self.tethers(inverse_masses == 0) if self.long_range else None
+        batches = [(self.i[b], self.j[b], self.length[b],
+                    self.compliance[b] / dt**2,
+                    inverse_masses[self.i[b]], inverse_masses[self.j[b]]) for b in self.batches]
+        multipliers = [np.zeros(len(b)) for b in self.batches]
+
+        for _ in range(self.iterations):
+            for (i, j, length, alpha, w_i, w_j), lam in zip(batches, multipliers):
+                r_vec = np.take(positions, j, axis=0) - np.take(positions, i, axis=0)
+                distance = np.sqrt(np.einsum("ij,ij->i", r_vec, r_vec))
+
+                # Fäden ohne Richtung oder zwischen zwei fixierten Körpern überspringen
+                weight = w_i + w_j + alpha
+                valid = (distance > 0) & (weight > 0)
+                delta = np.where(valid, (length - distance - alpha * lam) / np.where(valid, weight, 1.0), 0.0)
+                lam += delta
+
+                step = (delta / np.where(valid, distance, 1.0))[:, None] * r_vec
+                positions[i] -= w_i[:, None] * step
+                positions[j] += w_j[:, None] * step
+
+            if tethers is not None and len(tethers[0]):
+                self._pull_tethers(positions, *tethers)
+
+        self.multipliers = np.zeros(len(self.i))
+        for b, lam in zip(self.batches, multipliers):
+            self.multipliers[b] = lam
+        self.dt = dt
+
+
+    # Zieht alle Körper, die weiter als ihre Leine vom Anker entfernt sind,
+    # auf die Länge der Leine zurück
+    @staticmethod
+    def _pull_tethers(positions, bodies, anchors, lengths):
+        anchor_positions = np.take(positions, anchors, axis=0)
+        r_vec = np.take(positions, bodies, axis=0) - anchor_positions
+        distance = np.sqrt(np.einsum("ij,ij->i", r_vec, r_vec))
+
+        over = distance > lengths
+        if np.any(over):
+            scale = lengths[over] / distance[over]
+            positions[bodies[over]] = anchor_positions[over] + scale[:, None] * r_vec[over]
+
+
+    # Korrigiert die Positionen eines `ParticleSystem` nach einem Zeitschritt
+    # und berechnet die Geschwindigkeiten aus der Bewegung seit `previous`
+    def solve(self, particles, previous, dt):
+        inverse_masses = np.where(particles.fixed, 0.0, 1.0 / particles.masses)
+        self.project(particles.positions, inverse_masses, dt)
+        particles.velocities[:] = (particles.positions - previous) / dt
+        particles.velocities[particles.fixed] = 0.0
+
+
+    # Kräfte der Fäden im letzten Schritt (Form (N, 2)). Die Korrektur λ * e
+    # entspricht der Kraft F = λ * e / dt², die den Körper in der Zeit dt um
+    # dieselbe Strecke verschoben hätte.
+    def forces(self, positions, n=None):
+        n = len(positions) if n is None else n
+        forces = np.zeros((n, 2))
+        if self.dt is None or len(self.multipliers) != len(self.i):
+            return forces
+
+        r_vec = np.take(positions, self.j, axis=0) - np.take(positions, self.i, axis=0)
+        distance = np.sqrt(np.einsum("ij,ij->i", r_vec, r_vec))
+        f = (self.multipliers / self.dt**2 / np.where(distance > 0, distance, 1.0))[:, None] * r_vec
+
+        for axis in (0, 1):
+            forces[:, axis] = (np.bincount(self.j, weights=f[:, axis], minlength=n)
+                               - np.bincount(self.i, weights=f[:, axis], minlength=n))
+        return forces
+
+
+    # Grösste relative Abweichung |C| / L aller Fäden
+    def max_stretch(self, positions):
+        r_vec = np.take(positions, self.j, axis=0) - np.take(positions, self.i, axis=0)
+        distance = np.sqrt(np.einsum("ij,ij->i", r_vec, r_vec))
+        return float(np.max(np.abs(distance - self.length) / self.length, initial=0.0))
+
+
+    # Anfangs- und Endpunkte aller Fäden abwechselnd (Form (2M, 2)) zum Zeichnen
+    def segments(self, positions):
+        points = np.empty((2 * len(self.i), 2))
+        points[0::2] = np.take(positions, self.i, axis=0)
+        points[1::2] = np.take(positions, self.j, axis=0)
+        return points
+
+
+
+# _______________________
+#                        /
+# Messung               (
+# _______________________\
+#
+# Eine 4 m lange Kette aus n Gliedern hängt schräg am ersten Körper und schwingt
+# unter der Schwerkraft. Jedes Bild (1/60 s) wird in 1, 5 oder 20 Schritte
+# aufgeteilt, die Anzahl Iterationen so gewählt, dass der Aufwand etwa gleich
+# bleibt. Gemessen werden die Rechenzeit pro Bild, die grösste Dehnung eines
+# einzelnen Glieds und die grösste Dehnung der ganzen Kette, jeweils mit und
+# ohne Leinen. Aufruf im Ordner von Kapitel 13:
+#
+#        python -m physik.stangen
+
+def _chain(n, length=4.0, iterations=10, long_range=True):
+    from .federn import rope
+    from .partikel import ParticleSystem
+    from .simulation import Simulation
+
+    # Die Kette beginnt 60° neben der Senkrechten
+    end = length * np.array([np.sin(np.pi / 3), -np.cos(np.pi / 3)])
+    positions, edges = rope(n + 1, start=(0.0, 0.0), end=end)
+
+    particles = ParticleSystem(capacity=n + 1)
+    particles.add_bodies(positions, np.zeros_like(positions), mass=1.0 / n, radius=0.01)
+    particles.fixed[0] = True
+
+    simulation = Simulation(particles, gravity=9.81)
+    rods = simulation.add_constraints(DistanceConstraints(iterations, long_range=long_range))
+    rods.add_edges(edges, positions)
+    return simulation, rods
+
+
+def benchmark(sizes=(10, 100, 300), budgets=((1, 20), (5, 4), (20, 1)), steps=300, dt=1 / 60):
+    print(f"{'Glieder':>8} {'Schritte':>9} {'Iterationen':>12} {'Leinen':>7} {'ms/Bild':>8} "
+          f"{'Glied max.':>11} {'Kette max.':>11}")
+    for n in sizes:
+        for substeps, count in budgets:
+            for long_range in (False, True):
+                simulation, rods = _chain(n, iterations=count, long_range=long_range)
+                positions = simulation.particles.positions
+                total = rods.length.sum()
+
+                stretch = chain = elapsed = 0.0
+                for _ in range(steps):
+                    start = time.perf_counter()
+                    for _ in range(substeps):
+                        simulation.step(dt / substeps)
+                    elapsed += time.perf_counter() - start
+
+                    stretch = max(stretch, rods.max_stretch(positions))
+                    segments = rods.segments(positions)
+                    chain = max(chain, np.linalg.norm(segments[1::2] - segments[0::2], axis=1).sum() / total - 1)
+
+                print(f"{n:>8} {substeps:>9} {count:>12} {'ja' if long_range else 'nein':>7} "
+                      f"{1000 * elapsed / steps:>8.2f} {100 * stretch:>10.2f}% {100 * chain:>10.2f}%")
+
+
+if __name__ == "__main__":
+    benchmark()
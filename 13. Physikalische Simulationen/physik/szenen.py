@@ -0,0 +1,162 @@
+#              _________________________________
+#       ______|                                 |_____
+#       \     |   PHYSIK - SZENEN               |    /
+#        )    |_________________________________|   (
+#       /________)                          (________\      CC BY-NC-SA 4.0 (https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+# Fertige Szenen nach dem Vorbild der Lektionen des Kapitels 13. Jede Funktion
+# erzeugt eine `Simulation`, die ohne Fenster mit `physik.batch` berechnet oder
+# in einem Fenster angezeigt werden kann.
+#
+# Nur das Fenster der Lektion 13.6.2 wird direkt aus seiner Szene (`ideal_gas`)
+# erzeugt. Die Lektionen 13.5, 13.6, 13.7 und 13.9 bauen ihre Körper selbst auf.
+# Die Szenen `collisions`, `ideal_gas`, `coulomb` und `gravitation` sind deshalb
+# Kopien dieser Anfangsbedingungen: Wird eine dieser Lektionen geändert, muss
+# die Szene von Hand nachgeführt werden.
+#
+# Zufällige Anfangsbedingungen werden mit einem eigenen Zufallsgenerator
+# `np.random.default_rng(seed)` erzeugt. Mit demselben `seed` erhält man immer
+# genau dieselbe Simulation. Der Generator wird als `simulation.rng` behalten,
+# damit er in Sicherungspunkten mitgespeichert wird (siehe `physik.sicherung`).
+#
+# Die Farben sind RGB-Tupel, damit die Szenen auch ohne arcade funktionieren.
+
+
+import numpy as np
+
+from .federn import SpringNetwork, grid, triangle_lattice
+from .kraefte import Coulomb, PairGravity
+from .partikel import ParticleSystem
+from .simulation import Simulation
+
+
+RED = (255, 0, 0)
+BLUE = (0, 0, 255)
+
+
+# Wie Lektion 13.5: Zwei Bälle stossen in einer Box ohne Decke zusammen
+def collisions(seed=None):
+    particles = ParticleSystem()
+    particles.add_body([-2, 1.1], [2, 0], mass=1.0, radius=0.5, color=RED)
+    particles.add_body([2, 1], [-2, 0], mass=1.0, radius=0.5, color=BLUE)
+
+    box = (-4.5, 4.5, -4.5, np.inf)
+    return Simulation(particles, box=box, gravity=9.81, collisions=True)
+
+
+# Lektionen 13.6 und 13.6.2: Ideales Gas mit n_side x n_side Teilchen in einer Box
+def ideal_gas(n_side=8, seed=None, speed=0.4, radius=0.2, size=8.0, skin=None):
+    rng = np.random.default_rng(seed)
+
+    # Teilchen in einem regelmässigen Raster, damit sie sich nicht überlappen
+    spacing = size / n_side
+    grid = np.arange(n_side) * spacing - size / 2 + spacing / 2
+    x, y = np.meshgrid(grid, grid, indexing="ij")
+    positions = np.column_stack([x.ravel(), y.ravel()])
+
+    # Zufällige Geschwindigkeiten zwischen -speed und speed
+    velocities = rng.uniform(-speed, speed, size=positions.shape)
+
+    particles = ParticleSystem(capacity=len(positions))
+    particles.add_bodies(positions, velocities, radius=min(radius, 0.45 * spacing), color=RED)
+
+    box = (-size / 2, size / 2, -size / 2, size / 2)
+    simulation = Simulation(particles, box=box, collisions=True, skin=skin)
+    simulation.rng = rng
+    return simulation
+
+
+# Wie Lektion 13.7: Zwei geladene Kugeln in einer Box
+def coulomb(seed=None):
+    particles = ParticleSystem()
+    particles.add_body([-2, 1.1], [0, 2], mass=1.0, charge=1e-4, radius=0.5, color=RED)
+    particles.add_body([2.1, 1], [0, -1], mass=1.0, charge=-1e-4, radius=0.5, color=BLUE)
+
+    simulation = Simulation(particles, box=(-4, 4, -4, 4), collisions=True)
+    simulation.add_force_term(Coulomb())
+    return simulation
+
+
+# Wie Lektion 13.7, aber mit vielen Ladungen: ein Ionenkristall aus
+# n_side x n_side Körpern mit abwechselnd positiver und negativer Ladung
+# (Schachbrettmuster), leicht aus dem Gitter verschoben. Mit `mesh` wird die
+# Box periodisch und die Kraft mit `EwaldCoulomb` berechnet, sonst mit
+# `CutoffCoulomb` bis `cutoff`.
+def ionic_crystal(n_side=32, seed=None, spacing=1.0, charge=1e-5, jitter=0.1, cutoff=4.0, mesh=None):
+    from .elektrostatik import CutoffCoulomb, EwaldCoulomb
+
+    rng = np.random.default_rng(seed)
+
+    size = n_side * spacing
+    grid = np.arange(n_side) * spacing - size / 2 + spacing / 2
+    x, y = np.meshgrid(grid, grid, indexing="ij")
+    positions = np.column_stack([x.ravel(), y.ravel()]) + rng.uniform(-jitter, jitter, size=(n_side ** 2, 2))
+
+    column, row = np.meshgrid(np.arange(n_side), np.arange(n_side), indexing="ij")
+    positive = ((column + row) % 2 == 0).ravel()
+
+    particles = ParticleSystem(capacity=len(positions))
+    velocities = np.zeros_like(positions)
+    particles.add_bodies(positions[positive], velocities[positive], radius=0.3 * spacing, charge=charge, color=RED)
+    particles.add_bodies(positions[~positive], velocities[~positive], radius=0.3 * spacing, charge=-charge, color=BLUE)
+
+    box = (-size / 2, size / 2, -size / 2, size / 2)
+    simulation = Simulation(particles, box=box, collisions=True)
+    simulation.rng = rng
+    if mesh is None:
+        simulation.add_force_term(CutoffCoulomb(cutoff))
+    else:
+        simulation.add_force_term(EwaldCoulomb(box, cutoff=cutoff, mesh=mesh))
+    return simulation
+
+
+# Wie Lektion 13.9: Die Erde umkreist die Sonne
+def gravitation(seed=None):
+    particles = ParticleSystem()
+    particles.add_body([0, 0], [0, 0], mass=1.989e30, radius=1e9, color=RED)
+    particles.add_body([1.5e11, 0], [0, 2.98e4], mass=5.972e24, radius=1e8, color=BLUE)
+
+    simulation = Simulation(particles)
+    simulation.add_force_term(PairGravity())
+    return simulation
+
+
+# Nach Lektion 13.8.3: Ein weicher Körper aus n_side x n_side Massen, die mit Federn
+# verbunden sind, fällt in eine Box. `lattice` ist "grid" (Quadrate mit
+# Diagonalen) oder "triangle" (Dreiecksgitter). Die Gesamtmasse `mass` wird auf
+# alle Körper verteilt. In zwei Dimensionen hängt die Steifigkeit eines
+# Federgitters nicht vom Abstand der Massen ab: Bei gleichem k verformt sich der
+# Körper als Ganzes gleich stark, egal aus wie vielen Massen er besteht.
+#
+# Die einzelnen Massen werden mit n_side aber leichter, und die höchste
+# Frequenz ω_max ~ sqrt(k / m) ~ n_side * sqrt(k / mass) wächst. Der stabile
+# Zeitschritt wird deshalb kleiner. Die Szene setzt `max_dt` auf
+# `SpringNetwork.stable_dt`, damit die Simulation mit jedem dt stabil bleibt.
+def soft_body(n_side=10, seed=None, lattice="grid", size=3.0, mass=1.0, k=200.0, damping=0.05,
+              velocity=(2.0, 0.0)):
+    generators = {"grid": grid, "triangle": triangle_lattice}
+    spacing = size / (n_side - 1)
+    positions, edges = generators[lattice](n_side, n_side, spacing=spacing, origin=(-size / 2, -size / 2))
+
+    particles = ParticleSystem(capacity=len(positions))
+    velocities = np.broadcast_to(np.asarray(velocity, dtype=float), positions.shape)
+    particles.add_bodies(positions, velocities, mass=mass / len(positions), radius=spacing / 2, color=RED)
+
+    springs = SpringNetwork()
+    springs.add_edges(edges, particles.positions, k=k, damping=damping)
+
+    box = (-4.5, 4.5, -4.5, 4.5)
+    simulation = Simulation(particles, box=box, gravity=9.81, max_dt=springs.stable_dt(particles.masses))
+    simulation.add_force_term(springs)
+    return simulation
+
+
+# Alle Szenen, die über ihren Namen ausgewählt werden können
+SCENES = {
+    "collisions": collisions,
+    "gas": ideal_gas,
+    "coulomb": coulomb,
+    "crystal": ionic_crystal,
+    "gravitation": gravitation,
+    "softbody": soft_body,
+}
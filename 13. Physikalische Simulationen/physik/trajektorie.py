@@ -0,0 +1,132 @@
+#              _________________________________
+#       ______|                                 |_____
+#       \     |   PHYSIK - TRAJEKTORIEN         |    /
+#        )    |_________________________________|   (
+#       /________)                          (________\      CC BY-NC-SA 4.0 (https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+# Um die Bahnen zu zeichnen, speichert `World.simulate` die Positionen aller
+# Körper nach jedem Zeitschritt. Mit einer Python-Liste, an die in jedem Schritt
+# für jeden Körper ein kleines Array angehängt wird, braucht jede gespeicherte
+# Position ein eigenes Objekt. Bei zehn Jahren mit dt = 100 s sind das Millionen
+# von Objekten, und am Ende muss alles mit `np.array` umkopiert werden.
+#
+# Die Klasse `Trajectory` schreibt die Positionen direkt in ein einziges Array
+# der Form (Zeilen, N, 2):
+#
+#        data[k, i] = Position von Körper i in der k-ten gespeicherten Zeile
+#
+# - `capacity`: Ist die Anzahl Zeilen bekannt, wird das Array einmal reserviert.
+#               Sonst beginnt es mit 1024 Zeilen und verdoppelt sich bei Bedarf.
+#
+# - `stride`:   Nur jeder `stride`-te Schritt wird gespeichert. Für einen Plot
+#               genügen meist einige tausend Punkte pro Bahn.
+#
+# - `dtype`:    Mit `np.float32` braucht jede Zahl 4 statt 8 Bytes. Die Genauigkeit
+#               von etwa 7 Stellen reicht zum Zeichnen (bei 1.5e11 m etwa 10 km).
+#
+# - `path`:     Das Array wird als `.npy`-Datei auf der Festplatte angelegt
+#               (Memory Map). Das Betriebssystem lädt nur die gerade benötigten
+#               Teile in den Arbeitsspeicher, so dass auch Läufe mit vielen GB
+#               möglich sind. Die Datei kann später mit
+#
+#                   np.load(path, mmap_mode="r")
+#
+#               wieder geöffnet werden.
+
+
+import numpy as np
+
+
+# Anzahl Zeilen, mit der ein wachsendes Array beginnt
+INITIAL_CAPACITY = 1024
+
+
+class Trajectory:
+    def __init__(self, n_bodies, capacity=None, stride=1, dtype=np.float64, path=None):
+        self.n_bodies = n_bodies
+        self.stride = stride
+        self.dtype = np.dtype(dtype)
+        self.path = path
+
+        # Anzahl gespeicherter Zeilen und Anzahl angebotener Schritte
+        self.length = 0
+        self.steps = 0
+
+        if path is not None:
+            if capacity is None:
+                raise ValueError("Für eine Datei muss die Anzahl Zeilen (capacity) bekannt sein")
+            self.data = np.lib.format.open_memmap(path, mode="w+", dtype=self.dtype,
+                                                  shape=(capacity, n_bodies, 2))
+        else:
+            self.data = np.empty((capacity or INITIAL_CAPACITY, n_bodies, 2), dtype=self.dtype)
+
+
+    # Erzeugt eine Trajektorie für einen Lauf mit `steps` Zeitschritten
+    @classmethod
+    def for_steps(cls, n_bodies, steps, stride=1, dtype=np.float64, path=None):
+        return cls(n_bodies, capacity=max(steps // stride, 1), stride=stride, dtype=dtype, path=path)
+
+
+    def __len__(self):
+        return self.length
+
+
+    # Bietet die Positionen eines Zeitschritts an. Gespeichert wird nur jeder
+    # `stride`-te Schritt.
+    def append(self, positions):
+        self.steps += 1
+        if self.steps % self.stride:
+            return
+
+        if self.length == len(self.data):
+            self._grow(self.length + 1)
+
+        self.data[self.length] = positions
+        self.length += 1
+
+
+    # Speichert mehrere bereits ausgewählte Zeilen auf einmal (Form (k, N, 2))
+    def extend(self, block):
+        k = len(block)
+        if self.length + k > len(self.data):
+            self._grow(self.length + k)
+
+        self.data[self.length:self.length + k] = block
+        self.length += k
+        self.steps += k * self.stride
+
+
+    # Vergrössert das Array durch Verdoppeln
+    def _grow(self, needed):
+        if self.path is not None:
+            raise ValueError(f"Die Datei {self.path} ist voll ({len(self.data)} Zeilen)")
+
+        capacity = len(self.data)
+        while capacity < needed:
+            capacity *= 2
+
+        data = np.empty((capacity, self.n_bodies, 2), dtype=self.dtype)
+        data[:self.length] = self.data[:self.length]
+        self.data = data
+
+
+    # Alle gespeicherten Zeilen als Array der Form (Zeilen, N, 2)
+    @property
+    def positions(self):
+        return self.data[:self.length]
+
+
+    # Bahn eines Körpers als Array der Form (Zeilen, 2)
+    def body(self, i):
+        return self.data[:self.length, i]
+
+
+    # Bahnen aller Körper als Liste (wie früher von `World.simulate` geliefert)
+    def bodies(self):
+        return [self.body(i) for i in range(self.n_bodies)]
+
+
+    # Schreibt eine Memory Map vollständig auf die Festplatte
+    def flush(self):
+        if self.path is not None:
+            self.data.flush()
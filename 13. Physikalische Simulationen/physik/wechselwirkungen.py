@@ -0,0 +1,434 @@
+#              _________________________________
+#       ______|                                 |_____
+#       \     |   PHYSIK - WECHSELWIRKUNGEN     |    /
+#        )    |_________________________________|   (
+#       /________)                          (________\      CC BY-NC-SA 4.0 (https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+# In den Lektionen 13.5 bis 13.9 ist jede Wechselwirkung ein eigenes Objekt,
+# z.B. `Collision(ball1, ball2)` oder `Spring(body1, body2, k=10)`. In
+# `on_update` ruft eine Schleife für jedes Paar `interaction.update()` auf, und
+# jedes Objekt rechnet mit ein paar kleinen numpy-Arrays. Bei 100 Körpern mit
+# Coulomb-Kraft sind das fast 5000 Python-Aufrufe pro Zeitschritt, und die
+# meiste Zeit geht für den Aufruf verloren, nicht für die Rechnung.
+#
+# Die Klasse `InteractionList` ist eine normale Liste, in die die Objekte wie
+# bisher mit `append` oder `extend` eingefügt werden. Bei `update` werden die
+# Wechselwirkungen aber nach ihrer Art gruppiert ("Batches"):
+#
+#        1. Alle Körper erhalten eine Nummer. Für jede Art von Wechselwirkung
+#           werden die Nummern der beiden Körper in zwei Index-Arrays a und b
+#           gespeichert, die Parameter (z.B. k) in weiteren Arrays.
+#        2. Die Positionen, Geschwindigkeiten, Massen usw. aller Körper werden
+#           einmal in Arrays kopiert.
+#        3. Jede Art rechnet alle ihre Paare mit einer einzigen Arrayrechnung.
+#        4. Die Kräfte und neuen Geschwindigkeiten werden zu den Körpern
+#           zurückgeschrieben.
+#
+# Welche Rechnung zu einer Klasse gehört, gibt das Klassenattribut `batch` an:
+#
+#        class Collision(Interaction):
+#            batch = CollisionBatch
+#
+#        # in __init__
+#        self.interactions = InteractionList()
+#        self.interactions.extend([Collision(ball1, ball2)])
+#
+#        # in on_update statt der Schleife
+#        self.interactions.update()
+#
+# Der Batch ersetzt `update` und alle Hilfsmethoden der Klasse, die `batch`
+# festlegt. Objekte ohne `batch`, oder deren Klasse darunter eine Methode neu
+# schreibt (z.B. `resolve_collision` oder `calculate_spring_force`), werden
+# deshalb weiterhin einzeln mit `update()` aufgerufen. Werden Parameter (z.B.
+# `k`) nachträglich verändert, übernimmt `refresh()` die neuen Werte.
+#
+# Die Lektionen 13.5 bis 13.9 rufen ihre Wechselwirkungen einzeln auf, damit
+# ihre eigenen Methoden gelten. Wer viele Körper rechnen will, verwendet
+# `InteractionList` und legt `batch` ausdrücklich fest, wie in der Messung
+# am Ende dieser Datei.
+#
+# Alle Stösse eines Schritts werden gleichzeitig berechnet, wie bei
+# `resolve_collisions` aus `physik.gitter`, und nicht nacheinander wie in der
+# Schleife. Nur wenn ein Körper im selben Schritt an mehreren Stössen beteiligt
+# ist, gibt das ein etwas anderes Ergebnis.
+
+
+import time
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+
+# Summiert die Werte `values` (Form (M, 2)) für jeden Index in `index` auf.
+# `np.bincount` macht das für alle Paare in einem Durchgang.
+def _accumulate(index, values, n):
+    return np.column_stack([np.bincount(index, weights=values[:, 0], minlength=n),
+                            np.bincount(index, weights=values[:, 1], minlength=n)])
+
+
+# Zustand aller Körper als Arrays. `forces` und `velocity_changes` sammeln die
+# Ergebnisse der Batches.
+class BodyState:
+    def __init__(self, bodies):
+        self.positions = np.array([body.position for body in bodies], dtype=float).reshape(-1, 2)
+        self.velocities = np.array([body.velocity for body in bodies], dtype=float).reshape(-1, 2)
+        self.masses = np.array([body.mass for body in bodies], dtype=float)
+        self.radii = np.array([body.radius for body in bodies], dtype=float)
+        self.charges = np.array([getattr(body, "charge", 0.0) for body in bodies], dtype=float)
+
+        self.forces = np.zeros_like(self.positions)
+        self.velocity_changes = np.zeros_like(self.positions)
+        self.changed = np.zeros(len(bodies), dtype=bool)
+
+
+    # Kraft F auf a und -F auf b (actio = reactio)
+    def add_pair_forces(self, a, b, forces):
+        n = len(self.masses)
+        self.forces += _accumulate(a, forces, n) - _accumulate(b, forces, n)
+
+
+
+# _______________________
+#                        /
+# Klasse Batch          (
+# _______________________\
+#
+# Grundklasse für die Batches. Jeder Batch speichert die Nummern der beiden
+# Körper aller seiner Wechselwirkungen in `a` und `b`. Unterklassen lesen in
+# `__init__` ihre Parameter aus den Objekten und müssen `apply` überschreiben.
+
+class Batch(ABC):
+    def __init__(self, interactions, index):
+        self.interactions = interactions
+        self.a = np.array([index[id(x.bodyA)] for x in interactions], dtype=np.int64)
+        self.b = np.array([index[id(x.bodyB)] for x in interactions], dtype=np.int64)
+
+    def __len__(self):
+        return len(self.interactions)
+
+    @abstractmethod
+    def apply(self, state):
+        pass
+
+
+    # Ein Parameter aller Wechselwirkungen als Array
+    def parameter(self, name, default=None):
+        return np.array([getattr(x, name, default) for x in self.interactions], dtype=float)
+
+
+
+# Federn nach dem Hookeschen Gesetz mit Dämpfung (wie `Spring` in Lektion 13.8)
+class SpringBatch(Batch):
+    def __init__(self, interactions, index):
+        super().__init__(interactions, index)
+        self.k = self.parameter("k")
+        self.length = self.parameter("length")
+        self.damping = self.parameter("damping", 0.0)
+
+    def apply(self, state):
+        a, b = self.a, self.b
+        r_vec = state.positions[b] - state.positions[a]
+        distance = np.sqrt(np.einsum("ij,ij->i", r_vec, r_vec))
+        direction = r_vec / distance[:, None]
+
+        # F = -k * Auslenkung - Dämpfung * Relativgeschwindigkeit entlang der Feder
+        v_rel = state.velocities[b] - state.velocities[a]
+        magnitude = -self.k * (distance - self.length) - self.damping * np.einsum("ij,ij->i", v_rel, direction)
+
+        # Die Feder zieht b mit F und a mit -F
+        state.add_pair_forces(a, b, -magnitude[:, None] * direction)
+
+
+
+# Elastische Stösse mit Restitution (wie `Collision` in Lektion 13.5)
+class CollisionBatch(Batch):
+    def __init__(self, interactions, index):
+        super().__init__(interactions, index)
+        self.restitution = self.parameter("restitution", 1.0)
+
+        # Anzahl Stösse im letzten Aufruf
+        self.resolved = 0
+
+    def apply(self, state):
+        r_vec = state.positions[self.b] - state.positions[self.a]
+        distance = np.sqrt(np.einsum("ij,ij->i", r_vec, r_vec))
+
+        # Nur Paare, die sich berühren und aufeinander zu bewegen
+        touching = (distance <= state.radii[self.a] + state.radii[self.b]) & (distance > 0)
+        a, b = self.a[touching], self.b[touching]
+        normal = r_vec[touching] / distance[touching, None]
+        velocity_along_normal = np.einsum("ij,ij->i", state.velocities[a] - state.velocities[b], normal)
+
+        approaching = velocity_along_normal > 0
+        self.resolved = int(approaching.sum())
+        if not self.resolved:
+            return
+        a, b, normal = a[approaching], b[approaching], normal[approaching]
+        restitution = self.restitution[touching][approaching]
+
+        impulse = (1 + restitution) * velocity_along_normal[approaching] / (1 / state.masses[a] + 1 / state.masses[b])
+        impulse_vector = impulse[:, None] * normal
+
+        n = len(state.masses)
+        change = (_accumulate(b, impulse_vector, n) - _accumulate(a, impulse_vector, n)) / state.masses[:, None]
+        state.velocities += change
+        state.velocity_changes += change
+        state.changed[a] = True
+        state.changed[b] = True
+
+
+
+# Anziehung oder Abstossung mit 1/r^2, die bei überlappenden Körpern wegfällt
+# (wie `Gravity` und `Coulomb` in den Lektionen 13.9 und 13.7). Die Kraft auf
+# a ist strength * r_ab / |r_ab|^3 mit r_ab = x_b - x_a. Unterklassen müssen
+# `strength` überschreiben.
+class InverseSquareBatch(Batch):
+    @abstractmethod
+    def strength(self, state):
+        pass
+
+    def apply(self, state):
+        a, b = self.a, self.b
+        r_vec = state.positions[b] - state.positions[a]
+        distance_sq = np.einsum("ij,ij->i", r_vec, r_vec)
+
+        overlapping = distance_sq < (state.radii[a] + state.radii[b]) ** 2
+        weights = np.zeros_like(distance_sq)
+        np.divide(self.strength(state), distance_sq ** 1.5, out=weights, where=~overlapping)
+        state.add_pair_forces(a, b, weights[:, None] * r_vec)
+
+
+# Gravitation: strength = G m_a m_b. G ist das Klassenattribut der Wechselwirkung.
+class GravityBatch(InverseSquareBatch):
+    def __init__(self, interactions, index):
+        super().__init__(interactions, index)
+        self.G = self.parameter("G")
+
+    def strength(self, state):
+        return self.G * state.masses[self.a] * state.masses[self.b]
+
+
+# Coulomb-Kraft: strength = -K q_a q_b (gleichnamige Ladungen stossen sich ab)
+class CoulombBatch(InverseSquareBatch):
+    def __init__(self, interactions, index):
+        super().__init__(interactions, index)
+        self.K = self.parameter("K")
+
+    def strength(self, state):
+        return -self.K * state.charges[self.a] * state.charges[self.b]
+
+
+
+# Batch einer Klasse oder None, wenn ihre Objekte einzeln gerechnet werden
+# müssen. Das ist der Fall, wenn keine Klasse `batch` festlegt oder wenn eine
+# Unterklasse davon eine Methode ausser `__init__` neu schreibt.
+def _batch_class(cls):
+    for base in cls.__mro__:
+        if "batch" in base.__dict__:
+            return base.__dict__["batch"]
+        if any(callable(value) and name != "__init__" for name, value in base.__dict__.items()):
+            return None
+    return None
+
+
+
+# _______________________
+#                        /
+# Klasse InteractionList(
+# _______________________\
+#
+# Eine Liste von Wechselwirkungen, die mit `update` alle Batches rechnet.
+# Die Gruppierung wird neu erstellt, sobald sich die Liste ändert.
+#
+# `timings` enthält nach jedem `update` die Zeit in s für das Einsammeln der
+# Körper, für jede Art und für das Zurückschreiben. `collision_count` ist die
+# Anzahl Stösse im letzten `update`.
+
+class InteractionList(list):
+    def __init__(self, iterable=()):
+        super().__init__(iterable)
+        self.batches = []
+        self.singles = []
+        self.bodies = []
+        self.timings = {}
+        self.collision_count = 0
+        self._dirty = True
+
+
+    # Alle Methoden, die die Liste verändern, markieren die Gruppierung als veraltet
+    def _changed(method):
+        def wrapper(self, *args, **kwargs):
+            self._dirty = True
+            return method(self, *args, **kwargs)
+        wrapper.__name__ = method.__name__
+        return wrapper
+
+    append = _changed(list.append)
+    extend = _changed(list.extend)
+    insert = _changed(list.insert)
+    remove = _changed(list.remove)
+    pop = _changed(list.pop)
+    clear = _changed(list.clear)
+    sort = _changed(list.sort)
+    reverse = _changed(list.reverse)
+    __setitem__ = _changed(list.__setitem__)
+    __delitem__ = _changed(list.__delitem__)
+    __iadd__ = _changed(list.__iadd__)
+    __imul__ = _changed(list.__imul__)
+    del _changed
+
+
+    # Liest die Körper und Parameter neu ein, z.B. nachdem `k` verändert wurde
+    def refresh(self):
+        index = {}
+        self.bodies = []
+        groups = {}
+        self.singles = []
+
+        for interaction in self:
+            batch = _batch_class(type(interaction))
+            if batch is None:
+                self.singles.append(interaction)
+                continue
+
+            for body in (interaction.bodyA, interaction.bodyB):
+                if id(body) not in index:
+                    index[id(body)] = len(self.bodies)
+                    self.bodies.append(body)
+            groups.setdefault(batch, []).append(interaction)
+
+        # Die Batches laufen in der Reihenfolge, in der ihre Art zuerst vorkommt
+        self.batches = [batch(interactions, index) for batch, interactions in groups.items()]
+        self._dirty = False
+
+
+    # Rechnet alle Wechselwirkungen und addiert die Kräfte zu `body.force`
+    def update(self):
+        if self._dirty:
+            self.refresh()
+
+        for interaction in self.singles:
+            interaction.update()
+        if not self.batches:
+            return
+
+        start = time.perf_counter()
+        state = BodyState(self.bodies)
+        self.timings["Körper"] = time.perf_counter() - start
+
+        for batch in self.batches:
+            start = time.perf_counter()
+            batch.apply(state)
+            self.timings[type(batch).__name__] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for body, force in zip(self.bodies, state.forces):
+            body.force = body.force + force
+        for k in np.flatnonzero(state.changed):
+            self.bodies[k].velocity += state.velocity_changes[k]
+        self.collision_count = sum(getattr(batch, "resolved", 0) for batch in self.batches)
+        self.timings["Zurückschreiben"] = time.perf_counter() - start
+
+
+
+# _______________________
+#                        /
+# Vergleich             (
+# _______________________\
+#
+# N geladene Körper mit einer `Collision` und einer `Coulomb`-Wechselwirkung
+# für jedes Paar, wie in Lektion 13.7. Verglichen wird die Schleife über alle
+# Objekte mit `InteractionList.update`.
+#
+#        python -m physik.wechselwirkungen
+
+class _Body:
+    def __init__(self, position, velocity, mass=1.0, charge=0.0, radius=0.1):
+        self.position = np.array(position, dtype=float)
+        self.velocity = np.array(velocity, dtype=float)
+        self.force = np.zeros(2)
+        self.mass = mass
+        self.charge = charge
+        self.radius = radius
+
+    def add_force(self, force):
+        self.force += np.array(force, dtype=float)
+
+
+class _Collision:
+    batch = CollisionBatch
+
+    def __init__(self, bodyA, bodyB, restitution=1.0):
+        self.bodyA, self.bodyB, self.restitution = bodyA, bodyB, restitution
+
+    def update(self):
+        r_vector = self.bodyB.position - self.bodyA.position
+        distance = np.linalg.norm(r_vector)
+        if distance > self.bodyA.radius + self.bodyB.radius:
+            return
+        normal = r_vector / distance
+        velocity_along_normal = np.dot(self.bodyA.velocity - self.bodyB.velocity, normal)
+        if velocity_along_normal < 0:
+            return
+        impulse = (1 + self.restitution) * velocity_along_normal / (1 / self.bodyA.mass + 1 / self.bodyB.mass)
+        self.bodyA.velocity -= impulse * normal / self.bodyA.mass
+        self.bodyB.velocity += impulse * normal / self.bodyB.mass
+
+
+class _Coulomb:
+    batch = CoulombBatch
+    K = 8.99e9
+
+    def __init__(self, bodyA, bodyB):
+        self.bodyA, self.bodyB = bodyA, bodyB
+
+    def update(self):
+        r_vector = self.bodyA.position - self.bodyB.position
+        distance = np.linalg.norm(r_vector)
+        if distance < self.bodyA.radius + self.bodyB.radius:
+            return
+        force = _Coulomb.K * self.bodyA.charge * self.bodyB.charge / distance ** 3 * r_vector
+        self.bodyA.add_force(force)
+        self.bodyB.add_force(-force)
+
+
+def _charged_bodies(n, seed):
+    rng = np.random.default_rng(seed)
+    positions = rng.uniform(-4, 4, size=(n, 2))
+    velocities = rng.uniform(-1, 1, size=(n, 2))
+    charges = rng.choice([-1e-5, 1e-5], size=n)
+    return [_Body(p, v, charge=q) for p, v, q in zip(positions, velocities, charges)]
+
+
+def benchmark(sizes=(10, 30, 100, 300), repeats=5):
+    print(f"{'N':>5} {'Objekte':>7} {'Schleife':>10} {'Batches':>10} {'Gewinn':>7} {'Kraftfehler':>12}")
+    for n in sizes:
+        results = []
+        for batched in (False, True):
+            bodies = _charged_bodies(n, seed=1)
+            interactions = InteractionList() if batched else []
+            for i in range(n):
+                for j in range(i + 1, n):
+                    interactions.extend([_Collision(bodies[i], bodies[j]), _Coulomb(bodies[i], bodies[j])])
+
+            elapsed = np.inf
+            for _ in range(repeats):
+                for body in bodies:
+                    body.force = np.zeros(2)
+                start = time.perf_counter()
+                if batched:
+                    interactions.update()
+                else:
+                    for interaction in interactions:
+                        interaction.update()
+                elapsed = min(elapsed, time.perf_counter() - start)
+            results.append((elapsed, np.array([body.force for body in bodies])))
+
+        (loop_time, loop_forces), (batch_time, batch_forces) = results
+        error = np.abs(batch_forces - loop_forces).max() / np.abs(loop_forces).max()
+        print(f"{n:>5} {n * (n - 1):>7} {1e3 * loop_time:>8.2f}ms {1e3 * batch_time:>8.2f}ms "
+              f"{loop_time / batch_time:>6.1f}x {error:>12.1e}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,170 @@
+#              _________________________________
+#       ______|                                 |_____
+#       \     |   PHYSIK - ZEITMESSUNG          |    /
+#        )    |_________________________________|   (
+#       /________)                          (________\      CC BY-NC-SA 4.0 (https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+# Die FPS-Anzeige der Fenster sagt nur, dass ein Bild zu lange dauert, aber
+# nicht warum. Ist es das Zurücksetzen der Kräfte, die Schleife über die
+# Interaktionen, der Euler-Cromer-Schritt, die Wände oder die Energie?
+#
+# Ein `PhaseTimer` teilt die Zeit eines Bildes in Abschnitte ("Phasen") auf.
+# Am Anfang von `on_update` wird die Uhr mit `start` gestartet, und nach jedem
+# Abschnitt misst `lap` die Zeit seit dem letzten Aufruf:
+#
+#        self.profiler = PhaseTimer(enabled=True)
+#
+#        # in on_update
+#        self.profiler.start()
+#        for body in self.bodies:
+#            body.clear_force()
+#        self.profiler.lap("Kräfte null")
+#        self.interactions.update()
+#        self.profiler.lap("Interaktionen")
+#        ...
+#        self.profiler.count("Teilchen", len(self.bodies))
+#        self.profiler.stop(dt)
+#
+# Wird dieselbe Phase in einem Bild mehrmals gemessen (z.B. bei mehreren
+# Zeitschritten pro Bild), werden die Zeiten addiert. Ebenso werden mit `count`
+# Zahlen pro Bild gezählt, z.B. die Anzahl Stösse.
+#
+# Die Werte der letzten `size` Bilder stehen in Ringpuffern (siehe
+# `physik.diagramme`). `lines` liefert den Mittelwert der letzten Bilder als
+# Text für die Anzeige im Fenster, `save_csv` schreibt alle gespeicherten
+# Bilder in eine CSV-Datei.
+#
+# Ist die Messung ausgeschaltet (`enabled=False`), kehren `start`, `lap` und
+# `count` sofort zurück. `stop` merkt sich dann nur noch die Bildrate für die
+# FPS-Anzeige.
+
+
+import csv
+import time
+
+import numpy as np
+
+from .diagramme import RingBuffer
+
+
+# _______________________
+#                        /
+# Klasse PhaseTimer     (
+# _______________________\
+#
+# - `size`:     Anzahl Bilder, die gespeichert werden
+# - `average`:  Anzahl Bilder für die Mittelwerte in `fps` und `lines`
+# - `enabled`:  True, wenn die Phasen gemessen werden
+
+class PhaseTimer:
+    def __init__(self, size=600, average=30, enabled=False):
+        self.size = size
+        self.average = average
+        self.enabled = enabled
+
+        # Bildrate der letzten Bilder (wird immer gespeichert)
+        self.rates = RingBuffer(average)
+
+        # Ringpuffer für jede Phase und jede Zählung, in der Reihenfolge, in
+        # der sie zum ersten Mal vorkommen
+        self.frame_times = RingBuffer(size)
+        self.times = {}
+        self.counts = {}
+
+        # Werte des laufenden Bildes
+        self.current_times = {}
+        self.current_counts = {}
+        self.last = None
+
+
+    # Beginn eines Bildes
+    def start(self):
+        if not self.enabled:
+            return
+        self.last = time.perf_counter()
+
+
+    # Ende der Phase `name`: addiert die Zeit seit dem letzten Aufruf
+    def lap(self, name):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.current_times[name] = self.current_times.get(name, 0.0) + now - self.last
+        self.last = now
+
+
+    # Addiert `value` zur Zählung `name` des laufenden Bildes
+    def count(self, name, value):
+        if not self.enabled:
+            return
+        self.current_counts[name] = self.current_counts.get(name, 0) + value
+
+
+    # Ende eines Bildes, das `dt` Sekunden nach dem letzten gezeichnet wurde
+    def stop(self, dt):
+        self.rates.append(1.0 / dt if dt > 0 else 0.0)
+        if not self.enabled:
+            return
+
+        self.frame_times.append(dt)
+        self._store(self.times, self.current_times)
+        self._store(self.counts, self.current_counts)
+        self.current_times = {}
+        self.current_counts = {}
+
+
+    # Hängt die Werte eines Bildes an die Ringpuffer an. Eine neue Phase erhält
+    # einen Puffer, der für die früheren Bilder 0 enthält.
+    def _store(self, buffers, values):
+        for name in values:
+            if name not in buffers:
+                buffer = RingBuffer(self.size)
+                buffer.index = (self.frame_times.index - 1) % self.size
+                buffer.count = self.frame_times.count - 1
+                buffers[name] = buffer
+        for name, buffer in buffers.items():
+            buffer.append(values.get(name, 0.0))
+
+
+    # Mittlere Bildrate der letzten `average` Bilder
+    def fps(self):
+        rates = self.rates.values()
+        return float(rates.mean()) if len(rates) else 0.0
+
+
+    # Mittlere Dauer jeder Phase in ms und Mittelwert jeder Zählung der
+    # letzten `average` Bilder
+    def summary(self):
+        n = min(self.average, len(self.frame_times))
+        if n == 0:
+            return {}, {}
+        times = {name: 1e3 * float(buffer.values()[-n:].mean()) for name, buffer in self.times.items()}
+        counts = {name: float(buffer.values()[-n:].mean()) for name, buffer in self.counts.items()}
+        return times, counts
+
+
+    # Textzeilen für die Anzeige im Fenster (leer, wenn ausgeschaltet)
+    def lines(self):
+        if not self.enabled:
+            return []
+
+        times, counts = self.summary()
+        lines = [f"{name}: {ms:.2f} ms" for name, ms in times.items()]
+        if times:
+            lines.append(f"Summe: {sum(times.values()):.2f} ms")
+        lines += [f"{name}: {value:.0f}" for name, value in counts.items()]
+        return lines
+
+
+    # Schreibt alle gespeicherten Bilder in eine CSV-Datei: die Dauer des Bildes
+    # und jeder Phase in ms und die Zählungen
+    def save_csv(self, path):
+        columns = {"dt_ms": 1e3 * self.frame_times.values()}
+        columns.update({f"{name}_ms": 1e3 * buffer.values() for name, buffer in self.times.items()})
+        columns.update({name: buffer.values() for name, buffer in self.counts.items()})
+
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(columns)
+            writer.writerows(np.column_stack(list(columns.values())))
+        return path
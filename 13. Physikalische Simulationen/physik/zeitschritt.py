@@ -0,0 +1,97 @@
+#              _________________________________
+#       ______|                                 |_____
+#       \     |   PHYSIK - FESTER ZEITSCHRITT   |    /
+#        )    |_________________________________|   (
+#       /________)                          (________\      CC BY-NC-SA 4.0 (https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+# Arcade ruft `on_update(dt)` mit der Zeit auf, die seit dem letzten Bild
+# vergangen ist. Bei 60 FPS ist dt etwa 0.017 s. Stockt das Programm kurz,
+# z.B. weil das Fenster verschoben wird, kann dt aber auch 0.5 s betragen.
+# Ein einziger so grosser Zeitschritt lässt Teilchen durch Wände fliegen und
+# steife Federn explodieren.
+#
+# Wir trennen deshalb die Zeitschritte der Physik von den Bildern des Fensters:
+#
+#        Bild:     |-------------|-------------|----------------------------|
+#        Physik:   |---|---|---|---|---|---|---|---|---|---|---|---|---|---|
+#
+# Die Zeit eines Bildes wird in einem "Akkumulator" gesammelt. Solange der
+# Akkumulator mindestens einen ganzen Zeitschritt enthält, wird ein Schritt mit
+# dem festen Zeitschritt `dt` berechnet. Der Rest bleibt für das nächste Bild.
+#
+# - Höchstens `max_substeps` Schritte pro Bild:
+#   Ist die Physik langsamer als die Echtzeit, würde der Akkumulator immer weiter
+#   wachsen. Überzählige Zeit wird deshalb verworfen (`dropped_time`) und die
+#   Simulation läuft einfach langsamer als die Echtzeit.
+#
+# - Interpolation:
+#   Meistens liegt die Zeit des Bildes zwischen zwei Physikschritten. Mit dem
+#   Anteil alpha = Akkumulator / dt wird zwischen dem vorletzten und dem letzten
+#   Zustand interpoliert, damit die Bewegung gleichmässig aussieht:
+#
+#        x_bild = x_alt + alpha * (x_neu - x_alt)
+
+
+import numpy as np
+
+
+# _______________________
+#                        /
+# Klasse FixedTimestep  (
+# _______________________\
+#
+# - `dt`:            fester Zeitschritt der Physik in s
+# - `max_substeps`:  höchstens so viele Schritte pro Bild
+# - `snapshot`:      Funktion, die die aktuellen Positionen als Array liefert.
+#                    Sie wird für die Interpolation benötigt.
+#
+# Verwendung in `on_update`:
+#
+#        self.timestep.advance(dt, self.physics_step)
+#
+# und in `on_draw`:
+#
+#        positions = self.timestep.interpolated()
+
+class FixedTimestep:
+    def __init__(self, dt, max_substeps=10, snapshot=None):
+        self.dt = dt
+        self.max_substeps = max_substeps
+        self.snapshot = snapshot
+
+        self.accumulator = 0.0
+        self.alpha = 1.0
+        self.dropped_time = 0.0
+        self.previous = None
+
+
+    # Sammelt die Zeit `frame_dt` und ruft `step(dt)` für jeden ganzen
+    # Zeitschritt auf. Gibt die Anzahl der berechneten Schritte zurück.
+    def advance(self, frame_dt, step):
+        self.accumulator += frame_dt
+
+        substeps = min(int(self.accumulator / self.dt), self.max_substeps)
+        for k in range(substeps):
+            # Zustand vor dem letzten Schritt für die Interpolation merken
+            if k == substeps - 1 and self.snapshot is not None:
+                self.previous = np.array(self.snapshot(), dtype=float)
+            step(self.dt)
+
+        self.accumulator -= substeps * self.dt
+
+        # Zeit, die nicht mehr nachgeholt werden kann, wird verworfen
+        if self.accumulator >= self.dt:
+            skipped = int(self.accumulator / self.dt) * self.dt
+            self.dropped_time += skipped
+            self.accumulator -= skipped
+
+        self.alpha = self.accumulator / self.dt
+        return substeps
+
+
+    # Positionen zwischen dem vorletzten und dem letzten Zustand
+    def interpolated(self):
+        current = np.asarray(self.snapshot(), dtype=float)
+        if self.previous is None or self.previous.shape != current.shape:
+            return current
+        return self.previous + self.alpha * (current - self.previous)